@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import asyncio
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+from datahub.aio import AsyncDataHub
+from datahub.models import BlobRecord, CompressFormat
+
+_PUT_RESULT = b'{"FailedRecordCount": 0, "FailedRecords": []}'
+
+
+class PutHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Accepts every put after the configured network delay
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(_PUT_RESULT)))
+        self.send_header('x-datahub-request-id', '0')
+        self.end_headers()
+        self.wfile.write(_PUT_RESULT)
+
+    def log_message(self, *args):
+        pass
+
+
+class PutServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def gen_records(count, size):
+    line = b''.join(b'%08d,field_%d;' % (i, i % 97) for i in range(size // 16))
+    return [BlobRecord(blob_data=line) for _ in range(count)]
+
+
+async def put_all(endpoint, records, requests_, concurrency, compress_format, compress_workers):
+    async with AsyncDataHub('access_id', 'access_key', endpoint, compress_format=compress_format,
+                            compress_workers=compress_workers) as dh:
+        semaphore = asyncio.Semaphore(concurrency)
+        stalls = [0]
+        done = asyncio.Event()
+
+        async def put():
+            async with semaphore:
+                await dh.put_records('project', 'topic', records)
+
+        async def watch_loop():
+            # the longest time the event loop could not run other coroutines
+            while not done.is_set():
+                start_tick = time.time()
+                await asyncio.sleep(0.001)
+                stalls[0] = max(stalls[0], time.time() - start_tick - 0.001)
+
+        watcher = asyncio.ensure_future(watch_loop())
+        start = time.time()
+        await asyncio.gather(*[put() for _ in range(requests_)])
+        cost = time.time() - start
+        done.set()
+        await watcher
+        return cost, stalls[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='end to end put throughput of AsyncDataHub with bodies '
+                                                 'compressed on the event loop or on a thread pool, '
+                                                 'served by a local http server')
+    parser.add_argument('--records', help='record num of one request', type=int, default=50)
+    parser.add_argument('--size', help='record size in KB', type=int, default=40)
+    parser.add_argument('--requests', help='request num', type=int, default=64)
+    parser.add_argument('--concurrency', help='requests in flight', type=int, default=8)
+    parser.add_argument('--delay', help='network delay of a request in ms', type=int, default=20)
+    parser.add_argument('--workers', help='threads of the compress pool', type=int, default=4)
+    args = parser.parse_args()
+
+    server = PutServer(('127.0.0.1', 0), PutHandler)
+    server.delay = args.delay / 1000.0
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    endpoint = 'http://127.0.0.1:%d' % server.server_address[1]
+
+    records = gen_records(args.records, args.size * 1024)
+    total_mb = args.records * args.size * args.requests / 1024.0
+    print('requests: %d, body: %d KB, concurrency: %d, delay: %d ms'
+          % (args.requests, args.records * args.size, args.concurrency, args.delay))
+    print('%-10s%-16s%12s%12s%20s' % ('format', 'compress on', 'cost s', 'MB/s', 'max loop stall ms'))
+    for compress_format in (CompressFormat.LZ4, CompressFormat.ZLIB):
+        for name, workers in (('event loop', None), ('%d threads' % args.workers, args.workers)):
+            cost, stall = asyncio.run(put_all(endpoint, records, args.requests, args.concurrency, compress_format,
+                                              workers))
+            print('%-10s%-16s%12.2f%12.1f%20.1f' % (compress_format.value, name, cost, total_mb / cost,
+                                                    stall * 1000))
+    server.shutdown()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import time
+
+from datahub.exceptions import DatahubException
+from datahub.models import RecordSchema, TupleRecord, FieldType
+from datahub.proto import wire
+from datahub.proto.codec import PBCodecType, get_codec
+
+
+def gen_records(count, size):
+    schema = RecordSchema.from_lists(
+        ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+        [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+    records = []
+    for i in range(count):
+        record = TupleRecord(schema=schema, values=[i, 'x' * size, i * 0.1, i % 2 == 0, 1455869335000000 + i])
+        record.shard_id = '0'
+        record.put_attribute('key', 'value')
+        records.append(record)
+    return records
+
+
+def best_of(rounds, func):
+    costs = []
+    for _ in range(rounds):
+        start = time.time()
+        func()
+        costs.append(time.time() - start)
+    return min(costs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='per record encode / decode cost of every protobuf codec, '
+                                                 'no server is needed')
+    parser.add_argument('--records', help='record num of one request', type=int, default=1000)
+    parser.add_argument('--size', help='string field size', type=int, default=10)
+    parser.add_argument('--round', help='round num', type=int, default=20)
+    args = parser.parse_args()
+
+    records = gen_records(args.records, args.size)
+    # GetRecordsResponse carrying the same records: next_cursor, record_count, records with system_time
+    response = wire.encode_len_field(wire.TAG_FIELD_1, b'cursor') + b'\x10' + wire.encode_varint(len(records)) + \
+        b''.join(wire.encode_len_field(b'\x22', wire.encode_record_entry(record.encode_pb_values(),
+                                                                         attributes=record.attributes) +
+                                       b'\x38' + wire.encode_varint(record.system_time))
+                 for record in records)
+
+    print('records: %d, string size: %d, round: %d' % (args.records, args.size, args.round))
+    print('%-12s%16s%16s' % ('codec', 'encode us/rec', 'decode us/rec'))
+    for codec_type in PBCodecType:
+        try:
+            codec = get_codec(codec_type)
+        except DatahubException as e:
+            print('%-12s%32s' % (codec_type.value, 'unavailable: %s' % e.error_msg))
+            continue
+        encode_cost = best_of(args.round, lambda: codec.encode_put_records_request(records))
+        decode_cost = best_of(args.round, lambda: list(codec.decode_get_records_response(response)))
+        print('%-12s%16.2f%16.2f' % (codec_type.value, encode_cost * 1e6 / len(records),
+                                     decode_cost * 1e6 / len(records)))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import os
+import time
+
+import crcmod.predefined
+
+from datahub.exceptions import DatahubException
+from datahub.utils import CrcBackend, default_crc_backend, get_crc32c
+
+
+def legacy_crc32c(data):
+    # crc function built for every frame before the crc backends
+    return crcmod.predefined.mkCrcFun('crc-32c')(data)
+
+
+def megabytes_per_second(rounds, count, data, func):
+    costs = []
+    for _ in range(rounds):
+        start = time.time()
+        for _ in range(count):
+            func(data)
+        costs.append(time.time() - start)
+    return len(data) * count / min(costs) / 1024 / 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='crc32c throughput of every available backend on frames '
+                                                 'of different sizes, no server is needed')
+    parser.add_argument('--sizes', help='frame sizes in KB', type=int, nargs='+', default=[1, 64, 4096])
+    parser.add_argument('--bytes', help='bytes checksummed by one round in MB', type=int, default=64)
+    parser.add_argument('--round', help='round num', type=int, default=5)
+    args = parser.parse_args()
+
+    backends = [('legacy', legacy_crc32c)]
+    for backend in CrcBackend:
+        try:
+            backends.append((backend.value, get_crc32c(backend)))
+        except DatahubException:
+            print('%s: not installed' % backend.value)
+    print('default backend: %s' % default_crc_backend().value)
+
+    print('%-16s' % 'backend' + ''.join('%14s' % ('%dKB MB/s' % size) for size in args.sizes))
+    for name, func in backends:
+        line = '%-16s' % name
+        for size in args.sizes:
+            # frames unwrapped from responses are memoryview of bytearray
+            data = memoryview(bytearray(os.urandom(size * 1024)))
+            count = max(1, args.bytes * 1024 // size)
+            line += '%14.0f' % megabytes_per_second(args.round, count, data, func)
+        print(line)
@@ -20,9 +20,9 @@
 import argparse
 import time
 
-from datahub import DataHub, RestClient
-from datahub.implement import DataHubJson
-from datahub.models import CursorType, Result, RequestParams
+from datahub import DataHub
+from datahub.models import CursorType, RecordSchema, FieldType, TupleRecord
+from datahub.testing import MockDataHubServer
 
 
 class Timer(object):
@@ -45,7 +45,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('access_id', help='account access id')
     parser.add_argument('access_key', help='account access key')
-    parser.add_argument('endpoint', help='datahub server endpoint')
+    parser.add_argument('endpoint', help='datahub server endpoint', nargs='?')
+    parser.add_argument('--mock', help='run against a local mock server instead of the endpoint',
+                        action="store_true")
+    parser.add_argument('--latency', help='seconds every request is delayed by the mock server', type=float,
+                        default=0)
     parser.add_argument('--batch', help='batch record num', type=int, default=100)
     parser.add_argument('--round', help='round num', type=int, default=10000)
     parser.add_argument('--project', help='project name', default='py_perf_test_project')
@@ -53,13 +57,18 @@ if __name__ == '__main__':
     parser.add_argument('--retry_times', help='request retry nums', type=int, default=3)
     parser.add_argument('--conn_timeout', help='connect timeout', type=int, default=5)
     parser.add_argument('--read_timeout', help='read timeout', type=int, default=120)
-    parser.add_argument('--stream', help='read timeout', action="store_true")
     parser.add_argument('--protobuf', help='protobuf mode', type=bool, default=False)
     args = parser.parse_args()
+    if args.mock:
+        server = MockDataHubServer(latency=args.latency).start()
+        args.endpoint = server.endpoint
+    elif not args.endpoint:
+        parser.error('endpoint is required without --mock')
     print("=============configuration=============")
     print("access_id:%s" % args.access_id)
     print("access_key:%s" % args.access_key)
     print("endpoint:%s" % args.endpoint)
+    print("mock:%s" % args.mock)
     print("project:%s" % args.project)
     print("topic:%s" % args.topic)
     print("retry_times:%d" % args.retry_times)
@@ -67,7 +76,6 @@ if __name__ == '__main__':
     print("read_timeout:%d" % args.read_timeout)
     print("batch record num:%d" % args.batch)
     print("round num:%d" % args.round)
-    print("stream:%s" % args.stream)
     print("protobuf:%s" % args.protobuf)
     print("=======================================\n\n")
 
@@ -78,6 +86,19 @@ if __name__ == '__main__':
     # print "create project %s success!" % args.project
     # print "=======================================\n\n"
 
+    if args.mock:
+        # the mock server starts empty, fill the topic with the records read
+        record_schema = RecordSchema.from_lists(['string_field'], [FieldType.STRING])
+        dh.create_project(args.project, 'perf test')
+        dh.create_tuple_topic(args.project, args.topic, 1, 7, record_schema, 'perf test')
+        for i in range(0, args.round * args.batch, 1000):
+            records = []
+            for j in range(min(1000, args.round * args.batch - i)):
+                record = TupleRecord(schema=record_schema, values=['a' * 10])
+                record.shard_id = '0'
+                records.append(record)
+            dh.put_records(args.project, args.topic, records)
+
     topic_result = dh.get_topic(args.project, args.topic)
     print("get topic %s success! detail:\n%s" % (args.topic, str(topic_result)))
     print("=======================================\n\n")
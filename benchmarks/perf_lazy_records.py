@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+import argparse
+import time
+
+from datahub.exceptions import DatahubException
+from datahub.models import RecordSchema, TupleRecord, FieldType
+from datahub.models.results import GetPBRecordsResult
+from datahub.proto import wire
+from datahub.proto.codec import PBCodecType, get_codec
+from datahub.utils import pb_message_wrap
+
+
+def gen_response(count, size):
+    schema = RecordSchema.from_lists(
+        ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+        [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+    entries = []
+    for i in range(count):
+        record = TupleRecord(schema=schema, values=[i, 'x' * size, i * 0.1, i % 2 == 0, 1455869335000000 + i])
+        entries.append(wire.encode_record_entry(record.encode_pb_values(), attributes={'type': 'type%d' % (i % 10)})
+                       + b'\x38' + wire.encode_varint(1455869335000 + i))
+    response = wire.encode_len_field(wire.TAG_FIELD_1, b'cursor') + b'\x10' + wire.encode_varint(count) + \
+        b''.join(wire.encode_len_field(b'\x22', entry) for entry in entries)
+    return schema, bytes(pb_message_wrap(response))
+
+
+def best_of(rounds, func):
+    costs = []
+    for _ in range(rounds):
+        start = time.time()
+        func()
+        costs.append(time.time() - start)
+    return min(costs)
+
+
+def eager_filter(schema, frame, codec):
+    result = GetPBRecordsResult.parse_content(frame, record_schema=schema, codec=codec)
+    return [record for record in result.records if record.attributes['type'] == 'type0']
+
+
+def lazy_filter(schema, frame, codec):
+    records = GetPBRecordsResult.parse_content(frame, record_schema=schema, codec=codec, lazy=True).records
+    return [records[i] for i in range(len(records)) if records.attributes(i)['type'] == 'type0']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='cost of reading part of a GetRecords page eagerly and lazily, '
+                                                 'no server is needed')
+    parser.add_argument('--records', help='record num of one page', type=int, default=1000)
+    parser.add_argument('--size', help='string field size', type=int, default=10)
+    parser.add_argument('--round', help='round num', type=int, default=20)
+    args = parser.parse_args()
+
+    schema, frame = gen_response(args.records, args.size)
+    print('records: %d, string size: %d, round: %d' % (args.records, args.size, args.round))
+    print('%-12s%-28s%12s' % ('codec', 'case', 'us/rec'))
+    for codec_type in (PBCodecType.PYTHON, PBCodecType.PROTOBUF, PBCodecType.CPROTOBUF):
+        try:
+            codec = get_codec(codec_type)
+        except DatahubException:
+            continue
+        cases = [
+            ('all records', lambda: GetPBRecordsResult.parse_content(frame, record_schema=schema, codec=codec)),
+            ('one field', lambda: GetPBRecordsResult.parse_content(frame, record_schema=schema, codec=codec,
+                                                                   fields=['bigint_field'])),
+            ('filter by attribute', lambda: eager_filter(schema, frame, codec)),
+            ('filter by attribute lazily', lambda: lazy_filter(schema, frame, codec)),
+            ('cursor only lazily', lambda: GetPBRecordsResult.parse_content(frame, record_schema=schema, codec=codec,
+                                                                            lazy=True).next_cursor),
+        ]
+        for name, func in cases:
+            print('%-12s%-28s%12.2f' % (codec_type.value, name, best_of(args.round, func) * 1e6 / args.records))
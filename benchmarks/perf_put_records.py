@@ -20,10 +20,10 @@
 import argparse
 import time
 
-from datahub import DataHub, RestClient
+from datahub import DataHub
 from datahub.exceptions import ResourceExistException
-from datahub.implement import DataHubJson
-from datahub.models import RecordSchema, TupleRecord, RecordType, Field, FieldType, Result, RequestParams
+from datahub.models import RecordSchema, TupleRecord, Field, FieldType
+from datahub.testing import MockDataHubServer
 
 
 class Timer(object):
@@ -46,7 +46,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('access_id', help='account access id')
     parser.add_argument('access_key', help='account access key')
-    parser.add_argument('endpoint', help='datahub server endpoint')
+    parser.add_argument('endpoint', help='datahub server endpoint', nargs='?')
+    parser.add_argument('--mock', help='run against a local mock server instead of the endpoint',
+                        action="store_true")
+    parser.add_argument('--latency', help='seconds every request is delayed by the mock server', type=float,
+                        default=0)
     parser.add_argument('--file', help='record file')
     parser.add_argument('--batch', help='batch record num', type=int, default=100)
     parser.add_argument('--round', help='round num', type=int, default=10000)
@@ -55,14 +59,19 @@ if __name__ == '__main__':
     parser.add_argument('--retry_times', help='request retry nums', type=int, default=3)
     parser.add_argument('--conn_timeout', help='connect timeout', type=int, default=5)
     parser.add_argument('--read_timeout', help='read timeout', type=int, default=120)
-    parser.add_argument('--stream', help='read timeout', action="store_true")
     parser.add_argument('--protobuf', help='protobuf mode', type=bool, default=False)
     parser.add_argument('--size', help='record size', type=int, default=10)
     args = parser.parse_args()
+    if args.mock:
+        server = MockDataHubServer(latency=args.latency).start()
+        args.endpoint = server.endpoint
+    elif not args.endpoint:
+        parser.error('endpoint is required without --mock')
     print("=============configuration=============")
     print("access_id:%s" % args.access_id)
     print("access_key:%s" % args.access_key)
     print("endpoint:%s" % args.endpoint)
+    print("mock:%s" % args.mock)
     print("project:%s" % args.project)
     print("topic:%s" % args.topic)
     print("retry_times:%d" % args.retry_times)
@@ -70,11 +79,10 @@ if __name__ == '__main__':
     print("read_timeout:%d" % args.read_timeout)
     print("batch record num:%d" % args.batch)
     print("round num:%d" % args.round)
-    print("stream:%s" % args.stream)
     print("protobuf:%s" % args.protobuf)
     print("=======================================\n\n")
 
-    dh = DataHub(args.access_id, args.access_key, args.endpoint, stream=args.stream, retry_times=args.retry_times,
+    dh = DataHub(args.access_id, args.access_key, args.endpoint, retry_times=args.retry_times,
                  conn_timeout=args.conn_timeout, read_timeout=args.read_timeout)
     # project = Project(name=args.project, comment='perf project for python sdk')
     # dh.create_project(project)
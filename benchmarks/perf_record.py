@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+import argparse
+import time
+
+from datahub.models import RecordSchema, TupleRecord, FieldType
+from datahub.models.types import decode_values
+
+
+def best_of(rounds, func):
+    costs = []
+    for _ in range(rounds):
+        start = time.time()
+        func()
+        costs.append(time.time() - start)
+    return min(costs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='per record construction cost of TupleRecord, '
+                                                 'no server is needed')
+    parser.add_argument('--records', help='record num', type=int, default=10000)
+    parser.add_argument('--size', help='string field size', type=int, default=10)
+    parser.add_argument('--round', help='round num', type=int, default=10)
+    args = parser.parse_args()
+
+    schema = RecordSchema.from_lists(
+        ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+        [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+    typed = [[i, 'x' * args.size, i * 0.1, i % 2 == 0, 1455869335000000 + i] for i in range(args.records)]
+    # values as they come from the server, bytes in protobuf mode
+    raw = [[str(value).encode() for value in values] for values in typed]
+
+    cases = [
+        ('build typed', lambda: [TupleRecord(schema=schema, values=values) for values in typed]),
+        ('decode validated', lambda: [TupleRecord(schema=schema, values=values) for values in raw]),
+        ('decode trusted', lambda: [TupleRecord.from_trusted(schema, decode_values(schema.decoders, values))
+                                    for values in raw]),
+    ]
+    records = [TupleRecord(schema=schema, values=values) for values in typed]
+    cases += [
+        ('encode json', lambda: [record.encode_values() for record in records]),
+        ('encode pb', lambda: [record.encode_pb_values() for record in records]),
+    ]
+    print('records: %d, string size: %d, round: %d' % (args.records, args.size, args.round))
+    print('%-20s%12s' % ('case', 'us/rec'))
+    for name, func in cases:
+        cost = best_of(args.round, func)
+        print('%-20s%12.2f' % (name, cost * 1e6 / args.records))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+import argparse
+import time
+import tracemalloc
+
+from datahub.models import RecordSchema, TupleRecord, RecordBatch, FieldType
+
+
+def gen_values(count, size):
+    return [[i, 'x' * size, i * 0.1, i % 2 == 0, 1455869335000000 + i] for i in range(count)]
+
+
+def build_records(schema, values_list):
+    records = []
+    for sequence, values in enumerate(values_list):
+        record = TupleRecord.from_trusted(schema, values)
+        record.shard_id = '0'
+        record.attributes = {'key': 'value'}
+        record.sequence = sequence
+        record.system_time = values[4] // 1000
+        records.append(record)
+    return records
+
+
+def build_batch(schema, values_list):
+    batch = RecordBatch(schema)
+    for sequence, values in enumerate(values_list):
+        batch._append_decoded(values, {'key': 'value'}, sequence, values[4] // 1000)
+    batch.set_shard_id('0')
+    return batch
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.time()
+    # the result is alive while measuring, the memory it holds is the traced memory
+    result = func()
+    cost = time.time() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return cost, size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='memory held by records got from a shard, kept as record objects '
+                                                 'or in a record batch, no server is needed')
+    parser.add_argument('--records', help='record num', type=int, default=100000)
+    parser.add_argument('--size', help='string field size', type=int, default=10)
+    args = parser.parse_args()
+
+    schema = RecordSchema.from_lists(
+        ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+        [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+    schema.compiled  # built once, out of the measure
+    print('records: %d, string size: %d' % (args.records, args.size))
+    print('%-10s%12s%16s' % ('container', 'build ms', 'bytes/rec'))
+    for name, build in (('records', build_records), ('batch', build_batch)):
+        # values are decoded inside the measure like from a response, strings are payload of both
+        cost, size = measure(lambda: build(schema, gen_values(args.records, args.size)))
+        print('%-10s%12.2f%16.1f' % (name, cost * 1000, float(size) / args.records))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import struct
+import threading
+import time
+import tracemalloc
+
+import lz4.block
+import requests
+from six.moves import BaseHTTPServer, socketserver
+
+from datahub.models import CompressFormat
+from datahub.models.compress import get_compressor
+from datahub.transport import Transport
+from datahub.utils import pb_message_wrap
+
+
+class PageHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body, raw_size = self.server.pages[self.path.strip('/')]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-protobuf')
+        self.send_header('Content-Length', str(len(body)))
+        if raw_size is not None:
+            self.send_header('Content-Encoding', 'lz4')
+            self.send_header('x-datahub-content-raw-size', str(raw_size))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PageServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def legacy_read(session, url):
+    # response path before streaming: join the body chunks, copy by to_binary, prepend the lz4 size header
+    resp = session.get(url)
+    content = resp.content
+    raw_size = resp.headers.get('x-datahub-content-raw-size')
+    if raw_size is not None:
+        content = lz4.block.decompress(struct.pack('<I', int(raw_size)) + bytes(content))
+    binary = bytes(content)
+    return binary[4:8], binary[12:]
+
+
+def current_read(transport, url):
+    resp = transport.send(requests.Request('GET', url).prepare())
+    content = resp.content
+    raw_size = resp.headers.get('x-datahub-content-raw-size')
+    if raw_size is not None:
+        content = get_compressor(CompressFormat.LZ4).decompress(content, int(raw_size))
+    frame = memoryview(content)
+    return frame[4:8].tobytes(), frame[12:]
+
+
+def measure(rounds, func):
+    costs, peaks = [], []
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.time()
+        func()
+        costs.append(time.time() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(costs), min(peaks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='peak memory and cost of reading a GetRecords page, '
+                                                 'served by a local http server')
+    parser.add_argument('--size', help='page size in MB', type=int, default=4)
+    parser.add_argument('--round', help='round num', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = pb_message_wrap(b''.join(struct.pack('<Q', i) for i in range(args.size * 1024 * 1024 // 8)))
+    server = PageServer(('127.0.0.1', 0), PageHandler)
+    server.pages = {
+        'none': (payload, None),
+        'lz4': (lz4.block.compress(payload, store_size=False), len(payload)),
+    }
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    endpoint = 'http://127.0.0.1:%d' % server.server_address[1]
+
+    session = requests.Session()
+    transport = Transport(endpoint)
+    print('page: %d MB, round: %d' % (args.size, args.round))
+    print('%-8s%-10s%12s%16s' % ('format', 'path', 'cost ms', 'peak MB'))
+    for name in ('none', 'lz4'):
+        url = '%s/%s' % (endpoint, name)
+        assert legacy_read(session, url)[1] == current_read(transport, url)[1]
+        for path, func in (('legacy', lambda: legacy_read(session, url)),
+                           ('current', lambda: current_read(transport, url))):
+            cost, peak = measure(args.round, func)
+            print('%-8s%-10s%12.2f%16.2f' % (name, path, cost * 1000, peak / 1024.0 / 1024))
+    server.shutdown()
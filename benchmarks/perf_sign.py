@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import time
+
+import requests
+from six.moves.urllib.parse import urlparse, unquote
+
+from datahub.auth import AliyunAccount
+from datahub.rest import Headers, Path
+from datahub.utils import gen_rfc822_date, hmac_sha1
+
+
+def gen_request(shard_id):
+    headers = {
+        Headers.CLIENT_VERSION: '1.1',
+        Headers.USER_AGENT: 'pydatahub/benchmark',
+        Headers.CONTENT_TYPE: 'application/x-protobuf',
+        Headers.DATE: gen_rfc822_date(),
+        Headers.REQUEST_ACTION: 'sub',
+        Headers.RAW_SIZE: '4096',
+    }
+    url = 'http://endpoint' + Path.SHARD % ('project', 'topic', shard_id)
+    return requests.Request('POST', url, headers=headers, data=b'x' * 16).prepare()
+
+
+def legacy_sign(account, request):
+    # signing path before the keyed hmac and caches
+    url_components = urlparse(unquote(request.path_url))
+    canonical_str = account._build_canonical_str(url_components, request)
+    sign = hmac_sha1(account.access_key, canonical_str)
+    request.headers[Headers.AUTHORIZATION] = 'DATAHUB %s:%s' % (account.access_id, sign.decode())
+
+
+def signs_per_second(count, func):
+    start = time.time()
+    func()
+    return count / (time.time() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='signatures per second of AliyunAccount.sign_request, '
+                                                 'no server is needed')
+    parser.add_argument('--count', help='signatures of one round', type=int, default=100000)
+    parser.add_argument('--shards', help='shard num, every shard has its own url', type=int, default=16)
+    parser.add_argument('--round', help='round num', type=int, default=5)
+    args = parser.parse_args()
+
+    account = AliyunAccount(access_id='access_id', access_key='access_key')
+    requests_ = [gen_request(str(i)) for i in range(args.shards)]
+
+    for req in requests_:
+        legacy_sign(account, req)
+        legacy_auth = req.headers[Headers.AUTHORIZATION]
+        account.sign_request(req)
+        assert req.headers[Headers.AUTHORIZATION] == legacy_auth
+
+    count = args.count // len(requests_) * len(requests_)
+
+    def run(sign):
+        def _run():
+            for _ in range(count // len(requests_)):
+                for req in requests_:
+                    sign(req)
+        return _run
+
+    legacy = max(signs_per_second(count, run(lambda req: legacy_sign(account, req))) for _ in range(args.round))
+    fast = max(signs_per_second(count, run(account.sign_request)) for _ in range(args.round))
+
+    print('%-10s%16s' % ('signer', 'signs/s'))
+    print('%-10s%16.0f' % ('legacy', legacy))
+    print('%-10s%16.0f' % ('cached', fast))
+    print('speedup: %.2fx' % (fast / legacy))
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Offline benchmark suite of the sdk hot paths, results are saved as json baselines and compared to find
+regressions, e.g.
+
+    $ python benchmarks/perf_suite.py run --save base.json
+    $ python benchmarks/perf_suite.py run --save head.json
+    $ python benchmarks/perf_suite.py compare base.json head.json
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import time
+
+import requests
+
+from datahub.auth import AliyunAccount
+from datahub.exceptions import DatahubException
+from datahub.models import RecordSchema, TupleRecord, FieldType, CompressFormat
+from datahub.models.compress import get_compressor
+from datahub.models.params import PutRecordsRequestParams, PutPBRecordsRequestParams
+from datahub.models.results import GetRecordsResult, GetPBRecordsResult
+from datahub.models.types import validate_value
+from datahub.proto import wire
+from datahub.rest import Headers, Path
+from datahub.utils import gen_rfc822_date, get_crc32c, pb_message_wrap
+from datahub.version import __version__
+
+FORMAT_VERSION = 1
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+# name -> (unit, function building the benchmarked callable and its item count)
+_cases = []
+
+
+def case(name, unit='record'):
+    def register(func):
+        _cases.append((name, unit, func))
+        return func
+    return register
+
+
+def gen_values(count, size):
+    return [[i, 'x' * size, i * 0.1, i % 2 == 0, 1455869335000000 + i] for i in range(count)]
+
+
+def gen_records(count, size):
+    records = []
+    for values in gen_values(count, size):
+        record = TupleRecord(schema=record_schema, values=values)
+        record.shard_id = '0'
+        record.put_attribute('key', 'value')
+        records.append(record)
+    return records
+
+
+# =======================================================
+# cases
+# =======================================================
+
+@case('record.build')
+def build_records(args):
+    rows = gen_values(args.records, args.size)
+
+    def run():
+        for values in rows:
+            TupleRecord(schema=record_schema, values=values)
+    return run, len(rows)
+
+
+@case('record.validate_value', unit='value')
+def validate_values(args):
+    field_types = [field.type for field in record_schema.field_list]
+    rows = gen_values(args.records, args.size)
+
+    def run():
+        for values in rows:
+            for value, field_type in zip(values, field_types):
+                validate_value(value, field_type)
+    return run, len(rows) * len(field_types)
+
+
+@case('serialize.json')
+def serialize_json(args):
+    records = gen_records(args.records, args.size)
+    return lambda: PutRecordsRequestParams(records).content(), len(records)
+
+
+@case('serialize.pb')
+def serialize_pb(args):
+    records = gen_records(args.records, args.size)
+    return lambda: PutPBRecordsRequestParams(records).content(), len(records)
+
+
+@case('parse.json')
+def parse_json(args):
+    records = gen_records(args.records, args.size)
+    content = json.dumps({
+        'NextCursor': 'cursor',
+        'RecordCount': len(records),
+        'StartSeq': 0,
+        'Records': [{'SystemTime': 1455869335000, 'NextCursor': 'cursor', 'Data': record.encode_values(),
+                     'Attributes': record.attributes} for record in records]
+    })
+    return lambda: GetRecordsResult.parse_content(content, record_schema=record_schema), len(records)
+
+
+@case('parse.pb')
+def parse_pb(args):
+    records = gen_records(args.records, args.size)
+    content = bytes(pb_message_wrap(wire.encode_get_records_response('cursor', 0, [
+        wire.encode_record_entry(record.encode_pb_values(), attributes=record.attributes, sequence=index,
+                                 system_time=1455869335000) for index, record in enumerate(records)])))
+    return lambda: GetPBRecordsResult.parse_content(content, record_schema=record_schema), len(records)
+
+
+@case('sign', unit='request')
+def sign(args):
+    account = AliyunAccount(access_id='access_id', access_key='access_key')
+    signed = []
+    for shard_id in range(16):
+        headers = {
+            Headers.CONTENT_TYPE: 'application/x-protobuf',
+            Headers.DATE: gen_rfc822_date(),
+            Headers.REQUEST_ACTION: 'sub'
+        }
+        url = 'http://endpoint' + Path.SHARD % ('project', 'topic', shard_id)
+        signed.append(requests.Request('POST', url, headers=headers, data=b'x' * 16).prepare())
+
+    def run():
+        for _ in range(64):
+            for request in signed:
+                account.sign_request(request)
+    return run, 64 * len(signed)
+
+
+def compress_cases():
+    for compress_format in CompressFormat:
+        if compress_format == CompressFormat.NONE:
+            continue
+
+        def compress(args, compress_format=compress_format):
+            body = bytes(PutPBRecordsRequestParams(gen_records(args.records, args.size)).content())
+            compressor = get_compressor(compress_format)
+            return lambda: compressor.compress(body), args.records
+
+        def decompress(args, compress_format=compress_format):
+            body = bytes(PutPBRecordsRequestParams(gen_records(args.records, args.size)).content())
+            compressor = get_compressor(compress_format)
+            compressed = compressor.compress(body)
+            return lambda: compressor.decompress(compressed, len(body)), args.records
+
+        case('compress.%s' % compress_format.value)(compress)
+        case('decompress.%s' % compress_format.value)(decompress)
+
+
+compress_cases()
+
+
+@case('crc32c', unit='MB')
+def crc32c(args):
+    crc = get_crc32c()
+    data = memoryview(bytearray(os.urandom(1024 * 1024)))
+    return lambda: crc(data), 1
+
+
+# =======================================================
+# runner
+# =======================================================
+
+def measure(func, min_time, repeat):
+    """
+    Time func like asv: the number of calls of a sample is calibrated to last at least min_time
+
+    :return: seconds of one call of every sample
+    """
+    number = 1
+    while True:
+        start = time.time()
+        for _ in range(number):
+            func()
+        cost = time.time() - start
+        if cost >= min_time:
+            break
+        number *= 2 if cost == 0 else max(2, int(min_time / cost * 1.2))
+    samples = [cost / number]
+    for _ in range(repeat - 1):
+        start = time.time()
+        for _ in range(number):
+            func()
+        samples.append((time.time() - start) / number)
+    return samples
+
+
+def run(args):
+    results = {}
+    print('%-28s%14s%14s  %s' % ('case', 'min', 'median', 'unit'))
+    for name, unit, build in _cases:
+        if args.filter and not any(fnmatch.fnmatch(name, pattern) for pattern in args.filter):
+            continue
+        try:
+            func, items = build(args)
+        except DatahubException as e:
+            print('%-28s%28s' % (name, 'skipped: %s' % e.error_msg))
+            continue
+        samples = sorted(cost * 1e6 / items for cost in measure(func, args.min_time, args.repeat))
+        result = {
+            'unit': 'us/%s' % unit,
+            'min': samples[0],
+            'median': samples[len(samples) // 2],
+            'samples': samples
+        }
+        results[name] = result
+        print('%-28s%14.3f%14.3f  %s' % (name, result['min'], result['median'], result['unit']))
+
+    report = {
+        'version': FORMAT_VERSION,
+        'machine': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count() if hasattr(os, 'cpu_count') else None
+        },
+        'sdk_version': __version__,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'params': {'records': args.records, 'size': args.size},
+        'results': results
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print('results saved to %s' % args.save)
+    if args.compare:
+        with open(args.compare) as f:
+            return compare_reports(json.load(f), report, args.threshold)
+    return 0
+
+
+def compare_reports(baseline, current, threshold):
+    """
+    Compare the min of every case, changes beyond the threshold are flagged
+
+    :return: number of regressions
+    """
+    if baseline.get('params') != current.get('params'):
+        print('warning: params differ, baseline %s, current %s' % (baseline.get('params'), current.get('params')))
+    if baseline.get('machine') != current.get('machine'):
+        print('warning: machines differ, baseline %s, current %s'
+              % (baseline.get('machine'), current.get('machine')))
+
+    regressions = 0
+    print('%-28s%14s%14s%10s' % ('case', 'baseline', 'current', 'change'))
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        base, head = baseline['results'].get(name), current['results'].get(name)
+        if base is None or head is None:
+            print('%-28s%38s' % (name, 'only in %s' % ('current' if base is None else 'baseline')))
+            continue
+        if base['unit'] != head['unit']:
+            print('%-28s%38s' % (name, 'units differ: %s, %s' % (base['unit'], head['unit'])))
+            continue
+        change = head['min'] / base['min'] - 1 if base['min'] else 0
+        flag = ''
+        if change > threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif change < -threshold:
+            flag = 'improved'
+        print('%-28s%14.3f%14.3f%+9.1f%%  %s' % (name, base['min'], head['min'], change * 100, flag))
+    print('%d regression(s) beyond %.0f%%' % (regressions, threshold * 100))
+    return regressions
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return compare_reports(baseline, current, args.threshold)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='offline benchmark suite with json baselines, '
+                                                 'no server is needed')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='run the cases')
+    run_parser.add_argument('--filter', help='glob patterns of case names, e.g. "parse.*"', nargs='+')
+    run_parser.add_argument('--records', help='record num of one request', type=int, default=1000)
+    run_parser.add_argument('--size', help='string field size', type=int, default=10)
+    run_parser.add_argument('--repeat', help='samples of every case', type=int, default=7)
+    run_parser.add_argument('--min_time', help='min seconds of a sample', type=float, default=0.1)
+    run_parser.add_argument('--save', help='json file the results are saved to')
+    run_parser.add_argument('--compare', help='json baseline the results are compared to')
+    run_parser.add_argument('--threshold', help='relative slowdown flagged as regression', type=float,
+                            default=0.1)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two saved results')
+    compare_parser.add_argument('baseline', help='json file of the baseline')
+    compare_parser.add_argument('current', help='json file of the current results')
+    compare_parser.add_argument('--threshold', help='relative slowdown flagged as regression', type=float,
+                                default=0.1)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        sys.exit(1 if run(args) else 0)
+    elif args.command == 'compare':
+        sys.exit(1 if compare(args) else 0)
+    else:
+        parser.print_help()
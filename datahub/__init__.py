@@ -20,10 +20,12 @@
 from __future__ import absolute_import
 
 from .core import DataHub
+from .producer import DataHubProducer
+from .consumer import DataHubConsumer
 from .version import __version__, __datahub_client_version__
 
 """ author
 """
 __author__ = 'andy.xs'
 
-__all__ = ['DataHub', '__author__', '__version__', '__datahub_client_version__']
+__all__ = ['DataHub', 'DataHubProducer', 'DataHubConsumer', '__author__', '__version__', '__datahub_client_version__']
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from ..models import CompressFormat
+from .implement import AsyncDataHubJson, AsyncDataHubPB
+
+
+class AsyncDataHub(object):
+    """
+    Asynchronous entrance to DataHub running on asyncio.
+
+    Every operation of :class:`datahub.DataHub` is provided as a coroutine with the same parameters and results,
+    so many requests can be in flight on one event loop. Requires python 3.5+ and ``aiohttp``.
+
+    :param access_id: Aliyun Access ID
+    :param secret_access_key: Aliyun Access Key
+    :param endpoint: Rest service URL
+    :param enable_pb: enable protobuf when put/get records
+    :param compress_format: compress format
+    :type compress_format: :class:`datahub.models.compress.CompressFormat`
+    :param compress_workers: threads compressing request bodies and decompressing response bodies off the
+        event loop, or an executor shared by clients, default value is None which means on the event loop
+    :param metrics: metrics of requests and records, could be shared by clients, default value is None which
+        means no metrics
+    :type metrics: :class:`datahub.metrics.ClientMetrics`
+    :param hooks: hooks called before and after every request, e.g. :class:`datahub.tracing.OpenTelemetryHook`,
+        default value is None which means no hooks
+    :type hooks: list of :class:`datahub.tracing.RequestHook`
+    :param wire_logger: logger of requests and responses on the wire, by default they are logged to the
+        ``datahub.rest`` logger at DEBUG level
+    :type wire_logger: :class:`datahub.wirelog.WireLogger`
+
+    :Example:
+
+    >>> async with AsyncDataHub('**your access id**', '**your access key**', '**endpoint**') as datahub:
+    >>>     results = await asyncio.gather(*[datahub.get_topic('datahub_test', topic) for topic in topics])
+    >>>
+    """
+
+    def __init__(self, access_id, access_key, endpoint=None, enable_pb=False,
+                 compress_format=CompressFormat.NONE, **kwargs):
+        if enable_pb:
+            self._datahub_impl = AsyncDataHubPB(access_id, access_key, endpoint, compress_format, **kwargs)
+        else:
+            self._datahub_impl = AsyncDataHubJson(access_id, access_key, endpoint, compress_format, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close connections of the client
+
+        :return: none
+        """
+        await self._datahub_impl.close()
+
+    async def list_project(self):
+        """
+        Coroutine version of :meth:`datahub.DataHub.list_project`
+        """
+        return await self._datahub_impl.list_project()
+
+    async def create_project(self, project_name, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.create_project`
+        """
+        await self._datahub_impl.create_project(project_name, comment)
+
+    async def get_project(self, project_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_project`
+        """
+        return await self._datahub_impl.get_project(project_name)
+
+    async def delete_project(self, project_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.delete_project`
+        """
+        await self._datahub_impl.delete_project(project_name)
+
+    async def list_topic(self, project_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.list_topic`
+        """
+        return await self._datahub_impl.list_topic(project_name)
+
+    async def create_blob_topic(self, project_name, topic_name, shard_count, life_cycle, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.create_blob_topic`
+        """
+        await self._datahub_impl.create_blob_topic(project_name, topic_name, shard_count, life_cycle, comment)
+
+    async def create_tuple_topic(self, project_name, topic_name, shard_count, life_cycle, record_schema, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.create_tuple_topic`
+        """
+        await self._datahub_impl.create_tuple_topic(project_name, topic_name, shard_count, life_cycle, record_schema,
+                                                    comment)
+
+    async def get_topic(self, project_name, topic_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_topic`
+        """
+        return await self._datahub_impl.get_topic(project_name, topic_name)
+
+    async def update_topic(self, project_name, topic_name, life_cycle, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.update_topic`
+        """
+        await self._datahub_impl.update_topic(project_name, topic_name, life_cycle, comment)
+
+    async def delete_topic(self, project_name, topic_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.delete_topic`
+        """
+        await self._datahub_impl.delete_topic(project_name, topic_name)
+
+    async def append_field(self, project_name, topic_name, field_name, field_type):
+        """
+        Coroutine version of :meth:`datahub.DataHub.append_field`
+        """
+        await self._datahub_impl.append_field(project_name, topic_name, field_name, field_type)
+
+    async def wait_shards_ready(self, project_name, topic_name, timeout=30):
+        """
+        Coroutine version of :meth:`datahub.DataHub.wait_shards_ready`
+        """
+        await self._datahub_impl.wait_shards_ready(project_name, topic_name, timeout)
+
+    async def list_shard(self, project_name, topic_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.list_shard`
+        """
+        return await self._datahub_impl.list_shard(project_name, topic_name)
+
+    async def merge_shard(self, project_name, topic_name, shard_id, adj_shard_id):
+        """
+        Coroutine version of :meth:`datahub.DataHub.merge_shard`
+        """
+        return await self._datahub_impl.merge_shard(project_name, topic_name, shard_id, adj_shard_id)
+
+    async def split_shard(self, project_name, topic_name, shard_id, split_key=''):
+        """
+        Coroutine version of :meth:`datahub.DataHub.split_shard`
+        """
+        return await self._datahub_impl.split_shard(project_name, topic_name, shard_id, split_key)
+
+    async def get_cursor(self, project_name, topic_name, shard_id, cursor_type, param=-1):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_cursor`
+        """
+        return await self._datahub_impl.get_cursor(project_name, topic_name, shard_id, cursor_type, param)
+
+    async def put_records(self, project_name, topic_name, record_list):
+        """
+        Coroutine version of :meth:`datahub.DataHub.put_records`
+        """
+        return await self._datahub_impl.put_records(project_name, topic_name, record_list)
+
+    async def put_columns(self, project_name, topic_name, columns, record_schema, shard_id=None):
+        """
+        Coroutine version of :meth:`datahub.DataHub.put_columns`
+        """
+        return await self._datahub_impl.put_columns(project_name, topic_name, columns, record_schema, shard_id)
+
+    async def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num, lazy=False):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_blob_records`
+        """
+        return await self._datahub_impl.get_blob_records(project_name, topic_name, shard_id, cursor, limit_num, lazy)
+
+    async def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num,
+                                fields=None, lazy=False):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_tuple_records`
+        """
+        return await self._datahub_impl.get_tuple_records(project_name, topic_name, shard_id, record_schema, cursor,
+                                                          limit_num, fields, lazy)
+
+    async def get_tuple_columns(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_tuple_columns`
+        """
+        return await self._datahub_impl.get_tuple_columns(project_name, topic_name, shard_id, record_schema, cursor,
+                                                          limit_num)
+
+    async def get_record_batch(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_record_batch`
+        """
+        return await self._datahub_impl.get_record_batch(project_name, topic_name, shard_id, record_schema, cursor,
+                                                         limit_num)
+
+    async def get_metering_info(self, project_name, topic_name, shard_id):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_metering_info`
+        """
+        return await self._datahub_impl.get_metering_info(project_name, topic_name, shard_id)
+
+    async def list_connector(self, project_name, topic_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.list_connector`
+        """
+        return await self._datahub_impl.list_connector(project_name, topic_name)
+
+    async def create_connector(self, project_name, topic_name, connector_type, column_fields, config):
+        """
+        Coroutine version of :meth:`datahub.DataHub.create_connector`
+        """
+        await self._datahub_impl.create_connector(project_name, topic_name, connector_type, column_fields, config)
+
+    async def get_connector(self, project_name, topic_name, connector_type):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_connector`
+        """
+        return await self._datahub_impl.get_connector(project_name, topic_name, connector_type)
+
+    async def delete_connector(self, project_name, topic_name, connector_type):
+        """
+        Coroutine version of :meth:`datahub.DataHub.delete_connector`
+        """
+        await self._datahub_impl.delete_connector(project_name, topic_name, connector_type)
+
+    async def get_connector_shard_status(self, project_name, topic_name, connector_type, shard_id):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_connector_shard_status`
+        """
+        return await self._datahub_impl.get_connector_shard_status(project_name, topic_name, connector_type, shard_id)
+
+    async def reload_connector(self, project_name, topic_name, connector_type, shard_id=''):
+        """
+        Coroutine version of :meth:`datahub.DataHub.reload_connector`
+        """
+        await self._datahub_impl.reload_connector(project_name, topic_name, connector_type, shard_id)
+
+    async def append_connector_field(self, project_name, topic_name, connector_type, field_name):
+        """
+        Coroutine version of :meth:`datahub.DataHub.append_connector_field`
+        """
+        await self._datahub_impl.append_connector_field(project_name, topic_name, connector_type, field_name)
+
+    async def init_and_get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids):
+        """
+        Coroutine version of :meth:`datahub.DataHub.init_and_get_subscription_offset`
+        """
+        return await self._datahub_impl.init_and_get_subscription_offset(project_name, topic_name, sub_id, shard_ids)
+
+    async def get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids=None):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_subscription_offset`
+        """
+        return await self._datahub_impl.get_subscription_offset(project_name, topic_name, sub_id, shard_ids)
+
+    async def update_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        """
+        Coroutine version of :meth:`datahub.DataHub.update_subscription_offset`
+        """
+        await self._datahub_impl.update_subscription_offset(project_name, topic_name, sub_id, offsets)
+
+    async def get_connector_done_time(self, project_name, topic_name, connector_type):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_connector_done_time`
+        """
+        return await self._datahub_impl.get_connector_done_time(project_name, topic_name, connector_type)
+
+    async def update_connector_state(self, project_name, topic_name, connector_type, connector_state):
+        """
+        Coroutine version of :meth:`datahub.DataHub.update_connector_state`
+        """
+        await self._datahub_impl.update_connector_state(project_name, topic_name, connector_type, connector_state)
+
+    async def create_subscription(self, project_name, topic_name, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.create_subscription`
+        """
+        return await self._datahub_impl.create_subscription(project_name, topic_name, comment)
+
+    async def delete_subscription(self, project_name, topic_name, sub_id):
+        """
+        Coroutine version of :meth:`datahub.DataHub.delete_subscription`
+        """
+        await self._datahub_impl.delete_subscription(project_name, topic_name, sub_id)
+
+    async def get_subscription(self, project_name, topic_name, sub_id):
+        """
+        Coroutine version of :meth:`datahub.DataHub.get_subscription`
+        """
+        return await self._datahub_impl.get_subscription(project_name, topic_name, sub_id)
+
+    async def update_subscription(self, project_name, topic_name, sub_id, comment):
+        """
+        Coroutine version of :meth:`datahub.DataHub.update_subscription`
+        """
+        await self._datahub_impl.update_subscription(project_name, topic_name, sub_id, comment)
+
+    async def update_subscription_state(self, project_name, topic_name, sub_id, state):
+        """
+        Coroutine version of :meth:`datahub.DataHub.update_subscription_state`
+        """
+        await self._datahub_impl.update_subscription_state(project_name, topic_name, sub_id, state)
+
+    async def list_subscription(self, project_name, topic_name, query_key, page_index, page_size):
+        """
+        Coroutine version of :meth:`datahub.DataHub.list_subscription`
+        """
+        return await self._datahub_impl.list_subscription(project_name, topic_name, query_key, page_index, page_size)
+
+    async def reset_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        """
+        Coroutine version of :meth:`datahub.DataHub.reset_subscription_offset`
+        """
+        await self._datahub_impl.reset_subscription_offset(project_name, topic_name, sub_id, offsets)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import time
+
+from .rest import AsyncRestClient
+from ..exceptions import DatahubException
+from ..implement import DataHubJsonBase, DataHubPBBase
+from ..models import RecordType
+from ..utils import ErrorMessage, check_empty
+
+
+class AsyncDataHubJson(DataHubJsonBase):
+    """
+    Asynchronous datahub json client, requests are built by :class:`datahub.implement.DataHubJsonBase`
+    like the sync client and only sending them and sleeping are awaited
+    """
+
+    _rest_client_class = AsyncRestClient
+
+    async def close(self):
+        await self._rest_client.close()
+
+    async def _send(self, request, limit=None):
+        if not request.traced:
+            return request.parse(await self._rest_client.request(request.method, request.url, limit=limit,
+                                                                 **request.encode()))
+        with self._rest_client.trace() as context:
+            kwargs = request.encode(context)
+            content = await self._rest_client.request(request.method, request.url, context=context, limit=limit,
+                                                      **kwargs)
+            return request.parse(content, context)
+
+    async def list_project(self):
+        return await self._send(self._list_project_request())
+
+    async def create_project(self, project_name, comment):
+        await self._send(self._create_project_request(project_name, comment))
+
+    async def get_project(self, project_name):
+        return await self._send(self._get_project_request(project_name))
+
+    async def delete_project(self, project_name):
+        await self._send(self._delete_project_request(project_name))
+
+    async def list_topic(self, project_name):
+        return await self._send(self._list_topic_request(project_name))
+
+    async def create_blob_topic(self, project_name, topic_name, shard_count, life_cycle, comment):
+        await self._send(self._create_topic_request(project_name, topic_name, shard_count, life_cycle,
+                                                    RecordType.BLOB, comment))
+
+    async def create_tuple_topic(self, project_name, topic_name, shard_count, life_cycle, record_schema, comment):
+        await self._send(self._create_topic_request(project_name, topic_name, shard_count, life_cycle,
+                                                    RecordType.TUPLE, comment, record_schema))
+
+    async def get_topic(self, project_name, topic_name):
+        return await self._send(self._get_topic_request(project_name, topic_name))
+
+    async def update_topic(self, project_name, topic_name, life_cycle, comment):
+        await self._send(self._update_topic_request(project_name, topic_name, life_cycle, comment))
+
+    async def delete_topic(self, project_name, topic_name):
+        await self._send(self._delete_topic_request(project_name, topic_name))
+
+    async def append_field(self, project_name, topic_name, field_name, field_type):
+        await self._send(self._append_field_request(project_name, topic_name, field_name, field_type))
+
+    async def wait_shards_ready(self, project_name, topic_name, timeout=30):
+        self._check_wait_shards_ready(project_name, topic_name, timeout)
+
+        current_time = time.time()
+        end_time = current_time + timeout
+
+        while current_time <= end_time:
+            if self._is_shard_load_completed(await self.list_shard(project_name, topic_name)):
+                return
+            await asyncio.sleep(1)
+            current_time = time.time()
+
+        raise DatahubException(ErrorMessage.WAIT_SHARD_TIMEOUT)
+
+    async def list_shard(self, project_name, topic_name):
+        return await self._send(self._list_shard_request(project_name, topic_name))
+
+    async def merge_shard(self, project_name, topic_name, shard_id, adj_shard_id):
+        return await self._send(self._merge_shard_request(project_name, topic_name, shard_id, adj_shard_id))
+
+    async def split_shard(self, project_name, topic_name, shard_id, split_key=''):
+        self._check_split_shard(project_name, topic_name, shard_id)
+        if check_empty(split_key):
+            split_key = self._middle_hash_key(await self.list_shard(project_name, topic_name), shard_id)
+        return await self._send(self._split_shard_request(project_name, topic_name, shard_id, split_key))
+
+    async def get_cursor(self, project_name, topic_name, shard_id, cursor_type, param=-1):
+        return await self._send(self._get_cursor_request(project_name, topic_name, shard_id, cursor_type, param))
+
+    async def put_records(self, project_name, topic_name, record_list):
+        url = self._put_records_url(project_name, topic_name)
+
+        result = await self.__put_records(project_name, topic_name, url, record_list)
+
+        # only retry the failed records
+        put_retry = self._put_records_retry(record_list, result)
+        if put_retry is None:
+            return result
+        retry = put_retry.next(result)
+        while retry is not None:
+            records, delay = retry
+            await asyncio.sleep(delay)
+            retry = put_retry.next(await self.__put_records(project_name, topic_name, url, records))
+        return put_retry.result()
+
+    async def __put_records(self, project_name, topic_name, url, record_list):
+        limit = self._put_records_limit(project_name, topic_name, record_list)
+        result = await self._send(self._put_records_request(url, record_list), limit)
+        self._on_put_records(project_name, topic_name, record_list, result, limit)
+        return result
+
+    async def put_columns(self, project_name, topic_name, columns, record_schema, shard_id=None):
+        row_count, requests = self._put_columns_requests(project_name, topic_name, columns, record_schema, shard_id)
+
+        failed_records = []
+        for start, request in requests:
+            limit = self._put_columns_limit(project_name, topic_name, shard_id)
+            result = await self._send(request, limit)
+            self._on_put_columns(project_name, topic_name, shard_id, result, limit)
+            failed_records.extend(self._failed_rows(start, result))
+
+        return self._put_columns_result(project_name, topic_name, row_count, failed_records)
+
+    async def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num, lazy=False):
+        request = self._get_blob_records_request(project_name, topic_name, shard_id, cursor, limit_num, lazy)
+        return await self.__get_records(project_name, topic_name, shard_id, request)
+
+    async def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num,
+                                fields=None, lazy=False):
+        request = self._get_tuple_records_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                  limit_num, fields, lazy)
+        return await self.__get_records(project_name, topic_name, shard_id, request)
+
+    async def get_tuple_columns(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        request = self._get_tuple_columns_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                  limit_num)
+        return await self.__get_records(project_name, topic_name, shard_id, request)
+
+    async def get_record_batch(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        request = self._get_record_batch_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                 limit_num)
+        return await self.__get_records(project_name, topic_name, shard_id, request)
+
+    async def __get_records(self, project_name, topic_name, shard_id, request):
+        limit = self._get_records_limit(project_name, topic_name, shard_id)
+        result = await self._send(request, limit)
+        self._on_get_records(project_name, topic_name, result, limit)
+        return result
+
+    async def get_metering_info(self, project_name, topic_name, shard_id):
+        return await self._send(self._get_metering_info_request(project_name, topic_name, shard_id))
+
+    async def list_connector(self, project_name, topic_name):
+        return await self._send(self._list_connector_request(project_name, topic_name))
+
+    async def create_connector(self, project_name, topic_name, connector_type, column_fields, config):
+        await self._send(self._create_connector_request(project_name, topic_name, connector_type, column_fields,
+                                                        config))
+
+    async def get_connector(self, project_name, topic_name, connector_type):
+        return await self._send(self._get_connector_request(project_name, topic_name, connector_type))
+
+    async def delete_connector(self, project_name, topic_name, connector_type):
+        await self._send(self._delete_connector_request(project_name, topic_name, connector_type))
+
+    async def get_connector_shard_status(self, project_name, topic_name, connector_type, shard_id):
+        return await self._send(self._get_connector_shard_status_request(project_name, topic_name, connector_type,
+                                                                         shard_id))
+
+    async def reload_connector(self, project_name, topic_name, connector_type, shard_id=''):
+        await self._send(self._reload_connector_request(project_name, topic_name, connector_type, shard_id))
+
+    async def append_connector_field(self, project_name, topic_name, connector_type, field_name):
+        await self._send(self._append_connector_field_request(project_name, topic_name, connector_type,
+                                                              field_name))
+
+    async def init_and_get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids):
+        return await self._send(self._init_and_get_subscription_offset_request(project_name, topic_name, sub_id,
+                                                                               shard_ids))
+
+    async def get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids=None):
+        return await self._send(self._get_subscription_offset_request(project_name, topic_name, sub_id,
+                                                                      shard_ids))
+
+    async def update_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        await self._send(self._update_subscription_offset_request(project_name, topic_name, sub_id, offsets))
+
+    async def get_connector_done_time(self, project_name, topic_name, connector_type):
+        return await self._send(self._get_connector_done_time_request(project_name, topic_name, connector_type))
+
+    # =======================================================
+    # internal api
+    # =======================================================
+
+    async def update_connector_state(self, project_name, topic_name, connector_type, connector_state):
+        await self._send(self._update_connector_state_request(project_name, topic_name, connector_type,
+                                                              connector_state))
+
+    async def create_subscription(self, project_name, topic_name, comment):
+        return await self._send(self._create_subscription_request(project_name, topic_name, comment))
+
+    async def delete_subscription(self, project_name, topic_name, sub_id):
+        await self._send(self._delete_subscription_request(project_name, topic_name, sub_id))
+
+    async def get_subscription(self, project_name, topic_name, sub_id):
+        return await self._send(self._get_subscription_request(project_name, topic_name, sub_id))
+
+    async def update_subscription(self, project_name, topic_name, sub_id, comment):
+        await self._send(self._update_subscription_request(project_name, topic_name, sub_id, comment))
+
+    async def update_subscription_state(self, project_name, topic_name, sub_id, state):
+        await self._send(self._update_subscription_state_request(project_name, topic_name, sub_id, state))
+
+    async def list_subscription(self, project_name, topic_name, query_key, page_index, page_size):
+        return await self._send(self._list_subscription_request(project_name, topic_name, query_key, page_index,
+                                                                page_size))
+
+    async def reset_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        await self._send(self._reset_subscription_offset_request(project_name, topic_name, sub_id, offsets))
+
+
+class AsyncDataHubPB(DataHubPBBase, AsyncDataHubJson):
+    """
+    Asynchronous datahub protobuf client
+    """
+    pass
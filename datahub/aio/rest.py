@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ..exceptions import DatahubException
+from ..models.compress import CompressFormat
+from ..rest import RestClient, Headers
+from ..tracing import NULL_CONTEXT, Phase
+
+logger = logging.getLogger('datahub.rest')
+
+# smaller bodies are compressed on the event loop, handing them to a thread costs more
+_OFFLOAD_MIN_SIZE = 64 * 1024
+# backoff of retrying connections, doubled every retry
+_CONNECT_RETRY_BASE_DELAY = 0.1
+_CONNECT_RETRY_MAX_DELAY = 2.0
+
+
+class AsyncRestClient(RestClient):
+    """Asynchronous restful client on top of aiohttp.
+
+    Requests are built, compressed and signed exactly like :class:`datahub.rest.RestClient`,
+    only sending them is done on the event loop.
+
+    Compressing request bodies and decompressing response bodies block the event loop, with
+    ``compress_workers`` they run on a thread pool instead. lz4, zlib and zstd release the GIL,
+    so bodies are compressed while other requests are on the network.
+
+    :param compress_workers: threads of the pool, or an executor shared by clients,
+        None means on the event loop
+    """
+
+    def __init__(self, account, endpoint, user_agent=None, proxies=None, retry_times=3, conn_timeout=5,
+                 read_timeout=120, pool_maxsize=100, compress_workers=None, **kwargs):
+        if aiohttp is None:
+            raise DatahubException('aiohttp is required by asynchronous client, please install it first')
+        self._pool_maxsize = pool_maxsize
+        self._own_executor = False
+        if isinstance(compress_workers, Executor):
+            self._compress_executor = compress_workers
+        elif compress_workers:
+            self._compress_executor = ThreadPoolExecutor(max_workers=compress_workers,
+                                                         thread_name_prefix='datahub-compress')
+            self._own_executor = True
+        else:
+            self._compress_executor = None
+        super(AsyncRestClient, self).__init__(account, endpoint, user_agent=user_agent, proxies=proxies,
+                                              retry_times=retry_times, conn_timeout=conn_timeout,
+                                              read_timeout=read_timeout, pool_maxsize=pool_maxsize, **kwargs)
+
+    def _create_transport(self, pool_connections, pool_maxsize, max_concurrency):
+        # aiohttp session must be created inside the running event loop, see _get_session
+        self._aio_session = None
+        self._max_concurrency = max_concurrency
+        return None
+
+    def _get_session(self):
+        if self._aio_session is None or self._aio_session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_maxsize, limit_per_host=self._max_concurrency or 0,
+                                             ssl=False)
+            timeout = aiohttp.ClientTimeout(sock_connect=self._conn_timeout, sock_read=self._read_timeout)
+            self._aio_session = aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False,
+                                                      skip_auto_headers=(Headers.ACCEPT_ENCODING,))
+        return self._aio_session
+
+    async def close(self):
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+        if self._own_executor:
+            self._compress_executor.shutdown(wait=False)
+            self._own_executor = False
+            self._compress_executor = None
+
+    async def _offload(self, size, func, *args):
+        """
+        Run func on the compress pool if the body is large enough
+        """
+        if self._compress_executor is None or size < _OFFLOAD_MIN_SIZE:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._compress_executor, func, *args)
+
+    async def _send(self, session, prepared_req):
+        """
+        Send the request, retry only if the connection could not be established. Like max_retries of
+        HTTPAdapter, errors after the request is sent are not retried, the server may have handled it.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with session.request(prepared_req.method, prepared_req.url, data=prepared_req.body,
+                                           headers=dict(prepared_req.headers),
+                                           proxy=self._proxy(prepared_req.url)) as resp:
+                    return resp, await resp.read()
+            except aiohttp.ClientConnectorError as e:
+                if attempt >= self._retry_times:
+                    raise
+                delay = min(_CONNECT_RETRY_BASE_DELAY * 2 ** attempt, _CONNECT_RETRY_MAX_DELAY)
+                attempt += 1
+                logger.warning('connect %s failed, retry %d after %.3fs, error: %s', prepared_req.url, attempt,
+                               delay, e)
+                await asyncio.sleep(delay)
+
+    def _proxy(self, url):
+        if not self._proxies:
+            return None
+        return self._proxies.get(url.split(':', 1)[0])
+
+    async def request(self, method, url, compress_format=CompressFormat.NONE, context=None, limit=None, **kwargs):
+        if context is None:
+            if self._hooks:
+                with self.trace() as context:
+                    return await self.request(method, url, compress_format, context, limit, **kwargs)
+            context = NULL_CONTEXT
+
+        if self._retry_policy is not None:
+            self._retry_policy.on_request()
+        size = len(kwargs.get('data') or b'') if compress_format not in (None, CompressFormat.NONE) else 0
+        recorder = None
+        if self._metrics is not None:
+            recorder = self._metrics.recorder(method, url, kwargs.get('headers'), kwargs.get('data'))
+        kwargs = context.begin(method, url, kwargs)
+        with context.phase(Phase.COMPRESS):
+            kwargs = await self._offload(size, self._compress_body, compress_format, kwargs)
+
+        attempt = 0
+        while True:
+            if limit is not None:
+                delay = limit.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                return await self._request(method, url, recorder, context, **kwargs)
+            except DatahubException as e:
+                delay = self._on_failure(e, attempt, limit)
+                if delay is None:
+                    raise
+                attempt += 1
+                context.on_retry(attempt)
+                if recorder is not None:
+                    recorder.on_retry()
+                logger.warning('request %s failed, retry %d after %.3fs, error: %s', url, attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    async def _request(self, method, url, recorder=None, context=NULL_CONTEXT, **kwargs):
+        with context.phase(Phase.SIGN):
+            prepared_req = self._prepare_request(method, url, **kwargs)
+        session = self._get_session()
+        sampled = self._wire_logger.sample()
+        if sampled:
+            self._wire_logger.log_request(prepared_req.method, prepared_req.url, prepared_req.headers,
+                                          prepared_req.body)
+
+        if recorder is not None:
+            recorder.on_send(kwargs.get('data'))
+        try:
+            with context.phase(Phase.HTTP):
+                resp, content = await self._send(session, prepared_req)
+        except Exception as e:
+            if recorder is not None:
+                recorder.on_response(-1)
+            context.on_response(-1, error=e)
+            raise
+        context.on_response(resp.status, resp.headers)
+
+        if sampled:
+            self._wire_logger.log_response(prepared_req.url, resp.status, resp.headers, content)
+
+        size = len(content) if resp.headers.get(Headers.CONTENT_ENCODING) else 0
+        return await self._offload(size, self._handle_response, resp.status, resp.headers, content, recorder,
+                                   context)
@@ -26,7 +26,7 @@ from six.moves.urllib.parse import urlparse, unquote
 
 from .core import Account, AccountType
 from ..rest import Headers
-from ..utils import hmac_sha1
+from ..utils import HmacSha1
 
 try:
     from urllib.parse import parse_qsl
@@ -37,22 +37,56 @@ except ImportError:
 import logging
 
 logger = logging.getLogger('datahub.account')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(logging.INFO)
 if not logger.handlers:
     logger.addHandler(logging.NullHandler())
 
 
+_HEADER_PREFIX = 'x-datahub-'
+
+# canonical path of request urls and whether signed params are in the query,
+# urls are limited by projects, topics and shards
+_URL_CACHE = {}
+_URL_CACHE_SIZE = 4096
+# sorted signed header names of header name tuples, requests of an api carry the same headers
+_HEADERS_CACHE = {}
+_HEADERS_CACHE_SIZE = 256
+
+
+def _parse_url(url):
+    components = _URL_CACHE.get(url)
+    if components is None:
+        url_components = urlparse(unquote(url))
+        signed_params = any(k.startswith(_HEADER_PREFIX) for k, _ in parse_qsl(url_components.query, True))
+        components = (url_components.path, signed_params)
+        if len(_URL_CACHE) >= _URL_CACHE_SIZE:
+            _URL_CACHE.clear()
+        _URL_CACHE[url] = components
+    return components
+
+
+def _sorted_headers(names):
+    sorted_names = _HEADERS_CACHE.get(names)
+    if sorted_names is None:
+        sorted_names = sorted((name.lower(), name) for name in names if name.lower().startswith(_HEADER_PREFIX))
+        if len(_HEADERS_CACHE) >= _HEADERS_CACHE_SIZE:
+            _HEADERS_CACHE.clear()
+        _HEADERS_CACHE[names] = sorted_names
+    return sorted_names
+
+
 class AliyunAccount(Account):
     """
     Aliyun account implement base from :class:`datahub.auth.Account`
     """
 
-    __slots__ = '_access_id', '_access_key'
+    __slots__ = '_access_id', '_access_key', '_hmac'
 
     def __init__(self, *args, **kwargs):
         super(AliyunAccount, self).__init__(*args, **kwargs)
         self._access_id = kwargs.get('access_id', '')
         self._access_key = kwargs.get('access_key', '')
+        self._hmac = HmacSha1(self._access_key)
 
     @property
     def access_id(self):
@@ -69,6 +103,7 @@ class AliyunAccount(Account):
     @access_key.setter
     def access_key(self, value):
         self._access_key = value
+        self._hmac = HmacSha1(value)
 
     def get_type(self):
         """
@@ -112,6 +147,16 @@ class AliyunAccount(Account):
         lines.append(url_components.path)
         return '\n'.join(lines)
 
+    @staticmethod
+    def _build_fast_canonical_str(path, req):
+        # Same as _build_canonical_str for urls without signed params, sorted header names are cached
+        headers = req.headers
+        lines = [req.method, headers[Headers.CONTENT_TYPE], headers[Headers.DATE]]
+        for lower_name, name in _sorted_headers(tuple(headers)):
+            lines.append('%s:%s' % (lower_name, headers[name]))
+        lines.append(path)
+        return '\n'.join(lines)
+
     def sign_request(self, request):
         """
         Generator signature for request.
@@ -120,11 +165,14 @@ class AliyunAccount(Account):
         :return: none
         """
         url = request.path_url
-        url_components = urlparse(unquote(url))
-        canonical_str = self._build_canonical_str(url_components, request)
-        logger.debug('canonical string: ' + canonical_str)
-
-        sign = hmac_sha1(self._access_key, canonical_str)
+        path, signed_params = _parse_url(url)
+        if not signed_params:
+            canonical_str = self._build_fast_canonical_str(path, request)
+        else:
+            canonical_str = self._build_canonical_str(urlparse(unquote(url)), request)
+        logger.debug('canonical string: %s', canonical_str)
+
+        sign = self._hmac.sign(canonical_str)
 
         auth_str = 'DATAHUB %s:%s' % (self._access_id, sign.decode())
         request.headers[Headers.AUTHORIZATION] = auth_str
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+
+from six.moves import queue
+
+from .exceptions import DatahubException, InvalidParameterException, LimitExceededException, \
+    InternalServerException
+from .models import CursorType, RecordType, ShardState, OffsetWithSession
+from .utils import ErrorMessage, check_empty, check_positive
+
+logger = logging.getLogger('datahub.consumer')
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+class _ShardFetcher(object):
+    """
+    Fetch state of one shard
+    """
+
+    __slots__ = ('shard_id', 'closed', 'cursor', 'offset', 'consumed', 'committed', 'thread')
+
+    def __init__(self, shard_id, closed, offset):
+        self.shard_id = shard_id
+        self.closed = closed
+        self.cursor = None
+        self.offset = offset
+        # (sequence, system time) of the last record read, replaced as a whole so no lock is needed
+        self.consumed = (offset.sequence, offset.timestamp)
+        self.committed = self.consumed
+        self.thread = None
+
+
+class DataHubConsumer(object):
+    """
+    Consumer of a subscription which reads all shards of a topic concurrently.
+
+    Shards are discovered by :meth:`datahub.DataHub.list_shard` and every shard is fetched by its own
+    thread into a bounded prefetch queue, starting after the offset stored in the subscription.
+    Fetched records are kept in :class:`datahub.models.RecordBatch`, records read are views of the batches.
+    Offsets of records returned to the caller are committed in batches every ``commit_interval_ms``
+    milliseconds, and once more on ``close``.
+
+    :param datahub: datahub client
+    :type datahub: :class:`datahub.DataHub`
+    :param project_name: project name
+    :param topic_name: topic name
+    :param sub_id: subscription id
+    :param shard_ids: shards to read, all readable shards if not given
+    :param fetch_limit: max record count of one get records request
+    :param prefetch: max fetched batches waiting to be read
+    :param commit_interval_ms: interval of committing offsets
+    :param fetch_interval_ms: wait time before fetching again a shard which has no new record
+
+    :Example:
+
+    >>> with DataHubConsumer(dh, 'project', 'topic', sub_id) as consumer:
+    >>>     for record in consumer:
+    >>>         print(record.shard_id, record.sequence, record.values)
+
+    .. seealso:: :meth:`datahub.DataHub.init_and_get_subscription_offset`,
+        :meth:`datahub.DataHub.update_subscription_offset`
+    """
+
+    def __init__(self, datahub, project_name, topic_name, sub_id, shard_ids=None, fetch_limit=1000, prefetch=64,
+                 commit_interval_ms=5000, fetch_interval_ms=1000):
+        if check_empty(project_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
+        if check_empty(topic_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
+        if check_empty(sub_id):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'sub_id')
+        for name, value in (('fetch_limit', fetch_limit), ('prefetch', prefetch),
+                            ('commit_interval_ms', commit_interval_ms)):
+            if not check_positive(value):
+                raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % name)
+
+        self._datahub = datahub
+        self._project_name = project_name
+        self._topic_name = topic_name
+        self._sub_id = sub_id
+        self._fetch_limit = fetch_limit
+        self._commit_interval = commit_interval_ms / 1000.0
+        self._fetch_interval = fetch_interval_ms / 1000.0
+
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._commit_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._current = iter(())
+        self._closed = False
+
+        topic_result = datahub.get_topic(project_name, topic_name)
+        self._record_schema = topic_result.record_schema if topic_result.record_type == RecordType.TUPLE else None
+        self._fetchers = self._init_fetchers(shard_ids)
+
+        for fetcher in self._fetchers.values():
+            fetcher.thread = threading.Thread(target=self._fetch, args=(fetcher,),
+                                              name='datahub-consumer-fetcher-%s' % fetcher.shard_id)
+            fetcher.thread.daemon = True
+            fetcher.thread.start()
+        self._committer = threading.Thread(target=self._commit_periodically, name='datahub-consumer-committer')
+        self._committer.daemon = True
+        self._committer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            record = self.read()
+            if record is not None:
+                yield record
+
+    @property
+    def shard_ids(self):
+        return list(self._fetchers.keys())
+
+    def read(self, timeout=None):
+        """
+        Read next record of any shard
+
+        :param timeout: max seconds to wait, None means waiting forever
+        :return: next record, None if timeout
+        :rtype: :class:`datahub.models.Record`
+        :raise: :class:`datahub.exceptions.DatahubException` if fetching a shard failed with a non retryable error
+        """
+        if self._closed:
+            raise DatahubException(ErrorMessage.CONSUMER_CLOSED)
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            record = next(self._current, None)
+            if record is not None:
+                self._fetchers[record.shard_id].consumed = (record.sequence, record.system_time)
+                return record
+
+            remaining = max(deadline - time.time(), 0) if deadline is not None else None
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if isinstance(item, Exception):
+                raise item
+            self._current = iter(item)
+
+    def commit(self):
+        """
+        Commit offsets of records already read
+
+        :return: none
+        """
+        with self._commit_lock:
+            offsets = {}
+            for fetcher in self._fetchers.values():
+                consumed = fetcher.consumed
+                if consumed != fetcher.committed:
+                    offsets[fetcher.shard_id] = (consumed, OffsetWithSession(
+                        consumed[0], consumed[1], fetcher.offset.version, fetcher.offset.session_id))
+            if not offsets:
+                return
+            self._datahub.update_subscription_offset(self._project_name, self._topic_name, self._sub_id,
+                                                     dict((k, v[1]) for k, v in offsets.items()))
+            for shard_id, (consumed, _) in offsets.items():
+                self._fetchers[shard_id].committed = consumed
+
+    def close(self):
+        """
+        Stop fetching and commit offsets of records already read
+
+        :return: none
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._stopped.set()
+        for fetcher in self._fetchers.values():
+            fetcher.thread.join()
+        self._committer.join()
+        self.commit()
+
+    # =======================================================
+    # private function
+    # =======================================================
+
+    def _init_fetchers(self, shard_ids):
+        shards = self._datahub.list_shard(self._project_name, self._topic_name).shards
+        shards = [shard for shard in shards if shard.state in (ShardState.ACTIVE, ShardState.CLOSING,
+                                                               ShardState.CLOSED)]
+        if shard_ids is not None:
+            shards = [shard for shard in shards if shard.shard_id in shard_ids]
+        if not shards:
+            raise InvalidParameterException(ErrorMessage.NO_READABLE_SHARD)
+
+        offsets = self._datahub.init_and_get_subscription_offset(self._project_name, self._topic_name, self._sub_id,
+                                                                 [shard.shard_id for shard in shards]).offsets
+        return dict((shard.shard_id, _ShardFetcher(shard.shard_id, shard.state == ShardState.CLOSED,
+                                                   offsets[shard.shard_id]))
+                    for shard in shards)
+
+    def _init_cursor(self, fetcher):
+        offset = fetcher.offset
+        if offset.sequence >= 0:
+            try:
+                return self._datahub.get_cursor(self._project_name, self._topic_name, fetcher.shard_id,
+                                                CursorType.SEQUENCE, offset.sequence + 1).cursor
+            except InvalidParameterException as e:
+                # the record of the offset has expired
+                logger.warning('get cursor of shard %s by sequence %d failed, error: %s'
+                               % (fetcher.shard_id, offset.sequence + 1, e))
+        if offset.timestamp >= 0:
+            try:
+                return self._datahub.get_cursor(self._project_name, self._topic_name, fetcher.shard_id,
+                                                CursorType.SYSTEM_TIME, offset.timestamp).cursor
+            except InvalidParameterException as e:
+                logger.warning('get cursor of shard %s by system time %d failed, error: %s'
+                               % (fetcher.shard_id, offset.timestamp, e))
+        return self._datahub.get_cursor(self._project_name, self._topic_name, fetcher.shard_id,
+                                        CursorType.OLDEST).cursor
+
+    def _get_records(self, fetcher):
+        # batches keep prefetched records column by column, much smaller than one object per record
+        return self._datahub.get_record_batch(self._project_name, self._topic_name, fetcher.shard_id,
+                                              self._record_schema, fetcher.cursor, self._fetch_limit)
+
+    def _fetch(self, fetcher):
+        while not self._stopped.is_set():
+            try:
+                if fetcher.cursor is None:
+                    fetcher.cursor = self._init_cursor(fetcher)
+                result = self._get_records(fetcher)
+            except (LimitExceededException, InternalServerException) as e:
+                logger.warning('get records of shard %s failed, retry later, error: %s' % (fetcher.shard_id, e))
+                self._stopped.wait(self._fetch_interval)
+                continue
+            except InvalidParameterException as e:
+                if e.error_code != 'InvalidCursor':
+                    self._offer(e)
+                    return
+                logger.warning('cursor of shard %s expired, get cursor again' % fetcher.shard_id)
+                fetcher.cursor = None
+                continue
+            except Exception as e:
+                logger.error('get records of shard %s failed, error: %s' % (fetcher.shard_id, e))
+                self._offer(e)
+                return
+
+            if result.record_count == 0:
+                if fetcher.closed:
+                    logger.info('all records of closed shard %s have been fetched' % fetcher.shard_id)
+                    return
+                self._stopped.wait(self._fetch_interval)
+                continue
+
+            result.records.set_shard_id(fetcher.shard_id)
+            fetcher.cursor = result.next_cursor
+            if not self._offer(result.records):
+                return
+
+    def _offer(self, item):
+        # block while the prefetch queue is full, but give up once the consumer is closed
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _commit_periodically(self):
+        while not self._stopped.wait(self._commit_interval):
+            try:
+                self.commit()
+            except DatahubException as e:
+                logger.error('commit offsets of subscription %s failed, error: %s' % (self._sub_id, e))
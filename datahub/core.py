@@ -41,14 +41,37 @@ class DataHub(object):
     :param secret_access_key: Aliyun Access Key
     :param endpoint: Rest service URL
     :param enable_pb: enable protobuf when put/get records, default value is False in version <= 2.11, default value will be True in version >= 2.12
-    :param compress_format: compress format
-    :type compress_format: :class:`datahub.models.compress.CompressFormat`
+    :param compress_format: compress format, or an adaptive compression choosing the format of every request
+    :type compress_format: :class:`datahub.models.compress.CompressFormat` or
+        :class:`datahub.models.compress.AdaptiveCompression`
+    :param pb_codec: codec of records in protobuf mode, cprotobuf by default, run benchmarks/perf_codec.py to compare them
+    :type pb_codec: :class:`datahub.proto.codec.PBCodecType`
+    :param shared_transport: share connections with other clients of the same endpoint, default value is False
+    :param max_concurrency: max requests in flight to the endpoint, requests over it wait, None means no limit
+    :param http2: multiplex requests on HTTP/2 connections, falls back to HTTP/1.1 if the endpoint does not
+        support it, httpx[http2] is required, default value is False
+    :param retry_policy: retry policy of throttled and server failed requests, only failed records are retried
+        by put_records, default value is None which means no retry
+    :type retry_policy: :class:`datahub.retry.RetryPolicy`
+    :param rate_limiter: client side rate limiter of put_records and get records per shard, default value is None
+    :type rate_limiter: :class:`datahub.ratelimit.ShardRateLimiter`
+    :param metrics: metrics of requests and records, could be shared by clients, default value is None which
+        means no metrics
+    :type metrics: :class:`datahub.metrics.ClientMetrics`
+    :param hooks: hooks called before and after every request, e.g. :class:`datahub.tracing.OpenTelemetryHook`,
+        default value is None which means no hooks
+    :type hooks: list of :class:`datahub.tracing.RequestHook`
+    :param wire_logger: logger of requests and responses on the wire, by default they are logged to the
+        ``datahub.rest`` logger at DEBUG level
+    :type wire_logger: :class:`datahub.wirelog.WireLogger`
 
     :Example:
 
     >>> datahub = DataHub('**your access id**', '**your access key**', '**endpoint**')
     >>> datahub_pb = DataHub('**your access id**', '**your access key**', '**endpoint**', enable_pb=True)
     >>> datahub_lz4 = DataHub('**your access id**', '**your access key**', '**endpoint**', compress_format=CompressFormat.LZ4)
+    >>> datahub_adaptive = DataHub('**your access id**', '**your access key**', '**endpoint**', compress_format=AdaptiveCompression())
+    >>> datahub_shared = DataHub('**your access id**', '**your access key**', '**endpoint**', shared_transport=True)
     >>>
     >>> project_result = datahub.get_project('datahub_test')
     >>>
@@ -63,6 +86,23 @@ class DataHub(object):
         else:
             self._datahub_impl = DataHubJson(access_id, access_key, endpoint, compress_format, **kwargs)
 
+    def close(self):
+        """
+        Close connections of the client, shared connections are closed when no client uses them
+
+        :return: none
+        """
+        self._datahub_impl.close()
+
+    def transport_stats(self):
+        """
+        Get statistics of the connections used by the client
+
+        :return: statistics of connections
+        :rtype: :class:`datahub.transport.TransportStats`
+        """
+        return self._datahub_impl.transport_stats()
+
     def list_project(self):
         """
         List all project names
@@ -294,7 +334,7 @@ class DataHub(object):
 
         :param project_name: project name
         :param topic_name: topic name
-        :param record_list: record list
+        :param record_list: record list, or a :class:`datahub.models.RecordBatch`
         :type record_list: :class:`list`
         :return: failed records info
         :rtype: :class:`datahub.models.PutRecordsResult`
@@ -308,7 +348,32 @@ class DataHub(object):
         """
         return self._datahub_impl.put_records(project_name, topic_name, record_list)
 
-    def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num):
+    def put_columns(self, project_name, topic_name, columns, record_schema, shard_id=None):
+        """
+        Put tuple records given column by column to a topic, requires numpy.
+
+        Columns are validated against the schema in bulk and encoded without building a record object per row,
+        rows are split into several requests automatically when they exceed the limits of one request.
+
+        :param project_name: project name
+        :param topic_name: topic name
+        :param columns: pandas DataFrame, pyarrow Table, or dict from field name to numpy array / list
+        :param record_schema: tuple record schema
+        :type record_schema: :class:`datahub.models.RecordSchema`
+        :param shard_id: shard which all records are put to
+        :return: failed records info, index of failed record is the row index in columns
+        :rtype: :class:`datahub.models.PutRecordsResult`
+        :raise: :class:`datahub.exceptions.ResourceNotFoundException` if the project or topic not exists
+        :raise: :class:`datahub.exceptions.InvalidParameterException` if the columns are against the schema; project_name or topic_name is empty
+        :raise: :class:`datahub.exceptions.InvalidOperationException` if the shard is not active
+        :raise: :class:`datahub.exceptions.LimitExceededException` if query rate or throughput rate limit exceeded
+        :raise: :class:`datahub.exceptions.DatahubException` if crc is wrong in pb mode or numpy is not installed
+
+        .. see also:: :meth:`datahub.DataHub.get_tuple_columns`
+        """
+        return self._datahub_impl.put_columns(project_name, topic_name, columns, record_schema, shard_id)
+
+    def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num, lazy=False):
         """
         Get records from a topic
 
@@ -317,15 +382,17 @@ class DataHub(object):
         :param shard_id: shard id
         :param cursor: the cursor
         :param limit_num: record number need to read
+        :param lazy: records are decoded when they are accessed, see :class:`datahub.models.LazyRecords`
         :return: result include record list, start sequence, record num and next cursor
         :rtype: :class:`datahub.models.GetRecordsResult`
         :raise: :class:`datahub.exceptions.ResourceNotFoundException` if the project or topic or shard not exists
         :raise: :class:`datahub.exceptions.InvalidParameterException` if the cursor is invalid; project_name, topic_name, shard_id, or cursor is empty
         :raise: :class:`datahub.exceptions.DatahubException` if crc is wrong in pb mode
         """
-        return self._datahub_impl.get_blob_records(project_name, topic_name, shard_id, cursor, limit_num)
+        return self._datahub_impl.get_blob_records(project_name, topic_name, shard_id, cursor, limit_num, lazy)
 
-    def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+    def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num, fields=None,
+                          lazy=False):
         """
         Get records from a topic
 
@@ -336,15 +403,63 @@ class DataHub(object):
         :type record_schema: :class:`datahub.models.RecordSchema`
         :param cursor: the cursor
         :param limit_num: record number need to read
+        :param fields: names of the fields to decode, records are of the schema of those fields, all fields if not given
+        :param lazy: records are decoded when they are accessed, see :class:`datahub.models.LazyRecords`
         :return: result include record list, start sequence, record num and next cursor
         :rtype: :class:`datahub.models.GetRecordsResult`
         :raise: :class:`datahub.exceptions.ResourceNotFoundException` if the project or topic or shard not exists
-        :raise: :class:`datahub.exceptions.InvalidParameterException` if the cursor is invalid; project_name, topic_name, shard_id, or cursor is empty
+        :raise: :class:`datahub.exceptions.InvalidParameterException` if the cursor is invalid; project_name, topic_name, shard_id, or cursor is empty; a field of fields does not exist
         :raise: :class:`datahub.exceptions.DatahubException` if crc is wrong in pb mode
         """
         return self._datahub_impl.get_tuple_records(project_name, topic_name, shard_id, record_schema, cursor,
+                                                    limit_num, fields, lazy)
+
+    def get_tuple_columns(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        """
+        Get records from a topic decoded column by column into numpy arrays, requires numpy.
+
+        No record object is created, which makes decoding large pages much cheaper than
+        :meth:`get_tuple_records` for analytics. Record attributes are not decoded.
+
+        :param project_name: project name
+        :param topic_name: topic name
+        :param shard_id: shard id
+        :param record_schema: tuple record schema
+        :type record_schema: :class:`datahub.models.RecordSchema`
+        :param cursor: the cursor
+        :param limit_num: record number need to read
+        :return: result include columns, null masks, system times, start sequence, record num and next cursor
+        :rtype: :class:`datahub.models.GetColumnsResult`
+        :raise: :class:`datahub.exceptions.ResourceNotFoundException` if the project or topic or shard not exists
+        :raise: :class:`datahub.exceptions.InvalidParameterException` if the cursor is invalid; project_name, topic_name, shard_id, or cursor is empty
+        :raise: :class:`datahub.exceptions.DatahubException` if crc is wrong in pb mode or numpy is not installed
+        """
+        return self._datahub_impl.get_tuple_columns(project_name, topic_name, shard_id, record_schema, cursor,
                                                     limit_num)
 
+    def get_record_batch(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        """
+        Get records from a topic into a :class:`datahub.models.RecordBatch`.
+
+        Values are kept column by column and no object is created per record, which makes records held in
+        memory much smaller than records of :meth:`get_tuple_records` and :meth:`get_blob_records`.
+
+        :param project_name: project name
+        :param topic_name: topic name
+        :param shard_id: shard id
+        :param record_schema: tuple record schema, None for blob topics
+        :type record_schema: :class:`datahub.models.RecordSchema`
+        :param cursor: the cursor
+        :param limit_num: record number need to read
+        :return: result include record batch, start sequence, record num and next cursor
+        :rtype: :class:`datahub.models.GetRecordsResult`
+        :raise: :class:`datahub.exceptions.ResourceNotFoundException` if the project or topic or shard not exists
+        :raise: :class:`datahub.exceptions.InvalidParameterException` if the cursor is invalid; project_name, topic_name, shard_id, or cursor is empty; record_schema is neither None nor a RecordSchema
+        :raise: :class:`datahub.exceptions.DatahubException` if crc is wrong in pb mode
+        """
+        return self._datahub_impl.get_record_batch(project_name, topic_name, shard_id, record_schema, cursor,
+                                                   limit_num)
+
     def get_metering_info(self, project_name, topic_name, shard_id):
         """
         Get a shard metering info
@@ -19,97 +19,160 @@
 
 from .auth import AliyunAccount
 from .exceptions import InvalidParameterException, DatahubException
-from .models import ShardState, OffsetBase, SubscriptionState, FieldType, ConnectorConfig
+from .models import ShardState, OffsetBase, SubscriptionState, FieldType, ConnectorConfig, CompressFormat
+from .models.columnar import encode_rows
 from .models.params import *
 from .models.results import *
-from .rest import Path
+from .proto.codec import get_codec
+from .ratelimit import RequestLimit, put_records_keys, throttled_put_records_keys, throttled_put_columns_keys
+from .rest import Path, HTTPMethod
 from .rest import RestClient
+from .retry import PutRecordsRetry
+from .tracing import NULL_CONTEXT, Phase
 from .utils import check_project_name_valid, check_topic_name_valid, check_type, check_positive, \
-    to_text, ErrorMessage, check_empty, check_negative
+    ErrorMessage, check_empty, check_negative
 
 
-class DataHubJson(object):
+class ApiRequest(object):
     """
-    Datahub json client
+    Request of an api built by :class:`DataHubJsonBase`, sent by the rest client of the sync or async client
+
+    :param method: http method
+    :param url: url without the endpoint
+    :param request_param: params giving the body and extra headers, None for requests without body
+    :param result_class: result parsed from the content of the response, None for apis without result
+    :param parse_kwargs: kwargs of ``parse_content`` of the result class
+    :param compress_format: compress format of the body
+    :param traced: the request is traced from encoding the body to parsing the result, true for record apis
+    """
+
+    __slots__ = ('method', 'url', 'request_param', 'result_class', 'parse_kwargs', 'compress_format', 'traced')
+
+    def __init__(self, method, url, request_param=None, result_class=None, parse_kwargs=None,
+                 compress_format=CompressFormat.NONE, traced=False):
+        self.method = method
+        self.url = url
+        self.request_param = request_param
+        self.result_class = result_class
+        self.parse_kwargs = parse_kwargs or {}
+        self.compress_format = compress_format
+        self.traced = traced
+
+    def encode(self, context=NULL_CONTEXT):
+        """
+        Encode the body
+
+        :return: kwargs of :meth:`datahub.rest.RestClient.request`
+        """
+        kwargs = {'compress_format': self.compress_format}
+        if self.request_param is not None:
+            with context.phase(Phase.ENCODE):
+                kwargs['data'] = self.request_param.content()
+            headers = self.request_param.extra_headers()
+            if headers:
+                kwargs['headers'] = headers
+        return kwargs
+
+    def parse(self, content, context=NULL_CONTEXT):
+        """
+        Parse the content of the response
+
+        :return: result, None for apis without result
+        """
+        if self.result_class is None:
+            return None
+        with context.phase(Phase.PARSE):
+            return self.result_class.parse_content(content, **self.parse_kwargs)
+
+
+class DataHubJsonBase(object):
+    """
+    Requests of the json protocol built for the sync and async clients, which only send them and sleep.
+
+    Every ``_<api>_request`` method checks the arguments of the api and builds its :class:`ApiRequest`,
+    rate limits and record counts are kept by the ``_on_*`` methods around sending.
     """
 
     MAX_WAITING_MILLISECOND = 120
 
+    _rest_client_class = None
+
+    _put_columns_params = PutColumnsRequestParams
+    _get_records_params = GetRecordsRequestParams
+    _records_result = GetRecordsResult
+    _columns_result = GetColumnsResult
+    _batch_result = GetRecordBatchResult
+
     def __init__(self, access_id, access_key, endpoint=None, compress_format=None, **kwargs):
         self._account = kwargs.pop('account', None)
         if self._account is None:
             self._account = AliyunAccount(access_id=access_id, access_key=access_key)
         self._endpoint = endpoint
         self._compress_format = compress_format
-        self._rest_client = RestClient(self._account, self._endpoint, **kwargs)
+        self._rate_limiter = kwargs.pop('rate_limiter', None)
+        self._rest_client = self._rest_client_class(self._account, self._endpoint, **kwargs)
 
-    def list_project(self):
-        url = Path.PROJECTS
+    def _list_project_request(self):
+        return ApiRequest(HTTPMethod.GET, Path.PROJECTS, result_class=ListProjectResult)
 
-        content = self._rest_client.get(url)
-
-        result = ListProjectResult.parse_content(content)
-        return result
-
-    def create_project(self, project_name, comment):
+    def _create_project_request(self, project_name, comment):
         if not check_project_name_valid(project_name):
             raise InvalidParameterException(ErrorMessage.INVALID_PROJECT_NAME)
 
         url = Path.PROJECT % project_name
-        request_param = CreateProjectRequestParams(comment)
-
-        self._rest_client.post(url, data=request_param.content())
+        return ApiRequest(HTTPMethod.POST, url, CreateProjectRequestParams(comment))
 
-    def get_project(self, project_name):
+    def _get_project_request(self, project_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
 
         url = Path.PROJECT % project_name
+        return ApiRequest(HTTPMethod.GET, url, result_class=GetProjectResult,
+                          parse_kwargs={'project_name': project_name})
 
-        content = self._rest_client.get(url)
-        result = GetProjectResult.parse_content(to_text(content), project_name=project_name)
-        return result
-
-    def delete_project(self, project_name):
+    def _delete_project_request(self, project_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
 
         url = Path.PROJECT % project_name
+        return ApiRequest(HTTPMethod.DELETE, url)
 
-        self._rest_client.delete(url)
-
-    def list_topic(self, project_name):
+    def _list_topic_request(self, project_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
 
         url = Path.TOPICS % project_name
+        return ApiRequest(HTTPMethod.GET, url, result_class=ListTopicResult)
 
-        content = self._rest_client.get(url)
-
-        result = ListTopicResult.parse_content(content)
-        return result
-
-    def create_blob_topic(self, project_name, topic_name, shard_count, life_cycle, comment):
-        self.__create_topic(project_name, topic_name, shard_count, life_cycle, RecordType.BLOB, comment)
+    def _create_topic_request(self, project_name, topic_name, shard_count, life_cycle, record_type, comment,
+                              record_schema=None):
+        if check_empty(project_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
+        if not check_topic_name_valid(topic_name):
+            raise InvalidParameterException(ErrorMessage.INVALID_TOPIC_NAME)
+        if not check_positive(life_cycle):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'life_cycle')
+        if not check_type(record_type, RecordType):
+            raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('record_type', RecordType.__name__))
+        if record_type == RecordType.TUPLE:
+            if not check_type(record_schema, RecordSchema):
+                raise InvalidParameterException(ErrorMessage.INVALID_RECORD_SCHEMA_TYPE)
 
-    def create_tuple_topic(self, project_name, topic_name, shard_count, life_cycle, record_schema, comment):
-        self.__create_topic(project_name, topic_name, shard_count, life_cycle, RecordType.TUPLE, comment, record_schema)
+        url = Path.TOPIC % (project_name, topic_name)
+        request_param = CreateTopicRequestParams(shard_count, life_cycle, record_type, record_schema, comment)
+        return ApiRequest(HTTPMethod.POST, url, request_param)
 
-    def get_topic(self, project_name, topic_name):
+    def _get_topic_request(self, project_name, topic_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
         url = Path.TOPIC % (project_name, topic_name)
+        return ApiRequest(HTTPMethod.GET, url, result_class=GetTopicResult,
+                          parse_kwargs={'project_name': project_name, 'topic_name': topic_name})
 
-        content = self._rest_client.get(url)
-
-        result = GetTopicResult.parse_content(to_text(content), project_name=project_name,
-                                              topic_name=topic_name)
-        return result
-
-    def update_topic(self, project_name, topic_name, life_cycle, comment):
+    def _update_topic_request(self, project_name, topic_name, life_cycle, comment):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -118,21 +181,18 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'life_cycle')
 
         url = Path.TOPIC % (project_name, topic_name)
-        request_param = UpdateTopicRequestParams(life_cycle, comment)
-
-        self._rest_client.put(url, data=request_param.content())
+        return ApiRequest(HTTPMethod.PUT, url, UpdateTopicRequestParams(life_cycle, comment))
 
-    def delete_topic(self, project_name, topic_name):
+    def _delete_topic_request(self, project_name, topic_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
         url = Path.TOPIC % (project_name, topic_name)
+        return ApiRequest(HTTPMethod.DELETE, url)
 
-        self._rest_client.delete(url)
-
-    def append_field(self, project_name, topic_name, field_name, field_type):
+    def _append_field_request(self, project_name, topic_name, field_name, field_type):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -144,11 +204,10 @@ class DataHubJson(object):
                                             ('field_type', FieldType.__name__))
 
         url = Path.TOPIC % (project_name, topic_name)
-        request_param = AppendFieldParams(field_name, field_type)
+        return ApiRequest(HTTPMethod.POST, url, AppendFieldParams(field_name, field_type))
 
-        self._rest_client.post(url, data=request_param.content())
-
-    def wait_shards_ready(self, project_name, topic_name, timeout=30):
+    @staticmethod
+    def _check_wait_shards_ready(project_name, topic_name, timeout):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -156,31 +215,23 @@ class DataHubJson(object):
         if check_negative(timeout):
             raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'timeout')
 
-        current_time = time.time()
-        end_time = current_time + timeout
-
-        while current_time <= end_time:
-            if self.__is_shard_load_completed(project_name, topic_name):
-                return
-            time.sleep(1)
-            current_time = time.time()
-
-        raise DatahubException(ErrorMessage.WAIT_SHARD_TIMEOUT)
+    @staticmethod
+    def _is_shard_load_completed(list_shard_result):
+        for shard in list_shard_result.shards:
+            if shard.state not in (ShardState.ACTIVE, ShardState.CLOSED):
+                return False
+        return True
 
-    def list_shard(self, project_name, topic_name):
+    def _list_shard_request(self, project_name, topic_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
         url = Path.SHARDS % (project_name, topic_name)
+        return ApiRequest(HTTPMethod.GET, url, result_class=ListShardResult)
 
-        content = self._rest_client.get(url)
-
-        result = ListShardResult.parse_content(content)
-        return result
-
-    def merge_shard(self, project_name, topic_name, shard_id, adj_shard_id):
+    def _merge_shard_request(self, project_name, topic_name, shard_id, adj_shard_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -191,36 +242,33 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'adj_shard_id')
 
         url = Path.SHARDS % (project_name, topic_name)
-        request_param = MergeShardRequestParams(shard_id, adj_shard_id)
+        return ApiRequest(HTTPMethod.POST, url, MergeShardRequestParams(shard_id, adj_shard_id),
+                          MergeShardResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
-
-        result = MergeShardResult.parse_content(content)
-        return result
-
-    def split_shard(self, project_name, topic_name, shard_id, split_key=''):
+    @staticmethod
+    def _check_split_shard(project_name, topic_name, shard_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
         if check_empty(shard_id):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'shard_id')
-        if check_empty(split_key):
-            shard_info = self.__get_shard(project_name, topic_name, shard_id)
-            if not check_empty(shard_info):
-                begin_hash_key = int(shard_info.begin_hash_key, 16)
-                end_hash_key = int(shard_info.end_hash_key, 16)
-                split_key = hex(int((begin_hash_key + end_hash_key) // 2))[2:]
-
-        url = Path.SHARDS % (project_name, topic_name)
-        request_param = SplitShardRequestParams(shard_id, split_key)
 
-        content = self._rest_client.post(url, data=request_param.content())
+    @staticmethod
+    def _middle_hash_key(list_shard_result, shard_id):
+        for shard in list_shard_result.shards:
+            if shard.shard_id == shard_id:
+                begin_hash_key = int(shard.begin_hash_key, 16)
+                end_hash_key = int(shard.end_hash_key, 16)
+                return hex(int((begin_hash_key + end_hash_key) // 2))[2:]
+        return ''
 
-        result = SplitShardResult.parse_content(content)
-        return result
+    def _split_shard_request(self, project_name, topic_name, shard_id, split_key):
+        # arguments are checked by _check_split_shard before the split key is looked up
+        url = Path.SHARDS % (project_name, topic_name)
+        return ApiRequest(HTTPMethod.POST, url, SplitShardRequestParams(shard_id, split_key), SplitShardResult)
 
-    def get_cursor(self, project_name, topic_name, shard_id, cursor_type, param=-1):
+    def _get_cursor_request(self, project_name, topic_name, shard_id, cursor_type, param):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -235,66 +283,157 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.MISSING_SEQUENCE)
 
         url = Path.SHARD % (project_name, topic_name, shard_id)
-        request_param = GetCursorRequestParams(cursor_type, param)
+        return ApiRequest(HTTPMethod.POST, url, GetCursorRequestParams(cursor_type, param), GetCursorResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
+    @staticmethod
+    def _put_records_url(project_name, topic_name):
+        if check_empty(project_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
+        if check_empty(topic_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
-        result = GetCursorResult.parse_content(content)
-        return result
+        return Path.SHARDS % (project_name, topic_name)
 
-    def put_records(self, project_name, topic_name, record_list):
+    def _put_records_retry(self, record_list, result):
+        """
+        Retry of the failed records of put records, None if they are not retried
+        """
+        retry_policy = self._rest_client.retry_policy
+        if retry_policy is None or result.failed_record_count == 0:
+            return None
+        return PutRecordsRetry(retry_policy, record_list)
+
+    def _put_request(self, url, request_param):
+        return ApiRequest(HTTPMethod.POST, url, request_param, PutRecordsResult,
+                          compress_format=self._compress_format, traced=True)
+
+    def _put_records_request(self, url, record_list):
+        return self._put_request(url, PutRecordsRequestParams(record_list))
+
+    def _request_limit(self, keys):
+        """
+        Rate limit of the shards a request is sent to, None if the client is not rate limited
+        """
+        if self._rate_limiter is None:
+            return None
+        return RequestLimit(self._rate_limiter, keys)
+
+    def _put_records_limit(self, project_name, topic_name, record_list):
+        if self._rate_limiter is None:
+            return None
+        return self._request_limit(put_records_keys(project_name, topic_name, record_list))
+
+    def _on_put_records(self, project_name, topic_name, record_list, result, limit):
+        if limit is not None:
+            limit.on_result(throttled_put_records_keys(project_name, topic_name, record_list, result))
+        self._count_records(project_name, topic_name, put=len(record_list) - result.failed_record_count,
+                            failed=result.failed_record_count)
+
+    def _put_columns_requests(self, project_name, topic_name, columns, record_schema, shard_id):
+        """
+        Requests of put columns split by the size limit
+
+        :return: count of rows, and (index of the first row, request) of every part
+        """
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
+        if not check_type(record_schema, RecordSchema):
+            raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('record_schema', RecordSchema.__name__))
 
         url = Path.SHARDS % (project_name, topic_name)
+        rows = encode_rows(record_schema.field_list, columns)
+        return len(rows), ((start, self._put_request(url, request_param))
+                           for start, request_param in self._put_columns_params.split(rows, shard_id))
 
-        request_param = PutRecordsRequestParams(record_list)
+    def _put_columns_limit(self, project_name, topic_name, shard_id):
+        return self._request_limit([(project_name, topic_name, shard_id)])
 
-        content = self._rest_client.post(url, data=request_param.content(), headers=request_param.extra_headers(),
-                                         compress_format=self._compress_format)
+    @staticmethod
+    def _on_put_columns(project_name, topic_name, shard_id, result, limit):
+        if limit is not None:
+            limit.on_result(throttled_put_columns_keys(project_name, topic_name, shard_id, result))
 
-        result = PutRecordsResult.parse_content(content)
-
-        return result
+    @staticmethod
+    def _failed_rows(start, result):
+        return (FailedRecord(start + failed_record.index, failed_record.error_code, failed_record.error_message)
+                for failed_record in result.failed_records)
 
-    def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num):
-        return self.__get_records(project_name, topic_name, shard_id, cursor, limit_num)
+    def _put_columns_result(self, project_name, topic_name, row_count, failed_records):
+        self._count_records(project_name, topic_name, put=row_count - len(failed_records), failed=len(failed_records))
+        return PutRecordsResult(len(failed_records), failed_records)
 
-    def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
-        return self.__get_records(project_name, topic_name, shard_id, cursor, limit_num, record_schema)
-
-    def get_metering_info(self, project_name, topic_name, shard_id):
+    def _get_records_request(self, project_name, topic_name, shard_id, cursor, limit_num, result_class,
+                             **kwargs):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
         if check_empty(shard_id):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'shard_id')
+        if check_empty(cursor):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'cursor')
 
         url = Path.SHARD % (project_name, topic_name, shard_id)
-        request_param = GetMeteringInfoRequestParams()
+        return ApiRequest(HTTPMethod.POST, url, self._get_records_params(cursor, limit_num), result_class, kwargs,
+                          compress_format=self._compress_format, traced=True)
 
-        content = self._rest_client.post(url, data=request_param.content())
+    def _get_blob_records_request(self, project_name, topic_name, shard_id, cursor, limit_num, lazy):
+        return self._get_records_request(project_name, topic_name, shard_id, cursor, limit_num,
+                                         self._records_result, record_schema=None, lazy=lazy)
 
-        result = GetMeteringInfoResult.parse_content(content)
-        return result
+    def _get_tuple_records_request(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num,
+                                   fields, lazy):
+        return self._get_records_request(project_name, topic_name, shard_id, cursor, limit_num,
+                                         self._records_result, record_schema=record_schema, fields=fields,
+                                         lazy=lazy)
 
-    def list_connector(self, project_name, topic_name):
+    def _get_tuple_columns_request(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        return self._get_records_request(project_name, topic_name, shard_id, cursor, limit_num,
+                                         self._columns_result, record_schema=record_schema)
+
+    def _get_record_batch_request(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        # None for blob topics, other types are rejected before they reach the request
+        if record_schema is not None and not check_type(record_schema, RecordSchema):
+            raise InvalidParameterException(ErrorMessage.INVALID_RECORD_SCHEMA_TYPE)
+        return self._get_records_request(project_name, topic_name, shard_id, cursor, limit_num,
+                                         self._batch_result, record_schema=record_schema)
+
+    def _get_records_limit(self, project_name, topic_name, shard_id):
+        return self._request_limit([(project_name, topic_name, shard_id)])
+
+    def _on_get_records(self, project_name, topic_name, result, limit):
+        if limit is not None:
+            limit.on_result()
+        self._count_records(project_name, topic_name, read=result.record_count)
+
+    def _count_records(self, project_name, topic_name, put=0, failed=0, read=0):
+        metrics = self._rest_client.metrics
+        if metrics is not None:
+            metrics.on_records(project_name, topic_name, put, failed, read)
+
+    def _get_metering_info_request(self, project_name, topic_name, shard_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
+        if check_empty(shard_id):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'shard_id')
 
-        url = Path.CONNECTORS % (project_name, topic_name)
+        url = Path.SHARD % (project_name, topic_name, shard_id)
+        return ApiRequest(HTTPMethod.POST, url, GetMeteringInfoRequestParams(), GetMeteringInfoResult)
 
-        content = self._rest_client.get(url)
+    def _list_connector_request(self, project_name, topic_name):
+        if check_empty(project_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
+        if check_empty(topic_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
-        result = ListConnectorResult.parse_content(content)
-        return result
+        url = Path.CONNECTORS % (project_name, topic_name)
+        return ApiRequest(HTTPMethod.GET, url, result_class=ListConnectorResult)
 
-    def create_connector(self, project_name, topic_name, connector_type, column_fields, config):
+    def _create_connector_request(self, project_name, topic_name, connector_type, column_fields, config):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -307,11 +446,9 @@ class DataHubJson(object):
                                             ('config', ConnectorConfig.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
-        request_param = CreateConnectorParams(column_fields, config)
-
-        self._rest_client.post(url, data=request_param.content())
+        return ApiRequest(HTTPMethod.POST, url, CreateConnectorParams(column_fields, config))
 
-    def get_connector(self, project_name, topic_name, connector_type):
+    def _get_connector_request(self, project_name, topic_name, connector_type):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -321,13 +458,9 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
+        return ApiRequest(HTTPMethod.GET, url, result_class=GetConnectorResult)
 
-        content = self._rest_client.get(url)
-
-        result = GetConnectorResult.parse_content(content)
-        return result
-
-    def delete_connector(self, project_name, topic_name, connector_type):
+    def _delete_connector_request(self, project_name, topic_name, connector_type):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -337,10 +470,9 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
+        return ApiRequest(HTTPMethod.DELETE, url)
 
-        self._rest_client.delete(url)
-
-    def get_connector_shard_status(self, project_name, topic_name, connector_type, shard_id):
+    def _get_connector_shard_status_request(self, project_name, topic_name, connector_type, shard_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -352,14 +484,10 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
-        request_param = GetConnectorShardStatusParams(shard_id)
-
-        content = self._rest_client.post(url, data=request_param.content())
-
-        result = GetConnectorShardStatusResult.parse_content(content)
-        return result
+        return ApiRequest(HTTPMethod.POST, url, GetConnectorShardStatusParams(shard_id),
+                          GetConnectorShardStatusResult)
 
-    def reload_connector(self, project_name, topic_name, connector_type, shard_id=''):
+    def _reload_connector_request(self, project_name, topic_name, connector_type, shard_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -369,11 +497,9 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
-        request_param = ReloadConnectorParams(shard_id)
-
-        self._rest_client.post(url, data=request_param.content())
+        return ApiRequest(HTTPMethod.POST, url, ReloadConnectorParams(shard_id))
 
-    def append_connector_field(self, project_name, topic_name, connector_type, field_name):
+    def _append_connector_field_request(self, project_name, topic_name, connector_type, field_name):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -385,11 +511,9 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
-        request_param = AppendConnectorFieldParams(field_name)
+        return ApiRequest(HTTPMethod.POST, url, AppendConnectorFieldParams(field_name))
 
-        self._rest_client.post(url, data=request_param.content())
-
-    def init_and_get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids):
+    def _init_and_get_subscription_offset_request(self, project_name, topic_name, sub_id, shard_ids):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -405,14 +529,10 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('shard_ids', list.__name__))
 
         url = Path.OFFSETS % (project_name, topic_name, sub_id)
-        request_param = InitAndGetSubscriptionOffsetParams(shard_ids)
+        return ApiRequest(HTTPMethod.POST, url, InitAndGetSubscriptionOffsetParams(shard_ids),
+                          InitAndGetSubscriptionOffsetResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
-
-        result = InitAndGetSubscriptionOffsetResult.parse_content(content)
-        return result
-
-    def get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids=None):
+    def _get_subscription_offset_request(self, project_name, topic_name, sub_id, shard_ids):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -424,14 +544,10 @@ class DataHubJson(object):
             shard_ids = [shard_ids]
 
         url = Path.OFFSETS % (project_name, topic_name, sub_id)
-        request_param = GetSubscriptionOffsetParams(shard_ids)
+        return ApiRequest(HTTPMethod.POST, url, GetSubscriptionOffsetParams(shard_ids),
+                          GetSubscriptionOffsetResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
-
-        result = GetSubscriptionOffsetResult.parse_content(content)
-        return result
-
-    def update_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+    def _update_subscription_offset_request(self, project_name, topic_name, sub_id, offsets):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -446,11 +562,9 @@ class DataHubJson(object):
                 offsets[k] = OffsetWithSession.from_dict(v)
 
         url = Path.OFFSETS % (project_name, topic_name, sub_id)
-        request_param = UpdateSubscriptionOffsetParams(offsets)
-
-        self._rest_client.put(url, data=request_param.content())
+        return ApiRequest(HTTPMethod.PUT, url, UpdateSubscriptionOffsetParams(offsets))
 
-    def get_connector_done_time(self, project_name, topic_name, connector_type):
+    def _get_connector_done_time_request(self, project_name, topic_name, connector_type):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -460,17 +574,9 @@ class DataHubJson(object):
                                             ('connector_type', ConnectorType.__name__))
 
         url = Path.DONE_TIME % (project_name, topic_name, connector_type.value)
+        return ApiRequest(HTTPMethod.GET, url, result_class=GetConnectorDoneTimeResult)
 
-        content = self._rest_client.get(url)
-
-        result = GetConnectorDoneTimeResult.parse_content(content)
-        return result
-
-    # =======================================================
-    # internal api
-    # =======================================================
-
-    def update_connector_state(self, project_name, topic_name, connector_type, connector_state):
+    def _update_connector_state_request(self, project_name, topic_name, connector_type, connector_state):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -483,25 +589,18 @@ class DataHubJson(object):
                                             ('connector_state', ConnectorState.__name__))
 
         url = Path.CONNECTOR % (project_name, topic_name, connector_type.value)
-        request_param = UpdateConnectorStateParams(connector_state)
+        return ApiRequest(HTTPMethod.POST, url, UpdateConnectorStateParams(connector_state))
 
-        self._rest_client.post(url, data=request_param.content())
-
-    def create_subscription(self, project_name, topic_name, comment):
+    def _create_subscription_request(self, project_name, topic_name, comment):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
 
         url = Path.SUBSCRIPTIONS % (project_name, topic_name)
-        request_param = CreateSubscriptionParams(comment)
+        return ApiRequest(HTTPMethod.POST, url, CreateSubscriptionParams(comment), CreateSubscriptionResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
-
-        result = CreateSubscriptionResult.parse_content(content)
-        return result
-
-    def delete_subscription(self, project_name, topic_name, sub_id):
+    def _delete_subscription_request(self, project_name, topic_name, sub_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -510,10 +609,9 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'sub_id')
 
         url = Path.SUBSCRIPTION % (project_name, topic_name, sub_id)
+        return ApiRequest(HTTPMethod.DELETE, url)
 
-        self._rest_client.delete(url)
-
-    def get_subscription(self, project_name, topic_name, sub_id):
+    def _get_subscription_request(self, project_name, topic_name, sub_id):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -522,13 +620,9 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'sub_id')
 
         url = Path.SUBSCRIPTION % (project_name, topic_name, sub_id)
+        return ApiRequest(HTTPMethod.GET, url, result_class=GetSubscriptionResult)
 
-        content = self._rest_client.get(url)
-
-        result = GetSubscriptionResult.parse_content(content)
-        return result
-
-    def update_subscription(self, project_name, topic_name, sub_id, comment):
+    def _update_subscription_request(self, project_name, topic_name, sub_id, comment):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -537,11 +631,9 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'sub_id')
 
         url = Path.SUBSCRIPTION % (project_name, topic_name, sub_id)
-        request_param = UpdateSubscriptionParams(comment)
+        return ApiRequest(HTTPMethod.PUT, url, UpdateSubscriptionParams(comment))
 
-        self._rest_client.put(url, data=request_param.content())
-
-    def update_subscription_state(self, project_name, topic_name, sub_id, state):
+    def _update_subscription_state_request(self, project_name, topic_name, sub_id, state):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -553,11 +645,9 @@ class DataHubJson(object):
                                             ('state', SubscriptionState.__name__))
 
         url = Path.SUBSCRIPTION % (project_name, topic_name, sub_id)
-        request_param = UpdateSubscriptionStateParams(state)
+        return ApiRequest(HTTPMethod.PUT, url, UpdateSubscriptionStateParams(state))
 
-        self._rest_client.put(url, data=request_param.content())
-
-    def list_subscription(self, project_name, topic_name, query_key, page_index, page_size):
+    def _list_subscription_request(self, project_name, topic_name, query_key, page_index, page_size):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -568,13 +658,10 @@ class DataHubJson(object):
             raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'page_size')
 
         url = Path.SUBSCRIPTIONS % (project_name, topic_name)
-        request_param = ListSubscriptionParams(query_key, page_index, page_size)
+        return ApiRequest(HTTPMethod.POST, url, ListSubscriptionParams(query_key, page_index, page_size),
+                          ListSubscriptionResult)
 
-        content = self._rest_client.post(url, data=request_param.content())
-        result = ListSubscriptionResult.parse_content(content)
-        return result
-
-    def reset_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+    def _reset_subscription_offset_request(self, project_name, topic_name, sub_id, offsets):
         if check_empty(project_name):
             raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
         if check_empty(topic_name):
@@ -591,111 +678,253 @@ class DataHubJson(object):
                 offsets[k] = OffsetBase.from_dict(v)
 
         url = Path.OFFSETS % (project_name, topic_name, sub_id)
-        request_param = ResetSubscriptionOffsetParams(offsets)
+        return ApiRequest(HTTPMethod.PUT, url, ResetSubscriptionOffsetParams(offsets))
 
-        self._rest_client.put(url, data=request_param.content())
 
-    # =======================================================
-    # private function
-    # =======================================================
+class DataHubPBBase(DataHubJsonBase):
+    """
+    Requests of the protobuf protocol, records are sent and read by protobuf and their bodies are not compressed
+    """
 
-    def __is_shard_load_completed(self, project_name, topic_name):
-        shards = self.list_shard(project_name, topic_name)
-        for shard in shards.shards:
-            if shard.state not in (ShardState.ACTIVE, ShardState.CLOSED):
-                return False
-        return True
+    _put_columns_params = PutPBColumnsRequestParams
+    _get_records_params = GetPBRecordsRequestParams
+    _records_result = GetPBRecordsResult
+    _columns_result = GetPBColumnsResult
+    _batch_result = GetPBRecordBatchResult
 
-    def __get_shard(self, project_name, topic_name, shard_id):
-        shards = self.list_shard(project_name, topic_name)
-        for shard in shards.shards:
-            if shard.shard_id == shard_id:
-                return shard
+    def __init__(self, access_id, access_key, endpoint=None, compress_format=None, **kwargs):
+        self._codec = get_codec(kwargs.pop('pb_codec', None))
+        super(DataHubPBBase, self).__init__(access_id, access_key, endpoint, compress_format, **kwargs)
 
-    def __create_topic(self, project_name, topic_name, shard_count, life_cycle, record_type, comment,
-                       record_schema=None):
-        if check_empty(project_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
-        if not check_topic_name_valid(topic_name):
-            raise InvalidParameterException(ErrorMessage.INVALID_TOPIC_NAME)
-        if not check_positive(life_cycle):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'life_cycle')
-        if not check_type(record_type, RecordType):
-            raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('record_type', RecordType.__name__))
-        if record_type == RecordType.TUPLE:
-            if not check_type(record_schema, RecordSchema):
-                raise InvalidParameterException(ErrorMessage.INVALID_RECORD_SCHEMA_TYPE)
+    def _put_request(self, url, request_param):
+        return ApiRequest(HTTPMethod.POST, url, request_param, PutPBRecordsResult, traced=True)
 
-        url = Path.TOPIC % (project_name, topic_name)
-        request_param = CreateTopicRequestParams(shard_count, life_cycle, record_type, record_schema, comment)
+    def _put_records_request(self, url, record_list):
+        return self._put_request(url, PutPBRecordsRequestParams(record_list, self._codec))
 
-        self._rest_client.post(url, data=request_param.content())
+    def _get_records_request(self, project_name, topic_name, shard_id, cursor, limit_num, result_class,
+                             **kwargs):
+        return super(DataHubPBBase, self)._get_records_request(project_name, topic_name, shard_id, cursor,
+                                                               limit_num, result_class, codec=self._codec,
+                                                               **kwargs)
 
-    def __get_records(self, project_name, topic_name, shard_id, cursor, limit_num, record_schema=None):
-        if check_empty(project_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
-        if check_empty(topic_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
-        if check_empty(shard_id):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'shard_id')
-        if check_empty(cursor):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'cursor')
 
-        url = Path.SHARD % (project_name, topic_name, shard_id)
+class DataHubJson(DataHubJsonBase):
+    """
+    Datahub json client
+    """
 
-        request_param = GetRecordsRequestParams(cursor, limit_num)
+    _rest_client_class = RestClient
 
-        content = self._rest_client.post(url, data=request_param.content(), headers=request_param.extra_headers(),
-                                         compress_format=self._compress_format)
+    def close(self):
+        self._rest_client.close()
 
-        result = GetRecordsResult.parse_content(content, record_schema=record_schema)
+    def transport_stats(self):
+        return self._rest_client.transport.stats()
 
-        return result
+    def _send(self, request, limit=None):
+        if not request.traced:
+            return request.parse(self._rest_client.request(request.method, request.url, limit=limit,
+                                                           **request.encode()))
+        with self._rest_client.trace() as context:
+            kwargs = request.encode(context)
+            content = self._rest_client.request(request.method, request.url, context=context, limit=limit, **kwargs)
+            return request.parse(content, context)
 
+    def list_project(self):
+        return self._send(self._list_project_request())
 
-class DataHubPB(DataHubJson):
-    """
-    DataHub protobuf client
-    """
+    def create_project(self, project_name, comment):
+        self._send(self._create_project_request(project_name, comment))
 
-    def put_records(self, project_name, topic_name, record_list):
-        if check_empty(project_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
-        if check_empty(topic_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
+    def get_project(self, project_name):
+        return self._send(self._get_project_request(project_name))
 
-        url = Path.SHARDS % (project_name, topic_name)
+    def delete_project(self, project_name):
+        self._send(self._delete_project_request(project_name))
 
-        request_param = PutPBRecordsRequestParams(record_list)
+    def list_topic(self, project_name):
+        return self._send(self._list_topic_request(project_name))
 
-        content = self._rest_client.post(url, data=request_param.content(), headers=request_param.extra_headers())
+    def create_blob_topic(self, project_name, topic_name, shard_count, life_cycle, comment):
+        self._send(self._create_topic_request(project_name, topic_name, shard_count, life_cycle, RecordType.BLOB,
+                                              comment))
 
-        result = PutPBRecordsResult.parse_content(content)
+    def create_tuple_topic(self, project_name, topic_name, shard_count, life_cycle, record_schema, comment):
+        self._send(self._create_topic_request(project_name, topic_name, shard_count, life_cycle, RecordType.TUPLE,
+                                              comment, record_schema))
 
-        return result
+    def get_topic(self, project_name, topic_name):
+        return self._send(self._get_topic_request(project_name, topic_name))
 
-    def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num):
-        return self.__get_records(project_name, topic_name, shard_id, cursor, limit_num)
+    def update_topic(self, project_name, topic_name, life_cycle, comment):
+        self._send(self._update_topic_request(project_name, topic_name, life_cycle, comment))
 
-    def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
-        return self.__get_records(project_name, topic_name, shard_id, cursor, limit_num, record_schema)
+    def delete_topic(self, project_name, topic_name):
+        self._send(self._delete_topic_request(project_name, topic_name))
 
-    def __get_records(self, project_name, topic_name, shard_id, cursor, limit_num, record_schema=None):
-        if check_empty(project_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
-        if check_empty(topic_name):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
-        if check_empty(shard_id):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'shard_id')
-        if check_empty(cursor):
-            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'cursor')
+    def append_field(self, project_name, topic_name, field_name, field_type):
+        self._send(self._append_field_request(project_name, topic_name, field_name, field_type))
 
-        url = Path.SHARD % (project_name, topic_name, shard_id)
-        request_param = GetPBRecordsRequestParams(cursor, limit_num)
+    def wait_shards_ready(self, project_name, topic_name, timeout=30):
+        self._check_wait_shards_ready(project_name, topic_name, timeout)
+
+        current_time = time.time()
+        end_time = current_time + timeout
+
+        while current_time <= end_time:
+            if self._is_shard_load_completed(self.list_shard(project_name, topic_name)):
+                return
+            time.sleep(1)
+            current_time = time.time()
+
+        raise DatahubException(ErrorMessage.WAIT_SHARD_TIMEOUT)
+
+    def list_shard(self, project_name, topic_name):
+        return self._send(self._list_shard_request(project_name, topic_name))
+
+    def merge_shard(self, project_name, topic_name, shard_id, adj_shard_id):
+        return self._send(self._merge_shard_request(project_name, topic_name, shard_id, adj_shard_id))
 
-        content = self._rest_client.post(url, data=request_param.content(), headers=request_param.extra_headers(),
-                                         compress_format=self._compress_format)
+    def split_shard(self, project_name, topic_name, shard_id, split_key=''):
+        self._check_split_shard(project_name, topic_name, shard_id)
+        if check_empty(split_key):
+            split_key = self._middle_hash_key(self.list_shard(project_name, topic_name), shard_id)
+        return self._send(self._split_shard_request(project_name, topic_name, shard_id, split_key))
+
+    def get_cursor(self, project_name, topic_name, shard_id, cursor_type, param=-1):
+        return self._send(self._get_cursor_request(project_name, topic_name, shard_id, cursor_type, param))
 
-        result = GetPBRecordsResult.parse_content(content, record_schema=record_schema)
+    def put_records(self, project_name, topic_name, record_list):
+        url = self._put_records_url(project_name, topic_name)
+
+        result = self.__put_records(project_name, topic_name, url, record_list)
+
+        # only retry the failed records
+        put_retry = self._put_records_retry(record_list, result)
+        if put_retry is None:
+            return result
+        retry = put_retry.next(result)
+        while retry is not None:
+            records, delay = retry
+            time.sleep(delay)
+            retry = put_retry.next(self.__put_records(project_name, topic_name, url, records))
+        return put_retry.result()
+
+    def __put_records(self, project_name, topic_name, url, record_list):
+        limit = self._put_records_limit(project_name, topic_name, record_list)
+        result = self._send(self._put_records_request(url, record_list), limit)
+        self._on_put_records(project_name, topic_name, record_list, result, limit)
+        return result
 
+    def put_columns(self, project_name, topic_name, columns, record_schema, shard_id=None):
+        row_count, requests = self._put_columns_requests(project_name, topic_name, columns, record_schema, shard_id)
+
+        failed_records = []
+        for start, request in requests:
+            limit = self._put_columns_limit(project_name, topic_name, shard_id)
+            result = self._send(request, limit)
+            self._on_put_columns(project_name, topic_name, shard_id, result, limit)
+            failed_records.extend(self._failed_rows(start, result))
+
+        return self._put_columns_result(project_name, topic_name, row_count, failed_records)
+
+    def get_blob_records(self, project_name, topic_name, shard_id, cursor, limit_num, lazy=False):
+        request = self._get_blob_records_request(project_name, topic_name, shard_id, cursor, limit_num, lazy)
+        return self.__get_records(project_name, topic_name, shard_id, request)
+
+    def get_tuple_records(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num, fields=None,
+                          lazy=False):
+        request = self._get_tuple_records_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                  limit_num, fields, lazy)
+        return self.__get_records(project_name, topic_name, shard_id, request)
+
+    def get_tuple_columns(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        request = self._get_tuple_columns_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                  limit_num)
+        return self.__get_records(project_name, topic_name, shard_id, request)
+
+    def get_record_batch(self, project_name, topic_name, shard_id, record_schema, cursor, limit_num):
+        request = self._get_record_batch_request(project_name, topic_name, shard_id, record_schema, cursor,
+                                                 limit_num)
+        return self.__get_records(project_name, topic_name, shard_id, request)
+
+    def __get_records(self, project_name, topic_name, shard_id, request):
+        limit = self._get_records_limit(project_name, topic_name, shard_id)
+        result = self._send(request, limit)
+        self._on_get_records(project_name, topic_name, result, limit)
         return result
+
+    def get_metering_info(self, project_name, topic_name, shard_id):
+        return self._send(self._get_metering_info_request(project_name, topic_name, shard_id))
+
+    def list_connector(self, project_name, topic_name):
+        return self._send(self._list_connector_request(project_name, topic_name))
+
+    def create_connector(self, project_name, topic_name, connector_type, column_fields, config):
+        self._send(self._create_connector_request(project_name, topic_name, connector_type, column_fields, config))
+
+    def get_connector(self, project_name, topic_name, connector_type):
+        return self._send(self._get_connector_request(project_name, topic_name, connector_type))
+
+    def delete_connector(self, project_name, topic_name, connector_type):
+        self._send(self._delete_connector_request(project_name, topic_name, connector_type))
+
+    def get_connector_shard_status(self, project_name, topic_name, connector_type, shard_id):
+        return self._send(self._get_connector_shard_status_request(project_name, topic_name, connector_type,
+                                                                   shard_id))
+
+    def reload_connector(self, project_name, topic_name, connector_type, shard_id=''):
+        self._send(self._reload_connector_request(project_name, topic_name, connector_type, shard_id))
+
+    def append_connector_field(self, project_name, topic_name, connector_type, field_name):
+        self._send(self._append_connector_field_request(project_name, topic_name, connector_type, field_name))
+
+    def init_and_get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids):
+        return self._send(self._init_and_get_subscription_offset_request(project_name, topic_name, sub_id,
+                                                                         shard_ids))
+
+    def get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids=None):
+        return self._send(self._get_subscription_offset_request(project_name, topic_name, sub_id, shard_ids))
+
+    def update_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        self._send(self._update_subscription_offset_request(project_name, topic_name, sub_id, offsets))
+
+    def get_connector_done_time(self, project_name, topic_name, connector_type):
+        return self._send(self._get_connector_done_time_request(project_name, topic_name, connector_type))
+
+    # =======================================================
+    # internal api
+    # =======================================================
+
+    def update_connector_state(self, project_name, topic_name, connector_type, connector_state):
+        self._send(self._update_connector_state_request(project_name, topic_name, connector_type, connector_state))
+
+    def create_subscription(self, project_name, topic_name, comment):
+        return self._send(self._create_subscription_request(project_name, topic_name, comment))
+
+    def delete_subscription(self, project_name, topic_name, sub_id):
+        self._send(self._delete_subscription_request(project_name, topic_name, sub_id))
+
+    def get_subscription(self, project_name, topic_name, sub_id):
+        return self._send(self._get_subscription_request(project_name, topic_name, sub_id))
+
+    def update_subscription(self, project_name, topic_name, sub_id, comment):
+        self._send(self._update_subscription_request(project_name, topic_name, sub_id, comment))
+
+    def update_subscription_state(self, project_name, topic_name, sub_id, state):
+        self._send(self._update_subscription_state_request(project_name, topic_name, sub_id, state))
+
+    def list_subscription(self, project_name, topic_name, query_key, page_index, page_size):
+        return self._send(self._list_subscription_request(project_name, topic_name, query_key, page_index,
+                                                          page_size))
+
+    def reset_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        self._send(self._reset_subscription_offset_request(project_name, topic_name, sub_id, offsets))
+
+
+class DataHubPB(DataHubPBBase, DataHubJson):
+    """
+    DataHub protobuf client
+    """
+    pass
@@ -0,0 +1,602 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import bisect
+import logging
+import re
+import socket
+import threading
+import time
+
+import six
+
+from .retry import ErrorType, classify
+
+logger = logging.getLogger('datahub.metrics')
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+# upper bounds of latency buckets in seconds, 100us to about 50s growing by 25%,
+# quantiles estimated from them are within a few percent
+LATENCY_BUCKETS = tuple(0.0001 * 1.25 ** i for i in range(60))
+
+_ACTION_PATTERN = re.compile(br'^\{\s*"Action"\s*:\s*"([A-Za-z]+)"')
+
+
+def api_name(method, url, headers=None, data=None):
+    """
+    Name of the api a request calls, names of projects, topics, shards, connectors and
+    subscriptions in the url are replaced by placeholders, e.g.
+    ``POST /projects/{project}/topics/{topic}/shards/{shard} sub``
+
+    :param method: http method
+    :type method: :class:`datahub.rest.HTTPMethod`
+    :param url: url of the request without the endpoint
+    :param headers: headers of the request, the action of protobuf requests is in the headers
+    :param data: body of the request, the action of json requests is in the body
+    :return: name of the api
+    """
+    path, _, query = url.partition('?')
+    parts = path.split('/')
+    # '', 'projects', name, 'topics', name, ...
+    for i in range(2, len(parts), 2):
+        parts[i] = '{%s}' % parts[i - 1][:-1]
+    name = '%s %s' % (getattr(method, 'value', method), '/'.join(parts))
+    if query:
+        name = '%s?%s' % (name, query)
+
+    action = headers.get('x-datahub-request-action') if headers else None
+    if action is None and data:
+        head = data[:64]
+        if isinstance(head, six.text_type):
+            head = head.encode('utf-8')
+        match = _ACTION_PATTERN.match(bytes(head))
+        if match is not None:
+            action = match.group(1).decode('utf-8')
+    if action:
+        name = '%s %s' % (name, action)
+    return name
+
+
+class Histogram(object):
+    """
+    Histogram of fixed buckets, observing a value is a binary search of its bucket
+
+    :param bounds: sorted upper bounds of the buckets, values over the last bound fall in an overflow bucket
+    """
+    __slots__ = ('_bounds', '_counts', '_count', '_sum', '_max')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    @property
+    def bounds(self):
+        return self._bounds
+
+    @property
+    def counts(self):
+        """
+        Count of every bucket, the last one is the overflow bucket
+        """
+        return self._counts
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def max(self):
+        return self._max
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        if value > self._max:
+            self._max = value
+
+    def quantile(self, q):
+        """
+        Estimate the quantile by linear interpolation inside its bucket, like histogram_quantile of prometheus
+
+        :param q: quantile between 0 and 1
+        :return: estimated value, 0 if nothing is observed
+        """
+        if self._count == 0:
+            return 0.0
+        rank = q * self._count
+        cumulative = 0
+        for i, count in enumerate(self._counts):
+            if count and cumulative + count >= rank:
+                if i == len(self._bounds):
+                    return self._max
+                lower = self._bounds[i - 1] if i > 0 else 0.0
+                upper = min(self._bounds[i], self._max)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self._max
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self._counts[i] += count
+        self._count += other.count
+        self._sum += other.sum
+        self._max = max(self._max, other.max)
+
+    def copy(self):
+        histogram = Histogram(self._bounds)
+        histogram.merge(self)
+        return histogram
+
+
+class ApiMetrics(object):
+    """
+    Metrics of requests to an api, retries included
+
+    Members:
+        requests (:class:`int`): requests sent, every retry is a request
+
+        errors (:class:`int`): requests failed, connection errors included
+
+        throttled (:class:`int`): requests failed by LimitExceeded or status code 429
+
+        retries (:class:`int`): requests retried by the retry policy
+
+        latency (:class:`datahub.metrics.Histogram`): seconds from sending a request to its response decompressed
+
+        bytes_sent (:class:`int`): bytes of request bodies on the wire
+
+        bytes_sent_raw (:class:`int`): bytes of request bodies before compressed
+
+        bytes_received (:class:`int`): bytes of response bodies on the wire
+
+        bytes_received_raw (:class:`int`): bytes of response bodies after decompressed
+    """
+    __slots__ = ('requests', 'errors', 'throttled', 'retries', 'latency',
+                 'bytes_sent', 'bytes_sent_raw', 'bytes_received', 'bytes_received_raw')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.retries = 0
+        self.latency = Histogram()
+        self.bytes_sent = 0
+        self.bytes_sent_raw = 0
+        self.bytes_received = 0
+        self.bytes_received_raw = 0
+
+    def to_json(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'latency': {
+                'count': self.latency.count,
+                'sum': self.latency.sum,
+                'max': self.latency.max,
+                'p50': self.latency.quantile(0.5),
+                'p99': self.latency.quantile(0.99),
+            },
+            'bytes_sent': self.bytes_sent,
+            'bytes_sent_raw': self.bytes_sent_raw,
+            'bytes_received': self.bytes_received,
+            'bytes_received_raw': self.bytes_received_raw,
+            'compression_ratio_sent': _ratio(self.bytes_sent_raw, self.bytes_sent),
+            'compression_ratio_received': _ratio(self.bytes_received_raw, self.bytes_received),
+        }
+
+
+class TopicMetrics(object):
+    """
+    Records of a topic
+
+    Members:
+        records_put (:class:`int`): records written successfully
+
+        records_failed (:class:`int`): records failed to write, every failed try of a retried record counts
+
+        records_read (:class:`int`): records read
+    """
+    __slots__ = ('records_put', 'records_failed', 'records_read')
+
+    def __init__(self):
+        self.records_put = 0
+        self.records_failed = 0
+        self.records_read = 0
+
+    def to_json(self):
+        return {
+            'records_put': self.records_put,
+            'records_failed': self.records_failed,
+            'records_read': self.records_read,
+        }
+
+
+def _ratio(raw, compressed):
+    return float(raw) / compressed if compressed else 1.0
+
+
+class MetricsExporter(object):
+    """
+    Exporter pushed by :class:`datahub.metrics.ClientMetrics` on every event, methods do nothing by default.
+    Events are pushed on the thread of the request, exporters should not block.
+    """
+
+    def on_request(self, api, latency, status_code, throttled, sent, sent_raw, received, received_raw):
+        """
+        :param api: name of the api, see :func:`datahub.metrics.api_name`
+        :param latency: seconds of the request
+        :param status_code: http status code, -1 if no response is received
+        :param throttled: whether the request is throttled
+        :param sent: bytes of request body on the wire
+        :param sent_raw: bytes of request body before compressed
+        :param received: bytes of response body on the wire
+        :param received_raw: bytes of response body after decompressed
+        """
+        pass
+
+    def on_retry(self, api):
+        pass
+
+    def on_records(self, project_name, topic_name, put, failed, read):
+        pass
+
+
+class ClientMetrics(object):
+    """
+    Metrics of datahub clients, given to clients by the ``metrics`` argument, and shared by them if they
+    share the instance. Clients without metrics only pay for a None check per request.
+
+    .. code-block:: python
+
+        metrics = ClientMetrics()
+        dh = DataHub(access_id, access_key, endpoint, metrics=metrics)
+        ...
+        print(metrics.snapshot())
+        print(PrometheusExporter(metrics).render())
+
+    :param exporters: exporters pushed on every event, e.g. :class:`datahub.metrics.StatsdExporter`
+    :type exporters: list of :class:`datahub.metrics.MetricsExporter`
+    """
+
+    def __init__(self, exporters=None):
+        self._lock = threading.Lock()
+        self._apis = {}
+        self._topics = {}
+        self._exporters = list(exporters or ())
+
+    @property
+    def exporters(self):
+        return self._exporters
+
+    def recorder(self, method, url, headers=None, data=None):
+        """
+        Recorder of a request and its retries, called by rest client
+
+        :return: recorder of the request
+        :rtype: :class:`datahub.metrics.RequestRecorder`
+        """
+        return RequestRecorder(self, api_name(method, url, headers, data), len(data) if data else 0)
+
+    def _api(self, api):
+        api_metrics = self._apis.get(api)
+        if api_metrics is None:
+            api_metrics = self._apis[api] = ApiMetrics()
+        return api_metrics
+
+    def on_request(self, api, latency, status_code, error_code=None, sent=0, sent_raw=0, received=0,
+                   received_raw=0):
+        """
+        Record a finished request
+
+        :param api: name of the api
+        :param latency: seconds of the request
+        :param status_code: http status code, -1 if no response is received
+        :param error_code: datahub error code of failed request
+        :param sent: bytes of request body on the wire
+        :param sent_raw: bytes of request body before compressed
+        :param received: bytes of response body on the wire
+        :param received_raw: bytes of response body after decompressed
+        """
+        failed = status_code < 0 or status_code >= 400
+        throttled = failed and classify(status_code, error_code) == ErrorType.THROTTLED
+        with self._lock:
+            api_metrics = self._api(api)
+            api_metrics.requests += 1
+            if failed:
+                api_metrics.errors += 1
+                if throttled:
+                    api_metrics.throttled += 1
+            api_metrics.latency.observe(latency)
+            api_metrics.bytes_sent += sent
+            api_metrics.bytes_sent_raw += sent_raw
+            api_metrics.bytes_received += received
+            api_metrics.bytes_received_raw += received_raw
+        for exporter in self._exporters:
+            exporter.on_request(api, latency, status_code, throttled, sent, sent_raw, received, received_raw)
+
+    def on_retry(self, api):
+        """
+        Record a request retried by the retry policy
+
+        :param api: name of the api
+        """
+        with self._lock:
+            self._api(api).retries += 1
+        for exporter in self._exporters:
+            exporter.on_retry(api)
+
+    def on_records(self, project_name, topic_name, put=0, failed=0, read=0):
+        """
+        Record records put, failed and read of a topic
+
+        :param project_name: project name
+        :param topic_name: topic name
+        :param put: records written successfully
+        :param failed: records failed to write
+        :param read: records read
+        """
+        key = (project_name, topic_name)
+        with self._lock:
+            topic_metrics = self._topics.get(key)
+            if topic_metrics is None:
+                topic_metrics = self._topics[key] = TopicMetrics()
+            topic_metrics.records_put += put
+            topic_metrics.records_failed += failed
+            topic_metrics.records_read += read
+        for exporter in self._exporters:
+            exporter.on_records(project_name, topic_name, put, failed, read)
+
+    def apis(self):
+        """
+        Copy of metrics of every api
+
+        :return: dict from api name to metrics
+        :rtype: dict of :class:`datahub.metrics.ApiMetrics`
+        """
+        with self._lock:
+            copied = {}
+            for api, api_metrics in six.iteritems(self._apis):
+                api_copy = copied[api] = ApiMetrics()
+                for name in ApiMetrics.__slots__:
+                    setattr(api_copy, name, getattr(api_metrics, name))
+                api_copy.latency = api_metrics.latency.copy()
+            return copied
+
+    def topics(self):
+        """
+        Copy of records of every topic
+
+        :return: dict from (project name, topic name) to records
+        :rtype: dict of :class:`datahub.metrics.TopicMetrics`
+        """
+        with self._lock:
+            copied = {}
+            for key, topic_metrics in six.iteritems(self._topics):
+                topic_copy = copied[key] = TopicMetrics()
+                for name in TopicMetrics.__slots__:
+                    setattr(topic_copy, name, getattr(topic_metrics, name))
+            return copied
+
+    def snapshot(self):
+        """
+        Snapshot of all metrics in plain dicts, ready for json
+
+        :return: dict with ``apis`` from api name to its metrics and ``topics`` from 'project/topic' to its records
+        :rtype: dict
+        """
+        return {
+            'apis': dict((api, api_metrics.to_json()) for api, api_metrics in six.iteritems(self.apis())),
+            'topics': dict(('%s/%s' % key, topic_metrics.to_json())
+                           for key, topic_metrics in six.iteritems(self.topics())),
+        }
+
+    def reset(self):
+        """
+        Clear all metrics
+        """
+        with self._lock:
+            self._apis = {}
+            self._topics = {}
+
+
+class RequestRecorder(object):
+    """
+    Records a request and its retries to :class:`datahub.metrics.ClientMetrics`
+    """
+    __slots__ = ('_metrics', '_api', '_sent_raw', '_sent', '_start')
+
+    def __init__(self, metrics, api, sent_raw):
+        self._metrics = metrics
+        self._api = api
+        self._sent_raw = sent_raw
+        self._sent = 0
+        self._start = 0.0
+
+    @property
+    def api(self):
+        return self._api
+
+    def on_send(self, data):
+        """
+        Called before sending the request with its body on the wire
+        """
+        self._sent = len(data) if data else 0
+        self._start = time.time()
+
+    def on_response(self, status_code, received=0, received_raw=0, error_code=None):
+        """
+        Called after the response is decompressed, or with status code -1 if no response is received
+        """
+        self._metrics.on_request(self._api, time.time() - self._start, status_code, error_code,
+                                 self._sent, self._sent_raw, received, received_raw)
+
+    def on_retry(self):
+        self._metrics.on_retry(self._api)
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value):
+    return repr(float(value))
+
+
+class PrometheusExporter(MetricsExporter):
+    """
+    Render metrics in the prometheus text exposition format, serve :meth:`render` on the metrics endpoint
+    of the application
+
+    :param metrics: metrics to render
+    :type metrics: :class:`datahub.metrics.ClientMetrics`
+    :param prefix: prefix of metric names
+    """
+
+    def __init__(self, metrics, prefix='datahub'):
+        self._metrics = metrics
+        self._prefix = prefix
+
+    def render(self):
+        """
+        :return: metrics in prometheus text format
+        :rtype: str
+        """
+        apis = sorted(six.iteritems(self._metrics.apis()))
+        topics = sorted(six.iteritems(self._metrics.topics()))
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            name = '%s_%s' % (self._prefix, name)
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for suffix, labels, value in samples:
+                label_text = ','.join('%s="%s"' % (key, _escape_label(label)) for key, label in labels)
+                lines.append('%s%s{%s} %s' % (name, suffix, label_text, value))
+
+        counters = (
+            ('requests_total', 'requests', 'Requests sent, retries included'),
+            ('request_errors_total', 'errors', 'Requests failed, connection errors included'),
+            ('requests_throttled_total', 'throttled', 'Requests throttled by the server'),
+            ('request_retries_total', 'retries', 'Requests retried by the retry policy'),
+            ('sent_bytes_total', 'bytes_sent', 'Bytes of request bodies on the wire'),
+            ('sent_raw_bytes_total', 'bytes_sent_raw', 'Bytes of request bodies before compressed'),
+            ('received_bytes_total', 'bytes_received', 'Bytes of response bodies on the wire'),
+            ('received_raw_bytes_total', 'bytes_received_raw', 'Bytes of response bodies after decompressed'),
+        )
+        for name, attr, help_text in counters:
+            family(name, 'counter', help_text,
+                   [('', (('api', api),), getattr(api_metrics, attr)) for api, api_metrics in apis])
+
+        samples = []
+        for api, api_metrics in apis:
+            histogram = api_metrics.latency
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                samples.append(('_bucket', (('api', api), ('le', '%.6g' % bound)), cumulative))
+            samples.append(('_bucket', (('api', api), ('le', '+Inf')), histogram.count))
+            samples.append(('_sum', (('api', api),), _format_float(histogram.sum)))
+            samples.append(('_count', (('api', api),), histogram.count))
+        family('request_latency_seconds', 'histogram', 'Seconds from sending a request to its response', samples)
+
+        record_counters = (
+            ('records_put_total', 'records_put', 'Records written successfully'),
+            ('records_failed_total', 'records_failed', 'Records failed to write'),
+            ('records_read_total', 'records_read', 'Records read'),
+        )
+        for name, attr, help_text in record_counters:
+            family(name, 'counter', help_text,
+                   [('', (('project', key[0]), ('topic', key[1])), getattr(topic_metrics, attr))
+                    for key, topic_metrics in topics])
+        return '\n'.join(lines) + '\n'
+
+
+class StatsdExporter(MetricsExporter):
+    """
+    Push every event to a statsd agent over udp, failures of sending are ignored.
+    Api names are turned to dotted names, e.g. ``datahub.post.projects.topics.shards.sub.latency``
+
+    :param host: host of the statsd agent
+    :param port: port of the statsd agent
+    :param prefix: prefix of metric names
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='datahub'):
+        self._address = (host, port)
+        self._prefix = prefix
+        self._names = {}
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def close(self):
+        self._socket.close()
+
+    def _name(self, api):
+        name = self._names.get(api)
+        if name is None:
+            tokens = re.sub(r'\{[^}]*\}', ' ', api).lower()
+            name = self._names[api] = '.'.join(re.findall(r'[a-z0-9_]+', tokens))
+        return name
+
+    def _send(self, lines):
+        try:
+            self._socket.sendto('\n'.join(lines).encode('utf-8'), self._address)
+        except (socket.error, OSError) as e:
+            logger.debug('send metrics to statsd %s:%d failed, error: %s', self._address[0], self._address[1], e)
+
+    def on_request(self, api, latency, status_code, throttled, sent, sent_raw, received, received_raw):
+        prefix = '%s.%s' % (self._prefix, self._name(api))
+        lines = [
+            '%s.requests:1|c' % prefix,
+            '%s.latency:%.3f|ms' % (prefix, latency * 1000),
+            '%s.bytes_sent:%d|c' % (prefix, sent),
+            '%s.bytes_sent_raw:%d|c' % (prefix, sent_raw),
+            '%s.bytes_received:%d|c' % (prefix, received),
+            '%s.bytes_received_raw:%d|c' % (prefix, received_raw),
+        ]
+        if status_code < 0 or status_code >= 400:
+            lines.append('%s.errors:1|c' % prefix)
+        if throttled:
+            lines.append('%s.throttled:1|c' % prefix)
+        self._send(lines)
+
+    def on_retry(self, api):
+        self._send(['%s.%s.retries:1|c' % (self._prefix, self._name(api))])
+
+    def on_records(self, project_name, topic_name, put, failed, read):
+        prefix = '%s.records.%s.%s' % (self._prefix, project_name, topic_name)
+        lines = ['%s.%s:%d|c' % (prefix, name, count)
+                 for name, count in (('put', put), ('failed', failed), ('read', read)) if count]
+        if lines:
+            self._send(lines)
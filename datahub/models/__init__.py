@@ -19,8 +19,9 @@
 
 from .schema import Field, RecordSchema, FieldType
 from .record import RecordType, Record, BlobRecord, TupleRecord, FailedRecord
+from .batch import RecordBatch
 from .cursor import CursorType
-from .compress import CompressFormat
+from .compress import CompressFormat, AdaptiveCompression
 from .shard import ShardState, Shard, ShardContext, ShardBase
 from .connector import ConnectorConfig, ConnectorShardStatus, AuthMode, ConnectorState, PartitionMode, \
     OdpsConnectorConfig, DatabaseConnectorConfig, EsConnectorConfig, FcConnectorConfig, OssConnectorConfig, \
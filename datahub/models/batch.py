@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import base64
+from array import array
+
+import six
+
+from .record import RecordType, BlobRecord, TupleRecord
+from .schema import FieldType
+from ..exceptions import InvalidParameterException
+from ..utils import ErrorMessage
+
+# fields whose not null values are kept in typed arrays, a column falls back to a list at the first null
+_array_typecodes = {
+    FieldType.BIGINT: 'q',
+    FieldType.TIMESTAMP: 'q',
+    FieldType.DOUBLE: 'd'
+}
+
+_EMPTY_KEYS = ('', '', '')
+
+
+class RecordBatch(object):
+    """
+    Records of one topic kept column by column instead of one object per record
+
+    Values of every field are kept in one column, BIGINT, TIMESTAMP and DOUBLE columns without null are
+    typed arrays. Sequences and system times are int64 arrays, and equal attribute dicts and
+    shard id / hash key / partition key combinations are shared by records.
+
+    Indexing or iterating the batch gives views of the rows, which are :class:`datahub.models.TupleRecord`
+    (or :class:`datahub.models.BlobRecord` without schema) reading and writing the columns of the batch,
+    so a batch can be put by :meth:`datahub.DataHub.put_records` as a record list.
+    The attribute dict of a view is shared with other records, change it by ``put_attribute`` or by
+    setting ``attributes`` instead of modifying it in place. The field list of a view is the schema of the
+    batch, setting ``field_list`` of a view raises :class:`datahub.exceptions.InvalidParameterException`.
+
+    :param record_schema: schema of tuple records, None for blob records
+    :type record_schema: :class:`datahub.models.RecordSchema`
+
+    :Example:
+
+    >>> batch = RecordBatch(schema)
+    >>> batch.append_values([1, 'yc1'], attributes={'key': 'value'}, shard_id='0')
+    >>> batch.append(record)
+    >>> batch[0].get_value('string_field')
+    'yc1'
+    >>> dh.put_records(project_name, topic_name, batch)
+
+    .. seealso:: :meth:`datahub.DataHub.get_record_batch`
+    """
+
+    __slots__ = ('_record_schema', '_compiled', '_columns', '_sequences', '_system_times', '_keys',
+                 '_attributes', '_interned_keys', '_interned_attributes')
+
+    def __init__(self, record_schema=None):
+        self._record_schema = record_schema
+        if record_schema is not None:
+            self._compiled = record_schema.compiled
+            self._columns = [array(_array_typecodes[field.type]) if field.type in _array_typecodes else []
+                             for field in record_schema.field_list]
+        else:
+            self._compiled = None
+            self._columns = [[]]
+        self._sequences = array('q')
+        self._system_times = array('q')
+        # (shard id, hash key, partition key) and attribute dict of every record, None means no attribute
+        self._keys = []
+        self._attributes = []
+        self._interned_keys = {_EMPTY_KEYS: _EMPTY_KEYS}
+        self._interned_attributes = {}
+
+    @classmethod
+    def from_records(cls, records, record_schema=None):
+        """
+        Create a batch of records
+
+        :param records: tuple records of the schema, or blob records if no schema
+        :param record_schema: schema of tuple records, None for blob records
+        :return: batch
+        :rtype: :class:`datahub.models.RecordBatch`
+        """
+        batch = cls(record_schema)
+        batch.extend(records)
+        return batch
+
+    @property
+    def record_schema(self):
+        return self._record_schema
+
+    @property
+    def record_type(self):
+        return RecordType.BLOB if self._compiled is None else RecordType.TUPLE
+
+    @property
+    def sequences(self):
+        return self._sequences
+
+    @property
+    def system_times(self):
+        return self._system_times
+
+    def column(self, index_or_name):
+        """
+        Values of a field of all records, a typed array or a list
+
+        :param index_or_name: index or name of the field
+        """
+        if self._compiled is None:
+            return self._columns[0]
+        field = self._record_schema.get_field(index_or_name)
+        return self._columns[self._compiled.name_indices[field.name]]
+
+    def append(self, record):
+        """
+        Append a record, values of records of the schema are already validated and not checked again
+
+        :param record: tuple record, or blob record if no schema
+        :type record: :class:`datahub.models.Record`
+        """
+        record_type = record.get_type()
+        if record_type != self.record_type:
+            raise InvalidParameterException(ErrorMessage.RECORD_TYPE_MISMATCH
+                                            % (record_type.value, self.record_type.value))
+        if record_type == RecordType.BLOB:
+            values = (record.blob_data,)
+        elif record.field_list is self._compiled.field_list:
+            values = record.values
+        else:
+            values = self._compiled.validate_values(record.values)
+        self._append_row(values, (record.shard_id, record.hash_key, record.partition_key), record.attributes,
+                         record.sequence, record.system_time)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def append_values(self, values, attributes=None, shard_id='', hash_key='', partition_key='', sequence=0,
+                      system_time=0):
+        """
+        Append a record given by its values without creating a record object
+
+        :param values: values of the fields validated like :class:`datahub.models.TupleRecord`,
+            or the blob data if no schema
+        :param attributes: attributes of the record
+        """
+        if self._compiled is None:
+            if not values:
+                raise InvalidParameterException(ErrorMessage.MISSING_BLOB_RECORD_DATA)
+            values = (values,)
+        else:
+            values = self._compiled.validate_values(values)
+        self._append_row(values, (shard_id, hash_key, partition_key), attributes, sequence, system_time)
+
+    def set_shard_id(self, shard_id):
+        """
+        Set shard id of all records
+        """
+        self._keys = [self._intern_keys((shard_id, hash_key, partition_key))
+                      for _, hash_key, partition_key in self._keys]
+
+    def __len__(self):
+        return len(self._sequences)
+
+    def __iter__(self):
+        view_class = _BlobRecordView if self._compiled is None else _TupleRecordView
+        for row in range(len(self._sequences)):
+            yield view_class(self, row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[row] for row in range(*index.indices(len(self._sequences)))]
+        length = len(self._sequences)
+        row = index + length if index < 0 else index
+        if not 0 <= row < length:
+            raise IndexError('record index %d out of range' % index)
+        return (_BlobRecordView if self._compiled is None else _TupleRecordView)(self, row)
+
+    def __repr__(self):
+        return '<RecordBatch %s, %d records>' % (self.record_type.value, len(self._sequences))
+
+    # =======================================================
+    # private function
+    # =======================================================
+
+    def _intern_keys(self, keys):
+        return self._interned_keys.setdefault(keys, keys)
+
+    def _intern_attributes(self, attributes):
+        if not attributes:
+            return None
+        key = tuple(sorted(six.iteritems(attributes)))
+        interned = self._interned_attributes.get(key)
+        if interned is None:
+            interned = self._interned_attributes[key] = dict(attributes)
+        return interned
+
+    def _append_row(self, values, keys, attributes, sequence, system_time):
+        for index, value in enumerate(values):
+            self._append_value(index, value)
+        self._keys.append(self._intern_keys(keys))
+        self._attributes.append(self._intern_attributes(attributes))
+        self._sequences.append(sequence or 0)
+        self._system_times.append(system_time or 0)
+
+    def _append_decoded(self, values, attributes, sequence, system_time):
+        # values decoded from the server, records got from a shard have no key
+        self._append_row(values, _EMPTY_KEYS, attributes, sequence, system_time)
+
+    def _append_value(self, index, value):
+        column = self._columns[index]
+        try:
+            column.append(value)
+        except (TypeError, OverflowError):
+            # null, or a value the typed array can not keep
+            column = self._columns[index] = list(column)
+            column.append(value)
+
+    def _set_value(self, row, index, value):
+        column = self._columns[index]
+        try:
+            column[row] = value
+        except (TypeError, OverflowError):
+            column = self._columns[index] = list(column)
+            column[row] = value
+
+    def _set_keys(self, row, position, value):
+        keys = list(self._keys[row])
+        keys[position] = value
+        self._keys[row] = self._intern_keys(tuple(keys))
+
+
+def _keys_property(position):
+    def getter(self):
+        return self._batch._keys[self._row][position]
+
+    def setter(self, value):
+        self._batch._set_keys(self._row, position, value)
+    return property(getter, setter)
+
+
+class _RecordView(object):
+    """
+    Properties of :class:`datahub.models.Record` kept by the batch, they shadow the slots of the record
+    """
+
+    __slots__ = ()
+
+    _shard_id = _keys_property(0)
+    _hash_key = _keys_property(1)
+    _partition_key = _keys_property(2)
+
+    @property
+    def _attributes(self):
+        attributes = self._batch._attributes[self._row]
+        return {} if attributes is None else attributes
+
+    @_attributes.setter
+    def _attributes(self, value):
+        self._batch._attributes[self._row] = self._batch._intern_attributes(value)
+
+    @property
+    def _sequence(self):
+        return self._batch._sequences[self._row]
+
+    @_sequence.setter
+    def _sequence(self, value):
+        self._batch._sequences[self._row] = value
+
+    @property
+    def _system_time(self):
+        return self._batch._system_times[self._row]
+
+    @_system_time.setter
+    def _system_time(self, value):
+        self._batch._system_times[self._row] = value
+
+    def put_attribute(self, key, value):
+        # attribute dicts are shared, a changed copy replaces the dict of this record
+        attributes = dict(self._attributes)
+        attributes[key] = value
+        self._attributes = attributes
+
+    @property
+    def batch(self):
+        return self._batch
+
+    @property
+    def row(self):
+        return self._row
+
+
+class _TupleRecordView(_RecordView, TupleRecord):
+    """
+    Tuple record of a row of :class:`datahub.models.RecordBatch`
+    """
+
+    __slots__ = ('_batch', '_row')
+
+    def __init__(self, batch, row):
+        self._batch = batch
+        self._row = row
+
+    @property
+    def _compiled(self):
+        return self._batch._compiled
+
+    @property
+    def _field_list(self):
+        return self._batch._compiled.field_list
+
+    @property
+    def _name_indices(self):
+        return self._batch._compiled.name_indices
+
+    @property
+    def _values(self):
+        row = self._row
+        return [column[row] for column in self._batch._columns]
+
+    @_values.setter
+    def _values(self, value):
+        for index, column_value in enumerate(value):
+            self._batch._set_value(self._row, index, column_value)
+
+    @property
+    def field_list(self):
+        return self._batch._compiled.field_list
+
+    @field_list.setter
+    def field_list(self, value):
+        raise InvalidParameterException(ErrorMessage.BATCH_SCHEMA_READONLY)
+
+    @property
+    def name_indices(self):
+        return self._batch._compiled.name_indices
+
+    def _set_value_by_index(self, index, value):
+        self._batch._set_value(self._row, index, self._batch._compiled.validators[index](value))
+
+    def _get_value_by_index(self, index):
+        columns = self._batch._columns
+        if not 0 <= index < len(columns):
+            raise InvalidParameterException('Index %d out of range' % index)
+        return columns[index][self._row]
+
+    def _get_value_by_name(self, name):
+        if name not in self._batch._compiled.name_indices:
+            raise InvalidParameterException('Field name %s does not exists' % name)
+        return self._batch._columns[self._batch._compiled.name_indices[name]][self._row]
+
+
+class _BlobRecordView(_RecordView, BlobRecord):
+    """
+    Blob record of a row of :class:`datahub.models.RecordBatch`
+    """
+
+    __slots__ = ('_batch', '_row')
+
+    def __init__(self, batch, row):
+        self._batch = batch
+        self._row = row
+
+    @property
+    def _blob_data(self):
+        return self._batch._columns[0][self._row]
+
+    @property
+    def _values(self):
+        # base64 of the blob data like blob records got in json mode, encoded on access instead of kept
+        return bytes.decode(base64.b64encode(self._blob_data))
+
+    @_values.setter
+    def _values(self, value):
+        pass
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import decimal
+from collections import OrderedDict
+
+from . import types as _types
+from .schema import FieldType
+from ..exceptions import DatahubException, InvalidParameterException
+from ..utils import to_text, to_binary
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _check_numpy():
+    if np is None:
+        raise DatahubException('numpy is required by columnar records, please install it first')
+
+
+def _fill_nulls(values, mask, fill):
+    if not mask.any():
+        return values
+    return [fill if value is None else value for value in values]
+
+
+def _decode_integer(values, mask):
+    return np.array(_fill_nulls(values, mask, '0')).astype(np.int64)
+
+
+def _decode_double(values, mask):
+    return np.array(_fill_nulls(values, mask, '0')).astype(np.float64)
+
+
+def _decode_boolean(values, mask):
+    array = np.char.lower(np.array(_fill_nulls(values, mask, 'false')))
+    return array == (b'true' if array.dtype.kind == 'S' else u'true')
+
+
+def _decode_object(convert):
+    def _decode(values, mask):
+        array = np.empty(len(values), dtype=object)
+        array[:] = [None if value is None else convert(to_text(value)) for value in values]
+        return array
+    return _decode
+
+
+_decoders = {
+    FieldType.BIGINT: _decode_integer,
+    FieldType.TIMESTAMP: _decode_integer,
+    FieldType.DOUBLE: _decode_double,
+    FieldType.BOOLEAN: _decode_boolean,
+    FieldType.STRING: _decode_object(lambda value: value),
+    FieldType.DECIMAL: _decode_object(decimal.Decimal)
+}
+
+_dtypes = {
+    FieldType.BIGINT: 'int64',
+    FieldType.TIMESTAMP: 'int64',
+    FieldType.DOUBLE: 'float64',
+    FieldType.BOOLEAN: 'bool',
+    FieldType.STRING: 'object',
+    FieldType.DECIMAL: 'object'
+}
+
+
+def decode_columns(field_list, rows):
+    """
+    Decode encoded tuple record values row by row into one typed numpy array per field
+
+    BIGINT and TIMESTAMP fields are decoded to int64, DOUBLE to float64, BOOLEAN to bool,
+    STRING and DECIMAL to object arrays. Nulls are marked in the null masks, the value of a null
+    in a numeric or boolean array is 0 / False.
+
+    :param field_list: fields of the record schema
+    :param rows: encoded values of every record, text or bytes, None means null
+    :return: columns and null masks, both are ordered dicts keyed by field name
+    """
+    _check_numpy()
+    field_count = len(field_list)
+    for row in rows:
+        if len(row) != field_count:
+            raise DatahubException('The values of record are against the schema, expect len %d, got len %d'
+                                   % (field_count, len(row)))
+
+    columns = OrderedDict()
+    null_masks = OrderedDict()
+    values_list = list(zip(*rows)) if rows else [()] * field_count
+    for field, values in zip(field_list, values_list):
+        if not values:
+            columns[field.name] = np.empty(0, dtype=_dtypes[field.type])
+            null_masks[field.name] = np.zeros(0, dtype=bool)
+            continue
+        mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        columns[field.name] = _decoders[field.type](values, mask)
+        null_masks[field.name] = mask
+    return columns, null_masks
+
+
+def _column_of(columns, name):
+    # returns values and null mask (None if no null) of a column of DataFrame / Arrow Table / dict
+    if hasattr(columns, 'column_names') and hasattr(columns, 'column'):
+        if name not in columns.column_names:
+            raise InvalidParameterException('Column %s of schema does not exist' % name)
+        column = columns.column(name)
+        mask = column.is_null().to_numpy(zero_copy_only=False) if column.null_count else None
+        return column.to_numpy(), mask
+    if name not in columns:
+        raise InvalidParameterException('Column %s of schema does not exist' % name)
+    column = columns[name]
+    if hasattr(column, 'isna'):
+        mask = column.isna().to_numpy()
+        return column.to_numpy(), mask if mask.any() else None
+    if isinstance(column, np.ma.MaskedArray):
+        mask = np.ma.getmaskarray(column)
+        return column.data, mask if mask.any() else None
+    column = np.asarray(column)
+    if column.dtype.kind == 'O':
+        mask = np.fromiter((value is None for value in column), dtype=bool, count=len(column))
+        return column, mask if mask.any() else None
+    return column, None
+
+
+def _to_int64(field, values):
+    kind = values.dtype.kind
+    if kind == 'M':
+        return values.astype('datetime64[us]').astype(np.int64)
+    if kind == 'u' and len(values) and values.max() > np.iinfo(np.int64).max:
+        raise InvalidParameterException('InvalidData: %s(%s) out of range' % (field.type.value, values.max()))
+    if kind == 'f':
+        if not np.all(np.isfinite(values)) or np.any(np.mod(values, 1) != 0):
+            raise InvalidParameterException('InvalidData: values of %s field %s are not integers'
+                                            % (field.type.value, field.name))
+    elif kind not in 'iubO':
+        raise InvalidParameterException('Cannot cast column %s from dtype(%s) to type(%s)'
+                                        % (field.name, values.dtype, field.type.value))
+    try:
+        return values.astype(np.int64)
+    except (ValueError, TypeError, OverflowError) as e:
+        raise InvalidParameterException('Cannot cast column %s to type(%s), error: %s'
+                                        % (field.name, field.type.value, e))
+
+
+def _encode_integer(field, values):
+    return _to_int64(field, values).astype(np.bytes_).tolist()
+
+
+def _encode_timestamp(field, values):
+    values = _to_int64(field, values)
+    smallest, largest = _types.Timestamp._ticks_bound
+    if len(values) and (values.min() < smallest or values.max() > largest):
+        raise InvalidParameterException('InvalidData: Timestamp of column %s out of range' % field.name)
+    return values.astype(np.bytes_).tolist()
+
+
+def _encode_double(field, values):
+    if values.dtype.kind not in 'fiubO':
+        raise InvalidParameterException('Cannot cast column %s from dtype(%s) to type(%s)'
+                                        % (field.name, values.dtype, field.type.value))
+    try:
+        values = values.astype(np.float64)
+    except (ValueError, TypeError) as e:
+        raise InvalidParameterException('Cannot cast column %s to type(%s), error: %s'
+                                        % (field.name, field.type.value, e))
+    return [to_binary(repr(value)) for value in values.tolist()]
+
+
+def _encode_boolean(field, values):
+    if values.dtype.kind != 'b':
+        values = np.array([_types.validate_value(value, field.type) for value in values.tolist()], dtype=bool)
+    return np.where(values, b'true', b'false').tolist()
+
+
+def _encode_string(field, values):
+    if values.dtype.kind not in 'USO':
+        raise InvalidParameterException('Cannot cast column %s from dtype(%s) to type(%s)'
+                                        % (field.name, values.dtype, field.type.value))
+    encoded = [to_binary(value) for value in values.tolist()]
+    if any(value is not None and len(value) > _types.String._max_length for value in encoded):
+        raise InvalidParameterException('InvalidData: Length of string of column %s is more than 1M.' % field.name)
+    return encoded
+
+
+def _encode_decimal(field, values):
+    return [to_binary(_types.validate_value(value, field.type)) for value in values.tolist()]
+
+
+_encoders = {
+    FieldType.BIGINT: _encode_integer,
+    FieldType.TIMESTAMP: _encode_timestamp,
+    FieldType.DOUBLE: _encode_double,
+    FieldType.BOOLEAN: _encode_boolean,
+    FieldType.STRING: _encode_string,
+    FieldType.DECIMAL: _encode_decimal
+}
+
+_null_fills = {
+    FieldType.BIGINT: 0,
+    FieldType.TIMESTAMP: 0,
+    FieldType.DOUBLE: 0,
+    FieldType.BOOLEAN: False,
+    FieldType.STRING: u'',
+    FieldType.DECIMAL: 0
+}
+
+
+def encode_rows(field_list, columns):
+    """
+    Validate columns against the schema column by column, and encode them to rows of bytes values
+
+    Columns are validated in bulk by numpy dtype, values are encoded exactly like
+    :meth:`datahub.models.TupleRecord.encode_pb_record_data`.
+
+    :param field_list: fields of the record schema
+    :param columns: pandas DataFrame, pyarrow Table, or dict from field name to numpy array / list;
+        nulls are NaN / None of pandas, nulls of pyarrow, masked values of numpy masked array or None of object array
+    :return: encoded values of every row, None means null
+    :raise: :class:`datahub.exceptions.InvalidParameterException` if columns are against the schema
+    """
+    _check_numpy()
+    encoded_columns = []
+    row_count = None
+    for field in field_list:
+        values, mask = _column_of(columns, field.name)
+        if row_count is None:
+            row_count = len(values)
+        elif len(values) != row_count:
+            raise InvalidParameterException('Length of column %s is %d, expect %d'
+                                            % (field.name, len(values), row_count))
+        if mask is not None:
+            if not field.allow_null:
+                raise InvalidParameterException('Column %s can not be null' % field.name)
+            values = values.copy()
+            try:
+                values[mask] = _null_fills[field.type]
+            except (ValueError, TypeError):
+                values = values.astype(object)
+                values[mask] = _null_fills[field.type]
+
+        encoded = _encoders[field.type](field, values)
+        if mask is not None:
+            for index in np.flatnonzero(mask).tolist():
+                encoded[index] = None
+        encoded_columns.append(encoded)
+    return list(zip(*encoded_columns)) if encoded_columns else []
+
+
+def columns_to_pandas(field_list, columns, null_masks):
+    """
+    Build a pandas DataFrame from decoded columns, nullable numeric columns use pandas masked arrays
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise DatahubException('pandas is required by to_pandas, please install it first')
+
+    data = OrderedDict()
+    for field in field_list:
+        column, mask = columns[field.name], null_masks[field.name]
+        if mask.any() and field.type in (FieldType.BIGINT, FieldType.TIMESTAMP):
+            column = pd.arrays.IntegerArray(column, mask)
+        elif mask.any() and field.type == FieldType.BOOLEAN:
+            column = pd.arrays.BooleanArray(column, mask)
+        elif mask.any() and field.type == FieldType.DOUBLE:
+            column = np.where(mask, np.nan, column)
+        data[field.name] = column
+    return pd.DataFrame(data, columns=[field.name for field in field_list])
+
+
+def columns_to_arrow(field_list, columns, null_masks):
+    """
+    Build a pyarrow Table from decoded columns, TIMESTAMP fields become microsecond timestamps
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise DatahubException('pyarrow is required by to_arrow, please install it first')
+
+    arrow_types = {
+        FieldType.BIGINT: pa.int64(),
+        FieldType.TIMESTAMP: pa.timestamp('us'),
+        FieldType.DOUBLE: pa.float64(),
+        FieldType.BOOLEAN: pa.bool_(),
+        FieldType.STRING: pa.string(),
+        FieldType.DECIMAL: None
+    }
+    arrays = []
+    for field in field_list:
+        column, mask = columns[field.name], null_masks[field.name]
+        arrays.append(pa.array(column, type=arrow_types[field.type], mask=mask if mask.any() else None,
+                               from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[field.name for field in field_list])
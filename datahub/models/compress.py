@@ -21,30 +21,43 @@
 from __future__ import absolute_import
 
 import abc
-import struct
+import threading
 import zlib
 from enum import Enum
 
 import lz4.block
 import six
 
-from ..exceptions import DatahubException
+from ..exceptions import DatahubException, InvalidParameterException
+from ..utils import ErrorMessage, check_positive
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import snappy
+except ImportError:
+    snappy = None
 
 
 class CompressFormat(Enum):
     """
-    CompressFormat enum class, there are: ``NONE``, ``LZ4``, ``ZLIB``, ``DEFLATE``
+    CompressFormat enum class, there are: ``NONE``, ``LZ4``, ``ZLIB``, ``DEFLATE``, ``ZSTD``, ``SNAPPY``
     """
     NONE = ''
     LZ4 = 'lz4'
     ZLIB = 'zlib'
     DEFLATE = 'deflate'
+    ZSTD = 'zstd'
+    SNAPPY = 'snappy'
 
 
 @six.add_metaclass(abc.ABCMeta)
 class Compressor(object):
     """
-    Abstract Compressor class
+    Abstract Compressor class, compressors of new formats are added by :func:`register_compressor`
     """
 
     @abc.abstractmethod
@@ -59,6 +72,12 @@ class Compressor(object):
     def compress_format(self):
         pass
 
+    def format_name(self):
+        """
+        Name of the format in Content-Encoding and Accept-Encoding headers
+        """
+        return format_name(self.compress_format())
+
 
 class Lz4Compressor(Compressor):
     """
@@ -69,8 +88,8 @@ class Lz4Compressor(Compressor):
         return lz4.block.compress(data, store_size=False)
 
     def decompress(self, data, raw_size=-1):
-        size_header = struct.pack('<I', raw_size)
-        return lz4.block.decompress(size_header + data)
+        # the raw size is passed instead of prepending a size header, which copies the whole payload
+        return lz4.block.decompress(data, uncompressed_size=raw_size)
 
     def compress_format(self):
         return CompressFormat.LZ4
@@ -85,25 +104,119 @@ class ZlibCompressor(Compressor):
         return zlib.compress(data)
 
     def decompress(self, data, raw_size=-1):
+        if raw_size > 0:
+            # output buffer is allocated once by the raw size
+            return zlib.decompress(data, zlib.MAX_WBITS, raw_size)
         return zlib.decompress(data)
 
     def compress_format(self):
         return CompressFormat.ZLIB
 
 
-class DeflateCompressor(Compressor):
+class DeflateCompressor(ZlibCompressor):
     """
-    Deflate compressor
+    Deflate compressor, the stream is zlib wrapped as the http deflate encoding, raw deflate streams
+    are decompressed too
+    """
+
+    def decompress(self, data, raw_size=-1):
+        try:
+            return super(DeflateCompressor, self).decompress(data, raw_size)
+        except zlib.error:
+            return zlib.decompress(data, -zlib.MAX_WBITS, raw_size if raw_size > 0 else zlib.DEF_BUF_SIZE)
+
+    def compress_format(self):
+        return CompressFormat.DEFLATE
+
+
+class ZstdCompressor(Compressor):
     """
+    Zstandard compressor, zstandard is required
+
+    :param level: compression level, 1 to 22, higher levels are slower and smaller
+    :param dict_data: dictionary trained by :meth:`train_dictionary`, both client and server must use it
+    """
+
+    def __init__(self, level=3, dict_data=None):
+        if zstandard is None:
+            raise DatahubException('zstandard is required by zstd compression, please install it first')
+        self._level = level
+        self._dict = zstandard.ZstdCompressionDict(dict_data) if dict_data is not None else None
+        # zstd contexts are not thread safe, every thread keeps its own
+        self._local = threading.local()
+
+    @property
+    def level(self):
+        return self._level
+
+    @staticmethod
+    def train_dictionary(samples, dict_size=16 * 1024):
+        """
+        Train a dictionary from samples of request bodies, small bodies with common content are much
+        smaller compressed with it
+
+        :param samples: list of bytes
+        :param dict_size: max size of the dictionary
+        :return: dictionary
+        :rtype: bytes
+        """
+        if zstandard is None:
+            raise DatahubException('zstandard is required by zstd compression, please install it first')
+        return zstandard.train_dictionary(dict_size, samples).as_bytes()
+
+    def _compressor(self):
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self._level, dict_data=self._dict)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dict)
+            self._local.decompressor = decompressor
+        return decompressor
 
     def compress(self, data):
-        return zlib.compress(data)
+        return self._compressor().compress(data)
 
     def decompress(self, data, raw_size=-1):
-        return data
+        # frames carry the content size, the raw size is needed only by frames without it
+        return self._decompressor().decompress(data, max_output_size=max(raw_size, 0))
 
     def compress_format(self):
-        return CompressFormat.DEFLATE
+        return CompressFormat.ZSTD
+
+
+class SnappyCompressor(Compressor):
+    """
+    Snappy compressor, python-snappy is required
+    """
+
+    def __init__(self):
+        if snappy is None:
+            raise DatahubException('python-snappy is required by snappy compression, please install it first')
+
+    def compress(self, data):
+        return snappy.compress(data)
+
+    def decompress(self, data, raw_size=-1):
+        return snappy.uncompress(data)
+
+    def compress_format(self):
+        return CompressFormat.SNAPPY
+
+
+def format_name(compress_format):
+    """
+    Name of the compress format in headers, formats of registered compressors could be plain strings
+    """
+    if compress_format is None:
+        return ''
+    if isinstance(compress_format, CompressFormat):
+        return compress_format.value
+    return compress_format
 
 
 lz4_compressor = Lz4Compressor()
@@ -111,16 +224,120 @@ zlib_compressor = ZlibCompressor()
 deflate_compressor = DeflateCompressor()
 
 _compressor_dict = {
-    CompressFormat.NONE: None,
-    CompressFormat.LZ4: lz4_compressor,
-    CompressFormat.ZLIB: zlib_compressor,
-    CompressFormat.DEFLATE: deflate_compressor
+    CompressFormat.LZ4.value: lz4_compressor,
+    CompressFormat.ZLIB.value: zlib_compressor,
+    CompressFormat.DEFLATE.value: deflate_compressor
 }
 
+# compressors of optional libraries are created when first used
+_lazy_compressors = {
+    CompressFormat.ZSTD.value: ZstdCompressor,
+    CompressFormat.SNAPPY.value: SnappyCompressor
+}
+
+_lock = threading.Lock()
+
+
+def register_compressor(compressor):
+    """
+    Register a compressor by the name of its format, replacing the registered one,
+    e.g. ``register_compressor(ZstdCompressor(level=9))``
+
+    :param compressor: compressor
+    :type compressor: :class:`datahub.models.compress.Compressor`
+    """
+    if not isinstance(compressor, Compressor):
+        raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('compressor', 'Compressor'))
+    with _lock:
+        _compressor_dict[compressor.format_name()] = compressor
+
 
 def get_compressor(compress_format):
-    try:
-        compress_format = CompressFormat(compress_format)
-    except ValueError as e:
-        raise DatahubException(e)
-    return _compressor_dict.get(compress_format, None)
+    """
+    Get the registered compressor of the format, None for ``NONE``
+
+    :param compress_format: compress format or its name
+    :return: compressor
+    :rtype: :class:`datahub.models.compress.Compressor`
+    """
+    name = format_name(compress_format)
+    if not name:
+        return None
+    compressor = _compressor_dict.get(name)
+    if compressor is None:
+        if name not in _lazy_compressors:
+            raise DatahubException('%r is not a valid CompressFormat' % name)
+        with _lock:
+            if name not in _compressor_dict:
+                _compressor_dict[name] = _lazy_compressors[name]()
+            compressor = _compressor_dict[name]
+    return compressor
+
+
+class AdaptiveCompression(object):
+    """
+    Choose the compress format of every request body, instead of compressing the whole body and
+    comparing the lengths.
+
+    Bodies smaller than ``min_size`` are sent as they are. Otherwise slices sampled from the body are
+    compressed by every candidate, and the one with the smallest sampled ratio is used, unless the
+    ratio is above ``max_ratio`` which means the body is hardly compressible, e.g. encrypted or already
+    compressed blobs.
+
+    :param formats: candidate compress formats, the first one is also accepted for responses,
+        zstd and lz4 by default, zstd is skipped if zstandard is not installed
+    :param min_size: min body size to compress
+    :param max_ratio: max sampled compressed size / raw size to compress
+    :param sample_size: bytes sampled from the body
+    :param sample_slices: slices the sample is taken from, evenly spaced in the body
+    """
+
+    def __init__(self, formats=None, min_size=1024, max_ratio=0.9, sample_size=4096, sample_slices=4):
+        if not check_positive(sample_size):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'sample_size')
+        if not check_positive(sample_slices):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'sample_slices')
+        if not 0 < max_ratio <= 1:
+            raise InvalidParameterException(ErrorMessage.PARAMETER_OUT_OF_RANGE % ('max_ratio', '(0, 1]'))
+        if formats is None:
+            formats = [CompressFormat.LZ4]
+            if zstandard is not None:
+                formats.insert(0, CompressFormat.ZSTD)
+        self._compressors = [get_compressor(compress_format) for compress_format in formats]
+        if not self._compressors or None in self._compressors:
+            raise InvalidParameterException(ErrorMessage.INVALID_TYPE % ('formats', 'list of compress formats'))
+        self._min_size = min_size
+        self._max_ratio = max_ratio
+        self._sample_size = sample_size
+        self._sample_slices = sample_slices
+
+    @property
+    def accept_encoding(self):
+        return self._compressors[0].format_name()
+
+    def _sample(self, data):
+        if len(data) <= self._sample_size:
+            return data
+        view = memoryview(data)
+        slice_size = self._sample_size // self._sample_slices
+        step = (len(data) - slice_size) // max(self._sample_slices - 1, 1)
+        return b''.join(view[i * step:i * step + slice_size] for i in range(self._sample_slices))
+
+    def select(self, data):
+        """
+        Choose the compressor of the body
+
+        :param data: body
+        :return: compressor, None means the body should not be compressed
+        :rtype: :class:`datahub.models.compress.Compressor`
+        """
+        if len(data) < self._min_size:
+            return None
+        sample = self._sample(data)
+        best, best_ratio = None, None
+        for compressor in self._compressors:
+            ratio = len(compressor.compress(sample)) / float(len(sample))
+            # the former candidate wins a tie
+            if ratio <= self._max_ratio and (best is None or ratio < best_ratio):
+                best, best_ratio = compressor, ratio
+        return best
@@ -28,9 +28,11 @@ import time
 from cprotobuf.internal import encode_data
 
 from ..models import CursorType, RecordType, RecordSchema
-from ..proto.datahub_record_proto_pb import PutRecordsRequest, GetRecordsRequest
+from ..proto.datahub_record_proto_pb import GetRecordsRequest
+from ..proto.codec import get_codec
+from ..proto.wire import encode_record_entry, encode_put_records_request
 from ..rest import ContentType, Headers
-from ..utils import pb_message_wrap
+from ..utils import PB_FRAME_HEADER_SIZE, pb_message_wrap, to_text
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -320,14 +322,14 @@ class PutPBRecordsRequestParams(PutRecordsRequestParams):
     Protobuf Request params of put records api
     """
 
+    __slots__ = '_codec'
+
+    def __init__(self, record_list, codec=None):
+        super(PutPBRecordsRequestParams, self).__init__(record_list)
+        self._codec = codec or get_codec()
+
     def content(self):
-        pb_put_record_request = {
-            'records': []
-        }
-        for record in self._record_list:
-            pb_put_record_request['records'].append(record.to_pb_record_entry())
-        pb_data = encode_data(PutRecordsRequest, pb_put_record_request)
-        return pb_message_wrap(pb_data)
+        return self._codec.encode_put_records_frame(self._record_list)
 
     @staticmethod
     def extra_headers():
@@ -337,6 +339,83 @@ class PutPBRecordsRequestParams(PutRecordsRequestParams):
         }
 
 
+class PutColumnsRequestParams(RequestParams):
+    """
+    Request params of put records api built from encoded rows of columns
+
+    .. seealso:: :func:`datahub.models.columnar.encode_rows`
+    """
+
+    __slots__ = ('_rows', '_shard_id')
+
+    action = 'pub'
+
+    # server limits of one put records request
+    max_records = 1000
+    max_bytes = 4 * 1024 * 1024
+
+    def __init__(self, rows, shard_id=None):
+        self._rows = rows
+        self._shard_id = shard_id
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def shard_id(self):
+        return self._shard_id
+
+    @classmethod
+    def split(cls, rows, shard_id=None):
+        """
+        Split rows into requests under the server limits
+
+        :return: generator of (index of the first row, request params)
+        """
+        start, size = 0, 0
+        for index, row in enumerate(rows):
+            # values plus a few bytes of tag and length for every field
+            row_size = sum(len(value) + 4 for value in row if value is not None) + 16
+            if index > start and (index - start >= cls.max_records or size + row_size > cls.max_bytes):
+                yield start, cls(rows[start:index], shard_id)
+                start, size = index, 0
+            size += row_size
+        if start < len(rows):
+            yield start, cls(rows[start:], shard_id)
+
+    def content(self):
+        records = []
+        for row in self._rows:
+            record = {"Data": [to_text(value) for value in row]}
+            if self._shard_id:
+                record["ShardId"] = self._shard_id
+            records.append(record)
+        return json.dumps({
+            "Action": PutColumnsRequestParams.action,
+            "Records": records
+        })
+
+
+class PutPBColumnsRequestParams(PutColumnsRequestParams):
+    """
+    Protobuf Request params of put records api built from encoded rows of columns,
+    the request is written directly in protobuf wire format
+    """
+
+    def content(self):
+        buf = encode_put_records_request((encode_record_entry(row, self._shard_id) for row in self._rows),
+                                         bytearray(PB_FRAME_HEADER_SIZE))
+        return pb_message_wrap(buf, header_reserved=True)
+
+    @staticmethod
+    def extra_headers():
+        return {
+            Headers.REQUEST_ACTION: PutColumnsRequestParams.action,
+            Headers.CONTENT_TYPE: ContentType.HTTP_PROTOBUF.value
+        }
+
+
 class GetRecordsRequestParams(RequestParams):
     """
     Request params of get records api
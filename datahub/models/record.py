@@ -26,9 +26,8 @@ from enum import Enum
 import six
 
 from . import types as _types
-from .schema import RecordSchema, FieldType
 from ..exceptions import InvalidParameterException
-from ..utils import ErrorMessage, indent, to_str, bool_to_str, to_binary
+from ..utils import ErrorMessage, indent, to_str
 
 
 class RecordType(Enum):
@@ -79,7 +78,7 @@ class Record(object):
 
     @property
     def partition_key(self):
-        return self.partition_key
+        return self._partition_key
 
     @partition_key.setter
     def partition_key(self, value):
@@ -133,9 +132,14 @@ class Record(object):
         pass
 
     @abc.abstractmethod
-    def encode_pb_record_data(self):
+    def encode_pb_values(self):
         pass
 
+    def encode_pb_record_data(self):
+        return {
+            'data': [{'value': value} for value in self.encode_pb_values()]
+        }
+
     def to_json(self):
         data = {
             "Data": self.encode_values()
@@ -210,10 +214,8 @@ class BlobRecord(Record):
     def decode_values(self):
         return self._blob_data
 
-    def encode_pb_record_data(self):
-        return {
-            'data': [{'value': self._blob_data}]
-        }
+    def encode_pb_values(self):
+        return [self._blob_data]
 
 
 class TupleRecord(Record):
@@ -246,19 +248,49 @@ class TupleRecord(Record):
     True
     """
 
-    __slots__ = ('_field_list', '_name_indices')
+    __slots__ = ('_field_list', '_name_indices', '_compiled')
 
     def __init__(self, field_list=None, schema=None, values=None):
         super(TupleRecord, self).__init__()
-        self._field_list = field_list or schema.field_list
-        if self._field_list is None:
+        if field_list:
+            compiled = _types.CompiledSchema(field_list)
+        elif schema is not None:
+            compiled = schema.compiled
+        else:
             raise InvalidParameterException(ErrorMessage.MISSING_TUPLE_RECORD_SCHEMA)
+        self._set_compiled(compiled)
 
-        self._values = [None, ] * len(self._field_list)
         if values is not None:
-            self._set_values(values)
+            self._values = compiled.validate_values(values)
+        else:
+            self._values = [None, ] * len(self._field_list)
 
-        self._name_indices = dict((field.name, index) for index, field in enumerate(self._field_list))
+    @classmethod
+    def from_trusted(cls, schema, values):
+        """
+        Create a record without validating the values, which must be of the python type of every field
+        already, e.g. values decoded from the server or produced by a typed source
+
+        :param schema: record schema
+        :type schema: :class:`datahub.models.RecordSchema`
+        :param values: values of the fields
+        :return: record
+        :rtype: :class:`datahub.models.TupleRecord`
+        """
+        compiled = schema.compiled
+        if len(values) != len(compiled.field_list):
+            raise InvalidParameterException('The values set to records are against the schema, '
+                                            'expect len %s, got len %s' % (len(compiled.field_list), len(values)))
+        record = cls.__new__(cls)
+        Record.__init__(record)
+        record._set_compiled(compiled)
+        record._values = list(values)
+        return record
+
+    def _set_compiled(self, compiled):
+        self._compiled = compiled
+        self._field_list = compiled.field_list
+        self._name_indices = compiled.name_indices
 
     @property
     def field_list(self):
@@ -266,7 +298,7 @@ class TupleRecord(Record):
 
     @field_list.setter
     def field_list(self, value):
-        self._field_list = value
+        self._set_compiled(_types.CompiledSchema(value))
 
     @property
     def values(self):
@@ -302,46 +334,19 @@ class TupleRecord(Record):
         return RecordType.TUPLE
 
     def encode_values(self):
-        new_values = []
-        index = 0
-        for val in self._values:
-            if FieldType.BOOLEAN == self._field_list[index].type:
-                new_values.append(bool_to_str(val))
-            else:
-                new_values.append(to_str(val))
-            index += 1
-        return new_values
+        return self._compiled.encode_values(self._values)
 
     def decode_values(self):
         pass
 
-    def encode_pb_record_data(self):
-        pb_record_data = {
-            'data': []
-        }
-        index = 0
-        for val in self._values:
-            if FieldType.BOOLEAN == self._field_list[index].type:
-                pb_record_data['data'].append({'value': to_binary(bool_to_str(val))})
-            else:
-                pb_record_data['data'].append({'value': to_binary(val)})
-            index += 1
-        return pb_record_data
+    def encode_pb_values(self):
+        return self._compiled.encode_pb_values(self._values)
 
     def _set_values(self, values):
-        if len(values) != len(self._field_list):
-            raise InvalidParameterException('The values set to records are against the schema, '
-                                            'expect len %s, got len %s' % (len(self._field_list), len(values)))
-        for index, value in enumerate(values):
-            self._set_value_by_index(index, value)
+        self._values = self._compiled.validate_values(values)
 
     def _set_value_by_index(self, index, value):
-        field = self._field_list[index]
-        field_type = field.type
-        if not field.allow_null and value is None:
-            raise InvalidParameterException('Filed with index %d can not be none' % index)
-        val = _types.validate_value(value, field_type)
-        self._values[index] = val
+        self._values[index] = self._compiled.validators[index](value)
 
     def _set_value_by_name(self, name, value):
         self._set_value_by_index(self._name_indices[name], value)
@@ -20,18 +20,22 @@
 from __future__ import absolute_import
 
 import abc
+import base64
 import json
 
 import six
 
 from datahub.exceptions import DatahubException
+from . import columnar
 from .connector import ConnectorType, ConnectorState, get_connector_builder_by_type, \
     ConnectorShardStatus
+from .batch import RecordBatch
 from .record import FailedRecord, BlobRecord, TupleRecord, RecordType
 from .schema import RecordSchema
 from .shard import Shard, ShardBase, ShardContext
 from .subscription import OffsetWithSession, OffsetWithVersion, Subscription
-from ..proto.datahub_record_proto_pb import GetRecordsResponse, PutRecordsResponse
+from ..proto.codec import get_codec
+from ..proto.datahub_record_proto_pb import PutRecordsResponse
 from ..utils import to_text, unwrap_pb_frame
 
 
@@ -462,7 +466,7 @@ class GetCursorResult(Result):
     @classmethod
     def parse_content(cls, content, **kwargs):
         content = json.loads(to_text(content))
-        return cls(content['Cursor'], content['Sequence'], content['RecordTime'])
+        return cls(content['Cursor'], content['RecordTime'], content['Sequence'])
 
     def to_json(self):
         return {
@@ -538,6 +542,127 @@ class PutPBRecordsResult(PutRecordsResult):
         return cls(pb_put_record_response.failed_count, failed_records)
 
 
+class _JsonRecordEntries(object):
+    """
+    Records of a json get records response, gives them like the protobuf codecs
+    """
+
+    __slots__ = ('_items',)
+
+    def __init__(self, items):
+        self._items = items
+
+    def __len__(self):
+        return len(self._items)
+
+    def decode_entry(self, index, values=True, attributes=True):
+        item = self._items[index]
+        record_values = record_attributes = None
+        if values:
+            data = item['Data']
+            # data of blob records is base64 text, kept as it is
+            record_values = [data] if isinstance(data, six.string_types) else data
+        if attributes:
+            record_attributes = item['Attributes'] if 'Attributes' in item else {}
+        return record_values, record_attributes, item['SystemTime']
+
+
+class LazyRecords(object):
+    """
+    Records of a get records response, every record is decoded from the response when it is accessed the first time
+
+    Records of tuple topics can be projected to some fields, the records are of the schema of those fields then,
+    and only the values of those fields are decoded. Attributes and system time of a record can be read without
+    decoding the record.
+
+    :param response: decoded response, see :class:`datahub.proto.codec.PBCodec`
+    :param start_seq: sequence of the first record
+    :param record_schema: schema of tuple records, None for blob records
+    :param fields: names of the fields to decode, all fields if not given
+    """
+
+    __slots__ = ('_response', '_start_seq', '_record_schema', '_compiled', '_indices', '_records')
+
+    def __init__(self, response, start_seq, record_schema=None, fields=None):
+        self._response = response
+        self._start_seq = start_seq
+        self._indices = None
+        if record_schema is not None and fields is not None:
+            field_list = [record_schema.get_field(name) for name in fields]
+            self._indices = [record_schema.compiled.name_indices[field.name] for field in field_list]
+            record_schema = RecordSchema(field_list)
+        self._record_schema = record_schema
+        self._compiled = record_schema.compiled if record_schema is not None else None
+        self._records = [None] * len(response)
+
+    @property
+    def record_schema(self):
+        """
+        Schema of the records, only with the projected fields
+        """
+        return self._record_schema
+
+    def attributes(self, index):
+        """
+        Attributes of the record of the index, the values are not decoded
+
+        :rtype: dict
+        """
+        record = self._records[index]
+        if record is not None:
+            return record.attributes
+        return self._response.decode_entry(index % len(self._records), values=False)[1]
+
+    def system_time(self, index):
+        """
+        System time of the record of the index, the record is not decoded
+
+        :rtype: int
+        """
+        record = self._records[index]
+        if record is not None:
+            return record.system_time
+        return self._response.decode_entry(index % len(self._records), values=False, attributes=False)[2]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        records = self._records
+        for index in range(len(records)):
+            record = records[index]
+            if record is None:
+                record = records[index] = self._decode(index)
+            yield record
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._records)))]
+        record = self._records[index]
+        if record is None:
+            index %= len(self._records)
+            record = self._records[index] = self._decode(index)
+        return record
+
+    def __repr__(self):
+        return '<LazyRecords %d records>' % len(self._records)
+
+    def _decode(self, index):
+        values, attributes, system_time = self._response.decode_entry(index)
+        if self._compiled is not None:
+            if self._indices is not None:
+                values = [values[i] for i in self._indices]
+            record = TupleRecord.from_trusted(self._record_schema, self._compiled.decode_values(values))
+        elif isinstance(values[0], six.text_type):
+            record = BlobRecord(values=values[0])
+        else:
+            record = BlobRecord(blob_data=values[0])
+        record._attributes = attributes
+        record.sequence = self._start_seq + index
+        record.system_time = system_time
+        return record
+
+
 class GetRecordsResult(Result):
     """
     Result of get records api
@@ -549,7 +674,8 @@ class GetRecordsResult(Result):
 
         start_squ (:class:`int`): start sequence
 
-        records (:class:`list`): list of :obj:`datahub.models.BlobRecord`/:obj:`datahub.models.TupleRecord`
+        records (:class:`list`): list of :obj:`datahub.models.BlobRecord`/:obj:`datahub.models.TupleRecord`,
+        or :class:`datahub.models.LazyRecords` if got lazily
     """
 
     __slots__ = ('_next_cursor', '_record_count', '_start_seq', '_records')
@@ -596,22 +722,10 @@ class GetRecordsResult(Result):
     def parse_content(cls, content, **kwargs):
         content = json.loads(to_text(content))
 
-        records = []
-        sequence = content['StartSeq']
-        for item in content['Records']:
-            data = item['Data']
-            if isinstance(data, six.string_types):
-                record = BlobRecord(values=data)
-            else:
-                record_schema = kwargs['record_schema']
-                record = TupleRecord(schema=record_schema, values=data)
-            if 'Attributes' in item:
-                record.attributes = item['Attributes']
-            record.sequence = sequence
-            record.system_time = item['SystemTime']
-            sequence += 1
-            records.append(record)
-        return cls(content['NextCursor'], content['RecordCount'], content['StartSeq'], records)
+        records = LazyRecords(_JsonRecordEntries(content['Records']), content['StartSeq'],
+                              kwargs.get('record_schema'), kwargs.get('fields'))
+        return cls(content['NextCursor'], content['RecordCount'], content['StartSeq'],
+                   records if kwargs.get('lazy') else list(records))
 
     def to_json(self):
         return {
@@ -634,52 +748,181 @@ class GetPBRecordsResult(GetRecordsResult):
             raise DatahubException('Parse pb response body fail, error: crc check error. crc: %s, compute crc: %s'
                                    % (crc, compute_crc))
 
-        pb_get_record_response = GetRecordsResponse()
-        pb_get_record_response.ParseFromString(pb_str)
-        next_cursor = pb_get_record_response.next_cursor
-        record_count = pb_get_record_response.record_count
-        start_sequence = pb_get_record_response.start_sequence
-        records = []
-        sequence = start_sequence
-        for pb_record in pb_get_record_response.records:
-            record_schema = kwargs['record_schema']
-            if record_schema:
-                values = [bp_field_data.value for bp_field_data in pb_record.data.data]
-                record = TupleRecord(schema=record_schema, values=values)
-            else:
-                record = BlobRecord(blob_data=pb_record.data.data[0].value)
-            record._attributes = {
-                attribute.key: attribute.value for attribute in pb_record.attributes.attributes
-            }
-            record.system_time = pb_record.system_time
-            record.sequence = sequence
+        pb_get_record_response = (kwargs.get('codec') or get_codec()).decode_get_records_response(pb_str)
+        records = LazyRecords(pb_get_record_response, pb_get_record_response.start_sequence,
+                              kwargs.get('record_schema'), kwargs.get('fields'))
+        return cls(pb_get_record_response.next_cursor, pb_get_record_response.record_count,
+                   pb_get_record_response.start_sequence, records if kwargs.get('lazy') else list(records))
+
+
+class GetRecordBatchResult(GetRecordsResult):
+    """
+    Result of get records api, records are kept in a :class:`datahub.models.RecordBatch` without creating
+    an object per record
+    """
+
+    @classmethod
+    def parse_content(cls, content, **kwargs):
+        content = json.loads(to_text(content))
+
+        record_schema = kwargs['record_schema']
+        compiled = record_schema.compiled if record_schema else None
+        batch = RecordBatch(record_schema)
+        sequence = content['StartSeq']
+        for item in content['Records']:
+            data = item['Data']
+            values = compiled.decode_values(data) if compiled else (base64.b64decode(data),)
+            batch._append_decoded(values, item.get('Attributes'), sequence, item['SystemTime'])
             sequence += 1
-            records.append(record)
-        return cls(next_cursor, record_count, start_sequence, records)
-
-        # st = time.time()
-        # pb_get_record_response = GetRecordsResponse()
-        # pb_get_record_response.ParseFromString(content[12:])
-        # Result.parse += time.time() - st
-        # next_cursor = pb_get_record_response.next_cursor
-        # record_count = pb_get_record_response.record_count
-        # start_sequence = pb_get_record_response.start_sequence
-        # records = []
-        # sequence = start_sequence
-        # for pb_record in pb_get_record_response.records:
-        #     record_schema = kwargs['record_schema']
-        #     if record_schema:
-        #         values = [bp_field_data.value for bp_field_data in pb_record.data.data]
-        #         record = TupleRecord(schema=record_schema, values=values)
-        #     else:
-        #         record = BlobRecord(blob_data=pb_record.data.data[0].value)
-        #     record._attributes = pb_record.attributes
-        #     record.system_time = pb_record.system_time
-        #     record.sequence = sequence
-        #     sequence += 1
-        #     records.append(record)
-        # Result.decode += time.time() - st
-        # return cls(next_cursor, record_count, start_sequence, records)
+        return cls(content['NextCursor'], content['RecordCount'], content['StartSeq'], batch)
+
+
+class GetPBRecordBatchResult(GetPBRecordsResult):
+    """
+    Protobuf result of get records api, records are kept in a :class:`datahub.models.RecordBatch`
+    """
+
+    @classmethod
+    def parse_content(cls, content, **kwargs):
+        crc, compute_crc, pb_str = unwrap_pb_frame(content)
+        if crc != compute_crc:
+            raise DatahubException('Parse pb response body fail, error: crc check error. crc: %s, compute crc: %s'
+                                   % (crc, compute_crc))
+
+        pb_get_record_response = (kwargs.get('codec') or get_codec()).decode_get_records_response(pb_str)
+        record_schema = kwargs['record_schema']
+        compiled = record_schema.compiled if record_schema else None
+        batch = RecordBatch(record_schema)
+        sequence = pb_get_record_response.start_sequence
+        for values, attributes, system_time in pb_get_record_response:
+            batch._append_decoded(compiled.decode_values(values) if compiled else (bytes(values[0]),), attributes,
+                                  sequence, system_time)
+            sequence += 1
+        return cls(pb_get_record_response.next_cursor, pb_get_record_response.record_count,
+                   pb_get_record_response.start_sequence, batch)
+
+
+class GetColumnsResult(Result):
+    """
+    Result of get records api decoded column by column, no record object is created
+
+    Members:
+        next_cursor (:class:`str`): next cursor
+
+        record_count (:class:`int`): record count
+
+        start_seq (:class:`int`): start sequence, sequence of the i-th record is start_seq + i
+
+        record_schema (:class:`datahub.models.RecordSchema`): record schema
+
+        columns (:class:`collections.OrderedDict`): field name to numpy array of values
+
+        null_masks (:class:`collections.OrderedDict`): field name to numpy bool array, True means the value is null
+
+        system_times (:class:`numpy.ndarray`): int64 system time of every record
+    """
+
+    __slots__ = ('_next_cursor', '_record_count', '_start_seq', '_record_schema', '_columns', '_null_masks',
+                 '_system_times')
+
+    def __init__(self, next_cursor, record_count, start_seq, record_schema, columns, null_masks, system_times):
+        self._next_cursor = next_cursor
+        self._record_count = record_count
+        self._start_seq = start_seq
+        self._record_schema = record_schema
+        self._columns = columns
+        self._null_masks = null_masks
+        self._system_times = system_times
+
+    @property
+    def next_cursor(self):
+        return self._next_cursor
+
+    @property
+    def record_count(self):
+        return self._record_count
+
+    @property
+    def start_seq(self):
+        return self._start_seq
+
+    @property
+    def record_schema(self):
+        return self._record_schema
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def null_masks(self):
+        return self._null_masks
+
+    @property
+    def system_times(self):
+        return self._system_times
+
+    def to_pandas(self):
+        """
+        Convert to pandas DataFrame, requires pandas
+
+        :return: data frame with one column per field
+        :rtype: :class:`pandas.DataFrame`
+        """
+        return columnar.columns_to_pandas(self._record_schema.field_list, self._columns, self._null_masks)
+
+    def to_arrow(self):
+        """
+        Convert to pyarrow Table, requires pyarrow
+
+        :return: table with one column per field
+        :rtype: :class:`pyarrow.Table`
+        """
+        return columnar.columns_to_arrow(self._record_schema.field_list, self._columns, self._null_masks)
+
+    @classmethod
+    def _build(cls, next_cursor, record_count, start_seq, record_schema, rows, system_times):
+        columns, null_masks = columnar.decode_columns(record_schema.field_list, rows)
+        return cls(next_cursor, record_count, start_seq, record_schema, columns, null_masks,
+                   columnar.np.array(system_times, dtype=columnar.np.int64))
+
+    @classmethod
+    def parse_content(cls, content, **kwargs):
+        content = json.loads(to_text(content))
+
+        items = content['Records']
+        return cls._build(content['NextCursor'], content['RecordCount'], content['StartSeq'], kwargs['record_schema'],
+                          [item['Data'] for item in items], [item['SystemTime'] for item in items])
+
+    def to_json(self):
+        return {
+            'NextCursor': self._next_cursor,
+            'RecordCount': self._record_count,
+            'StartSeq': self._start_seq,
+            'Columns': [field.name for field in self._record_schema.field_list]
+        }
+
+
+class GetPBColumnsResult(GetColumnsResult):
+    """
+    Protobuf Result of get records api decoded column by column
+    """
+
+    @classmethod
+    def parse_content(cls, content, **kwargs):
+        crc, compute_crc, pb_str = unwrap_pb_frame(content)
+        if crc != compute_crc:
+            raise DatahubException('Parse pb response body fail, error: crc check error. crc: %s, compute crc: %s'
+                                   % (crc, compute_crc))
+
+        pb_get_record_response = (kwargs.get('codec') or get_codec()).decode_get_records_response(pb_str)
+        rows = []
+        system_times = []
+        for values, _, system_time in pb_get_record_response:
+            rows.append(values)
+            system_times.append(system_time)
+        return cls._build(pb_get_record_response.next_cursor, pb_get_record_response.record_count,
+                          pb_get_record_response.start_sequence, kwargs['record_schema'], rows, system_times)
 
 
 class GetMeteringInfoResult(Result):
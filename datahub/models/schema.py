@@ -124,6 +124,7 @@ class RecordSchema(object):
     def __init__(self, field_list=None):
         self._field_list = field_list if field_list else []
         self._field_dict = {}
+        self._compiled = None
 
         duplicates = set()
         for field in self._field_list:
@@ -143,9 +144,38 @@ class RecordSchema(object):
         if field.name not in self._field_dict:
             self._field_list.append(field)
             self._field_dict[field.name] = field
+            self._compiled = None
         else:
             raise InvalidParameterException('Field name %s already exists' % field.name)
 
+    @property
+    def compiled(self):
+        """
+        Name to index map, validators, encoders and decoders of the fields, built once and shared by records
+        of the schema, rebuilt after fields are added
+
+        :rtype: :class:`datahub.models.types.CompiledSchema`
+        """
+        if self._compiled is None:
+            # types is imported here, it depends on FieldType of this module
+            from .types import CompiledSchema
+            self._compiled = CompiledSchema(self._field_list)
+        return self._compiled
+
+    @property
+    def validators(self):
+        """
+        Validators of values set to every field
+        """
+        return self.compiled.validators
+
+    @property
+    def decoders(self):
+        """
+        Decoders of values of every field sent by the server
+        """
+        return self.compiled.decoders
+
     def get_field(self, index_or_name):
         if isinstance(index_or_name, six.integer_types):
             return self._get_field_by_index(index_or_name)
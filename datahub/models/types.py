@@ -175,6 +175,16 @@ class Boolean(DataType):
             return True
         return super(Boolean, self).can_implicit_cast(other)
 
+    def cast_value(self, value, data_type):
+        if isinstance(data_type, String):
+            # bool('false') is True, so string values are parsed as the server encodes them
+            lower_value = value.lower()
+            if lower_value not in ('true', 'false'):
+                raise InvalidParameterException('Cannot cast value(%s) from type(%s) to type(%s)' % (
+                    value, data_type, self))
+            return lower_value == 'true'
+        return super(Boolean, self).cast_value(value, data_type)
+
     def cast_type(self):
         return bool
 
@@ -193,7 +203,7 @@ try:
     import numpy as np
 
     integer_builtins += (np.integer,)
-    float_builtins += (np.float,)
+    float_builtins += (np.floating,)
 except ImportError:
     pass
 
@@ -251,5 +261,170 @@ def _validate_builtin_value(value, data_type):
 def validate_value(value, field_type):
     datahub_type = _datahub_types_dict[field_type]
     result = _validate_builtin_value(value, datahub_type)
-    datahub_type.validate_value(result)
+    if result is not None:
+        datahub_type.validate_value(result)
     return result
+
+
+def compile_validator(index, field):
+    """
+    Build the validator of values set to the field once, values of the exact builtin type of the field
+    are only checked by range, others fall back to :func:`validate_value`
+
+    :param index: index of the field
+    :param field: field
+    :return: function validating and converting a value
+    """
+    field_type = field.type
+    datahub_type = _datahub_types_dict[field_type]
+    exact_types = frozenset(_builtin_types_dict[datahub_type])
+    check_value = datahub_type.validate_value
+    allow_null = field.allow_null
+
+    def validate(value):
+        if value is None:
+            if not allow_null:
+                raise InvalidParameterException('Filed with index %d can not be none' % index)
+            return None
+        if type(value) in exact_types:
+            check_value(value)
+            return value
+        return validate_value(value, field_type)
+    return validate
+
+
+def _decode_boolean(value):
+    if not isinstance(value, six.text_type):
+        value = value.decode('utf-8')
+    return value.lower() == 'true'
+
+
+def _decode_decimal(value):
+    return decimal.Decimal(utils.to_text(value))
+
+
+# values sent by the server are text or bytes of the canonical form of every type
+_decoders_dict = {
+    FieldType.BIGINT: bigint_type.cast_type(),
+    FieldType.DOUBLE: float,
+    FieldType.STRING: utils.to_text,
+    FieldType.TIMESTAMP: timestamp_type.cast_type(),
+    FieldType.BOOLEAN: _decode_boolean,
+    FieldType.DECIMAL: _decode_decimal
+}
+
+
+def compile_decoder(field):
+    """
+    Decoder of values of the field sent by the server, the values are trusted and not validated
+
+    :param field: field
+    :return: function converting a not null text or bytes value to the python type of the field
+    """
+    return _decoders_dict[field.type]
+
+
+def decode_values(decoders, values):
+    """
+    Decode values of a record sent by the server by the decoders of the fields
+    """
+    return [None if value is None else decode(value) for decode, value in zip(decoders, values)]
+
+
+def _encode_boolean(value):
+    return 'true' if value else 'false'
+
+
+def _encode_pb_boolean(value):
+    return b'true' if value else b'false'
+
+
+if six.PY3:
+    def _encode_pb_number(value):
+        return str(value).encode('ascii')
+else:
+    _encode_pb_number = str
+
+# values of records are validated already, json encoders give text and protobuf encoders give bytes
+_json_encoders_dict = {
+    FieldType.BIGINT: str,
+    FieldType.DOUBLE: str,
+    FieldType.STRING: utils.to_str,
+    FieldType.TIMESTAMP: str,
+    FieldType.BOOLEAN: _encode_boolean,
+    FieldType.DECIMAL: str
+}
+
+_pb_encoders_dict = {
+    FieldType.BIGINT: _encode_pb_number,
+    FieldType.DOUBLE: _encode_pb_number,
+    FieldType.STRING: utils.to_binary,
+    FieldType.TIMESTAMP: _encode_pb_number,
+    FieldType.BOOLEAN: _encode_pb_boolean,
+    FieldType.DECIMAL: _encode_pb_number
+}
+
+
+class CompiledSchema(object):
+    """
+    Everything records need from the fields, built once and shared by all records of a schema:
+    the name to index map, validators, encoders and decoders of every field
+
+    :param field_list: fields
+    """
+
+    __slots__ = ('_field_list', '_name_indices', '_validators', '_decoders', '_json_encoders', '_pb_encoders')
+
+    def __init__(self, field_list):
+        self._field_list = field_list
+        self._name_indices = dict((field.name, index) for index, field in enumerate(field_list))
+        self._validators = [compile_validator(index, field) for index, field in enumerate(field_list)]
+        self._decoders = [compile_decoder(field) for field in field_list]
+        self._json_encoders = [_json_encoders_dict[field.type] for field in field_list]
+        self._pb_encoders = [_pb_encoders_dict[field.type] for field in field_list]
+
+    @property
+    def field_list(self):
+        return self._field_list
+
+    @property
+    def name_indices(self):
+        return self._name_indices
+
+    @property
+    def validators(self):
+        return self._validators
+
+    @property
+    def decoders(self):
+        return self._decoders
+
+    def validate_values(self, values):
+        """
+        Validate and convert values set to a record
+
+        :return: values of the python type of every field
+        :rtype: list
+        """
+        if len(values) != len(self._validators):
+            raise InvalidParameterException('The values set to records are against the schema, '
+                                            'expect len %s, got len %s' % (len(self._validators), len(values)))
+        return [validate(value) for validate, value in zip(self._validators, values)]
+
+    def decode_values(self, values):
+        """
+        Decode values of a record sent by the server, see :func:`decode_values`
+        """
+        return decode_values(self._decoders, values)
+
+    def encode_values(self, values):
+        """
+        Encode values of a record to text in json mode, null is kept as None
+        """
+        return [None if value is None else encode(value) for encode, value in zip(self._json_encoders, values)]
+
+    def encode_pb_values(self, values):
+        """
+        Encode values of a record to bytes in protobuf mode, null is kept as None
+        """
+        return [None if value is None else encode(value) for encode, value in zip(self._pb_encoders, values)]
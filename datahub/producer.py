@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import six
+
+from .exceptions import DatahubException, InvalidParameterException
+from .models import RecordType
+from .retry import ErrorType, classify, classify_exception
+from .utils import ErrorMessage, check_empty, check_positive, to_str
+
+logger = logging.getLogger('datahub.producer')
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+def _record_key(record):
+    if record.shard_id:
+        return 'shard:%s' % record.shard_id
+    if record.hash_key:
+        return 'hash:%s' % record.hash_key
+    if record.partition_key:
+        return 'partition:%s' % record.partition_key
+    return ''
+
+
+def _estimate_size(record):
+    if record.get_type() == RecordType.BLOB:
+        size = len(record.blob_data)
+    else:
+        size = sum(len(to_str(value)) for value in record.values if value is not None)
+    for key, value in six.iteritems(record.attributes):
+        size += len(key) + len(value)
+    return size
+
+
+class _Batch(object):
+    """
+    Records of one shard (or hash key) waiting to be put in one request
+    """
+
+    __slots__ = ('key', 'records', 'futures', 'sizes', 'size', 'create_time', 'not_before', 'attempts')
+
+    def __init__(self, key, attempts=0, not_before=0):
+        self.key = key
+        self.records = []
+        self.futures = []
+        self.sizes = []
+        self.size = 0
+        self.create_time = time.time()
+        self.not_before = not_before
+        self.attempts = attempts
+
+    def append(self, record, future, size):
+        self.records.append(record)
+        self.futures.append(future)
+        self.sizes.append(size)
+        self.size += size
+
+
+class DataHubProducer(object):
+    """
+    Asynchronous producer which buffers records per shard (or hash key, partition key)
+    and puts them in batches from background threads.
+
+    A batch is sent when it reaches ``batch_size`` records, ``batch_bytes`` bytes or has waited
+    ``linger_ms`` milliseconds. Failed records in :class:`datahub.models.PutRecordsResult` are resent
+    automatically up to ``retry_times`` times. At most one request per shard is in flight, so records
+    of a shard are written in the order they were sent unless they have to be resent.
+
+    :param datahub: datahub client
+    :type datahub: :class:`datahub.DataHub`
+    :param project_name: project name
+    :param topic_name: topic name
+    :param batch_size: max record count of one put request
+    :param batch_bytes: max estimated payload size of one put request
+    :param linger_ms: max time a record waits for its batch to fill up
+    :param max_buffered_records: max records buffered but not yet acknowledged
+    :param max_buffered_bytes: max estimated payload size buffered but not yet acknowledged
+    :param max_block_ms: max time ``send`` blocks when the buffer is full, -1 means blocking forever
+    :param retry_times: max resend times of a failed record
+    :param retry_backoff_ms: wait time before resending failed records
+    :param workers: number of threads sending requests
+
+    :Example:
+
+    >>> producer = DataHubProducer(dh, 'project', 'topic', linger_ms=50)
+    >>> future = producer.send(record)
+    >>> producer.send(record, callback=lambda f: print(f.exception()))
+    >>> producer.close()
+    >>> print(future.result())
+
+    .. seealso:: :meth:`datahub.DataHub.put_records`
+    """
+
+    def __init__(self, datahub, project_name, topic_name, batch_size=500, batch_bytes=2 * 1024 * 1024,
+                 linger_ms=100, max_buffered_records=100000, max_buffered_bytes=64 * 1024 * 1024,
+                 max_block_ms=60000, retry_times=3, retry_backoff_ms=100, workers=4):
+        if check_empty(project_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'project_name')
+        if check_empty(topic_name):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_EMPTY % 'topic_name')
+        for name, value in (('batch_size', batch_size), ('batch_bytes', batch_bytes),
+                            ('max_buffered_records', max_buffered_records),
+                            ('max_buffered_bytes', max_buffered_bytes), ('workers', workers)):
+            if not check_positive(value):
+                raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % name)
+
+        self._datahub = datahub
+        self._project_name = project_name
+        self._topic_name = topic_name
+        self._batch_size = batch_size
+        self._batch_bytes = batch_bytes
+        self._linger = linger_ms / 1000.0
+        self._max_buffered_records = max_buffered_records
+        self._max_buffered_bytes = max_buffered_bytes
+        self._max_block = max_block_ms / 1000.0 if max_block_ms >= 0 else None
+        self._retry_times = retry_times
+        self._retry_backoff = retry_backoff_ms / 1000.0
+
+        self._cond = threading.Condition()
+        self._batches = {}
+        self._in_flight = set()
+        self._buffered_records = 0
+        self._buffered_bytes = 0
+        self._flushing = 0
+        self._closed = False
+
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._dispatcher = threading.Thread(target=self._run, name='datahub-producer-dispatcher')
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def project_name(self):
+        return self._project_name
+
+    @property
+    def topic_name(self):
+        return self._topic_name
+
+    @property
+    def buffered_records(self):
+        return self._buffered_records
+
+    def send(self, record, callback=None):
+        """
+        Buffer a record to be put asynchronously
+
+        :param record: record to put
+        :type record: :class:`datahub.models.Record`
+        :param callback: callable invoked with the future once the record is written or failed
+        :return: future whose result is the record, or whose exception is the put error
+        :rtype: :class:`concurrent.futures.Future`
+        :raise: :class:`datahub.exceptions.DatahubException` if the producer is closed or the buffer is still full
+            after ``max_block_ms``
+        """
+        size = _estimate_size(record)
+        key = _record_key(record)
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        with self._cond:
+            deadline = time.time() + self._max_block if self._max_block is not None else None
+            while not self._closed and self._buffered_records > 0 and \
+                    (self._buffered_records >= self._max_buffered_records or
+                     self._buffered_bytes + size > self._max_buffered_bytes):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise DatahubException(ErrorMessage.PRODUCER_BUFFER_FULL)
+                self._cond.wait(remaining)
+            if self._closed:
+                raise DatahubException(ErrorMessage.PRODUCER_CLOSED)
+
+            queue = self._batches.get(key)
+            if queue is None:
+                queue = self._batches[key] = deque()
+            new_batch = not queue or self._is_full(queue[-1], size)
+            if new_batch:
+                queue.append(_Batch(key))
+            queue[-1].append(record, future, size)
+            self._buffered_records += 1
+            self._buffered_bytes += size
+            if new_batch or self._is_full(queue[-1]):
+                self._cond.notify_all()
+        return future
+
+    def flush(self, timeout=None):
+        """
+        Send all buffered records immediately and wait until they are written or failed
+
+        :param timeout: max seconds to wait, None means waiting forever
+        :return: True if all buffered records are done
+        """
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                deadline = time.time() + timeout if timeout is not None else None
+                while self._buffered_records > 0:
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout=None):
+        """
+        Flush buffered records and stop background threads. Records still buffered after
+        ``timeout`` fail with :class:`datahub.exceptions.DatahubException`.
+
+        :param timeout: max seconds to wait for buffered records, None means waiting forever
+        :return: none
+        """
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+        completions = []
+        with self._cond:
+            error = DatahubException(ErrorMessage.PRODUCER_CLOSED)
+            for queue in self._batches.values():
+                for batch in queue:
+                    completions.extend(self._complete(batch, range(len(batch.records)), error))
+            self._batches.clear()
+        self._set_results(completions)
+
+    # =======================================================
+    # private function
+    # =======================================================
+
+    def _is_full(self, batch, extra_size=0):
+        if len(batch.records) >= self._batch_size:
+            return True
+        return len(batch.records) > 0 and batch.size + extra_size > self._batch_bytes
+
+    def _is_ready(self, batch, now):
+        if batch.not_before > now:
+            return False
+        return self._flushing > 0 or self._is_full(batch) or now - batch.create_time >= self._linger
+
+    def _ready_time(self, batch):
+        if self._flushing > 0 or self._is_full(batch):
+            return batch.not_before
+        return max(batch.not_before, batch.create_time + self._linger)
+
+    def _run(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    # wait for in flight requests, batches left are failed by close()
+                    if not self._in_flight:
+                        return
+                    self._cond.wait()
+                    continue
+
+                now = time.time()
+                # new, full, flushed and finished batches notify, only deadlines of pending batches are waited for
+                deadline = None
+                for key, queue in list(self._batches.items()):
+                    if not queue:
+                        del self._batches[key]
+                        continue
+                    if key in self._in_flight:
+                        continue
+                    batch = queue[0]
+                    if self._is_ready(batch, now):
+                        queue.popleft()
+                        self._in_flight.add(key)
+                        self._executor.submit(self._send_batch, batch)
+                    else:
+                        batch_deadline = self._ready_time(batch)
+                        deadline = batch_deadline if deadline is None else min(deadline, batch_deadline)
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    self._cond.wait(max(deadline - now, 0.001))
+
+    def _send_batch(self, batch):
+        error = None
+        failed_records = []
+        try:
+            result = self._datahub.put_records(self._project_name, self._topic_name, batch.records)
+            failed_records = result.failed_records
+        except DatahubException as e:
+            error = e
+        except Exception as e:
+            logger.error('put records to %s/%s failed, unexpected error: %s'
+                         % (self._project_name, self._topic_name, e))
+            error = DatahubException(to_str(e))
+
+        completions = []
+        with self._cond:
+            try:
+                completions = self._handle_result(batch, error, failed_records)
+            finally:
+                self._in_flight.discard(batch.key)
+                self._cond.notify_all()
+        self._set_results(completions)
+
+    def _handle_result(self, batch, error, failed_records):
+        all_indices = range(len(batch.records))
+        can_retry = batch.attempts < self._retry_times and not self._closed
+        if error is not None:
+            if can_retry and classify_exception(error) != ErrorType.NON_RETRYABLE:
+                logger.warning('put %d records failed, resend them later, error: %s' % (len(batch.records), error))
+                self._requeue(batch, all_indices)
+                return []
+            return self._complete(batch, all_indices, error)
+
+        completions = []
+        retry_indices = []
+        failed = dict((failed_record.index, failed_record) for failed_record in failed_records)
+        for index in all_indices:
+            failed_record = failed.get(index)
+            if failed_record is None:
+                completions.extend(self._complete(batch, [index]))
+            elif can_retry and classify(error_code=failed_record.error_code) != ErrorType.NON_RETRYABLE:
+                retry_indices.append(index)
+            else:
+                exception = DatahubException(failed_record.error_message, error_code=failed_record.error_code)
+                completions.extend(self._complete(batch, [index], exception))
+        if retry_indices:
+            logger.warning('%d records failed, resend them later' % len(retry_indices))
+            self._requeue(batch, retry_indices)
+        return completions
+
+    def _requeue(self, batch, indices):
+        retry_batch = _Batch(batch.key, batch.attempts + 1, time.time() + self._retry_backoff)
+        for index in indices:
+            retry_batch.append(batch.records[index], batch.futures[index], batch.sizes[index])
+        queue = self._batches.get(batch.key)
+        if queue is None:
+            queue = self._batches[batch.key] = deque()
+        queue.appendleft(retry_batch)
+
+    def _complete(self, batch, indices, error=None):
+        completions = []
+        for index in indices:
+            self._buffered_records -= 1
+            self._buffered_bytes -= batch.sizes[index]
+            completions.append((batch.futures[index], batch.records[index], error))
+        return completions
+
+    @staticmethod
+    def _set_results(completions):
+        # futures are completed outside the lock since done callbacks run synchronously
+        for future, record, error in completions:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(record)
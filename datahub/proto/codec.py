@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import abc
+from enum import Enum
+
+import six
+
+from . import wire
+from ..exceptions import DatahubException
+from ..utils import PB_FRAME_HEADER_SIZE, pb_message_wrap
+
+try:
+    from cprotobuf.internal import encode_data
+    from .datahub_record_proto_pb import GetRecordsResponse as CGetRecordsResponse, \
+        PutRecordsRequest as CPutRecordsRequest
+except ImportError:
+    encode_data = None
+
+try:
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+except ImportError:
+    descriptor_pb2 = None
+
+
+class PBCodecType(Enum):
+    """
+    Protobuf codec type enum class, there are: ``CPROTOBUF``, ``PROTOBUF``, ``PYTHON``
+    """
+    CPROTOBUF = 'cprotobuf'
+    PROTOBUF = 'protobuf'
+    PYTHON = 'python'
+
+
+@six.add_metaclass(abc.ABCMeta)
+class PBCodec(object):
+    """
+    Abstract codec of record messages in protobuf mode
+
+    Records are encoded from the record objects, and GetRecordsResponse is decoded to an object with
+    ``next_cursor``, ``record_count`` and ``start_sequence``, iterating which gives
+    (values, attributes, system time) of every record, values are bytes and None means null.
+    ``decode_entry(index, values=True, attributes=True)`` of the object gives those of one record.
+    """
+
+    @abc.abstractmethod
+    def encode_put_records_request(self, record_list):
+        pass
+
+    def encode_put_records_frame(self, record_list):
+        """
+        Encode a PutRecordsRequest wrapped into a frame, codecs writing the message into a buffer
+        reserve the frame header in it instead of copying the message
+        """
+        return pb_message_wrap(self.encode_put_records_request(record_list))
+
+    @abc.abstractmethod
+    def decode_get_records_response(self, data):
+        pass
+
+    @abc.abstractmethod
+    def codec_type(self):
+        pass
+
+
+class _EntityGetRecordsResponse(object):
+    """
+    GetRecordsResponse decoded by a protobuf runtime, values are converted to python types on iteration
+    """
+
+    __slots__ = ('next_cursor', 'record_count', 'start_sequence', '_records', '_value_of')
+
+    def __init__(self, response, value_of):
+        self.next_cursor = response.next_cursor
+        self.record_count = response.record_count
+        self.start_sequence = response.start_sequence
+        self._records = response.records
+        self._value_of = value_of
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        value_of = self._value_of
+        for pb_record in self._records:
+            values = [value_of(field_data) for field_data in pb_record.data.data]
+            attributes = dict((attribute.key, attribute.value) for attribute in pb_record.attributes.attributes)
+            yield values, attributes, pb_record.system_time
+
+    def decode_entry(self, index, values=True, attributes=True):
+        pb_record = self._records[index]
+        record_values = [self._value_of(field_data) for field_data in pb_record.data.data] if values else None
+        record_attributes = dict((attribute.key, attribute.value)
+                                 for attribute in pb_record.attributes.attributes) if attributes else None
+        return record_values, record_attributes, pb_record.system_time
+
+
+class CProtobufCodec(PBCodec):
+    """
+    Codec on cprotobuf, records are encoded by its C encoder from plain dicts
+    """
+
+    def __init__(self):
+        if encode_data is None:
+            raise DatahubException('cprotobuf is required by cprotobuf codec, please install it first')
+
+    def encode_put_records_request(self, record_list):
+        return bytes(encode_data(CPutRecordsRequest, {
+            'records': [record.to_pb_record_entry() for record in record_list]
+        }))
+
+    def decode_get_records_response(self, data):
+        response = CGetRecordsResponse()
+        response.ParseFromString(data)
+        # cprotobuf only keeps fields present in the message in the entity dict
+        return _EntityGetRecordsResponse(response, lambda field_data: vars(field_data).get('value'))
+
+    def codec_type(self):
+        return PBCodecType.CPROTOBUF
+
+
+class ProtobufCodec(PBCodec):
+    """
+    Codec on the official protobuf runtime, message classes are built from record.proto at runtime
+    """
+
+    def __init__(self):
+        if descriptor_pb2 is None:
+            raise DatahubException('protobuf is required by protobuf codec, please install it first')
+        self._put_records_request, self._get_records_response = self._build_messages()
+
+    @staticmethod
+    def _build_messages():
+        file_proto = descriptor_pb2.FileDescriptorProto(name='datahub_record_codec.proto', syntax='proto2',
+                                                        package='datahub.record.codec')
+        field_proto = descriptor_pb2.FieldDescriptorProto
+        messages = [
+            ('StringPair', [('key', 1, 'string', 'required'), ('value', 2, 'string', 'required')]),
+            ('FieldData', [('value', 1, 'bytes', 'optional')]),
+            ('RecordAttributes', [('attributes', 1, 'StringPair', 'repeated')]),
+            ('RecordData', [('data', 1, 'FieldData', 'repeated')]),
+            ('RecordEntry', [('shard_id', 1, 'string', 'optional'), ('hash_key', 2, 'string', 'optional'),
+                             ('partition_key', 3, 'string', 'optional'), ('cursor', 4, 'string', 'optional'),
+                             ('next_cursor', 5, 'string', 'optional'), ('sequence', 6, 'int64', 'optional'),
+                             ('system_time', 7, 'int64', 'optional'),
+                             ('attributes', 8, 'RecordAttributes', 'optional'),
+                             ('data', 9, 'RecordData', 'required')]),
+            ('PutRecordsRequest', [('records', 1, 'RecordEntry', 'repeated')]),
+            ('GetRecordsResponse', [('next_cursor', 1, 'string', 'required'),
+                                    ('record_count', 2, 'int32', 'required'),
+                                    ('start_sequence', 3, 'int64', 'optional'),
+                                    ('records', 4, 'RecordEntry', 'repeated')])
+        ]
+        for message_name, fields in messages:
+            message_proto = file_proto.message_type.add(name=message_name)
+            for name, number, type_name, label in fields:
+                field = message_proto.field.add(name=name, number=number,
+                                                label=getattr(field_proto, 'LABEL_' + label.upper()))
+                if hasattr(field_proto, 'TYPE_' + type_name.upper()):
+                    field.type = getattr(field_proto, 'TYPE_' + type_name.upper())
+                else:
+                    field.type = field_proto.TYPE_MESSAGE
+                    field.type_name = '.datahub.record.codec.' + type_name
+
+        pool = descriptor_pool.DescriptorPool()
+        pool.Add(file_proto)
+
+        def message_class(name):
+            descriptor = pool.FindMessageTypeByName('datahub.record.codec.' + name)
+            if hasattr(message_factory, 'GetMessageClass'):
+                return message_factory.GetMessageClass(descriptor)
+            return message_factory.MessageFactory(pool).GetPrototype(descriptor)
+
+        return message_class('PutRecordsRequest'), message_class('GetRecordsResponse')
+
+    def encode_put_records_request(self, record_list):
+        request = self._put_records_request()
+        for record in record_list:
+            entry = request.records.add()
+            if record.shard_id:
+                entry.shard_id = record.shard_id
+            if record.hash_key:
+                entry.hash_key = record.hash_key
+            if record.partition_key:
+                entry.partition_key = record.partition_key
+            if record.attributes:
+                for key, value in record.attributes.items():
+                    entry.attributes.attributes.add(key=key, value=value)
+            data = entry.data.data
+            for value in record.encode_pb_values():
+                if value is None:
+                    data.add()
+                else:
+                    data.add(value=value)
+        return request.SerializeToString()
+
+    def decode_get_records_response(self, data):
+        response = self._get_records_response()
+        response.ParseFromString(data)
+        return _EntityGetRecordsResponse(
+            response, lambda field_data: field_data.value if field_data.HasField('value') else None)
+
+    def codec_type(self):
+        return PBCodecType.PROTOBUF
+
+
+class PythonCodec(PBCodec):
+    """
+    Pure python codec, records are written directly in wire format and GetRecordsResponse is parsed lazily
+    """
+
+    def encode_put_records_request(self, record_list):
+        return wire.encode_put_records_request(
+            wire.encode_record_entry(record.encode_pb_values(), record.shard_id, record.hash_key,
+                                     record.partition_key, record.attributes)
+            for record in record_list)
+
+    def encode_put_records_frame(self, record_list):
+        buf = wire.encode_put_records_request(
+            (wire.encode_record_entry(record.encode_pb_values(), record.shard_id, record.hash_key,
+                                      record.partition_key, record.attributes)
+             for record in record_list), bytearray(PB_FRAME_HEADER_SIZE))
+        return pb_message_wrap(buf, header_reserved=True)
+
+    def decode_get_records_response(self, data):
+        return wire.LazyGetRecordsResponse(data)
+
+    def codec_type(self):
+        return PBCodecType.PYTHON
+
+
+_codec_classes = {
+    PBCodecType.CPROTOBUF: CProtobufCodec,
+    PBCodecType.PROTOBUF: ProtobufCodec,
+    PBCodecType.PYTHON: PythonCodec
+}
+
+_codec_dict = {}
+
+
+def get_codec(codec_type=None):
+    """
+    Get codec by type, the default codec is cprotobuf
+
+    :param codec_type: codec type
+    :type codec_type: :class:`datahub.proto.codec.PBCodecType`
+    :return: codec instance
+    :rtype: :class:`datahub.proto.codec.PBCodec`
+    """
+    try:
+        codec_type = PBCodecType(codec_type or PBCodecType.CPROTOBUF)
+    except ValueError as e:
+        raise DatahubException(e)
+    if codec_type not in _codec_dict:
+        _codec_dict[codec_type] = _codec_classes[codec_type]()
+    return _codec_dict[codec_type]
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Minimal protobuf wire format reader and writer for messages of record.proto, used where building
+cprotobuf entities or dicts per record would cost more than the encoding itself.
+"""
+
+from __future__ import absolute_import
+
+import six
+
+from ..exceptions import DatahubException
+
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LEN = 2
+WIRE_FIXED32 = 5
+
+# tags of length delimited fields, (field_number << 3) | 2
+TAG_FIELD_1 = b'\x0a'
+TAG_FIELD_2 = b'\x12'
+TAG_FIELD_3 = b'\x1a'
+TAG_FIELD_4 = b'\x22'
+TAG_FIELD_8 = b'\x42'
+TAG_FIELD_9 = b'\x4a'
+
+# tags of varint fields, (field_number << 3) | 0
+TAG_VARINT_2 = b'\x10'
+TAG_VARINT_3 = b'\x18'
+TAG_VARINT_6 = b'\x30'
+TAG_VARINT_7 = b'\x38'
+
+_EMPTY_FIELD_DATA = TAG_FIELD_1 + b'\x00'
+
+_small_varints = [six.int2byte(i) for i in range(0x80)]
+
+# headers of RecordData.data entries wrapping a FieldData of short value, which fit in one byte lengths
+_field_data_headers = [TAG_FIELD_1 + _small_varints[size + 2] + TAG_FIELD_1 + _small_varints[size]
+                       for size in range(0x7e)]
+
+
+# =======================================================
+# writer
+# =======================================================
+
+def encode_varint(value):
+    if value < 0:
+        value += 1 << 64
+    if value < 0x80:
+        return _small_varints[value]
+    buf = bytearray()
+    while value > 0x7f:
+        buf.append(value & 0x7f | 0x80)
+        value >>= 7
+    buf.append(value)
+    return bytes(buf)
+
+
+def encode_len_field(tag, payload):
+    return tag + encode_varint(len(payload)) + payload
+
+
+def _encode_field_data(value):
+    if value is None:
+        return _EMPTY_FIELD_DATA
+    size = len(value)
+    if size < 0x7e:
+        return _field_data_headers[size] + value
+    return encode_len_field(TAG_FIELD_1, encode_len_field(TAG_FIELD_1, value))
+
+
+def _encode_string(tag, value):
+    return encode_len_field(tag, value.encode('utf-8') if isinstance(value, six.text_type) else value)
+
+
+def encode_record_entry(values, shard_id=None, hash_key=None, partition_key=None, attributes=None,
+                        sequence=None, system_time=None):
+    """
+    Encode a RecordEntry
+
+    :param values: encoded bytes of every field, None means null
+    :param shard_id: shard id of the record
+    :param hash_key: hash key of the record
+    :param partition_key: partition key of the record
+    :param attributes: attributes of the record
+    :param sequence: sequence of the record, only set in responses
+    :param system_time: system time of the record, only set in responses
+    :return: bytes of the RecordEntry message
+    """
+    entry = encode_len_field(TAG_FIELD_9, b''.join(_encode_field_data(value) for value in values))
+    if attributes:
+        pairs = b''.join(encode_len_field(TAG_FIELD_1, _encode_string(TAG_FIELD_1, key) +
+                                          _encode_string(TAG_FIELD_2, value))
+                         for key, value in attributes.items())
+        entry = encode_len_field(TAG_FIELD_8, pairs) + entry
+    if partition_key:
+        entry = _encode_string(TAG_FIELD_3, partition_key) + entry
+    if hash_key:
+        entry = _encode_string(TAG_FIELD_2, hash_key) + entry
+    if shard_id:
+        entry = _encode_string(TAG_FIELD_1, shard_id) + entry
+    if sequence is not None:
+        entry += TAG_VARINT_6 + encode_varint(sequence)
+    if system_time is not None:
+        entry += TAG_VARINT_7 + encode_varint(system_time)
+    return entry
+
+
+def encode_put_records_request(entries, buf=None):
+    """
+    Encode a PutRecordsRequest from encoded RecordEntry messages
+
+    :param entries: bytes of RecordEntry messages
+    :param buf: bytearray the message is appended to, entries are copied once into it
+    :return: bytes of the PutRecordsRequest message, or buf if given
+    """
+    if buf is None:
+        return b''.join(encode_len_field(TAG_FIELD_1, entry) for entry in entries)
+    for entry in entries:
+        buf += TAG_FIELD_1
+        buf += encode_varint(len(entry))
+        buf += entry
+    return buf
+
+
+def encode_get_records_response(next_cursor, start_sequence, entries):
+    """
+    Encode a GetRecordsResponse from encoded RecordEntry messages
+
+    :param next_cursor: cursor of the record after the last one
+    :param start_sequence: sequence of the first record
+    :param entries: list of bytes of RecordEntry messages
+    :return: bytes of the GetRecordsResponse message
+    """
+    return b''.join([_encode_string(TAG_FIELD_1, next_cursor), TAG_VARINT_2, encode_varint(len(entries)),
+                     TAG_VARINT_3, encode_varint(start_sequence)] +
+                    [encode_len_field(TAG_FIELD_4, entry) for entry in entries])
+
+
+# =======================================================
+# reader
+# =======================================================
+
+def decode_varint(data, pos):
+    """
+    :return: value and the position after it
+    """
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise DatahubException('Parse pb message fail, error: varint too long')
+
+
+def iter_fields(data, pos, end):
+    """
+    Iterate fields of the message in data[pos:end]
+
+    :return: generator of (field number, wire type, value), value is the integer of varint fields,
+        and (start, end) of length delimited fields
+    """
+    while pos < end:
+        key, pos = decode_varint(data, pos)
+        wire_type = key & 0x07
+        if wire_type == WIRE_VARINT:
+            value, pos = decode_varint(data, pos)
+        elif wire_type == WIRE_LEN:
+            size, pos = decode_varint(data, pos)
+            value = (pos, pos + size)
+            pos += size
+        elif wire_type == WIRE_FIXED64:
+            value, pos = None, pos + 8
+        elif wire_type == WIRE_FIXED32:
+            value, pos = None, pos + 4
+        else:
+            raise DatahubException('Parse pb message fail, error: unsupported wire type %d' % wire_type)
+        if pos > end:
+            raise DatahubException('Parse pb message fail, error: truncated message')
+        yield key >> 3, wire_type, value
+
+
+def to_int64(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_int32(value):
+    value &= 0xffffffff
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+
+def _text(data, span):
+    return bytes(data[span[0]:span[1]]).decode('utf-8')
+
+
+def _decode_record_data(data, pos, end):
+    # hot path of decoding, RecordData is a list of FieldData which has only one bytes field
+    values = []
+    while pos < end:
+        if data[pos] != 0x0a:
+            raise DatahubException('Parse pb message fail, error: unexpected field of RecordData')
+        size, pos = decode_varint(data, pos + 1)
+        field_end = pos + size
+        value = None
+        while pos < field_end:
+            key, pos = decode_varint(data, pos)
+            if key != 0x0a:
+                raise DatahubException('Parse pb message fail, error: unexpected field of FieldData')
+            size, pos = decode_varint(data, pos)
+            value = bytes(data[pos:pos + size])
+            pos += size
+        if pos != field_end:
+            raise DatahubException('Parse pb message fail, error: truncated message')
+        values.append(value)
+    return values
+
+
+def _decode_attributes(data, pos, end):
+    attributes = {}
+    for _, _, pair in iter_fields(data, pos, end):
+        key = value = u''
+        for number, _, span in iter_fields(data, pair[0], pair[1]):
+            if number == 1:
+                key = _text(data, span)
+            elif number == 2:
+                value = _text(data, span)
+        attributes[key] = value
+    return attributes
+
+
+def decode_put_records_request(data):
+    """
+    Parse a PutRecordsRequest
+
+    :return: list of (shard id, hash key, partition key, values, attributes) of every record entry,
+        values are bytes and None means null
+    """
+    if six.PY2:
+        data = bytearray(data)
+    entries = []
+    for number, wire_type, span in iter_fields(data, 0, len(data)):
+        if number != 1 or wire_type != WIRE_LEN:
+            continue
+        shard_id = hash_key = partition_key = u''
+        values = []
+        attributes = {}
+        for entry_number, entry_wire_type, value in iter_fields(data, span[0], span[1]):
+            if entry_wire_type != WIRE_LEN:
+                continue
+            if entry_number == 9:
+                values = _decode_record_data(data, value[0], value[1])
+            elif entry_number == 1:
+                shard_id = _text(data, value)
+            elif entry_number == 2:
+                hash_key = _text(data, value)
+            elif entry_number == 3:
+                partition_key = _text(data, value)
+            elif entry_number == 8:
+                attributes = _decode_attributes(data, value[0], value[1])
+        entries.append((shard_id, hash_key, partition_key, values, attributes))
+    return entries
+
+
+class LazyGetRecordsResponse(object):
+    """
+    GetRecordsResponse of which only the top level fields are parsed, record entries are parsed on iteration
+    """
+
+    __slots__ = ('_data', 'next_cursor', 'record_count', 'start_sequence', '_entries')
+
+    def __init__(self, data):
+        if six.PY2:
+            data = bytearray(data)
+        self._data = data
+        self.next_cursor = ''
+        self.record_count = 0
+        self.start_sequence = 0
+        self._entries = []
+        for number, wire_type, value in iter_fields(data, 0, len(data)):
+            if number == 4 and wire_type == WIRE_LEN:
+                self._entries.append(value)
+            elif number == 1 and wire_type == WIRE_LEN:
+                self.next_cursor = _text(data, value)
+            elif number == 2 and wire_type == WIRE_VARINT:
+                self.record_count = to_int32(value)
+            elif number == 3 and wire_type == WIRE_VARINT:
+                self.start_sequence = to_int64(value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        """
+        :return: generator of (values, attributes, system time) of every record, values are bytes and None means null
+        """
+        for index in range(len(self._entries)):
+            yield self.decode_entry(index)
+
+    def decode_entry(self, index, values=True, attributes=True):
+        """
+        Parse the record entry of the index, values or attributes not asked for are skipped and given as None
+
+        :return: (values, attributes, system time)
+        """
+        data = self._data
+        start, end = self._entries[index]
+        record_values = [] if values else None
+        record_attributes = {} if attributes else None
+        system_time = 0
+        for number, wire_type, value in iter_fields(data, start, end):
+            if number == 9 and wire_type == WIRE_LEN:
+                if values:
+                    record_values = _decode_record_data(data, value[0], value[1])
+            elif number == 7 and wire_type == WIRE_VARINT:
+                system_time = to_int64(value)
+            elif number == 8 and wire_type == WIRE_LEN and attributes:
+                record_attributes = _decode_attributes(data, value[0], value[1])
+        return record_values, record_attributes, system_time
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+from .exceptions import InvalidParameterException
+from .retry import ErrorType, classify
+from .utils import ErrorMessage, check_positive
+
+
+class AdaptiveTokenBucket(object):
+    """
+    Token bucket whose rate is adapted by AIMD: the rate is cut by ``decrease_factor`` when requests are
+    throttled, and grows by ``increase`` per second while requests succeed, up to ``max_rate``.
+
+    :param rate: initial requests per second
+    :param burst: max tokens kept, ``rate`` by default
+    :param min_rate: min requests per second, ``rate / 20`` by default
+    :param max_rate: max requests per second, ``rate`` by default
+    :param increase: requests per second added every second without throttling, ``max_rate / 20`` by default
+    :param decrease_factor: factor multiplied to the rate when throttled
+    :param cooldown: min seconds between two decreases, throttling of requests in flight are counted once
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None, max_rate=None, increase=None, decrease_factor=0.5,
+                 cooldown=1.0):
+        if not check_positive(rate):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'rate')
+        if not 0 < decrease_factor < 1:
+            raise InvalidParameterException(ErrorMessage.PARAMETER_OUT_OF_RANGE % ('decrease_factor', '(0, 1)'))
+        self._max_rate = max_rate if max_rate is not None else float(rate)
+        self._min_rate = min_rate if min_rate is not None else rate / 20.0
+        self._rate = float(rate)
+        self._burst = burst if burst is not None else max(float(rate), 1.0)
+        self._increase = increase if increase is not None else self._max_rate / 20.0
+        self._decrease_factor = decrease_factor
+        self._cooldown = cooldown
+
+        now = time.time()
+        self._tokens = self._burst
+        self._last_refill = now
+        self._last_increase = now
+        self._last_decrease = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _refill(self, now):
+        if now > self._last_refill:
+            self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def reserve(self, cost=1):
+        """
+        Take tokens, the tokens could be borrowed from the future
+
+        :param cost: tokens to take
+        :return: seconds to wait before sending the request
+        """
+        with self._lock:
+            self._refill(time.time())
+            self._tokens -= cost
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self._rate
+
+    def on_success(self):
+        with self._lock:
+            now = time.time()
+            # idle time does not count, or the rate jumps back after a pause
+            elapsed = min(now - self._last_increase, 1.0)
+            self._last_increase = now
+            if elapsed > 0 and self._rate < self._max_rate:
+                self._refill(now)
+                self._rate = min(self._max_rate, self._rate + self._increase * elapsed)
+
+    def on_throttled(self):
+        with self._lock:
+            now = time.time()
+            self._last_increase = now
+            if now - self._last_decrease < self._cooldown:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+            # stop the burst which has been throttled
+            self._tokens = min(self._tokens, 0)
+
+
+class ShardRateLimiter(object):
+    """
+    Client side rate limiter keyed by (project, topic, shard_id), each key is limited by an
+    :class:`datahub.ratelimit.AdaptiveTokenBucket` created with the same arguments.
+
+    Records put without shard id are limited by the key of shard id None.
+
+    :param rate: initial requests per second of a shard
+    :param kwargs: other arguments of :class:`datahub.ratelimit.AdaptiveTokenBucket`
+    """
+
+    def __init__(self, rate, **kwargs):
+        # check arguments early
+        AdaptiveTokenBucket(rate, **kwargs)
+        self._rate = rate
+        self._kwargs = kwargs
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, project_name, topic_name, shard_id):
+        key = (project_name, topic_name, shard_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = AdaptiveTokenBucket(self._rate, **self._kwargs)
+                    self._buckets[key] = bucket
+        return bucket
+
+    def rate(self, project_name, topic_name, shard_id):
+        """
+        Current requests per second of the shard
+
+        :return: rate
+        :rtype: float
+        """
+        return self.bucket(project_name, topic_name, shard_id).rate
+
+    def reserve(self, keys):
+        """
+        Take a token of every key
+
+        :param keys: list of (project, topic, shard_id)
+        :return: seconds to wait before sending the request
+        """
+        delay = 0
+        for key in keys:
+            delay = max(delay, self.bucket(*key).reserve())
+        return delay
+
+    def update(self, keys, throttled_keys=()):
+        """
+        Adapt rates by the result of the request
+
+        :param keys: list of (project, topic, shard_id) of the request
+        :param throttled_keys: keys which were throttled
+        """
+        for key in keys:
+            if key in throttled_keys:
+                self.bucket(*key).on_throttled()
+            else:
+                self.bucket(*key).on_success()
+
+
+class RequestLimit(object):
+    """
+    Rate limit of the shards of one request, given to rest client which takes a token before every try
+    and slows the shards down as soon as a try is throttled, retried tries included
+
+    :param limiter: rate limiter
+    :type limiter: :class:`datahub.ratelimit.ShardRateLimiter`
+    :param keys: list of (project, topic, shard_id) of the request
+    """
+
+    __slots__ = ('_limiter', '_keys')
+
+    def __init__(self, limiter, keys):
+        self._limiter = limiter
+        self._keys = keys
+
+    @property
+    def keys(self):
+        return self._keys
+
+    def reserve(self):
+        """
+        Take a token of every key before a try
+
+        :return: seconds to wait before sending the try
+        """
+        return self._limiter.reserve(self._keys)
+
+    def on_throttled(self):
+        """
+        Called by rest client when a try of the request is throttled
+        """
+        self._limiter.update(self._keys, self._keys)
+
+    def on_result(self, throttled_keys=()):
+        """
+        Adapt rates by the result of the request, keys of throttled records are slowed down
+        """
+        self._limiter.update(self._keys, throttled_keys)
+
+
+def put_records_keys(project_name, topic_name, record_list):
+    """
+    Keys of the shards which the records are put to
+
+    :return: list of (project, topic, shard_id)
+    """
+    shard_ids = set(record.shard_id for record in record_list)
+    return [(project_name, topic_name, shard_id) for shard_id in shard_ids]
+
+
+def throttled_put_records_keys(project_name, topic_name, record_list, result):
+    """
+    Keys of the shards which throttled the records
+
+    :return: set of (project, topic, shard_id)
+    """
+    return set((project_name, topic_name, record_list[failed_record.index].shard_id)
+               for failed_record in result.failed_records
+               if classify(error_code=failed_record.error_code) == ErrorType.THROTTLED)
+
+
+def throttled_put_columns_keys(project_name, topic_name, shard_id, result):
+    """
+    Keys of the shard which throttled the rows of a put columns request, all rows of it are put to one shard
+
+    :return: set of (project, topic, shard_id)
+    """
+    if any(classify(error_code=failed_record.error_code) == ErrorType.THROTTLED
+           for failed_record in result.failed_records):
+        return {(project_name, topic_name, shard_id)}
+    return set()
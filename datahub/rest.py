@@ -23,17 +23,22 @@ import json
 import logging
 import platform
 import socket
+import time
+import warnings
 from enum import Enum
 from string import Template
 
 import requests
 import six
-from requests.adapters import HTTPAdapter
 
 from .exceptions import exception_handler, DatahubException
-from .models.compress import CompressFormat, get_compressor
+from .models.compress import AdaptiveCompression, CompressFormat, get_compressor
+from .retry import ErrorType, classify_exception
+from .tracing import NULL_CONTEXT, Phase, RequestContext
+from .transport import Transport, Http2Transport, transport_registry
 from .utils import gen_rfc822_date, to_text, to_binary
 from .version import __version__, __datahub_client_version__
+from .wirelog import DEFAULT_WIRE_LOGGER
 
 logger = logging.getLogger('datahub.rest')
 logger.setLevel(logging.INFO)
@@ -97,7 +102,7 @@ class Path(object):
 class CommonResponseResult(object):
     __slots__ = ('_status_code', '_request_id', '_error_code', '_error_msg')
 
-    def __init__(self, resp, content):
+    def __init__(self, resp, content, wire_logger=DEFAULT_WIRE_LOGGER):
         if resp is not None:
             try:
                 self._status_code = resp.status_code
@@ -106,9 +111,10 @@ class CommonResponseResult(object):
                 self._error_code = content['ErrorCode']
                 self._error_msg = content['ErrorMessage']
             except Exception:
-                logger.error('Decode json message error, content: %s' % to_text(content))
+                preview = wire_logger.preview(content)
+                logger.error('Decode json message error, content: %s', preview)
                 raise DatahubException(self._status_code, self._request_id, '',
-                                       'Decode json message error, content: %s' % to_text(content))
+                                       'Decode json message error, content: %s' % preview)
 
     @property
     def status_code(self):
@@ -153,35 +159,64 @@ def default_user_agent():
 
 class RestClient(object):
     """Restful client enhanced by URL building and request signing facilities.
+
+    ``stream`` is deprecated and ignored, response bodies are always read by the transport
+    before the connection is released.
     """
 
     def __init__(self, account, endpoint, user_agent=None, proxies=None, stream=False, retry_times=3, conn_timeout=5,
-                 read_timeout=120, pool_connections=10, pool_maxsize=10, exception_handler_=exception_handler):
+                 read_timeout=120, pool_connections=10, pool_maxsize=10, exception_handler_=exception_handler,
+                 shared_transport=False, max_concurrency=None, http2=False, retry_policy=None, metrics=None,
+                 hooks=None, wire_logger=None):
         if endpoint.endswith('/'):
             endpoint = endpoint[:-1]
         self._account = account
         self._endpoint = endpoint
         self._user_agent = user_agent or default_user_agent()
         self._proxies = proxies
-        self._stream = stream
+        if stream:
+            warnings.warn('stream is deprecated and ignored, response bodies are always read by the transport',
+                          DeprecationWarning, stacklevel=2)
         self._retry_times = retry_times
         self._conn_timeout = conn_timeout
         self._read_timeout = read_timeout
+        self._retry_policy = retry_policy
+        self._metrics = metrics
+        self._hooks = tuple(hooks) if hooks else ()
+        self._wire_logger = wire_logger if wire_logger is not None else DEFAULT_WIRE_LOGGER
 
-        self._session = requests.Session()
-        self._session.headers.update({Headers.ACCEPT_ENCODING: ''})
-
-        # mount adapters with retry times
-        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
-                              max_retries=self._retry_times)
-        self._session.mount('http://', adapter)
-        self._session.mount('https://', adapter)
+        self._shared_transport = shared_transport
+        self._http2 = http2
+        self._transport = self._create_transport(pool_connections, pool_maxsize, max_concurrency)
 
         # exception handler
         self._exception_handler = exception_handler_
 
     def __del__(self):
-        self._session.close()
+        self._release_transport()
+
+    def _create_transport(self, pool_connections, pool_maxsize, max_concurrency):
+        if self._shared_transport:
+            return transport_registry.acquire(self._endpoint, pool_connections, pool_maxsize, self._retry_times,
+                                              max_concurrency, self._http2)
+        transport_class = Http2Transport if self._http2 else Transport
+        return transport_class(self._endpoint, pool_connections, pool_maxsize, self._retry_times, max_concurrency)
+
+    def close(self):
+        """
+        Close the connections, a shared transport is only closed when no client uses it
+        """
+        self._release_transport()
+
+    def _release_transport(self):
+        transport = getattr(self, '_transport', None)
+        if transport is None:
+            return
+        self._transport = None
+        if self._shared_transport:
+            transport_registry.release(transport)
+        else:
+            transport.close()
 
     @property
     def endpoint(self):
@@ -193,6 +228,39 @@ class RestClient(object):
             value = value[:-1]
         self._endpoint = value
 
+    @property
+    def transport(self):
+        return self._transport
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def hooks(self):
+        return self._hooks
+
+    @property
+    def wire_logger(self):
+        return self._wire_logger
+
+    def trace(self):
+        """
+        Context tracing a request by the hooks from encoding it to parsing its result, used as a context manager
+        around them and given to the request. Requests sent without context are traced from compressing them
+        to handling their responses.
+
+        :return: context of the request, a context tracing nothing if there are no hooks
+        :rtype: :class:`datahub.tracing.RequestContext`
+        """
+        if not self._hooks:
+            return NULL_CONTEXT
+        return RequestContext(self._hooks)
+
     @property
     def account(self):
         return self._account
@@ -233,33 +301,150 @@ class RestClient(object):
         }
         return headers
 
+    @staticmethod
+    def __to_buffer(content):
+        # bytes-like content is used as it is, to_binary copies bytearray
+        if isinstance(content, (six.binary_type, bytearray, memoryview)):
+            return content
+        return to_binary(content)
+
     @staticmethod
     def __compress_content(content, compress_format):
-        compressor = get_compressor(compress_format)
-        if compressor:
-            compressed = compressor.compress(to_binary(content))
+        if isinstance(compress_format, AdaptiveCompression):
+            if not content:
+                return content, {}
+            buffer = RestClient.__to_buffer(content)
+            compressor = compress_format.select(buffer)
             compress_headers = {
-                Headers.ACCEPT_ENCODING: compress_format.value
+                Headers.ACCEPT_ENCODING: compress_format.accept_encoding
             }
-            if len(compressed) < len(content):
-                compress_headers[Headers.RAW_SIZE] = to_text(len(content))
-                compress_headers[Headers.CONTENT_ENCODING] = compress_format.value
-                return compressed, compress_headers
+            if compressor is None:
+                return content, compress_headers
+        else:
+            compressor = get_compressor(compress_format)
+            if not compressor:
+                return content, {}
+            buffer = RestClient.__to_buffer(content)
+            compress_headers = {
+                Headers.ACCEPT_ENCODING: compressor.format_name()
+            }
+
+        compressed = compressor.compress(buffer)
+        if len(compressed) < len(buffer):
+            compress_headers[Headers.RAW_SIZE] = to_text(len(buffer))
+            compress_headers[Headers.CONTENT_ENCODING] = compressor.format_name()
+            return compressed, compress_headers
+        return content, compress_headers
+
+    @staticmethod
+    def _compress_body(compress_format, kwargs):
+        """
+        Compress the body once before sending, retries of the request reuse the compressed body
 
-            return content, compress_headers
-        return content, {}
+        :return: kwargs with the compressed body and compress headers
+        """
+        if 'data' not in kwargs:
+            return kwargs
+        data, compress_headers = RestClient.__compress_content(kwargs['data'], compress_format)
+        headers = dict(kwargs.get('headers', {}))
+        headers.update(compress_headers)
+        return dict(kwargs, data=data, headers=headers)
 
     @staticmethod
-    def __decompress_response(response):
-        content_encoding = response.headers.get(Headers.CONTENT_ENCODING, '')
-        raw_size = int(response.headers.get(Headers.RAW_SIZE, '0'))
+    def __decompress_response(headers, content):
+        content_encoding = headers.get(Headers.CONTENT_ENCODING, '')
+        raw_size = int(headers.get(Headers.RAW_SIZE, '0'))
         compressor = get_compressor(content_encoding)
 
         if compressor:
-            return compressor.decompress(to_binary(response.content), raw_size)
-        return response.content
+            return compressor.decompress(RestClient.__to_buffer(content), raw_size)
+        return content
+
+    def request(self, method, url, compress_format=CompressFormat.NONE, context=None, limit=None, **kwargs):
+        """
+        Send a request, retried by the retry policy
 
-    def request(self, method, url, compress_format=CompressFormat.NONE, **kwargs):
+        :param limit: rate limit of the request, a token is taken before every try and throttled tries are
+            reported to it, see :class:`datahub.ratelimit.RequestLimit`
+        """
+        if context is None:
+            if self._hooks:
+                with self.trace() as context:
+                    return self.request(method, url, compress_format, context, limit, **kwargs)
+            context = NULL_CONTEXT
+
+        if self._retry_policy is not None:
+            self._retry_policy.on_request()
+        recorder = None
+        if self._metrics is not None:
+            recorder = self._metrics.recorder(method, url, kwargs.get('headers'), kwargs.get('data'))
+        kwargs = context.begin(method, url, kwargs)
+        with context.phase(Phase.COMPRESS):
+            kwargs = self._compress_body(compress_format, kwargs)
+
+        attempt = 0
+        while True:
+            if limit is not None:
+                delay = limit.reserve()
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                return self._request(method, url, recorder, context, **kwargs)
+            except DatahubException as e:
+                delay = self._on_failure(e, attempt, limit)
+                if delay is None:
+                    raise
+                attempt += 1
+                context.on_retry(attempt)
+                if recorder is not None:
+                    recorder.on_retry()
+                logger.warning('request %s failed, retry %d after %.3fs, error: %s', url, attempt, delay, e)
+                time.sleep(delay)
+
+    def _request(self, method, url, recorder=None, context=NULL_CONTEXT, **kwargs):
+        with context.phase(Phase.SIGN):
+            prepared_req = self._prepare_request(method, url, **kwargs)
+        sampled = self._wire_logger.sample()
+        if sampled:
+            self._wire_logger.log_request(prepared_req.method, prepared_req.url, prepared_req.headers,
+                                          prepared_req.body)
+
+        if recorder is not None:
+            recorder.on_send(kwargs.get('data'))
+        try:
+            with context.phase(Phase.HTTP):
+                resp = self._transport.send(prepared_req,
+                                            timeout=(self._conn_timeout, self._read_timeout),
+                                            verify=False,
+                                            proxies=self._proxies)
+        except Exception as e:
+            if recorder is not None:
+                recorder.on_response(-1)
+            context.on_response(-1, error=e)
+            raise
+        context.on_response(resp.status_code, resp.headers)
+
+        if sampled:
+            self._wire_logger.log_response(prepared_req.url, resp.status_code, resp.headers, resp.content)
+
+        return self._handle_response(resp.status_code, resp.headers, resp.content, recorder, context)
+
+    def _on_failure(self, exception, attempt, limit=None):
+        """
+        Report a throttled try to the rate limit, and get the seconds to sleep before retrying the failed request,
+        None means not to retry
+        """
+        error_type = classify_exception(exception)
+        if limit is not None and error_type == ErrorType.THROTTLED:
+            limit.on_throttled()
+        if self._retry_policy is None:
+            return None
+        return self._retry_policy.retry_delay(error_type, attempt)
+
+    def _prepare_request(self, method, url, **kwargs):
+        """
+        Build the signed request, shared by all transports
+        """
         url = "%s%s" % (self._endpoint, url)
 
         # Construct user agent without handling the letter case.
@@ -268,51 +453,50 @@ class RestClient(object):
         extra_headers = dict((k, str(v)) for k, v in six.iteritems(extra_headers))
         headers.update(extra_headers)
 
-        # Compress content and set headers
+        # Content is compressed already
         if 'data' in kwargs:
-            data, compress_headers = RestClient.__compress_content(kwargs['data'], compress_format)
-            headers.update(compress_headers)
-            kwargs['data'] = data
-            headers[Headers.CONTENT_LENGTH] = to_text(len(data))
+            headers[Headers.CONTENT_LENGTH] = to_text(len(kwargs['data']))
 
         kwargs['headers'] = headers
 
         req = requests.Request(method.value, url, **kwargs)
-        prepared_req = self._session.prepare_request(req)
+        if self._transport is not None:
+            prepared_req = self._transport.prepare_request(req)
+        else:
+            prepared_req = req.prepare()
 
         self._account.sign_request(prepared_req)
+        return prepared_req
 
-        logger.debug('full request url: %s\nrequest headers:\n%s\nrequest body:\n%s'
-                     % (prepared_req.url, prepared_req.headers, prepared_req.body))
-
-        resp = self._session.send(prepared_req,
-                                  stream=self._stream,
-                                  timeout=(self._conn_timeout, self._read_timeout),
-                                  verify=False)
-
-        logger.debug('response.status_code: %d' % resp.status_code)
-        logger.debug('response.headers: \n%s' % resp.headers)
-        if not self._stream:
-            logger.debug('response.content: %s\n' % resp.content)
-
-        content = RestClient.__decompress_response(resp)
+    def _handle_response(self, status_code, headers, content, recorder=None, context=NULL_CONTEXT):
+        """
+        Decompress the response content and raise exception if the request failed, shared by all transports
+        """
+        received = len(content) if content else 0
+        with context.phase(Phase.DECOMPRESS):
+            content = RestClient.__decompress_response(headers, content)
 
         # Automatically detect error
-        if not RestClient.is_ok(resp) and self._exception_handler is not None:
-            status_code = resp.status_code
-            request_id = resp.headers[Headers.REQUEST_ID]
-            try:
-                content_data = json.loads(to_text(content))
-                error_code = content_data['ErrorCode']
-                error_msg = content_data['ErrorMessage']
-            except Exception:
-                logger.error('Decode json message error, content: %s' % to_text(content))
-                raise DatahubException('Decode json message error, content: %s' % to_text(content),
-                                       status_code, request_id, '',)
-
-            logger.error("status_code: %d, request_id: %s, error_code: %s, error_msg: %s"
-                         % (status_code, request_id, error_code, error_msg))
-            self._exception_handler.raise_exception(error_msg, status_code, request_id, error_code)
+        error_code = None
+        try:
+            if status_code >= 400 and self._exception_handler is not None:
+                request_id = headers[Headers.REQUEST_ID]
+                try:
+                    content_data = json.loads(to_text(content))
+                    error_code = content_data['ErrorCode']
+                    error_msg = content_data['ErrorMessage']
+                except Exception:
+                    preview = self._wire_logger.preview(content)
+                    logger.error('Decode json message error, content: %s', preview)
+                    raise DatahubException('Decode json message error, content: %s' % preview,
+                                           status_code, request_id, '',)
+
+                logger.error('status_code: %d, request_id: %s, error_code: %s, error_msg: %s',
+                             status_code, request_id, error_code, error_msg)
+                self._exception_handler.raise_exception(error_msg, status_code, request_id, error_code)
+        finally:
+            if recorder is not None:
+                recorder.on_response(status_code, received, len(content) if content else 0, error_code)
 
         return content
 
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import random
+import threading
+import time
+from enum import Enum
+
+from .exceptions import InvalidParameterException, DatahubException, ExceptionHandler
+from .models import FailedRecord
+from .models.results import PutRecordsResult
+from .utils import ErrorMessage, check_negative, check_positive
+
+
+class ErrorType(Enum):
+    """
+    Retry classification of failed requests and failed records
+    """
+    THROTTLED = 'THROTTLED'
+    SERVER_ERROR = 'SERVER_ERROR'
+    NON_RETRYABLE = 'NON_RETRYABLE'
+
+
+THROTTLED_ERROR_CODES = frozenset(['LimitExceeded'])
+SERVER_ERROR_CODES = frozenset(['InternalServerError'])
+THROTTLED_STATUS_CODES = frozenset([429])
+SERVER_ERROR_STATUS_CODES = frozenset([500, 502, 503, 504])
+
+
+def classify(status_code=-1, error_code=None):
+    """
+    Classify a failure by its error code, or by its status code if the error code is unknown
+
+    :param status_code: http status code, -1 for failed records
+    :param error_code: datahub error code
+    :return: error type
+    :rtype: :class:`datahub.retry.ErrorType`
+    """
+    if error_code in THROTTLED_ERROR_CODES:
+        return ErrorType.THROTTLED
+    if error_code in SERVER_ERROR_CODES:
+        return ErrorType.SERVER_ERROR
+    if error_code in ExceptionHandler.error_code_dict:
+        return ErrorType.NON_RETRYABLE
+    if status_code in THROTTLED_STATUS_CODES:
+        return ErrorType.THROTTLED
+    if status_code in SERVER_ERROR_STATUS_CODES:
+        return ErrorType.SERVER_ERROR
+    return ErrorType.NON_RETRYABLE
+
+
+def classify_exception(exception):
+    """
+    Classify an exception raised by rest client, only datahub exceptions could be retried,
+    connection errors are retried by the transport already
+
+    :return: error type
+    :rtype: :class:`datahub.retry.ErrorType`
+    """
+    if isinstance(exception, DatahubException):
+        return classify(exception.status_code, exception.error_code)
+    return ErrorType.NON_RETRYABLE
+
+
+class RetryBudget(object):
+    """
+    Token bucket limiting retries to a ratio of requests, so that retries can not amplify an outage.
+
+    Every request deposits ``ratio`` token, and ``min_per_second`` tokens are refilled every second
+    to allow retries of clients with few requests. A retry withdraws one token.
+
+    :param ratio: retries allowed per request
+    :param min_per_second: retries allowed per second regardless of the requests
+    :param max_tokens: max tokens kept, ``10 * min_per_second`` by default
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=10, max_tokens=None):
+        if check_negative(ratio):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'ratio')
+        if check_negative(min_per_second):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'min_per_second')
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max_tokens = max_tokens if max_tokens is not None else max(10 * min_per_second, 1)
+        self._tokens = float(min(min_per_second, self._max_tokens))
+        self._last_refill = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self):
+        now = time.time()
+        if now > self._last_refill:
+            self._tokens = min(self._max_tokens, self._tokens + (now - self._last_refill) * self._min_per_second)
+        self._last_refill = now
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self):
+        """
+        Withdraw a token for a retry
+
+        :return: False if the budget is exhausted
+        :rtype: bool
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Retry policy of requests failed by throttling or server errors, with exponential backoff and full jitter.
+
+    A policy keeps a retry budget, clients sharing the policy share the budget.
+
+    :param max_retries: max retries of a request
+    :param base_delay: base delay in seconds of server errors, doubled every retry
+    :param throttle_base_delay: base delay in seconds of throttled requests, doubled every retry
+    :param max_delay: max delay in seconds of a retry
+    :param budget: retry budget, a new :class:`datahub.retry.RetryBudget` by default, None means no budget
+    :param retry_on: error types to retry
+    """
+
+    _DEFAULT_BUDGET = object()
+
+    def __init__(self, max_retries=3, base_delay=0.1, throttle_base_delay=0.5, max_delay=5.0, budget=_DEFAULT_BUDGET,
+                 retry_on=(ErrorType.THROTTLED, ErrorType.SERVER_ERROR)):
+        if check_negative(max_retries):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'max_retries')
+        if not check_positive(max_delay):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'max_delay')
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._throttle_base_delay = throttle_base_delay
+        self._max_delay = max_delay
+        self._budget = RetryBudget() if budget is RetryPolicy._DEFAULT_BUDGET else budget
+        self._retry_on = frozenset(retry_on)
+
+    @property
+    def max_retries(self):
+        return self._max_retries
+
+    @property
+    def budget(self):
+        return self._budget
+
+    def is_retryable(self, error_type):
+        return error_type in self._retry_on
+
+    def backoff(self, error_type, attempt):
+        """
+        Delay before the retry, picked uniformly from zero to the exponential backoff
+
+        :param error_type: error type of the failure
+        :param attempt: count of retries done
+        :return: seconds to sleep
+        """
+        base_delay = self._throttle_base_delay if error_type == ErrorType.THROTTLED else self._base_delay
+        return random.uniform(0, min(self._max_delay, base_delay * (2 ** attempt)))
+
+    def on_request(self):
+        """
+        Called once per request, not per retry, to fill the retry budget
+        """
+        if self._budget is not None:
+            self._budget.deposit()
+
+    def retry_delay(self, error_type, attempt):
+        """
+        Decide whether to retry the failure
+
+        :param error_type: error type of the failure
+        :param attempt: count of retries done
+        :return: seconds to sleep before the retry, None means not to retry
+        """
+        if not self.is_retryable(error_type) or attempt >= self._max_retries:
+            return None
+        if self._budget is not None and not self._budget.withdraw():
+            return None
+        return self.backoff(error_type, attempt)
+
+
+class PutRecordsRetry(object):
+    """
+    Retry only the failed records of a partially failed put records request.
+
+    Indexes of failed records are mapped back to the original record list.
+
+    :param policy: retry policy
+    :param record_list: records of the first request
+    """
+
+    def __init__(self, policy, record_list):
+        self._policy = policy
+        self._records = record_list
+        self._indexes = list(range(len(record_list)))
+        self._failed = {}
+        self._attempt = 0
+
+    @property
+    def attempt(self):
+        return self._attempt
+
+    def next(self, result):
+        """
+        Handle the result of the last request
+
+        :param result: result of the last request
+        :type result: :class:`datahub.models.PutRecordsResult`
+        :return: records to retry and seconds to sleep before, None means done
+        :rtype: tuple
+        """
+        retry_indexes, retry_records, error_type = [], [], None
+        for failed_record in result.failed_records:
+            index = self._indexes[failed_record.index]
+            self._failed[index] = FailedRecord(index, failed_record.error_code, failed_record.error_message)
+            record_error_type = classify(error_code=failed_record.error_code)
+            if self._policy.is_retryable(record_error_type):
+                retry_indexes.append(index)
+                retry_records.append(self._records[failed_record.index])
+                # backoff by the slower one if both kinds of errors happened
+                if error_type != ErrorType.THROTTLED:
+                    error_type = record_error_type
+        if not retry_records:
+            return None
+
+        delay = self._policy.retry_delay(error_type, self._attempt)
+        if delay is None:
+            return None
+        for index in retry_indexes:
+            del self._failed[index]
+        self._records = retry_records
+        self._indexes = retry_indexes
+        self._attempt += 1
+        return retry_records, delay
+
+    def result(self):
+        """
+        Merged result of all requests
+
+        :return: failed records with indexes of the original record list
+        :rtype: :class:`datahub.models.PutRecordsResult`
+        """
+        failed_records = [self._failed[index] for index in sorted(self._failed)]
+        return PutRecordsResult(len(failed_records), failed_records)
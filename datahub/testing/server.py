@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+from .service import MockDataHubService
+from ..rest import Headers
+
+logger = logging.getLogger('datahub.testing')
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, nagle with delayed ack of the client stalls every response 40ms
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        length = int(self.headers.get(Headers.CONTENT_LENGTH) or 0)
+        body = self.rfile.read(length) if length else b''
+        headers = dict((name.lower(), value) for name, value in self.headers.items())
+        service = self.server.service
+
+        delay = service.delay()
+        if delay > 0:
+            time.sleep(delay)
+        status_code, response_headers, content = service.handle(self.command, self.path, headers, body)
+
+        self.send_response(status_code)
+        for name, value in response_headers.items():
+            self.send_header(name, value)
+        self.send_header(Headers.CONTENT_LENGTH, str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+    def log_message(self, format_, *args):
+        logger.debug('%s - %s', self.address_string(), format_ % args)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class MockDataHubServer(object):
+    """
+    Local http server of :class:`datahub.testing.MockDataHubService`, which stands in for the DataHub service
+    in tests and benchmarks without an endpoint or credentials, e.g.
+
+    .. code-block:: python
+
+        with MockDataHubServer(latency=0.005) as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True)
+            dh.create_project('project', 'comment')
+
+    Every request is answered by a thread of its own, delayed requests do not block each other.
+
+    :param host: host to listen on
+    :param port: port to listen on, 0 means any free port
+    :param service: service answering requests, created from kwargs if not given
+    :param kwargs: faults of the service, see :class:`datahub.testing.MockDataHubService`
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, service=None, **kwargs):
+        self._service = service if service is not None else MockDataHubService(**kwargs)
+        self._host = host
+        self._port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def service(self):
+        return self._service
+
+    @property
+    def endpoint(self):
+        """
+        Endpoint of the server given to clients, known after started
+        """
+        return 'http://%s:%d' % (self._host, self._port)
+
+    def start(self):
+        """
+        Start serving in a daemon thread
+
+        :return: the server
+        """
+        if self._server is not None:
+            return self
+        self._server = _ThreadingHTTPServer((self._host, self._port), _Handler)
+        self._server.service = self._service
+        self._port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='datahub-mock-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket
+
+        :return: none
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
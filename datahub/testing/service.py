@@ -0,0 +1,822 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+In-memory DataHub service answering the restful api of :class:`datahub.rest.Path`, both json and protobuf
+"""
+
+from __future__ import absolute_import
+
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+
+import six
+from cprotobuf.internal import encode_data
+from six.moves.urllib.parse import unquote
+
+from ..exceptions import DatahubException
+from ..models import RecordSchema
+from ..models.compress import get_compressor
+from ..proto.datahub_record_proto_pb import GetRecordsRequest, PutRecordsResponse
+from ..proto.wire import encode_record_entry, encode_get_records_response, decode_put_records_request
+from ..rest import ContentType, Headers
+from ..utils import pb_message_wrap, unwrap_pb_frame, to_text, to_binary
+
+_MAX_HASH_KEY = (1 << 128) - 1
+_NO_SHARD_ID = '4294967295'
+_MAX_LIMIT = 1000
+
+
+class ServiceError(Exception):
+    """
+    Error answered to the client as ``{"ErrorCode": ..., "ErrorMessage": ...}``
+    """
+
+    def __init__(self, status_code, error_code, error_msg):
+        super(ServiceError, self).__init__(error_msg)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.error_msg = error_msg
+
+
+def _invalid_parameter(error_msg):
+    return ServiceError(400, 'InvalidParameter', error_msg)
+
+
+def _hash_key_str(value):
+    return '%032X' % value
+
+
+def _cursor(sequence):
+    return '%032x' % sequence
+
+
+def _now():
+    return int(time.time())
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+# (resource, method) -> name of the api, or dict of request action -> name of the api
+_ROUTES = {
+    ('projects', 'GET'): 'list_project',
+    ('project', 'GET'): 'get_project',
+    ('project', 'POST'): 'create_project',
+    ('project', 'DELETE'): 'delete_project',
+    ('topics', 'GET'): 'list_topic',
+    ('topic', 'GET'): 'get_topic',
+    ('topic', 'POST'): {'': 'create_topic', 'appendfield': 'append_field'},
+    ('topic', 'PUT'): 'update_topic',
+    ('topic', 'DELETE'): 'delete_topic',
+    ('shards', 'GET'): 'list_shard',
+    ('shards', 'POST'): {'pub': 'put_records', 'merge': 'merge_shard', 'split': 'split_shard'},
+    ('shard', 'POST'): {'sub': 'get_records', 'cursor': 'get_cursor', 'meter': 'get_metering_info'},
+    ('subscriptions', 'POST'): {'create': 'create_subscription', 'list': 'list_subscription'},
+    ('subscription', 'GET'): 'get_subscription',
+    ('subscription', 'PUT'): 'update_subscription',
+    ('subscription', 'DELETE'): 'delete_subscription',
+    ('offsets', 'POST'): {'open': 'init_and_get_subscription_offset', 'get': 'get_subscription_offset'},
+    ('offsets', 'PUT'): {'commit': 'update_subscription_offset', 'reset': 'reset_subscription_offset'}
+}
+
+
+class _TokenBucket(object):
+    """
+    Requests per second allowed by the server, requests beyond are throttled instead of delayed
+    """
+
+    __slots__ = ('_rate', '_tokens', '_last_refill')
+
+    def __init__(self, rate):
+        self._rate = float(rate)
+        self._tokens = max(self._rate, 1.0)
+        self._last_refill = time.time()
+
+    def take(self):
+        now = time.time()
+        self._tokens = min(max(self._rate, 1.0), self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class _Shard(object):
+    """
+    Shard and its log of (values, attributes, system time), the sequence of a record is its index
+    """
+
+    __slots__ = ('shard_id', 'begin', 'end', 'state', 'closed_time', 'parent_shard_ids', 'records', 'size')
+
+    def __init__(self, shard_id, begin, end, parent_shard_ids=()):
+        self.shard_id = shard_id
+        self.begin = begin
+        self.end = end
+        self.state = 'ACTIVE'
+        self.closed_time = ''
+        self.parent_shard_ids = list(parent_shard_ids)
+        self.records = []
+        self.size = 0
+
+    def contains(self, hash_key):
+        return self.begin <= hash_key < self.end or (hash_key == self.end == _MAX_HASH_KEY)
+
+    def close(self):
+        self.state = 'CLOSED'
+        self.closed_time = _now()
+
+    def to_json(self, left_shard_id, right_shard_id):
+        data = {
+            'ShardId': self.shard_id,
+            'State': self.state,
+            'BeginHashKey': _hash_key_str(self.begin),
+            'EndHashKey': _hash_key_str(self.end),
+            'ParentShardIds': self.parent_shard_ids,
+            'LeftShardId': left_shard_id,
+            'RightShardId': right_shard_id
+        }
+        if self.closed_time:
+            data['CloseTime'] = self.closed_time
+        return data
+
+
+class _Topic(object):
+    __slots__ = ('name', 'record_type', 'schema', 'life_cycle', 'comment', 'create_time', 'last_modify_time',
+                 'shards', 'next_shard_id', 'subscriptions')
+
+    def __init__(self, name, record_type, schema, life_cycle, comment, shard_count):
+        self.name = name
+        self.record_type = record_type
+        self.schema = schema
+        self.life_cycle = life_cycle
+        self.comment = comment
+        self.create_time = self.last_modify_time = _now()
+        self.shards = {}
+        self.subscriptions = {}
+        step = (_MAX_HASH_KEY + 1) // shard_count
+        for index in range(shard_count):
+            end = _MAX_HASH_KEY if index == shard_count - 1 else (index + 1) * step
+            self.shards[str(index)] = _Shard(str(index), index * step, end)
+        self.next_shard_id = shard_count
+
+    @property
+    def field_count(self):
+        return len(self.schema['fields']) if self.schema else 1
+
+    def new_shard(self, begin, end, parent_shard_ids):
+        shard = _Shard(str(self.next_shard_id), begin, end, parent_shard_ids)
+        self.shards[shard.shard_id] = shard
+        self.next_shard_id += 1
+        return shard
+
+    def active_shards(self):
+        return sorted((shard for shard in self.shards.values() if shard.state == 'ACTIVE'),
+                      key=lambda shard: shard.begin)
+
+
+class _Project(object):
+    __slots__ = ('name', 'comment', 'create_time', 'last_modify_time', 'topics')
+
+    def __init__(self, name, comment):
+        self.name = name
+        self.comment = comment
+        self.create_time = self.last_modify_time = _now()
+        self.topics = {}
+
+
+class _Subscription(object):
+    __slots__ = ('sub_id', 'topic_name', 'comment', 'state', 'create_time', 'last_modify_time', 'offsets')
+
+    def __init__(self, sub_id, topic_name, comment):
+        self.sub_id = sub_id
+        self.topic_name = topic_name
+        self.comment = comment
+        self.state = 1
+        self.create_time = self.last_modify_time = _now()
+        # shard id -> [sequence, timestamp, version, session id]
+        self.offsets = {}
+
+    def offset(self, shard_id):
+        if shard_id not in self.offsets:
+            self.offsets[shard_id] = [-1, -1, 0, None]
+        return self.offsets[shard_id]
+
+    def to_json(self):
+        return {
+            'Comment': self.comment,
+            'CreateTime': self.create_time,
+            'IsOwner': True,
+            'LastModifyTime': self.last_modify_time,
+            'State': self.state,
+            'SubId': self.sub_id,
+            'TopicName': self.topic_name,
+            'Type': 0
+        }
+
+
+class MockDataHubService(object):
+    """
+    In-memory stand-in of the DataHub service, keeps projects, topics, shard logs and subscriptions in
+    memory and answers requests as the service does, requests are not authenticated.
+    Connectors are not supported.
+
+    Faults are injected to measure how clients behave under them:
+
+    * ``latency`` and ``jitter`` delay every request, see :class:`datahub.testing.MockDataHubServer`
+    * ``throttle_qps`` throttles puts and gets of a shard beyond the rate with ``LimitExceeded``
+    * ``error_rate`` fails requests with ``InternalServerError`` randomly
+    * ``record_error_rate`` fails put records randomly, the other records of the request are written
+    * :meth:`inject_error` fails the next requests of an api
+
+    :param latency: seconds every request is delayed
+    :param jitter: max seconds added to the latency randomly
+    :param throttle_qps: max requests per second of puts and gets of a shard, None means unlimited
+    :param error_rate: probability that a request fails
+    :param record_error_rate: probability that a put record fails
+    :param seed: seed of the random faults
+    """
+
+    def __init__(self, latency=0, jitter=0, throttle_qps=None, error_rate=0, record_error_rate=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_qps = throttle_qps
+        self.error_rate = error_rate
+        self.record_error_rate = record_error_rate
+        self._random = random.Random(seed)
+        self._projects = {}
+        self._buckets = {}
+        self._injected_errors = []
+        self._request_counts = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    # =======================================================
+    # faults and statistics
+    # =======================================================
+
+    def inject_error(self, error_code='InternalServerError', status_code=500, error_msg='Injected error.',
+                     count=1, api=None):
+        """
+        Fail the next requests with the error
+
+        :param error_code: error code answered
+        :param status_code: http status code answered
+        :param error_msg: error message answered
+        :param count: number of requests failed
+        :param api: name of the api failed, e.g. ``put_records``, ``get_records``, ``get_cursor``, None means any
+        :return: none
+        """
+        with self._lock:
+            self._injected_errors.append([api, count, ServiceError(status_code, error_code, error_msg)])
+
+    def request_count(self, api=None):
+        """
+        Number of requests received, including failed ones
+
+        :param api: name of the api, e.g. ``put_records``, None means all apis
+        :return: number of requests
+        :rtype: int
+        """
+        with self._lock:
+            if api is None:
+                return sum(self._request_counts.values())
+            return self._request_counts.get(api, 0)
+
+    def delay(self):
+        """
+        Seconds the current request is delayed
+        """
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _fault(self, api, throttle_key):
+        for injected in self._injected_errors:
+            if injected[0] is None or injected[0] == api:
+                injected[1] -= 1
+                if injected[1] <= 0:
+                    self._injected_errors.remove(injected)
+                raise injected[2]
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ServiceError(500, 'InternalServerError', 'Service internal error, please try again later.')
+        if self.throttle_qps and throttle_key is not None:
+            bucket = self._buckets.get(throttle_key)
+            if bucket is None:
+                bucket = self._buckets[throttle_key] = _TokenBucket(self.throttle_qps)
+            if not bucket.take():
+                raise ServiceError(429, 'LimitExceeded', 'The query rate or throughput rate is exceeded.')
+
+    # =======================================================
+    # requests
+    # =======================================================
+
+    def handle(self, method, path, headers, body):
+        """
+        Answer a request
+
+        :param method: http method
+        :param path: path of the url
+        :param headers: dict of headers, the names are lower case
+        :param body: request body
+        :return: status code, dict of headers and body of the response
+        """
+        with self._lock:
+            self._next_id += 1
+            response_headers = {Headers.REQUEST_ID: '%016x' % self._next_id}
+        try:
+            body = self._decompress(headers, body)
+            status_code, content_type, content = self._dispatch(method, path, headers, body)
+        except ServiceError as e:
+            status_code, content_type = e.status_code, ContentType.HTTP_JSON.value
+            content = to_binary(json.dumps({'ErrorCode': e.error_code, 'ErrorMessage': e.error_msg}))
+        response_headers[Headers.CONTENT_TYPE] = content_type
+        content = self._compress(headers, response_headers, content)
+        return status_code, response_headers, content
+
+    @staticmethod
+    def _decompress(headers, body):
+        content_encoding = headers.get(Headers.CONTENT_ENCODING.lower())
+        if not content_encoding or not body:
+            return body
+        try:
+            compressor = get_compressor(content_encoding)
+            return compressor.decompress(body, int(headers.get(Headers.RAW_SIZE.lower(), '0')))
+        except Exception as e:
+            raise _invalid_parameter('Decompress request body error, %s' % e)
+
+    @staticmethod
+    def _compress(headers, response_headers, content):
+        accept_encoding = headers.get(Headers.ACCEPT_ENCODING.lower())
+        if not accept_encoding or not content:
+            return content
+        try:
+            compressor = get_compressor(accept_encoding)
+        except DatahubException:
+            return content
+        compressed = compressor.compress(content)
+        if len(compressed) >= len(content):
+            return content
+        response_headers[Headers.CONTENT_ENCODING] = compressor.format_name()
+        response_headers[Headers.RAW_SIZE] = str(len(content))
+        return compressed
+
+    def _dispatch(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if len(parts) > 4 and parts[4] == 'connectors':
+            raise ServiceError(400, 'InvalidOperation', 'Connectors are not supported by the mock service.')
+
+        pb = headers.get(Headers.CONTENT_TYPE.lower()) == ContentType.HTTP_PROTOBUF.value
+        if pb:
+            action = headers.get(Headers.REQUEST_ACTION.lower(), '')
+            request = None
+        else:
+            request = json.loads(to_text(body)) if body else {}
+            action = request.get('Action', '') if isinstance(request, dict) else ''
+
+        api, throttle_key = self._route(method, parts, action.lower())
+        with self._lock:
+            self._request_counts[api] = self._request_counts.get(api, 0) + 1
+            self._fault(api, throttle_key)
+            handler = getattr(self, '_' + api)
+            result = handler(parts, body if pb else request)
+
+        if result is None:
+            return 200, ContentType.HTTP_JSON.value, b''
+        if pb and api in ('put_records', 'get_records'):
+            return 200, ContentType.HTTP_PROTOBUF.value, bytes(pb_message_wrap(result))
+        return 200, ContentType.HTTP_JSON.value, to_binary(json.dumps(result))
+
+    @staticmethod
+    def _route(method, parts, action):
+        """
+        :return: name of the api and key of throttling
+        """
+        size = len(parts)
+        resource = None
+        if parts[0] == 'projects' and (size < 3 or parts[2] == 'topics'):
+            if size <= 4:
+                resource = ('projects', 'project', 'topics', 'topic')[size - 1]
+            elif parts[4] in ('shards', 'subscriptions') and size <= 6:
+                resource = parts[4] if size == 5 else parts[4][:-1]
+            elif parts[4] == 'subscriptions' and size == 7 and parts[6] == 'offsets':
+                resource = 'offsets'
+        api = _ROUTES.get((resource, method))
+        if isinstance(api, dict):
+            api = api.get(action)
+        if api is None:
+            raise ServiceError(400, 'InvalidUriSpec', 'Unsupported request %s /%s, action: %s.'
+                               % (method, '/'.join(parts), action))
+        if api == 'get_records':
+            return api, (parts[1], parts[3], parts[5])
+        if api == 'put_records':
+            return api, (parts[1], parts[3], None)
+        return api, None
+
+    # =======================================================
+    # projects and topics
+    # =======================================================
+
+    def _project(self, parts):
+        project = self._projects.get(parts[1])
+        if project is None:
+            raise ServiceError(404, 'NoSuchProject', 'The specified project name does not exist.')
+        return project
+
+    def _topic(self, parts):
+        topic = self._project(parts).topics.get(parts[3])
+        if topic is None:
+            raise ServiceError(404, 'NoSuchTopic', 'The specified topic name does not exist.')
+        return topic
+
+    def _shard(self, topic, shard_id):
+        shard = topic.shards.get(shard_id)
+        if shard is None:
+            raise ServiceError(404, 'NoSuchShard', 'The specified shard does not exist.')
+        return shard
+
+    def _list_project(self, parts, request):
+        return {'ProjectNames': sorted(self._projects)}
+
+    def _create_project(self, parts, request):
+        if parts[1] in self._projects:
+            raise ServiceError(400, 'ProjectAlreadyExist', 'The project already exists.')
+        self._projects[parts[1]] = _Project(parts[1], request.get('Comment', ''))
+
+    def _get_project(self, parts, request):
+        project = self._project(parts)
+        return {
+            'Comment': project.comment,
+            'CreateTime': project.create_time,
+            'LastModifyTime': project.last_modify_time
+        }
+
+    def _delete_project(self, parts, request):
+        if self._project(parts).topics:
+            raise ServiceError(400, 'InvalidOperation', 'The project is not empty.')
+        del self._projects[parts[1]]
+
+    def _list_topic(self, parts, request):
+        return {'TopicNames': sorted(self._project(parts).topics)}
+
+    def _create_topic(self, parts, request):
+        project = self._project(parts)
+        if parts[3] in project.topics:
+            raise ServiceError(400, 'TopicAlreadyExist', 'The topic already exists.')
+        record_type = request.get('RecordType')
+        shard_count = request.get('ShardCount', 0)
+        if record_type not in ('TUPLE', 'BLOB'):
+            raise _invalid_parameter('Invalid record type %s.' % record_type)
+        if not isinstance(shard_count, six.integer_types) or shard_count <= 0:
+            raise _invalid_parameter('Invalid shard count %s.' % shard_count)
+        schema = None
+        if record_type == 'TUPLE':
+            try:
+                RecordSchema.from_json_str(request['RecordSchema'])
+                schema = json.loads(request['RecordSchema'])
+            except Exception:
+                raise ServiceError(400, 'InvalidSchema', 'The record schema is invalid.')
+        project.topics[parts[3]] = _Topic(parts[3], record_type, schema, request.get('Lifecycle', 1),
+                                          request.get('Comment', ''), shard_count)
+
+    def _get_topic(self, parts, request):
+        topic = self._topic(parts)
+        data = {
+            'Comment': topic.comment,
+            'CreateTime': topic.create_time,
+            'LastModifyTime': topic.last_modify_time,
+            'Lifecycle': topic.life_cycle,
+            'RecordType': topic.record_type,
+            'ShardCount': len(topic.active_shards())
+        }
+        if topic.schema:
+            data['RecordSchema'] = json.dumps(topic.schema)
+        return data
+
+    def _update_topic(self, parts, request):
+        topic = self._topic(parts)
+        topic.life_cycle = request.get('Lifecycle', topic.life_cycle)
+        topic.comment = request.get('Comment', topic.comment)
+        topic.last_modify_time = _now()
+
+    def _delete_topic(self, parts, request):
+        self._topic(parts)
+        del self._projects[parts[1]].topics[parts[3]]
+
+    def _append_field(self, parts, request):
+        topic = self._topic(parts)
+        if not topic.schema:
+            raise ServiceError(400, 'InvalidOperation', 'Fields can not be appended to blob topics.')
+        if any(field['name'] == request.get('FieldName') for field in topic.schema['fields']):
+            raise _invalid_parameter('The field already exists.')
+        topic.schema['fields'].append({'name': request.get('FieldName'), 'type': request.get('FieldType')})
+        topic.last_modify_time = _now()
+
+    # =======================================================
+    # shards
+    # =======================================================
+
+    def _list_shard(self, parts, request):
+        topic = self._topic(parts)
+        active_shards = topic.active_shards()
+        neighbours = {}
+        for index, shard in enumerate(active_shards):
+            neighbours[shard.shard_id] = (active_shards[index - 1].shard_id if index > 0 else _NO_SHARD_ID,
+                                          active_shards[index + 1].shard_id if index + 1 < len(active_shards)
+                                          else _NO_SHARD_ID)
+        shards = sorted(topic.shards.values(), key=lambda shard: int(shard.shard_id))
+        return {'Shards': [shard.to_json(*neighbours.get(shard.shard_id, (_NO_SHARD_ID, _NO_SHARD_ID)))
+                           for shard in shards]}
+
+    def _split_shard(self, parts, request):
+        topic = self._topic(parts)
+        shard = self._shard(topic, request.get('ShardId'))
+        if shard.state != 'ACTIVE':
+            raise ServiceError(400, 'InvalidShardOperation', 'The specified shard is not active.')
+        try:
+            split_key = int(request.get('SplitKey'), 16)
+        except (TypeError, ValueError):
+            split_key = None
+        if split_key is None or not shard.begin < split_key < shard.end:
+            raise _invalid_parameter('The key range is invalid.')
+        shard.close()
+        new_shards = [topic.new_shard(shard.begin, split_key, [shard.shard_id]),
+                      topic.new_shard(split_key, shard.end, [shard.shard_id])]
+        return {'NewShards': [{
+            'ShardId': new_shard.shard_id,
+            'BeginHashKey': _hash_key_str(new_shard.begin),
+            'EndHashKey': _hash_key_str(new_shard.end)
+        } for new_shard in new_shards]}
+
+    def _merge_shard(self, parts, request):
+        topic = self._topic(parts)
+        shard = self._shard(topic, request.get('ShardId'))
+        adjacent = self._shard(topic, request.get('AdjacentShardId'))
+        if shard.state != 'ACTIVE' or adjacent.state != 'ACTIVE':
+            raise ServiceError(400, 'InvalidShardOperation', 'The specified shard is not active.')
+        if shard.end == adjacent.begin:
+            left, right = shard, adjacent
+        elif adjacent.end == shard.begin:
+            left, right = adjacent, shard
+        else:
+            raise _invalid_parameter('The two shards are not adjacent.')
+        left.close()
+        right.close()
+        new_shard = topic.new_shard(left.begin, right.end, [left.shard_id, right.shard_id])
+        return {
+            'ShardId': new_shard.shard_id,
+            'BeginHashKey': _hash_key_str(new_shard.begin),
+            'EndHashKey': _hash_key_str(new_shard.end)
+        }
+
+    def _get_metering_info(self, parts, request):
+        shard = self._shard(self._topic(parts), parts[5])
+        return {'ActiveTime': 0, 'Storage': shard.size}
+
+    # =======================================================
+    # records
+    # =======================================================
+
+    def _route_record(self, topic, shard_id, hash_key, partition_key):
+        if shard_id:
+            shard = topic.shards.get(shard_id)
+            return shard if shard is not None and shard.state == 'ACTIVE' else None
+        if hash_key:
+            key = int(hash_key, 16)
+        elif partition_key:
+            key = int(hashlib.md5(to_binary(partition_key)).hexdigest(), 16)
+        else:
+            return None
+        for shard in topic.active_shards():
+            if shard.contains(key):
+                return shard
+        return None
+
+    def _put_records(self, parts, request):
+        topic = self._topic(parts)
+        if isinstance(request, dict):
+            entries = []
+            for item in request.get('Records', []):
+                data = item.get('Data')
+                if topic.record_type == 'BLOB':
+                    values = [base64.b64decode(data)] if isinstance(data, six.string_types) else None
+                else:
+                    values = [None if value is None else to_binary(value) for value in data] \
+                        if isinstance(data, list) else None
+                entries.append((item.get('ShardId'), item.get('HashKey'), item.get('PartitionKey'), values,
+                                item.get('Attributes') or {}))
+        else:
+            crc, compute_crc, pb_str = unwrap_pb_frame(request)
+            if crc != compute_crc:
+                raise _invalid_parameter('Crc of the protobuf message is invalid.')
+            entries = decode_put_records_request(pb_str)
+
+        field_count = topic.field_count
+        system_time = _now_ms()
+        failed_records = []
+        for index, (shard_id, hash_key, partition_key, values, attributes) in enumerate(entries):
+            if values is None or len(values) != field_count:
+                raise ServiceError(400, 'MalformedRecord', 'The record is not well-formed.')
+            shard = self._route_record(topic, shard_id, hash_key, partition_key)
+            if shard is None:
+                failed_records.append((index, 'InvalidShardOperation', 'The specified shard is not active.'))
+            elif self.record_error_rate and self._random.random() < self.record_error_rate:
+                failed_records.append((index, 'InternalServerError', 'Service internal error.'))
+            else:
+                shard.records.append((values, attributes, system_time))
+                shard.size += sum(len(value) for value in values if value is not None)
+
+        if isinstance(request, dict):
+            return {
+                'FailedRecordCount': len(failed_records),
+                'FailedRecords': [{'Index': index, 'ErrorCode': code, 'ErrorMessage': message}
+                                  for index, code, message in failed_records]
+            }
+        return encode_data(PutRecordsResponse, {
+            'failed_count': len(failed_records),
+            'failed_records': [{'index': index, 'error_code': code, 'error_message': message}
+                               for index, code, message in failed_records]
+        })
+
+    def _get_cursor(self, parts, request):
+        shard = self._shard(self._topic(parts), parts[5])
+        records = shard.records
+        cursor_type = request.get('Type')
+        if cursor_type == 'OLDEST':
+            sequence = 0
+        elif cursor_type == 'LATEST':
+            sequence = max(len(records) - 1, 0)
+        elif cursor_type == 'SEQUENCE':
+            sequence = request.get('Sequence', -1)
+            if not 0 <= sequence <= len(records):
+                raise _invalid_parameter('Sequence %s is out of range.' % sequence)
+        elif cursor_type == 'SYSTEM_TIME':
+            system_time = request.get('SystemTime', -1)
+            if system_time < 0:
+                raise _invalid_parameter('Invalid system time %s.' % system_time)
+            sequence = next((index for index, record in enumerate(records) if record[2] >= system_time),
+                            len(records))
+        else:
+            raise _invalid_parameter('Invalid cursor type %s.' % cursor_type)
+        record_time = records[sequence][2] if sequence < len(records) else 0
+        return {'Cursor': _cursor(sequence), 'Sequence': sequence, 'RecordTime': record_time}
+
+    def _get_records(self, parts, request):
+        topic = self._topic(parts)
+        shard = self._shard(topic, parts[5])
+        if isinstance(request, dict):
+            cursor, limit = request.get('Cursor'), request.get('Limit', 1)
+        else:
+            crc, compute_crc, pb_str = unwrap_pb_frame(request)
+            if crc != compute_crc:
+                raise _invalid_parameter('Crc of the protobuf message is invalid.')
+            pb_request = GetRecordsRequest()
+            pb_request.ParseFromString(bytes(pb_str))
+            cursor, limit = pb_request.cursor, pb_request.limit
+        try:
+            start = int(cursor, 16)
+        except (TypeError, ValueError):
+            start = -1
+        if not 0 <= start <= len(shard.records):
+            raise ServiceError(400, 'InvalidCursor', 'The cursor is invalid.')
+        records = shard.records[start:start + min(max(limit, 1), _MAX_LIMIT)]
+        next_sequence = start + len(records)
+
+        if isinstance(request, dict):
+            items = []
+            for offset, (values, attributes, system_time) in enumerate(records):
+                item = {
+                    'Sequence': start + offset,
+                    'SystemTime': system_time,
+                    'NextCursor': _cursor(start + offset + 1),
+                    'Data': base64.b64encode(values[0]).decode('ascii') if topic.record_type == 'BLOB' else
+                    [None if value is None else to_text(value) for value in values]
+                }
+                if attributes:
+                    item['Attributes'] = attributes
+                items.append(item)
+            return {
+                'NextCursor': _cursor(next_sequence),
+                'RecordCount': len(items),
+                'StartSeq': start,
+                'Records': items
+            }
+        return encode_get_records_response(_cursor(next_sequence), start, [
+            encode_record_entry(values, attributes=attributes, sequence=start + offset, system_time=system_time)
+            for offset, (values, attributes, system_time) in enumerate(records)])
+
+    # =======================================================
+    # subscriptions
+    # =======================================================
+
+    def _subscription(self, parts):
+        subscription = self._topic(parts).subscriptions.get(parts[5])
+        if subscription is None:
+            raise ServiceError(404, 'NoSuchSubscription', 'The specified subscription does not exist.')
+        return subscription
+
+    def _create_subscription(self, parts, request):
+        topic = self._topic(parts)
+        self._next_id += 1
+        sub_id = '%d%06d' % (_now_ms(), self._next_id % 1000000)
+        topic.subscriptions[sub_id] = _Subscription(sub_id, topic.name, request.get('Comment', ''))
+        return {'SubId': sub_id}
+
+    def _list_subscription(self, parts, request):
+        search = request.get('Search') or ''
+        subscriptions = sorted((subscription for subscription in self._topic(parts).subscriptions.values()
+                                if search in subscription.sub_id or search in subscription.comment),
+                               key=lambda subscription: subscription.sub_id)
+        page_index, page_size = request.get('PageIndex', 1), request.get('PageSize', 10)
+        start = (page_index - 1) * page_size
+        return {
+            'TotalCount': len(subscriptions),
+            'Subscriptions': [subscription.to_json() for subscription in subscriptions[start:start + page_size]]
+        }
+
+    def _get_subscription(self, parts, request):
+        return self._subscription(parts).to_json()
+
+    def _update_subscription(self, parts, request):
+        subscription = self._subscription(parts)
+        if 'Comment' in request:
+            subscription.comment = request['Comment']
+        if 'State' in request:
+            subscription.state = request['State']
+        subscription.last_modify_time = _now()
+
+    def _delete_subscription(self, parts, request):
+        self._subscription(parts)
+        del self._topic(parts).subscriptions[parts[5]]
+
+    def _offsets(self, parts, shard_ids):
+        topic = self._topic(parts)
+        subscription = self._subscription(parts)
+        for shard_id in shard_ids:
+            self._shard(topic, shard_id)
+        return subscription, dict((shard_id, subscription.offset(shard_id)) for shard_id in shard_ids)
+
+    def _init_and_get_subscription_offset(self, parts, request):
+        subscription, offsets = self._offsets(parts, request.get('ShardIds') or [])
+        if subscription.state != 1:
+            raise ServiceError(400, 'SubscriptionOffline', 'The subscription is offline.')
+        result = {}
+        for shard_id, offset in offsets.items():
+            offset[3] = (offset[3] or 0) + 1
+            result[shard_id] = {'Sequence': offset[0], 'Timestamp': offset[1], 'Version': offset[2],
+                                'SessionId': offset[3]}
+        return {'Offsets': result}
+
+    def _get_subscription_offset(self, parts, request):
+        shard_ids = request.get('ShardIds') or sorted(self._topic(parts).shards, key=int)
+        subscription, offsets = self._offsets(parts, shard_ids)
+        return {'Offsets': dict((shard_id, {'Sequence': offset[0], 'Timestamp': offset[1], 'Version': offset[2]})
+                                for shard_id, offset in offsets.items())}
+
+    def _update_subscription_offset(self, parts, request):
+        commits = request.get('Offsets') or {}
+        subscription, offsets = self._offsets(parts, list(commits))
+        if subscription.state != 1:
+            raise ServiceError(400, 'SubscriptionOffline', 'The subscription is offline.')
+        for shard_id, commit in commits.items():
+            offset = offsets[shard_id]
+            if commit.get('Version') != offset[2]:
+                raise ServiceError(400, 'OffsetReseted', 'The offset has been reset.')
+            if offset[3] is None or commit.get('SessionId') != offset[3]:
+                raise ServiceError(400, 'OffsetSessionChanged', 'The offset session has changed.')
+        for shard_id, commit in commits.items():
+            offsets[shard_id][0] = commit.get('Sequence', -1)
+            offsets[shard_id][1] = commit.get('Timestamp', -1)
+
+    def _reset_subscription_offset(self, parts, request):
+        resets = request.get('Offsets') or {}
+        subscription, offsets = self._offsets(parts, list(resets))
+        for shard_id, reset in resets.items():
+            offset = offsets[shard_id]
+            offset[0] = reset.get('Sequence', -1)
+            offset[1] = reset.get('Timestamp', -1)
+            offset[2] += 1
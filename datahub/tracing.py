@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import time
+
+from .exceptions import DatahubException
+from .metrics import api_name
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+class Phase(object):
+    """
+    Phases of a traced request
+    """
+    ENCODE = 'encode'
+    SIGN = 'sign'
+    COMPRESS = 'compress'
+    HTTP = 'http'
+    DECOMPRESS = 'decompress'
+    PARSE = 'parse'
+
+
+class RequestHook(object):
+    """
+    Hook of requests sent by rest client, given to clients by the ``hooks`` argument, methods do nothing by default.
+
+    Every request is traced by a :class:`datahub.tracing.RequestContext` shared by the hooks,
+    hooks are called on the thread of the request and should not block.
+    """
+
+    def before_request(self, context):
+        """
+        Called once before a request is compressed, signed and sent, headers added to ``context.headers``
+        are sent with the request
+
+        :param context: context of the request
+        :type context: :class:`datahub.tracing.RequestContext`
+        """
+        pass
+
+    def after_send(self, context):
+        """
+        Called after every try of the request is answered, or with status code -1 and the error
+        if the try is not answered
+
+        :param context: context of the request
+        :type context: :class:`datahub.tracing.RequestContext`
+        """
+        pass
+
+    def after_parse(self, context):
+        """
+        Called once after the result of the request is parsed, or with the error if the request failed
+
+        :param context: context of the request
+        :type context: :class:`datahub.tracing.RequestContext`
+        """
+        pass
+
+
+class _PhaseTimer(object):
+    __slots__ = ('_context', '_name', '_start')
+
+    def __init__(self, context, name):
+        self._context = context
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._context.phases.append((self._name, self._start, time.time()))
+
+
+class RequestContext(object):
+    """
+    Context of a request traced by hooks, from encoding the request to parsing its result
+
+    Members:
+        api (:class:`str`): name of the api, see :func:`datahub.metrics.api_name`
+
+        method (:class:`str`): http method
+
+        url (:class:`str`): url without the endpoint
+
+        headers (:class:`dict`): headers of the request before compressed and signed
+
+        attempt (:class:`int`): tries of the request retried by the retry policy, starts from 0
+
+        status_code (:class:`int`): http status code of the last try, -1 if it is not answered
+
+        request_id (:class:`str`): ``x-datahub-request-id`` of the last try
+
+        response_headers (:class:`dict`): headers of the last response
+
+        error (:class:`Exception`): error of the request, None if it succeeded
+
+        start (:class:`float`): timestamp in seconds the context is created
+
+        end (:class:`float`): timestamp in seconds the result is parsed
+
+        phases (:class:`list`): (name, start timestamp, end timestamp) of every phase, retried phases repeat,
+            see :class:`datahub.tracing.Phase`
+
+        attributes (:class:`dict`): state of hooks
+    """
+    __slots__ = ('_hooks', 'api', 'method', 'url', 'headers', 'attempt', 'status_code', 'request_id',
+                 'response_headers', 'error', 'start', 'end', 'phases', 'attributes')
+
+    def __init__(self, hooks):
+        self._hooks = hooks
+        self.api = None
+        self.method = None
+        self.url = None
+        self.headers = None
+        self.attempt = 0
+        self.status_code = None
+        self.request_id = None
+        self.response_headers = None
+        self.error = None
+        self.start = time.time()
+        self.end = None
+        self.phases = []
+        self.attributes = {}
+
+    def phase(self, name):
+        """
+        Time a phase of the request
+
+        .. code-block:: python
+
+            with context.phase(Phase.ENCODE):
+                data = request_param.content()
+        """
+        return _PhaseTimer(self, name)
+
+    def begin(self, method, url, kwargs):
+        """
+        Called by rest client before the request is compressed, calls before_request of hooks
+
+        :return: kwargs of the request with headers added by hooks
+        """
+        self.method = method.value
+        self.url = url
+        self.headers = dict(kwargs.get('headers') or {})
+        self.api = api_name(method, url, self.headers, kwargs.get('data'))
+        for hook in self._hooks:
+            hook.before_request(self)
+        return dict(kwargs, headers=self.headers)
+
+    def on_response(self, status_code, headers=None, error=None):
+        """
+        Called by rest client after every try is answered, calls after_send of hooks
+        """
+        self.status_code = status_code
+        self.response_headers = headers
+        self.request_id = headers.get('x-datahub-request-id') if headers else None
+        self.error = error
+        for hook in self._hooks:
+            hook.after_send(self)
+
+    def on_retry(self, attempt):
+        """
+        Called by rest client before the request is retried by the retry policy
+        """
+        self.attempt = attempt
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end = time.time()
+        self.error = exc_val
+        for hook in self._hooks:
+            hook.after_parse(self)
+
+
+class _NullContext(object):
+    """
+    Context of clients without hooks, nothing is traced
+    """
+    __slots__ = ()
+
+    def phase(self, name):
+        return self
+
+    def begin(self, method, url, kwargs):
+        return kwargs
+
+    def on_response(self, status_code, headers=None, error=None):
+        pass
+
+    def on_retry(self, attempt):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+NULL_CONTEXT = _NullContext()
+
+
+def _ns(timestamp):
+    return int(timestamp * 1e9)
+
+
+class OpenTelemetryHook(RequestHook):
+    """
+    Trace every request by an OpenTelemetry span named ``DataHub <api>``, with child spans of its phases,
+    see :class:`datahub.tracing.Phase`. ``opentelemetry-api`` is required, spans are exported by the sdk
+    configured by the application, e.g.
+
+    .. code-block:: python
+
+        dh = DataHub(access_id, access_key, endpoint, hooks=[OpenTelemetryHook()])
+
+    Phases are timed by the client and turned to spans after the result is parsed.
+
+    :param tracer: tracer creating spans, the tracer of the global tracer provider by default
+    """
+
+    _SPAN = 'otel.span'
+
+    def __init__(self, tracer=None):
+        if otel_trace is None:
+            raise DatahubException('opentelemetry-api is required by OpenTelemetryHook, please install it first')
+        self._tracer = tracer if tracer is not None else otel_trace.get_tracer('datahub')
+
+    def before_request(self, context):
+        span = self._tracer.start_span('DataHub %s' % context.api, kind=otel_trace.SpanKind.CLIENT,
+                                       start_time=_ns(context.start),
+                                       attributes={'http.method': context.method, 'datahub.url': context.url,
+                                                   'datahub.api': context.api})
+        context.attributes[self._SPAN] = span
+
+    def after_send(self, context):
+        span = context.attributes.get(self._SPAN)
+        if span is None:
+            return
+        span.set_attribute('http.status_code', context.status_code)
+        if context.request_id:
+            span.set_attribute('datahub.request_id', context.request_id)
+        if context.attempt:
+            span.set_attribute('datahub.retries', context.attempt)
+
+    def after_parse(self, context):
+        # before_request is not called if the request failed to encode
+        span = context.attributes.pop(self._SPAN, None)
+        if span is None:
+            return
+        parent = otel_trace.set_span_in_context(span)
+        for name, start, end in context.phases:
+            child = self._tracer.start_span(name, context=parent, start_time=_ns(start))
+            child.end(end_time=_ns(end))
+        if context.error is not None:
+            span.record_exception(context.error)
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(context.error)))
+        span.end(end_time=_ns(context.end))
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves import http_cookiejar
+from urllib3.exceptions import ProtocolError
+from six.moves.urllib.parse import urlparse
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .exceptions import DatahubException
+from .utils import ErrorMessage
+
+logger = logging.getLogger('datahub.transport')
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+class TransportStats(object):
+    """
+    Statistics of a transport
+
+    Members:
+        endpoint (:class:`str`): scheme and host of the endpoint
+
+        clients (:class:`int`): count of rest clients using the transport
+
+        requests (:class:`int`): count of requests sent
+
+        in_use (:class:`int`): count of requests in flight
+
+        idle (:class:`int`): count of idle connections kept alive in the pool, None if it is unknown
+
+        max_concurrency (:class:`int`): max requests in flight, None means no limit
+
+        wait_count (:class:`int`): count of requests which waited for the concurrency limit
+
+        total_wait_time (:class:`float`): seconds waited for the concurrency limit in total
+
+        max_wait_time (:class:`float`): max seconds a request waited for the concurrency limit
+    """
+
+    __slots__ = ('endpoint', 'clients', 'requests', 'in_use', 'idle', 'max_concurrency', 'wait_count',
+                 'total_wait_time', 'max_wait_time')
+
+    def __init__(self, endpoint, clients, requests_, in_use, idle, max_concurrency, wait_count, total_wait_time,
+                 max_wait_time):
+        self.endpoint = endpoint
+        self.clients = clients
+        self.requests = requests_
+        self.in_use = in_use
+        self.idle = idle
+        self.max_concurrency = max_concurrency
+        self.wait_count = wait_count
+        self.total_wait_time = total_wait_time
+        self.max_wait_time = max_wait_time
+
+    def to_json(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        return str(self.to_json())
+
+
+class RawResponse(object):
+    """
+    Response of transports, the body is fully read and kept as sent by the server
+    """
+
+    __slots__ = ('status_code', 'headers', 'content', 'http_version')
+
+    def __init__(self, status_code, headers, content, http_version):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.http_version = http_version
+
+
+_READ_CHUNK_SIZE = 256 * 1024
+
+
+def read_body(method, resp):
+    """
+    Read the body of a streamed requests response into a buffer allocated once by the content length,
+    instead of joining chunks of the body. The body is not decoded by Content-Encoding, compressed
+    bodies are decompressed by the rest client.
+
+    :return: body
+    :rtype: bytearray or bytes
+    """
+    raw = resp.raw
+    content_length = resp.headers.get('Content-Length')
+    if method == 'HEAD' or (content_length is None and not resp.headers.get('Content-Encoding')):
+        return resp.content
+
+    try:
+        if content_length is None:
+            content = b''.join(raw.stream(_READ_CHUNK_SIZE, decode_content=False))
+            raw.release_conn()
+            return content
+
+        # chunks are copied into the buffer, the whole body is never kept twice
+        buf = bytearray(int(content_length))
+        read_size = 0
+        while read_size < len(buf):
+            chunk = raw.read(min(_READ_CHUNK_SIZE, len(buf) - read_size), decode_content=False)
+            if not chunk:
+                resp.close()
+                raise DatahubException('Incomplete response body, read %d of %d bytes' % (read_size, len(buf)),
+                                       resp.status_code)
+            buf[read_size:read_size + len(chunk)] = chunk
+            read_size += len(chunk)
+    except ProtocolError as e:
+        # same error as reading the body by requests
+        resp.close()
+        raise requests.exceptions.ChunkedEncodingError(e)
+    # the body is fully read, the connection goes back to the pool
+    raw.release_conn()
+    return buf
+
+
+class Transport(object):
+    """
+    Connection pool of one endpoint sending prepared requests by HTTP/1.1, with an optional limit of
+    concurrent requests.
+
+    :param endpoint: endpoint url
+    :param pool_connections: count of connection pools to cache
+    :param pool_maxsize: max connections kept alive in the pool
+    :param retry_times: retry times of connection errors
+    :param max_concurrency: max requests in flight, requests over it wait, None means no limit
+    :param shared: whether the transport is shared by clients, cookies are never kept by a shared transport
+    """
+
+    def __init__(self, endpoint, pool_connections=10, pool_maxsize=10, retry_times=3, max_concurrency=None,
+                 shared=False):
+        self._endpoint = endpoint
+        self._max_concurrency = max_concurrency
+        self._semaphore = threading.Semaphore(max_concurrency) if max_concurrency else None
+
+        self._session = requests.Session()
+        self._session.headers.update({'Accept-Encoding': ''})
+        if shared:
+            # clients with different accounts send requests by the same session
+            self._session.cookies.set_policy(http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self._init_pool(pool_connections, pool_maxsize, retry_times)
+
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._requests = 0
+        self._in_use = 0
+        self._wait_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def _init_pool(self, pool_connections, pool_maxsize, retry_times):
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    max_retries=retry_times)
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+
+    @property
+    def endpoint(self):
+        return self._endpoint
+
+    def prepare_request(self, request):
+        return self._session.prepare_request(request)
+
+    def send(self, prepared_request, **kwargs):
+        """
+        Send the prepared request, waiting for the concurrency limit first
+
+        :return: response
+        :rtype: :class:`datahub.transport.RawResponse`
+        """
+        if self._semaphore is not None and not self._semaphore.acquire(False):
+            start = time.time()
+            self._semaphore.acquire()
+            wait_time = time.time() - start
+            with self._lock:
+                self._wait_count += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+        with self._lock:
+            self._requests += 1
+            self._in_use += 1
+        try:
+            return self._send(prepared_request, **kwargs)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def _send(self, prepared_request, **kwargs):
+        # the body is read before the concurrency limit is released, the connection is in use until then
+        kwargs['stream'] = True
+        resp = self._session.send(prepared_request, **kwargs)
+        return RawResponse(resp.status_code, resp.headers, read_body(prepared_request.method, resp), 'HTTP/1.1')
+
+    def _idle_connections(self):
+        idle = 0
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is not None and pool.pool is not None:
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        return idle
+
+    def stats(self):
+        """
+        Get statistics of the transport
+
+        :return: statistics
+        :rtype: :class:`datahub.transport.TransportStats`
+        """
+        idle = self._idle_connections()
+        with self._lock:
+            return TransportStats(self._endpoint, self._clients, self._requests, self._in_use, idle,
+                                  self._max_concurrency, self._wait_count, self._total_wait_time,
+                                  self._max_wait_time)
+
+    def close(self):
+        self._session.close()
+
+
+class Http2Transport(Transport):
+    """
+    Transport multiplexing concurrent requests on one HTTP/2 connection, built on httpx.
+
+    HTTP/2 is negotiated by ALPN for https endpoints. For http endpoints HTTP/2 is tried with prior knowledge,
+    and the transport falls back to HTTP/1.1 if the server does not speak it.
+    Requests are prepared and signed exactly like :class:`datahub.transport.Transport`.
+    """
+
+    def _init_pool(self, pool_connections, pool_maxsize, retry_times):
+        if httpx is None:
+            raise DatahubException('httpx and h2 are required by http2 transport, please install them first')
+        self._limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        self._retry_times = retry_times
+        # http endpoints can only speak HTTP/2 with prior knowledge
+        self._prior_knowledge = urlparse(self._endpoint).scheme == 'http'
+        self._pools = {}
+
+    def _pool(self, proxy):
+        pool = self._pools.get(proxy)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(proxy)
+                if pool is None:
+                    pool = httpx.HTTPTransport(verify=False, http1=not self._prior_knowledge, http2=True,
+                                               limits=self._limits, proxy=proxy, retries=self._retry_times)
+                    self._pools[proxy] = pool
+        return pool
+
+    def _fallback(self):
+        with self._lock:
+            if not self._prior_knowledge:
+                return
+            self._prior_knowledge = False
+            pools, self._pools = self._pools, {}
+        logger.warning('endpoint %s does not support HTTP/2, fall back to HTTP/1.1', self._endpoint)
+        for pool in pools.values():
+            pool.close()
+
+    def _send(self, prepared_request, timeout=None, proxies=None, **kwargs):
+        proxy = None
+        if proxies:
+            proxy = proxies.get(urlparse(prepared_request.url).scheme)
+        extensions = {}
+        if timeout is not None:
+            conn_timeout, read_timeout = timeout
+            extensions['timeout'] = httpx.Timeout(read_timeout, connect=conn_timeout).as_dict()
+
+        content = prepared_request.body or b''
+        if isinstance(content, (bytearray, memoryview)):
+            # httpx iterates bytes-like content other than bytes, the buffer is sent as one chunk instead,
+            # the length is known by the Content-Length header
+            content = [content]
+
+        while True:
+            prior_knowledge = self._prior_knowledge
+            request = httpx.Request(prepared_request.method, prepared_request.url,
+                                    headers=list(prepared_request.headers.items()),
+                                    content=content, extensions=extensions)
+            try:
+                response = self._pool(proxy).handle_request(request)
+            except httpx.RemoteProtocolError:
+                # the server answered the connection preface by HTTP/1.1 or closed it
+                if not prior_knowledge:
+                    raise
+                self._fallback()
+                continue
+            try:
+                # content is decompressed by rest client, raw bytes are read
+                content = b''.join(response.iter_raw())
+            finally:
+                response.close()
+            return RawResponse(response.status_code, response.headers, content,
+                               response.extensions.get('http_version', b'').decode())
+
+    def _idle_connections(self):
+        # connections of httpx pools are private, idle is unknown if httpx changes them
+        idle = 0
+        for pool in list(self._pools.values()):
+            connections = getattr(getattr(pool, '_pool', None), 'connections', None)
+            if connections is None:
+                return None
+            idle += sum(1 for conn in list(connections) if conn.is_idle())
+        return idle
+
+    def close(self):
+        super(Http2Transport, self).close()
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+
+class TransportRegistry(object):
+    """
+    Process wide registry of transports shared by rest clients, keyed by endpoint and pool options
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._transports = {}
+
+    @staticmethod
+    def _key(endpoint, pool_connections, pool_maxsize, retry_times, max_concurrency, http2):
+        url = urlparse(endpoint)
+        if not url.scheme or not url.netloc:
+            raise DatahubException(ErrorMessage.INVALID_ENDPOINT % endpoint)
+        return ('%s://%s' % (url.scheme, url.netloc.lower()), pool_connections, pool_maxsize, retry_times,
+                max_concurrency, http2)
+
+    def acquire(self, endpoint, pool_connections=10, pool_maxsize=10, retry_times=3, max_concurrency=None,
+                http2=False):
+        """
+        Get the shared transport of the endpoint and options, create it if not exists
+
+        :return: shared transport, must be released by :meth:`release`
+        :rtype: :class:`datahub.transport.Transport`
+        """
+        key = self._key(endpoint, pool_connections, pool_maxsize, retry_times, max_concurrency, http2)
+        with self._lock:
+            transport = self._transports.get(key)
+            if transport is None:
+                transport_class = Http2Transport if http2 else Transport
+                transport = transport_class(key[0], pool_connections, pool_maxsize, retry_times, max_concurrency,
+                                            shared=True)
+                self._transports[key] = transport
+            transport._clients += 1
+            return transport
+
+    def release(self, transport):
+        """
+        Release a shared transport, it is closed when no client uses it
+        """
+        with self._lock:
+            transport._clients -= 1
+            if transport._clients > 0:
+                return
+            for key, value in list(self._transports.items()):
+                if value is transport:
+                    del self._transports[key]
+        transport.close()
+
+    def stats(self):
+        """
+        Get statistics of all shared transports
+
+        :return: statistics list
+        :rtype: list
+        """
+        with self._lock:
+            transports = list(self._transports.values())
+        return [transport.stats() for transport in transports]
+
+
+transport_registry = TransportRegistry()
@@ -20,4 +20,5 @@
 from .codec import *
 from .constants import *
 from .converters import *
+from .crc import *
 from .validator import *
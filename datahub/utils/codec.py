@@ -24,9 +24,10 @@ import struct
 from base64 import b64encode
 from hashlib import sha1
 
-import crcmod.predefined
+import six
 
 from .converters import to_binary
+from .crc import get_crc32c
 
 
 def hmac_sha1(secret, data):
@@ -38,16 +39,67 @@ def hmac_sha1(secret, data):
     return b64encode(hmac.new(key_bytes, data_bytes, sha1).digest())
 
 
-def pb_message_wrap(pb_data):
-    crc32c = crcmod.predefined.mkCrcFun('crc-32c')
-    crc = crc32c(to_binary(pb_data)) & 0xffffffff
-    return to_binary('DHUB') + struct.pack('>I', crc) + struct.pack('>I', len(pb_data)) + pb_data
+class HmacSha1(object):
+    """
+    HMAC-SHA1 keyed once, the keyed state is copied for every message instead of hashing the key again
+    """
+
+    __slots__ = ('_hmac',)
+
+    def __init__(self, secret):
+        try:
+            key_bytes = bytes(secret, 'latin-1')
+        except TypeError:
+            key_bytes = secret
+        self._hmac = hmac.new(key_bytes, digestmod=sha1)
+
+    def sign(self, data):
+        """
+        Same as :func:`hmac_sha1` with the secret of this object
+
+        :return: base64 encoded signature
+        :rtype: bytes
+        """
+        mac = self._hmac.copy()
+        try:
+            mac.update(bytes(data, 'latin-1'))
+        except TypeError:
+            mac.update(data)
+        return b64encode(mac.digest())
+
+
+# magic, crc32c and length of the protobuf message
+PB_FRAME_HEADER_SIZE = 12
+
+
+def pb_message_wrap(pb_data, header_reserved=False):
+    """
+    Wrap the protobuf message into a frame, the header and the message are written into one buffer
+
+    :param pb_data: protobuf message
+    :param header_reserved: the first ``PB_FRAME_HEADER_SIZE`` bytes of pb_data, which must be a bytearray,
+        are reserved for the header, which is written in place without copying the message
+    :return: frame
+    :rtype: bytearray
+    """
+    crc32c = get_crc32c()
+    if header_reserved:
+        frame = pb_data
+    else:
+        frame = bytearray(PB_FRAME_HEADER_SIZE + len(pb_data))
+        frame[PB_FRAME_HEADER_SIZE:] = to_binary(pb_data) if isinstance(pb_data, six.text_type) else pb_data
+    pb_str = memoryview(frame)[PB_FRAME_HEADER_SIZE:]
+    crc = crc32c(pb_str) & 0xffffffff
+    struct.pack_into('>4sII', frame, 0, b'DHUB', crc, len(pb_str))
+    return frame
 
 
 def unwrap_pb_frame(pb_frame):
-    crc32c = crcmod.predefined.mkCrcFun('crc-32c')
-    binary = to_binary(pb_frame)
-    crc = binary[4:8]
-    pb_str = pb_frame[12:]
+    crc32c = get_crc32c()
+    # slices of the memoryview share the response buffer instead of copying the payload
+    frame = memoryview(pb_frame if isinstance(pb_frame, (six.binary_type, bytearray, memoryview))
+                       else to_binary(pb_frame))
+    crc = frame[4:8].tobytes()
+    pb_str = frame[12:]
     compute_crc = struct.pack('>I', crc32c(pb_str) & 0xffffffff)
     return crc, compute_crc, pb_str
@@ -25,6 +25,9 @@ class ErrorMessage(object):
     INVALID_RECORD_SCHEMA_TYPE = 'record schema parameter must be type of RecordSchema'
     MISSING_BLOB_RECORD_DATA = 'Blob Record blob data or values is missing'
     MISSING_TUPLE_RECORD_SCHEMA = 'TUPLE Record fields or schema is missing'
+    RECORD_TYPE_MISMATCH = '%s record can not be added to a batch of %s records'
+    BATCH_SCHEMA_READONLY = 'field list of a record in a batch is the schema of the batch and can not be changed, ' \
+                            'create a TupleRecord of the values to change it'
     MISSING_SYSTEM_TIME = 'get SYSTEM_TIME cursor must provide invalid system_time parameter'
     MISSING_SEQUENCE = 'get SEQUENCE cursor must provide invalid sequence parameter'
     WAIT_SHARD_TIMEOUT = 'wait shards ready timeout'
@@ -32,3 +35,9 @@ class ErrorMessage(object):
     PARAMETER_NOT_POSITIVE = '%s must be positive'
     PARAMETER_NEGATIVE = '%s could not be negative'
     INVALID_TYPE = '%s must be type of %s'
+    PRODUCER_CLOSED = 'producer is closed'
+    PRODUCER_BUFFER_FULL = 'producer buffer is full'
+    CONSUMER_CLOSED = 'consumer is closed'
+    NO_READABLE_SHARD = 'no readable shard to consume'
+    INVALID_ENDPOINT = 'invalid endpoint: %s'
+    PARAMETER_OUT_OF_RANGE = '%s must be in range %s'
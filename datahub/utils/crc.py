@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+from enum import Enum
+
+import six
+
+from ..exceptions import DatahubException
+
+
+class CrcBackend(Enum):
+    """
+    CRC32C implementation enum class, there are: ``CRC32C``, ``GOOGLE_CRC32C``, ``CRCMOD``
+
+    ``CRC32C`` and ``GOOGLE_CRC32C`` use SSE4.2 / ARMv8 crc instructions when the cpu supports them.
+    """
+    CRC32C = 'crc32c'
+    GOOGLE_CRC32C = 'google_crc32c'
+    CRCMOD = 'crcmod'
+
+
+def _load_crc32c():
+    import crc32c
+    return crc32c.crc32c
+
+
+def _load_google_crc32c():
+    import google_crc32c
+    if google_crc32c.implementation != 'c':
+        # the pure python fallback is slower than crcmod
+        raise ImportError('google_crc32c is built without the c extension')
+    value = google_crc32c.value
+
+    def _crc32c(data):
+        # only bytes are accepted, memoryview and bytearray are copied
+        return value(data if isinstance(data, six.binary_type) else bytes(data))
+    return _crc32c
+
+
+def _load_crcmod():
+    import crcmod.predefined
+    return crcmod.predefined.mkCrcFun('crc-32c')
+
+
+# the first available backend is used by default
+_loaders = [
+    (CrcBackend.CRC32C, _load_crc32c),
+    (CrcBackend.GOOGLE_CRC32C, _load_google_crc32c),
+    (CrcBackend.CRCMOD, _load_crcmod),
+]
+
+_crc_dict = {}
+_default_backend = []
+
+
+def _load(backend):
+    if backend not in _crc_dict:
+        _crc_dict[backend] = dict(_loaders)[backend]()
+    return _crc_dict[backend]
+
+
+def default_crc_backend():
+    """
+    The first available backend of ``CRC32C``, ``GOOGLE_CRC32C`` and ``CRCMOD``
+
+    :return: backend
+    :rtype: :class:`datahub.utils.crc.CrcBackend`
+    """
+    if not _default_backend:
+        for backend, _ in _loaders:
+            try:
+                _load(backend)
+            except ImportError:
+                continue
+            _default_backend.append(backend)
+            break
+        else:
+            raise DatahubException('crcmod is required by crc32c, please install it first')
+    return _default_backend[0]
+
+
+def get_crc32c(backend=None):
+    """
+    Get the crc32c function of the backend, the function is built once and shared
+
+    :param backend: crc backend, the default one if not given
+    :type backend: :class:`datahub.utils.crc.CrcBackend`
+    :return: function computing the unsigned crc32c of bytes-like data
+    """
+    try:
+        backend = CrcBackend(backend or default_crc_backend())
+    except ValueError as e:
+        raise DatahubException(e)
+    try:
+        return _load(backend)
+    except ImportError:
+        raise DatahubException('%s is required by %s crc backend, please install it first'
+                               % (backend.value, backend.value))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from __future__ import absolute_import
+
+import itertools
+import logging
+
+import six
+
+from .exceptions import InvalidParameterException
+from .utils import ErrorMessage, check_negative, check_positive
+
+REDACTED = '***'
+
+
+class WireLogger(object):
+    """
+    Log requests and responses on the wire, given to clients by the ``wire_logger`` argument.
+    By default requests are logged to the ``datahub.rest`` logger at DEBUG level, like
+    ``logging.getLogger('datahub.rest').setLevel(logging.DEBUG)`` of former versions.
+
+    Nothing is formatted unless the logger is enabled for the level, bodies are cut to a preview and
+    credentials are redacted, so sampled wire logs could stay on in production, e.g.
+
+    .. code-block:: python
+
+        wire_logger = WireLogger(sample_rate=100, max_body_size=256, level=logging.INFO)
+        dh = DataHub(access_id, access_key, endpoint, wire_logger=wire_logger)
+
+    Every record carries the fields in ``record.datahub_wire`` for structured handlers, e.g. json formatters.
+
+    :param sample_rate: log 1 in sample_rate tries of requests, the request and response of a try are both logged
+    :param max_body_size: max bytes of body previews, 0 means no body
+    :param level: logging level of the records
+    :param logger_name: name of the logger
+    :param redact_headers: headers whose values are replaced by ``***``, case insensitive
+    """
+
+    def __init__(self, sample_rate=1, max_body_size=1024, level=logging.DEBUG, logger_name='datahub.rest',
+                 redact_headers=('Authorization',)):
+        if not check_positive(sample_rate):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NOT_POSITIVE % 'sample_rate')
+        if check_negative(max_body_size):
+            raise InvalidParameterException(ErrorMessage.PARAMETER_NEGATIVE % 'max_body_size')
+        self._sample_rate = sample_rate
+        self._max_body_size = max_body_size
+        self._level = level
+        self._logger = logging.getLogger(logger_name)
+        self._redact_headers = frozenset(name.lower() for name in redact_headers)
+        # next of itertools.count is atomic under the GIL
+        self._counter = itertools.count()
+
+    @property
+    def sample_rate(self):
+        return self._sample_rate
+
+    @property
+    def max_body_size(self):
+        return self._max_body_size
+
+    @property
+    def logger(self):
+        return self._logger
+
+    def sample(self):
+        """
+        Whether to log the current try, costs a level check when the logger is disabled
+
+        :return: True if the try should be logged
+        """
+        if not self._logger.isEnabledFor(self._level):
+            return False
+        if self._sample_rate == 1:
+            return True
+        return next(self._counter) % self._sample_rate == 0
+
+    def redact(self, headers):
+        """
+        Copy of headers with credentials redacted
+        """
+        if headers is None:
+            return {}
+        return dict((name, REDACTED if name.lower() in self._redact_headers else value)
+                    for name, value in six.iteritems(headers))
+
+    def preview(self, body, headers=None):
+        """
+        Preview of a body cut to max_body_size, compressed bodies are only described by their size
+
+        :return: preview text
+        """
+        if not body:
+            return ''
+        encoding = headers.get('Content-Encoding') if headers else None
+        if encoding:
+            return '<%d bytes %s>' % (len(body), encoding)
+        if self._max_body_size == 0:
+            return '<%d bytes>' % len(body)
+        head = body[:self._max_body_size]
+        if not isinstance(head, six.text_type):
+            head = self.__to_text(bytes(head))
+        if len(body) > self._max_body_size:
+            return '%s...<%d bytes>' % (head, len(body))
+        return head
+
+    @staticmethod
+    def __to_text(data):
+        # json bodies are kept readable, protobuf bodies are escaped not to break the log lines
+        if six.PY3:
+            try:
+                text = data.decode('utf-8')
+                if text.isprintable():
+                    return text
+            except UnicodeDecodeError:
+                pass
+        return repr(data)[2:-1] if six.PY3 else repr(data)[1:-1]
+
+    def log_request(self, method, url, headers, body):
+        """
+        Log a request on the wire, called by rest client if the try is sampled
+        """
+        preview = self.preview(body, headers)
+        headers = self.redact(headers)
+        fields = {
+            'direction': 'request',
+            'method': method,
+            'url': url,
+            'headers': headers,
+            'body_size': len(body) if body else 0,
+            'body': preview,
+        }
+        self._logger.log(self._level, 'request %s %s, headers: %s, body: %s', method, url, headers, preview,
+                         extra={'datahub_wire': fields})
+
+    def log_response(self, url, status_code, headers, body):
+        """
+        Log a response on the wire, called by rest client if the try is sampled
+        """
+        preview = self.preview(body, headers)
+        request_id = headers.get('x-datahub-request-id') if headers else None
+        headers = self.redact(headers)
+        fields = {
+            'direction': 'response',
+            'url': url,
+            'status_code': status_code,
+            'request_id': request_id,
+            'headers': headers,
+            'body_size': len(body) if body else 0,
+            'body': preview,
+        }
+        self._logger.log(self._level, 'response %s %d, headers: %s, body: %s', url, status_code, headers, preview,
+                         extra={'datahub_wire': fields})
+
+
+DEFAULT_WIRE_LOGGER = WireLogger()
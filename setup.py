@@ -61,5 +61,13 @@ setuptools.setup(
     url='https://github.com/aliyun/aliyun-datahub-sdk-python',
     packages=setuptools.find_packages(exclude='tests'),
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.6.0; python_version >= "3.6"'],
+        'http2': ['httpx[http2]>=0.26.0; python_version >= "3.8"'],
+        'crc': ['crc32c>=2.0; python_version >= "3.7"'],
+        'zstd': ['zstandard>=0.15.0'],
+        'snappy': ['python-snappy>=0.5'],
+        'otel': ['opentelemetry-api>=1.0.0; python_version >= "3.6"'],
+    },
     license='Apache License 2.0'
 )
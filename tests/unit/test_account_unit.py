@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import requests
+from six.moves.urllib.parse import urlparse, unquote
+
+from datahub.auth import AliyunAccount
+from datahub.utils import HmacSha1, hmac_sha1
+
+
+def gen_request(url, headers):
+    base_headers = {
+        'Content-Type': 'application/json',
+        'Date': 'Thu, 01 Jan 2026 00:00:00 GMT',
+        'x-datahub-client-version': '1.1',
+    }
+    base_headers.update(headers)
+    return requests.Request('POST', 'http://endpoint' + url, headers=base_headers, data=b'{}').prepare()
+
+
+def expected_auth(account, request):
+    url_components = urlparse(unquote(request.path_url))
+    canonical_str = AliyunAccount._build_canonical_str(url_components, request)
+    return 'DATAHUB %s:%s' % (account.access_id, hmac_sha1(account.access_key, canonical_str).decode())
+
+
+class TestAccount:
+
+    def test_hmac_sha1(self):
+        signer = HmacSha1('access_key')
+        for data in ('', 'a', 'POST\napplication/json\n/projects'):
+            assert signer.sign(data) == hmac_sha1('access_key', data)
+            # signing twice does not change the keyed state
+            assert signer.sign(data) == hmac_sha1('access_key', data)
+        assert HmacSha1(b'access_key').sign(b'data') == hmac_sha1(b'access_key', b'data')
+
+    def test_sign_request(self):
+        account = AliyunAccount(access_id='access_id', access_key='access_key')
+        cases = [
+            ('/projects', {}),
+            ('/projects/project/topics/topic/shards/0', {'x-datahub-request-action': 'sub',
+                                                         'X-Datahub-Content-Raw-Size': '100'}),
+            ('/projects/project/topics/topic/shards/1', {'X-Datahub-Content-Raw-Size': '100',
+                                                         'x-datahub-request-action': 'sub'}),
+            ('/projects/project/topics/topic/connectors/sink_odps?donetime', {}),
+            ('/projects/project/topics/topic?x-datahub-extra=1&a=b', {'x-datahub-request-action': 'pub'}),
+            ('/projects/project%20name/topics', {}),
+        ]
+        for _ in range(2):
+            for url, headers in cases:
+                request = gen_request(url, headers)
+                account.sign_request(request)
+                assert request.headers['Authorization'] == expected_auth(account, request)
+
+    def test_change_access_key(self):
+        account = AliyunAccount(access_id='access_id', access_key='access_key')
+        request = gen_request('/projects', {})
+        account.sign_request(request)
+        old_auth = request.headers['Authorization']
+
+        account.access_key = 'new_access_key'
+        account.sign_request(request)
+        assert request.headers['Authorization'] != old_auth
+        assert request.headers['Authorization'] == expected_auth(account, request)
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestAccount()
+    test.test_hmac_sha1()
+    test.test_sign_request()
+    test.test_change_access_key()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from six.moves import BaseHTTPServer, socketserver
+
+from datahub.aio import AsyncDataHub
+from datahub.exceptions import InvalidParameterException, ResourceNotFoundException, LimitExceededException
+from datahub.metrics import ClientMetrics
+from datahub.models import RecordSchema, FieldType, TupleRecord, CompressFormat, CursorType
+from datahub.ratelimit import ShardRateLimiter
+from datahub.testing import MockDataHubServer
+
+_TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+_FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+
+class FixtureHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers every request with the fixture file of its path
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        pb = self.headers.get('Content-Type') == 'application/x-protobuf'
+        path = self.path.split('?', 1)[0].replace('/', '.')[1:]
+        res_file = os.path.join(_FIXTURE_PATH, '%s.%s' % (path, 'bin' if pb else 'json'))
+        with open(res_file, 'rb') as f:
+            content = f.read()
+        status_code = 200
+        if not pb and 'ErrorCode' in json.loads(content.decode('utf-8')):
+            status_code = 500
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/x-protobuf' if pb else 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('x-datahub-request-id', '0')
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture(scope='module')
+def endpoint():
+    server = FixtureServer(('127.0.0.1', 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:%d' % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def run(endpoint, func, **kwargs):
+    async def _run():
+        async with AsyncDataHub('access_id', 'access_key', endpoint, **kwargs) as dh:
+            return await func(dh)
+    return asyncio.run(_run())
+
+
+class TestAsyncDataHub:
+
+    def test_list_project(self, endpoint):
+        result = run(endpoint, lambda dh: dh.list_project())
+        assert 'project_name_1' in result.project_names
+
+    def test_concurrent_requests(self, endpoint):
+        async def get_projects(dh):
+            return await asyncio.gather(*[dh.get_project('success') for _ in range(10)])
+
+        results = run(endpoint, get_projects)
+        assert len(results) == 10
+        assert all(result.comment == 'get project' for result in results)
+
+    def test_get_tuple_records(self, endpoint):
+        cursor = '20000000000000000000000000fb0021'
+        result = run(endpoint, lambda dh: dh.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10))
+        assert result.record_count == 1
+        assert result.records[0].values == (1, 'yc1', 10.01, True, 1455869335000000)
+
+    def test_get_tuple_records_pb(self, endpoint):
+        cursor = '20000000000000000000000000fb0021'
+        result = run(endpoint, lambda dh: dh.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10),
+                     enable_pb=True)
+        assert result.record_count == 3
+        assert result.records[0].values == (99, 'yc1', 10.01, True, 1455869335000000)
+
+    def test_put_records_with_compression(self, endpoint):
+        records = [TupleRecord(schema=record_schema, values=[1, 'yc1', 10.01, True, 1455869335000000])]
+        result = run(endpoint, lambda dh: dh.put_records('put', 'success', records),
+                     compress_format=CompressFormat.LZ4)
+        assert result.failed_record_count == 0
+
+    def test_compress_workers(self, endpoint):
+        class CountingExecutor(ThreadPoolExecutor):
+            submitted = 0
+
+            def submit(self, *args, **kwargs):
+                CountingExecutor.submitted += 1
+                return super(CountingExecutor, self).submit(*args, **kwargs)
+
+        executor = CountingExecutor(max_workers=2)
+        small = [TupleRecord(schema=record_schema, values=[1, 'yc1', 10.01, True, 1455869335000000])]
+        large = [TupleRecord(schema=record_schema, values=[i, 'yc' * 100, 10.01, True, 1455869335000000])
+                 for i in range(1000)]
+        result = run(endpoint, lambda dh: dh.put_records('put', 'success', small),
+                     compress_format=CompressFormat.LZ4, compress_workers=executor)
+        assert result.failed_record_count == 0
+        # small bodies are compressed on the event loop
+        assert CountingExecutor.submitted == 0
+        result = run(endpoint, lambda dh: dh.put_records('put', 'success', large),
+                     compress_format=CompressFormat.LZ4, compress_workers=executor)
+        assert result.failed_record_count == 0
+        assert CountingExecutor.submitted == 1
+        executor.shutdown()
+
+        result = run(endpoint, lambda dh: dh.put_records('put', 'success', large),
+                     compress_format=CompressFormat.LZ4, compress_workers=2)
+        assert result.failed_record_count == 0
+
+    def test_error_response(self, endpoint):
+        try:
+            run(endpoint, lambda dh: dh.get_project('unexisted'))
+        except ResourceNotFoundException:
+            pass
+        else:
+            raise Exception('get unexisted project success')
+
+        try:
+            run(endpoint, lambda dh: dh.split_shard('split', 'limit_exceeded', '0', '00000000000000000000000000AAAAAA'))
+        except LimitExceededException:
+            pass
+        else:
+            raise Exception('split shard success when limit exceeded')
+
+    def test_connection_retry(self, monkeypatch, caplog):
+        aiohttp = pytest.importorskip('aiohttp')
+        monkeypatch.setattr('datahub.aio.rest._CONNECT_RETRY_BASE_DELAY', 0.001)
+
+        # a request dropped after sent is not retried, the server may have handled it
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(8)
+        accepted = []
+
+        def drop():
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                accepted.append(conn)
+                conn.recv(65536)
+                conn.close()
+
+        thread = threading.Thread(target=drop)
+        thread.daemon = True
+        thread.start()
+        records = [TupleRecord(schema=record_schema, values=[1, 'yc1', 10.01, True, 1455869335000000])]
+        try:
+            run('http://127.0.0.1:%d' % listener.getsockname()[1],
+                lambda dh: dh.put_records('put', 'success', records), retry_times=3)
+        except aiohttp.ServerDisconnectedError:
+            pass
+        else:
+            raise Exception('put records to a dropping server success!')
+        finally:
+            listener.close()
+        assert len(accepted) == 1
+
+        # a connection never established is retried
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        port = closed.getsockname()[1]
+        closed.close()
+        with caplog.at_level(logging.WARNING, logger='datahub.rest'):
+            try:
+                run('http://127.0.0.1:%d' % port, lambda dh: dh.list_project(), retry_times=2)
+            except aiohttp.ClientConnectorError:
+                pass
+            else:
+                raise Exception('list project without server success!')
+        assert len([record for record in caplog.records if record.getMessage().startswith('connect ')]) == 2
+
+    def test_invalid_param(self, endpoint):
+        try:
+            run(endpoint, lambda dh: dh.get_project(''))
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('get project success with empty project name')
+
+    def test_record_apis(self):
+        async def records(dh):
+            await dh.create_project('test_project', 'comment')
+            await dh.create_tuple_topic('test_project', 'tuple_topic', 1, 7, record_schema, 'tuple')
+            await dh.wait_shards_ready('test_project', 'tuple_topic')
+            record_list = []
+            for i in range(10):
+                record = TupleRecord(schema=record_schema, values=[i, 'yc%d' % i, 1.0, True, 1455869335000000])
+                record.shard_id = '0'
+                record_list.append(record)
+            assert (await dh.put_records('test_project', 'tuple_topic', record_list)).failed_record_count == 0
+            columns = {'bigint_field': [10, 11], 'string_field': ['yc10', 'yc11'], 'double_field': [1.0, 2.0],
+                       'bool_field': [True, False], 'time_field': [0, 1]}
+            result = await dh.put_columns('test_project', 'tuple_topic', columns, record_schema, '0')
+            assert result.failed_record_count == 0
+
+            cursor = (await dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.OLDEST)).cursor
+            batch = (await dh.get_record_batch('test_project', 'tuple_topic', '0', record_schema, cursor, 20)).records
+            assert [view.values[0] for view in batch] == list(range(12))
+            result = await dh.get_tuple_records('test_project', 'tuple_topic', '0', record_schema, cursor, 5)
+            assert result.records[4].values[1] == 'yc4'
+            result = await dh.split_shard('test_project', 'tuple_topic', '0')
+            assert [shard.shard_id for shard in result.new_shards] == ['1', '2']
+
+        for enable_pb in (False, True):
+            metrics = ClientMetrics()
+            with MockDataHubServer() as server:
+                run(server.endpoint, records, enable_pb=enable_pb, compress_format=CompressFormat.LZ4,
+                    rate_limiter=ShardRateLimiter(100), metrics=metrics)
+            assert metrics.snapshot()['topics']['test_project/tuple_topic'] == {
+                'records_put': 12, 'records_failed': 0, 'records_read': 17}
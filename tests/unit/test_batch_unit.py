@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+from array import array
+
+from httmock import HTTMock, urlmatch, response
+
+from datahub import DataHub
+from datahub.exceptions import InvalidParameterException
+from datahub.models import RecordSchema, FieldType, BlobRecord, TupleRecord, RecordBatch, RecordType
+
+_TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+_FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
+
+dh = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=False)
+dh2 = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=True)
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    res_file = os.path.join(_FIXTURE_PATH, '%s.json' % path)
+    headers = {
+        'Content-Type': 'application/json',
+        'x-datahub-request-id': 0
+    }
+    with open(res_file, 'rb') as f:
+        content = json.loads(f.read().decode('utf-8'))
+    return response(200, content, headers, request=request)
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_pb_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    res_file = os.path.join(_FIXTURE_PATH, '%s.bin' % path)
+    headers = {
+        'Content-Type': 'application/x-protobuf',
+        'x-datahub-request-id': 0
+    }
+    with open(res_file, 'rb') as f:
+        content = f.read()
+    return response(200, content, headers, request=request)
+
+
+def gen_records():
+    records = []
+    record0 = TupleRecord(schema=record_schema, values=[1, 'yc1', 10.01, True, 1455869335000000])
+    record0.shard_id = '0'
+    record0.put_attribute('key', 'value')
+    records.append(record0)
+
+    record1 = TupleRecord(schema=record_schema, values=[None, 'yc2', None, False, 1455869335000001])
+    record1.hash_key = '4FFFFFFFFFFFFFFD7FFFFFFFFFFFFFFD'
+    record1.put_attribute('key', 'value')
+    records.append(record1)
+
+    record2 = TupleRecord(schema=record_schema, values=[9223372036854775807, None, 0.5, None, None])
+    record2.partition_key = 'TestPartitionKey'
+    record2.sequence = 10
+    record2.system_time = 1527161792134
+    records.append(record2)
+    return records
+
+
+class TestRecordBatch:
+
+    def test_build_batch(self):
+        records = gen_records()
+        batch = RecordBatch.from_records(records, record_schema)
+        assert len(batch) == 3
+        assert batch.record_type == RecordType.TUPLE
+        assert list(batch.sequences) == [0, 0, 10]
+        assert list(batch.system_times) == [0, 0, 1527161792134]
+        for record, view in zip(records, batch):
+            assert isinstance(view, TupleRecord)
+            assert view.values == record.values
+            assert view.attributes == record.attributes
+            assert (view.shard_id, view.hash_key, view.partition_key) == \
+                (record.shard_id, record.hash_key, record.partition_key)
+            assert view.to_json() == record.to_json()
+            assert view.encode_pb_values() == record.encode_pb_values()
+        assert batch[-1].get_value('double_field') == 0.5
+        assert [view.sequence for view in batch[1:]] == [0, 10]
+
+        # equal attributes are kept once, columns without null are typed arrays
+        assert batch[0].attributes is batch[1].attributes
+        assert isinstance(batch.column('time_field'), list)
+        assert isinstance(batch.column('string_field'), list)
+        batch.append_values([2, 'yc3', 1.5, True, 1455869335000002], attributes={'key': 'value'}, shard_id='1')
+        assert batch.column(4)[3] == 1455869335000002
+        assert batch[3].attributes is batch[0].attributes
+        assert batch[3].shard_id == '1'
+
+        try:
+            batch.append_values([2, 'yc3'])
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('append values against the schema success')
+
+        try:
+            batch.append(BlobRecord(blob_data=b'data'))
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('append blob record to tuple batch success')
+
+        batch = RecordBatch(record_schema)
+        batch.append_values([1, 'yc1', 10.01, True, 1455869335000000])
+        assert isinstance(batch.column('bigint_field'), array)
+        assert isinstance(batch.column('double_field'), array)
+
+    def test_modify_view(self):
+        batch = RecordBatch.from_records(gen_records(), record_schema)
+        view = batch[0]
+        view.set_value('bigint_field', '5')
+        view.set_value(2, None)
+        view.put_attribute('key2', 'value2')
+        view.shard_id = '3'
+        view.sequence = 7
+        assert batch[0].values == (5, 'yc1', None, True, 1455869335000000)
+        assert batch[0].attributes == {'key': 'value', 'key2': 'value2'}
+        # the attributes shared with the other record are not changed
+        assert batch[1].attributes == {'key': 'value'}
+        assert batch[0].shard_id == '3'
+        assert batch.sequences[0] == 7
+
+        try:
+            view.set_value('bool_field', 'yes')
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('set invalid value to view success')
+
+        try:
+            view.field_list = record_schema.field_list[:2]
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('set field list of view success')
+        assert len(view.field_list) == len(record_schema.field_list)
+
+        batch.set_shard_id('9')
+        assert [view.shard_id for view in batch] == ['9', '9', '9']
+        assert batch[1].hash_key == '4FFFFFFFFFFFFFFD7FFFFFFFFFFFFFFD'
+
+    def test_blob_batch(self):
+        record = BlobRecord(blob_data=b'blob data')
+        record.put_attribute('key', 'value')
+        batch = RecordBatch.from_records([record])
+        batch.append_values(b'\x00\x01')
+        assert batch.record_type == RecordType.BLOB
+        assert isinstance(batch[0], BlobRecord)
+        assert batch[0].blob_data == b'blob data'
+        assert batch[0].to_json() == record.to_json()
+        assert batch[1].encode_pb_values() == [b'\x00\x01']
+
+    def test_put_batch(self):
+        bodies = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def capture_mock(url, request):
+            bodies.append(request.body)
+            return datahub_api_mock(url, request)
+
+        records = gen_records()
+        batch = RecordBatch.from_records(records, record_schema)
+        with HTTMock(capture_mock):
+            assert dh.put_records('put', 'success', batch).failed_record_count == 0
+            dh.put_records('put', 'success', records)
+        # the batch is sent exactly like the records
+        assert bodies[0] == bodies[1]
+
+        with HTTMock(datahub_pb_api_mock):
+            assert dh2.put_records('put', 'success', batch).failed_record_count == 0
+
+    def test_get_batch(self):
+        cursor = '20000000000000000000000000fb0021'
+        with HTTMock(datahub_api_mock):
+            result = dh.get_record_batch('get', 'tuple', '0', record_schema, cursor, 10)
+            records = dh.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10).records
+        assert isinstance(result.records, RecordBatch)
+        assert result.record_count == len(result.records) == len(records)
+        for record, view in zip(records, result.records):
+            assert view.values == record.values
+            assert view.attributes == record.attributes
+            assert view.get_offset() == record.get_offset()
+
+        with HTTMock(datahub_pb_api_mock):
+            result = dh2.get_record_batch('get', 'tuple', '0', record_schema, cursor, 10)
+            records = dh2.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10).records
+        assert result.next_cursor == '200000000000000000000000018c0030'
+        assert len(result.records) == 3
+        assert result.records[0].values == (99, 'yc1', 10.01, True, 1455869335000000)
+        assert [view.values for view in result.records] == [record.values for record in records]
+        assert [view.get_offset() for view in result.records] == [record.get_offset() for record in records]
+
+        for client, mock in ((dh, datahub_api_mock), (dh2, datahub_pb_api_mock)):
+            with HTTMock(mock):
+                result = client.get_record_batch('get', 'blob', '0', None, cursor, 10)
+                records = client.get_blob_records('get', 'blob', '0', cursor, 10).records
+            assert result.records.record_type == RecordType.BLOB
+            assert [view.blob_data for view in result.records] == [record.blob_data for record in records]
+            assert result.records[0].values == records[0].encode_values()
+
+        for client in (dh, dh2):
+            try:
+                client.get_record_batch('get', 'tuple', '0', cursor, 10, record_schema)
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('get record batch with cursor as schema success!')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestRecordBatch()
+    test.test_build_batch()
+    test.test_modify_view()
+    test.test_blob_batch()
+    test.test_put_batch()
+    test.test_get_batch()
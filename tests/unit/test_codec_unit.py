@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+
+from httmock import HTTMock, urlmatch, response
+
+from datahub import DataHub
+from datahub.exceptions import DatahubException
+from datahub.models import RecordSchema, FieldType, BlobRecord, TupleRecord, CompressFormat
+from datahub.models.compress import get_compressor
+from datahub.proto import wire
+from datahub.proto.codec import PBCodecType, get_codec
+from datahub.utils import unwrap_pb_frame
+
+_TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+_FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP],
+    [False, True, True, True, True])
+
+
+def available_codecs():
+    codecs = []
+    for codec_type in PBCodecType:
+        try:
+            codecs.append(get_codec(codec_type))
+        except DatahubException:
+            pass
+    return codecs
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_pb_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    with open(os.path.join(_FIXTURE_PATH, '%s.bin' % path), 'rb') as f:
+        content = f.read()
+    headers = {
+        'Content-Type': 'application/x-protobuf',
+        'x-datahub-request-id': 0
+    }
+    return response(200, content, headers, request=request)
+
+
+def gen_records():
+    records = []
+    for i in range(3):
+        record = TupleRecord(schema=record_schema, values=[i, 'yc%d' % i * 100, None, i % 2 == 0, -i])
+        record.shard_id = '0'
+        record.partition_key = 'partition'
+        record.put_attribute('key', 'value%d' % i)
+        records.append(record)
+    blob_record = BlobRecord(blob_data=b'blob data')
+    blob_record.hash_key = 'hash'
+    records.append(blob_record)
+    return records
+
+
+class TestCodec:
+
+    def test_encode_put_records_request(self):
+        records = gen_records()
+        expected = get_codec(PBCodecType.CPROTOBUF).encode_put_records_request(records)
+        for codec in available_codecs():
+            assert codec.encode_put_records_request(records) == expected, codec.codec_type()
+
+    def test_encode_put_records_frame(self):
+        records = gen_records()
+        pb_str = get_codec(PBCodecType.CPROTOBUF).encode_put_records_request(records)
+        for codec in available_codecs():
+            frame = codec.encode_put_records_frame(records)
+            assert isinstance(frame, bytearray)
+            assert frame[:4] == b'DHUB'
+            crc, compute_crc, frame_pb_str = unwrap_pb_frame(frame)
+            assert crc == compute_crc
+            assert frame_pb_str == pb_str, codec.codec_type()
+
+    def test_decode_get_records_response(self):
+        with open(os.path.join(_FIXTURE_PATH, 'projects.get.topics.tuple.shards.0.bin'), 'rb') as f:
+            pb_str = unwrap_pb_frame(f.read())[2]
+        for codec in available_codecs():
+            result = codec.decode_get_records_response(pb_str)
+            assert result.next_cursor == '200000000000000000000000018c0030'
+            assert result.record_count == 3
+            assert result.start_sequence == 0
+            records = list(result)
+            assert len(records) == 3
+            assert records[2] == ([b'99', b'yc2', b'10.02', b'false', b'1455869335000011'], {}, 1527161792617)
+
+    def test_decode_from_buffer(self):
+        with open(os.path.join(_FIXTURE_PATH, 'projects.get.topics.tuple.shards.0.bin'), 'rb') as f:
+            frame = f.read()
+        for compress_format in (CompressFormat.LZ4, CompressFormat.ZLIB):
+            compressor = get_compressor(compress_format)
+            # response bodies are read into bytearray by the transport
+            content = bytearray(compressor.compress(frame))
+            data = compressor.decompress(memoryview(content), len(frame))
+            assert data == frame
+            crc, compute_crc, pb_str = unwrap_pb_frame(bytearray(data))
+            assert crc == compute_crc
+            assert isinstance(pb_str, memoryview)
+            for codec in available_codecs():
+                assert codec.decode_get_records_response(pb_str).record_count == 3
+
+    def test_decode_null_and_negative(self):
+        entries = [wire.encode_record_entry(record.encode_pb_values(), attributes=record.attributes)
+                   + b'\x38' + wire.encode_varint(-1) for record in gen_records()[:2]]
+        pb_str = wire.encode_len_field(wire.TAG_FIELD_1, b'cursor') + b'\x10\x02' + b'\x18' + \
+            wire.encode_varint(-5) + b''.join(wire.encode_len_field(b'\x22', entry) for entry in entries)
+        for codec in available_codecs():
+            result = codec.decode_get_records_response(pb_str)
+            assert result.start_sequence == -5
+            assert list(result)[1] == ([b'1', b'yc1' * 100, None, b'false', b'-1'], {'key': 'value1'}, -1)
+
+    def test_decode_entry(self):
+        entries = [wire.encode_record_entry(record.encode_pb_values(), attributes=record.attributes)
+                   + b'\x38' + wire.encode_varint(100 + index) for index, record in enumerate(gen_records()[:3])]
+        pb_str = wire.encode_len_field(wire.TAG_FIELD_1, b'cursor') + b'\x10\x03' + \
+            b''.join(wire.encode_len_field(b'\x22', entry) for entry in entries)
+        for codec in available_codecs():
+            result = codec.decode_get_records_response(pb_str)
+            assert result.decode_entry(1) == list(result)[1]
+            assert result.decode_entry(2, values=False) == (None, {'key': 'value2'}, 102)
+            assert result.decode_entry(0, attributes=False) == ([b'0', b'yc0' * 100, None, b'true', b'0'], None, 100)
+
+    def test_wire_request_and_response(self):
+        records = gen_records()
+        pb_str = get_codec(PBCodecType.CPROTOBUF).encode_put_records_request(records)
+        entries = wire.decode_put_records_request(pb_str)
+        assert entries[0] == ('0', '', 'partition', [b'0', b'yc0' * 100, None, b'true', b'0'], {'key': 'value0'})
+        assert entries[3] == ('', 'hash', '', [b'blob data'], {})
+
+        pb_str = wire.encode_get_records_response('cursor', 7, [
+            wire.encode_record_entry(values, attributes=attributes, sequence=7 + index, system_time=-index)
+            for index, (_, _, _, values, attributes) in enumerate(entries[:3])])
+        for codec in available_codecs():
+            result = codec.decode_get_records_response(pb_str)
+            assert (result.next_cursor, result.record_count, result.start_sequence) == ('cursor', 3, 7)
+            assert list(result)[2] == ([b'2', b'yc2' * 100, None, b'true', b'-2'], {'key': 'value2'}, -2)
+
+    def test_get_records_with_codec(self):
+        for codec_type in PBCodecType:
+            try:
+                dh = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=True, pb_codec=codec_type)
+            except DatahubException:
+                continue
+            with HTTMock(datahub_pb_api_mock):
+                result = dh.get_tuple_records('get', 'tuple', '0', record_schema, 'cursor', 10)
+            assert [record.values for record in result.records][2] == (99, 'yc2', 10.02, False, 1455869335000011)
+            assert [record.sequence for record in result.records] == [0, 1, 2]
+
+            with HTTMock(datahub_pb_api_mock):
+                result = dh.get_tuple_records('get', 'tuple', '0', record_schema, 'cursor', 10,
+                                              fields=['time_field', 'bigint_field'], lazy=True)
+            assert result.records[2].values == (1455869335000011, 99)
+            assert result.records[1].sequence == 1
+
+    def test_invalid_codec(self):
+        try:
+            DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=True, pb_codec='unknown')
+        except DatahubException:
+            pass
+        else:
+            raise Exception('create datahub success with unknown codec')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestCodec()
+    test.test_encode_put_records_request()
+    test.test_encode_put_records_frame()
+    test.test_decode_get_records_response()
+    test.test_decode_from_buffer()
+    test.test_decode_null_and_negative()
+    test.test_decode_entry()
+    test.test_wire_request_and_response()
+    test.test_get_records_with_codec()
+    test.test_invalid_codec()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import decimal
+import json
+import os
+
+import pytest
+from httmock import HTTMock, urlmatch, response
+
+np = pytest.importorskip('numpy')
+
+from datahub import DataHub
+from datahub.exceptions import DatahubException, InvalidParameterException
+from datahub.models import RecordSchema, FieldType, GetColumnsResult, TupleRecord
+from datahub.models.columnar import decode_columns, encode_rows
+from datahub.models.params import PutColumnsRequestParams, PutPBRecordsRequestParams
+from datahub.ratelimit import ShardRateLimiter
+from datahub.utils import pb_message_wrap
+
+_TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+_FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
+
+dh = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=False)
+dh2 = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=True)
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+field_names = [field.name for field in record_schema.field_list]
+
+cursor = '20000000000000000000000000fb0021'
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    with open(os.path.join(_FIXTURE_PATH, '%s.json' % path), 'rb') as f:
+        content = json.loads(f.read().decode('utf-8'))
+    headers = {
+        'Content-Type': 'application/json',
+        'x-datahub-request-id': 0
+    }
+    return response(200, content, headers, request=request)
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_pb_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    with open(os.path.join(_FIXTURE_PATH, '%s.bin' % path), 'rb') as f:
+        content = f.read()
+    headers = {
+        'Content-Type': 'application/x-protobuf',
+        'x-datahub-request-id': 0
+    }
+    return response(200, content, headers, request=request)
+
+
+class TestColumnar:
+
+    def test_get_tuple_columns_success(self):
+        with HTTMock(datahub_api_mock):
+            result = dh.get_tuple_columns('get', 'tuple', '0', record_schema, cursor, 10)
+        assert result.next_cursor == '20000000000000000000000000830010'
+        assert result.record_count == 1
+        assert list(result.columns.keys()) == field_names
+        assert result.columns['bigint_field'].dtype == np.int64
+        assert result.columns['bigint_field'].tolist() == [1]
+        assert result.columns['string_field'].tolist() == ['yc1']
+        assert result.columns['double_field'].tolist() == [10.01]
+        assert result.columns['bool_field'].tolist() == [True]
+        assert result.columns['time_field'].tolist() == [1455869335000000]
+        assert result.system_times.tolist() == [1526293795168]
+        assert not any(mask.any() for mask in result.null_masks.values())
+
+    def test_get_tuple_columns_pb_success(self):
+        with HTTMock(datahub_pb_api_mock):
+            result = dh2.get_tuple_columns('get', 'tuple', '0', record_schema, cursor, 10)
+        with HTTMock(datahub_pb_api_mock):
+            records = dh2.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10).records
+        assert result.next_cursor == '200000000000000000000000018c0030'
+        assert result.record_count == 3
+        assert result.start_seq == 0
+        for index, field in enumerate(record_schema.field_list):
+            assert result.columns[field.name].tolist() == [record.values[index] for record in records]
+        assert result.columns['bool_field'].tolist() == [True, True, False]
+        assert result.system_times.tolist() == [record.system_time for record in records]
+
+    def test_pb_null_values(self):
+        content = pb_message_wrap(_encode_response([
+            [b'1', b'a', b'1.5', b'true', b'10'],
+            [None, None, None, None, None]
+        ]))
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def null_mock(url, request):
+            return response(200, content, {'Content-Type': 'application/x-protobuf'}, request=request)
+
+        with HTTMock(null_mock):
+            result = dh2.get_tuple_columns('get', 'tuple', '0', record_schema, cursor, 10)
+        assert result.record_count == 2
+        for field in record_schema.field_list:
+            assert result.null_masks[field.name].tolist() == [False, True]
+        assert result.columns['string_field'].tolist() == ['a', None]
+        assert result.columns['bigint_field'].tolist() == [1, 0]
+
+    def test_decode_columns(self):
+        schema = RecordSchema.from_lists(['bigint_field', 'decimal_field', 'bool_field'],
+                                         [FieldType.BIGINT, FieldType.DECIMAL, FieldType.BOOLEAN])
+        columns, null_masks = decode_columns(schema.field_list, [['1', '1.20', 'True'], ['-2', None, 'false']])
+        assert columns['bigint_field'].tolist() == [1, -2]
+        assert columns['decimal_field'].tolist() == [decimal.Decimal('1.20'), None]
+        assert columns['bool_field'].tolist() == [True, False]
+        assert null_masks['decimal_field'].tolist() == [False, True]
+
+        columns, null_masks = decode_columns(schema.field_list, [])
+        assert columns['bigint_field'].dtype == np.int64
+        assert len(columns['decimal_field']) == 0
+
+        try:
+            decode_columns(schema.field_list, [['1', '2']])
+        except DatahubException:
+            pass
+        else:
+            raise Exception('decode success with values against schema')
+
+    def test_to_pandas_and_arrow(self):
+        columns, null_masks = decode_columns(record_schema.field_list, [['1', 'a', '1.5', 'true', '10'],
+                                                                         [None, None, None, None, None]])
+        result = GetColumnsResult('cursor', 2, 0, record_schema, columns, null_masks, np.array([1, 2]))
+
+        pytest.importorskip('pandas')
+        df = result.to_pandas()
+        assert list(df.columns) == field_names
+        assert df['bigint_field'].isna().tolist() == [False, True]
+        assert df['bigint_field'][0] == 1
+
+        pytest.importorskip('pyarrow')
+        table = result.to_arrow()
+        assert table.num_rows == 2
+        assert table.column('bigint_field').null_count == 1
+        assert table.column('string_field').to_pylist() == ['a', None]
+
+    def test_put_columns_pb(self):
+        bodies = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def put_mock(url, request):
+            bodies.append(request.body)
+            return datahub_pb_api_mock(url, request)
+
+        columns = {
+            'bigint_field': np.array([1, 2], dtype=np.int32),
+            'string_field': ['yc1', 'yc2'],
+            'double_field': np.array([10.01, 0.1 + 0.2]),
+            'bool_field': np.array([True, False]),
+            'time_field': np.array([1455869335000000, 1455869335000001])
+        }
+        with HTTMock(put_mock):
+            result = dh2.put_columns('put', 'success', columns, record_schema, shard_id='0')
+        assert result.failed_record_count == 0
+
+        records = []
+        for values in zip(*[columns[name] for name in field_names]):
+            record = TupleRecord(schema=record_schema, values=[value.item() if hasattr(value, 'item') else value
+                                                               for value in values])
+            record.shard_id = '0'
+            records.append(record)
+        assert bodies == [PutPBRecordsRequestParams(records).content()]
+
+    def test_put_columns_split(self):
+        bodies = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def put_mock(url, request):
+            bodies.append(json.loads(request.body))
+            if len(bodies) == 2:
+                content = {'FailedRecordCount': 1, 'FailedRecords': [
+                    {'Index': 1, 'ErrorCode': 'LimitExceeded', 'ErrorMessage': 'limit exceeded'}]}
+            else:
+                content = {'FailedRecordCount': 0, 'FailedRecords': []}
+            return response(200, content, {'Content-Type': 'application/json'}, request=request)
+
+        schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING],
+                                         [False, True])
+        columns = {'bigint_field': np.arange(5), 'string_field': ['a', None, 'c', 'd', 'e']}
+        max_records = PutColumnsRequestParams.max_records
+        PutColumnsRequestParams.max_records = 2
+        try:
+            with HTTMock(put_mock):
+                result = dh.put_columns('put', 'success', columns, schema)
+        finally:
+            PutColumnsRequestParams.max_records = max_records
+
+        assert [len(body['Records']) for body in bodies] == [2, 2, 1]
+        assert bodies[0]['Records'][1] == {'Data': ['1', None]}
+        assert result.failed_record_count == 1
+        assert result.failed_records[0].index == 3
+
+    def test_put_columns_throttled(self):
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def throttled_mock(url, request):
+            content = {'FailedRecordCount': 1, 'FailedRecords': [
+                {'Index': 1, 'ErrorCode': 'LimitExceeded', 'ErrorMessage': 'limit exceeded'}]}
+            return response(200, content, {'Content-Type': 'application/json'}, request=request)
+
+        limiter = ShardRateLimiter(100)
+        limited_dh = DataHub('access_id', 'access_key', 'http://endpoint', rate_limiter=limiter)
+        schema = RecordSchema.from_lists(['bigint_field'], [FieldType.BIGINT])
+        with HTTMock(throttled_mock):
+            result = limited_dh.put_columns('put', 'success', {'bigint_field': np.arange(2)}, schema, shard_id='0')
+
+        assert result.failed_record_count == 1
+        assert limiter.rate('put', 'success', '0') == 50
+        assert limiter.rate('put', 'success', '1') == 100
+
+    def test_encode_rows(self):
+        pd = pytest.importorskip('pandas')
+        df = pd.DataFrame({
+            'bigint_field': pd.array([1, None], dtype='Int64'),
+            'string_field': ['yc1', None],
+            'double_field': [10.01, None],
+            'bool_field': [True, False],
+            'time_field': pd.to_datetime([1455869335000000, 1455869335000011], unit='us'),
+            'unused': [0, 0]
+        })
+        rows = encode_rows(record_schema.field_list, df)
+        assert rows == [(b'1', b'yc1', b'10.01', b'true', b'1455869335000000'),
+                        (None, None, None, b'false', b'1455869335000011')]
+
+        pa = pytest.importorskip('pyarrow')
+        assert encode_rows(record_schema.field_list, pa.Table.from_pandas(df)) == rows
+
+    def test_encode_rows_invalid(self):
+        schema = RecordSchema.from_lists(['bigint_field'], [FieldType.BIGINT], [False])
+        invalid_columns = [
+            {},
+            {'bigint_field': np.array([1.5])},
+            {'bigint_field': np.array(['a'])},
+            {'bigint_field': np.ma.masked_array([1, 2], mask=[False, True])}
+        ]
+        for columns in invalid_columns:
+            try:
+                encode_rows(schema.field_list, columns)
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('encode success with invalid columns %s' % columns)
+
+
+def _encode_response(rows):
+    # hand made GetRecordsResponse records, fields without value are left out to express null
+    def _field(number, payload):
+        return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+    def _varint(value):
+        buf = b''
+        while value > 0x7f:
+            buf += bytes(bytearray([value & 0x7f | 0x80]))
+            value >>= 7
+        return buf + bytes(bytearray([value]))
+
+    buf = _field(1, b'cursor') + _varint(2 << 3) + _varint(len(rows))
+    for row in rows:
+        data = b''.join(_field(1, b'' if value is None else _field(1, value)) for value in row)
+        buf += _field(4, _varint(7 << 3) + _varint(1) + _field(9, data))
+    return buf
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestColumnar()
+    test.test_get_tuple_columns_success()
+    test.test_get_tuple_columns_pb_success()
+    test.test_pb_null_values()
+    test.test_decode_columns()
+    test.test_to_pandas_and_arrow()
+    test.test_put_columns_pb()
+    test.test_put_columns_split()
+    test.test_put_columns_throttled()
+    test.test_encode_rows()
+    test.test_encode_rows_invalid()
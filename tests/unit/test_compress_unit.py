@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import threading
+import zlib
+
+import pytest
+from httmock import HTTMock, urlmatch, response
+from six.moves import BaseHTTPServer, socketserver
+
+from datahub import DataHub
+from datahub.exceptions import DatahubException, InvalidParameterException
+from datahub.models import BlobRecord, CompressFormat, AdaptiveCompression
+from datahub.models.compress import Compressor, ZstdCompressor, get_compressor, register_compressor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+headers = {
+    'Content-Type': 'application/json',
+    'x-datahub-request-id': 0
+}
+
+_PROJECTS = json.dumps({'ProjectNames': ['project']}).encode('utf-8')
+
+
+def available_compressors():
+    compressors = []
+    for compress_format in CompressFormat:
+        try:
+            compressor = get_compressor(compress_format)
+        except DatahubException:
+            continue
+        if compressor is not None:
+            compressors.append(compressor)
+    return compressors
+
+
+class ReverseCompressor(Compressor):
+
+    def compress(self, data):
+        return bytes(data)[::-1]
+
+    def decompress(self, data, raw_size=-1):
+        return bytes(data)[::-1]
+
+    def compress_format(self):
+        return 'reverse'
+
+
+class DeflateHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers the project list deflated, without content length on path /stream
+    """
+
+    def do_GET(self):
+        body = zlib.compress(_PROJECTS)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'deflate')
+        self.send_header('x-datahub-content-raw-size', str(len(_PROJECTS)))
+        self.send_header('x-datahub-request-id', '0')
+        if not self.path.endswith('/stream'):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DeflateServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class TestCompress:
+
+    def test_round_trip(self):
+        data = b''.join(b'%d,value_%d\n' % (i, i % 100) for i in range(10000))
+        compressors = available_compressors()
+        assert CompressFormat.LZ4 in [c.compress_format() for c in compressors]
+        for compressor in compressors:
+            compressed = compressor.compress(memoryview(bytearray(data)))
+            assert len(compressed) < len(data), compressor.format_name()
+            assert compressor.decompress(memoryview(bytearray(compressed)), len(data)) == data
+            assert get_compressor(compressor.format_name()) is compressor
+
+    def test_deflate(self):
+        data = b'deflate' * 100
+        compressor = get_compressor(CompressFormat.DEFLATE)
+        assert compressor.decompress(zlib.compress(data), len(data)) == data
+        raw_deflate = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        assert compressor.decompress(raw_deflate.compress(data) + raw_deflate.flush()) == data
+
+    @pytest.mark.skipif(zstandard is None, reason='zstandard is required by zstd compression')
+    def test_zstd_dictionary(self):
+        samples = [json.dumps({'id': i, 'name': 'name_%d' % i, 'tags': ['a', 'b']}).encode('utf-8')
+                   for i in range(2000)]
+        dict_data = ZstdCompressor.train_dictionary(samples, 1024)
+        compressor = ZstdCompressor(level=9, dict_data=dict_data)
+        assert compressor.level == 9
+        sample = samples[7]
+        compressed = compressor.compress(sample)
+        assert len(compressed) < len(ZstdCompressor().compress(sample))
+        assert compressor.decompress(compressed, len(sample)) == sample
+
+    def test_register_compressor(self):
+        register_compressor(ReverseCompressor())
+        assert get_compressor('reverse').decompress(b'cba') == b'abc'
+        try:
+            get_compressor('unknown')
+        except DatahubException:
+            pass
+        else:
+            raise Exception('get compressor success with unknown format')
+        try:
+            register_compressor('reverse')
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('register compressor success with invalid compressor')
+
+    def test_adaptive_select(self):
+        adaptive = AdaptiveCompression(formats=[CompressFormat.LZ4, CompressFormat.ZLIB], min_size=1024)
+        assert adaptive.accept_encoding == 'lz4'
+        assert adaptive.select(b'x' * 1000) is None
+        assert adaptive.select(os.urandom(64 * 1024)) is None
+        # the body is compressible out of the first sample slice
+        data = bytearray(os.urandom(1024) + b'x' * 64 * 1024)
+        assert adaptive.select(data) is not None
+        assert adaptive.select(b'x' * 64 * 1024).compress_format() in (CompressFormat.LZ4, CompressFormat.ZLIB)
+
+        try:
+            AdaptiveCompression(max_ratio=0)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create adaptive compression success with zero max ratio')
+
+    def test_put_records_adaptive(self):
+        sent = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def put_mock(url, request):
+            sent.append(request.headers)
+            return response(200, {'FailedRecordCount': 0, 'FailedRecords': []}, headers, request=request)
+
+        # base64 of random blobs in json is compressed to 3/4 at best
+        dh = DataHub('access_id', 'access_key', 'http://endpoint',
+                     compress_format=AdaptiveCompression(max_ratio=0.7))
+        with HTTMock(put_mock):
+            dh.put_records('project', 'topic', [BlobRecord(blob_data=os.urandom(16 * 1024))])
+            dh.put_records('project', 'topic', [BlobRecord(blob_data=b'x' * 16 * 1024)])
+
+        assert 'Content-Encoding' not in sent[0]
+        assert sent[1]['Content-Encoding'] in ('zstd', 'lz4')
+        assert int(sent[1]['x-datahub-content-raw-size']) > 16 * 1024
+        assert sent[0]['Accept-Encoding'] == sent[1]['Accept-Encoding']
+
+    def test_deflate_response(self):
+        server = DeflateServer(('127.0.0.1', 0), DeflateHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            endpoint = 'http://127.0.0.1:%d' % server.server_address[1]
+            dh = DataHub('access_id', 'access_key', endpoint)
+            assert dh.list_project().project_names == ['project']
+            dh = DataHub('access_id', 'access_key', endpoint + '/stream')
+            assert dh.list_project().project_names == ['project']
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestCompress()
+    test.test_round_trip()
+    test.test_deflate()
+    test.test_zstd_dictionary()
+    test.test_register_compressor()
+    test.test_adaptive_select()
+    test.test_put_records_adaptive()
+    test.test_deflate_response()
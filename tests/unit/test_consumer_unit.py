@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import threading
+
+from datahub import DataHubConsumer
+from datahub.exceptions import DatahubException, InvalidParameterException, NoPermissionException
+from datahub.models import RecordSchema, FieldType, RecordBatch, CursorType, ShardState, Shard, \
+    OffsetWithSession, GetTopicResult, ListShardResult, GetCursorResult, GetRecordsResult, \
+    InitAndGetSubscriptionOffsetResult
+
+record_schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING])
+
+
+class FakeDataHub(object):
+    """
+    In memory shards answering the api used by consumer
+    """
+
+    def __init__(self, shards, offsets=None, error=None):
+        self.shards = shards
+        self.offsets = offsets or {}
+        self.error = error
+        self.cursor_calls = []
+        self.commits = []
+        self.lock = threading.Lock()
+
+    def get_topic(self, project_name, topic_name):
+        return GetTopicResult(project_name=project_name, topic_name=topic_name, record_type='TUPLE',
+                              record_schema=record_schema)
+
+    def list_shard(self, project_name, topic_name):
+        return ListShardResult([Shard(shard_id, '', '', state, 0, [], '', '')
+                                for shard_id, (state, _) in sorted(self.shards.items())])
+
+    def init_and_get_subscription_offset(self, project_name, topic_name, sub_id, shard_ids):
+        return InitAndGetSubscriptionOffsetResult(dict(
+            (shard_id, self.offsets.get(shard_id, OffsetWithSession(-1, -1, 1, 100))) for shard_id in shard_ids))
+
+    def get_cursor(self, project_name, topic_name, shard_id, cursor_type, param=-1):
+        with self.lock:
+            self.cursor_calls.append((shard_id, cursor_type, param))
+        return GetCursorResult(param if cursor_type == CursorType.SEQUENCE else 0, 0, 0)
+
+    def get_record_batch(self, project_name, topic_name, shard_id, schema, cursor, limit_num):
+        if self.error is not None:
+            raise self.error
+        values = self.shards[shard_id][1]
+        batch = RecordBatch(schema)
+        for sequence in range(cursor, min(cursor + limit_num, len(values))):
+            batch.append_values([values[sequence], 'v%d' % values[sequence]], sequence=sequence,
+                                system_time=1000 + sequence)
+        return GetRecordsResult(cursor + len(batch), len(batch), cursor, batch)
+
+    def update_subscription_offset(self, project_name, topic_name, sub_id, offsets):
+        with self.lock:
+            self.commits.append(offsets)
+
+
+class TestConsumer:
+
+    def test_consume_all_shards(self):
+        fake = FakeDataHub({
+            '0': (ShardState.CLOSED, list(range(5))),
+            '1': (ShardState.CLOSED, list(range(100, 103))),
+            '2': (ShardState.OPENING, [200])
+        })
+        consumer = DataHubConsumer(fake, 'project', 'topic', 'sub_id', fetch_limit=2)
+        records = []
+        while len(records) < 8:
+            record = consumer.read(timeout=5)
+            assert record is not None
+            records.append(record)
+        assert consumer.read(timeout=0.1) is None
+        consumer.close()
+
+        assert sorted(consumer.shard_ids) == ['0', '1']
+        assert [r.get_value(0) for r in records if r.shard_id == '0'] == list(range(5))
+        assert [r.get_value(0) for r in records if r.shard_id == '1'] == list(range(100, 103))
+
+        committed = {}
+        for offsets in fake.commits:
+            committed.update(offsets)
+        assert committed['0'].sequence == 4
+        assert committed['0'].timestamp == 1004
+        assert committed['0'].session_id == 100
+        assert committed['1'].sequence == 2
+
+    def test_resume_from_offset(self):
+        fake = FakeDataHub({'0': (ShardState.CLOSED, list(range(5)))},
+                           offsets={'0': OffsetWithSession(2, 1002, 1, 100)})
+        with DataHubConsumer(fake, 'project', 'topic', 'sub_id') as consumer:
+            assert consumer.read(timeout=5).get_value(0) == 3
+            assert consumer.read(timeout=5).get_value(0) == 4
+        assert fake.cursor_calls == [('0', CursorType.SEQUENCE, 3)]
+        assert fake.commits[-1]['0'].sequence == 4
+
+    def test_only_commit_read_records(self):
+        fake = FakeDataHub({'0': (ShardState.CLOSED, list(range(5)))})
+        consumer = DataHubConsumer(fake, 'project', 'topic', 'sub_id', commit_interval_ms=60000)
+        consumer.read(timeout=5)
+        consumer.commit()
+        consumer.commit()
+        consumer.close()
+        assert len(fake.commits) == 1
+        assert fake.commits[0]['0'].sequence == 0
+
+    def test_fetch_error(self):
+        fake = FakeDataHub({'0': (ShardState.ACTIVE, [])}, error=NoPermissionException('no permission'))
+        consumer = DataHubConsumer(fake, 'project', 'topic', 'sub_id')
+        try:
+            consumer.read(timeout=5)
+        except NoPermissionException:
+            pass
+        else:
+            raise Exception('read success when fetching failed')
+        consumer.close()
+
+    def test_read_after_close(self):
+        consumer = DataHubConsumer(FakeDataHub({'0': (ShardState.CLOSED, [])}), 'project', 'topic', 'sub_id')
+        consumer.close()
+        try:
+            consumer.read()
+        except DatahubException:
+            pass
+        else:
+            raise Exception('read success after consumer closed')
+
+    def test_invalid_param(self):
+        try:
+            DataHubConsumer(FakeDataHub({}), 'project', 'topic', '')
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create consumer success with empty sub id')
+
+        try:
+            DataHubConsumer(FakeDataHub({'2': (ShardState.OPENING, [])}), 'project', 'topic', 'sub_id')
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create consumer success without readable shard')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestConsumer()
+    test.test_consume_all_shards()
+    test.test_resume_from_offset()
+    test.test_only_commit_read_records()
+    test.test_fetch_error()
+    test.test_read_after_close()
+    test.test_invalid_param()
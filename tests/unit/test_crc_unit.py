@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from datahub.exceptions import DatahubException
+from datahub.utils import CrcBackend, default_crc_backend, get_crc32c, pb_message_wrap, unwrap_pb_frame
+
+
+def available_backends():
+    backends = []
+    for backend in CrcBackend:
+        try:
+            get_crc32c(backend)
+            backends.append(backend)
+        except DatahubException:
+            pass
+    return backends
+
+
+class TestCrc:
+
+    def test_check_value(self):
+        backends = available_backends()
+        assert CrcBackend.CRCMOD in backends
+        assert default_crc_backend() == backends[0]
+        data = bytearray(b'x' * 3 + b'123456789')
+        for backend in backends:
+            crc32c = get_crc32c(backend)
+            assert crc32c(b'123456789') == 0xe3069283, backend
+            assert crc32c(memoryview(data)[3:]) == 0xe3069283, backend
+            assert crc32c(b'') == 0, backend
+            assert get_crc32c(backend) is crc32c
+
+    def test_frame_crc(self):
+        frame = pb_message_wrap(b'message')
+        assert bytes(frame) == b'DHUB\x98\xa2\x14\xd0\x00\x00\x00\x07message'
+        crc, compute_crc, pb_str = unwrap_pb_frame(bytes(frame))
+        assert crc == compute_crc
+        assert pb_str == b'message'
+
+    def test_unknown_backend(self):
+        try:
+            get_crc32c('unknown')
+        except DatahubException:
+            pass
+        else:
+            raise Exception('get crc32c success with unknown backend')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestCrc()
+    test.test_check_value()
+    test.test_frame_crc()
+    test.test_unknown_backend()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import socket
+
+from datahub import DataHub
+from datahub.exceptions import LimitExceededException
+from datahub.metrics import ClientMetrics, Histogram, PrometheusExporter, StatsdExporter, api_name
+from datahub.models import RecordSchema, FieldType, TupleRecord, CursorType, CompressFormat
+from datahub.rest import HTTPMethod
+from datahub.retry import RetryPolicy
+from datahub.testing import MockDataHubServer
+
+record_schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING])
+
+SHARD_API = 'POST /projects/{project}/topics/{topic}/shards/{shard} %s'
+SHARDS_API = 'POST /projects/{project}/topics/{topic}/shards'
+
+
+def gen_records(count, shard_id='0'):
+    records = []
+    for i in range(count):
+        record = TupleRecord(schema=record_schema, values=[i, 'value_%d' % i * 10])
+        record.shard_id = shard_id
+        records.append(record)
+    return records
+
+
+class TestMetrics:
+
+    def test_api_name(self):
+        assert api_name(HTTPMethod.GET, '/projects') == 'GET /projects'
+        assert api_name(HTTPMethod.GET, '/projects/p1/topics/t1') == 'GET /projects/{project}/topics/{topic}'
+        assert api_name(HTTPMethod.POST, '/projects/p1/topics/t1/shards/0', data='{"Action": "sub", "Cursor": ""}') \
+            == SHARD_API % 'sub'
+        assert api_name(HTTPMethod.POST, '/projects/p1/topics/t1/shards',
+                        headers={'x-datahub-request-action': 'pub'}, data=b'\x00\x01') == SHARDS_API + ' pub'
+        assert api_name(HTTPMethod.GET, '/projects/p1/topics/t1/connectors/sink_odps?donetime') == \
+            'GET /projects/{project}/topics/{topic}/connectors/{connector}?donetime'
+
+    def test_histogram(self):
+        histogram = Histogram()
+        assert histogram.quantile(0.5) == 0
+        for i in range(1, 1001):
+            histogram.observe(i / 1000.0)
+        assert histogram.count == 1000
+        assert abs(histogram.sum - 500.5) < 1e-6
+        assert histogram.max == 1.0
+        assert abs(histogram.quantile(0.5) - 0.5) / 0.5 < 0.1
+        assert abs(histogram.quantile(0.99) - 0.99) / 0.99 < 0.1
+        assert histogram.quantile(1) == 1.0
+
+        histogram.observe(1000)
+        assert histogram.counts[-1] == 1
+        assert histogram.quantile(1) == 1000
+
+        copied = histogram.copy()
+        copied.observe(0.5)
+        assert copied.count == histogram.count + 1
+
+    def test_request_metrics(self):
+        metrics = ClientMetrics()
+        with MockDataHubServer() as server:
+            for enable_pb in (False, True):
+                dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=enable_pb,
+                             compress_format=CompressFormat.DEFLATE, metrics=metrics)
+                project_name = 'project_%d' % enable_pb
+                dh.create_project(project_name, 'comment')
+                dh.create_tuple_topic(project_name, 'tuple_topic', 1, 7, record_schema, 'tuple')
+                dh.put_records(project_name, 'tuple_topic', gen_records(100))
+                cursor = dh.get_cursor(project_name, 'tuple_topic', '0', CursorType.OLDEST).cursor
+                dh.get_tuple_records(project_name, 'tuple_topic', '0', record_schema, cursor, 30)
+
+        snapshot = metrics.snapshot()
+        apis = snapshot['apis']
+        assert apis['POST /projects/{project}']['requests'] == 2
+        assert apis[SHARDS_API + ' pub']['requests'] == 2
+        assert apis[SHARD_API % 'cursor']['requests'] == 2
+
+        put = apis[SHARDS_API + ' pub']
+        assert put['errors'] == 0
+        assert put['latency']['count'] == 2
+        assert 0 < put['latency']['p50'] <= put['latency']['p99'] <= put['latency']['max']
+        # json puts are compressed, protobuf puts are not
+        assert put['bytes_sent'] < put['bytes_sent_raw']
+        assert put['compression_ratio_sent'] > 1
+
+        get = apis[SHARD_API % 'sub']
+        assert get['requests'] == 2
+        assert get['bytes_received'] > 0
+        assert get['bytes_received_raw'] >= get['bytes_received']
+
+        topics = snapshot['topics']
+        assert topics['project_0/tuple_topic'] == {'records_put': 100, 'records_failed': 0, 'records_read': 30}
+        assert topics['project_1/tuple_topic'] == {'records_put': 100, 'records_failed': 0, 'records_read': 30}
+
+        metrics.reset()
+        assert metrics.snapshot() == {'apis': {}, 'topics': {}}
+
+    def test_error_metrics(self):
+        metrics = ClientMetrics()
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, metrics=metrics,
+                         retry_policy=RetryPolicy(max_retries=3, base_delay=0.001, throttle_base_delay=0.001,
+                                                  budget=None))
+            server.service.inject_error('LimitExceeded', 429, count=2, api='list_project')
+            dh.list_project()
+            server.service.inject_error('NoSuchProject', 404, count=1, api='get_project')
+            try:
+                dh.get_project('unexisted')
+            except Exception:
+                pass
+            else:
+                raise Exception('get unexisted project success!')
+
+        apis = metrics.snapshot()['apis']
+        assert apis['GET /projects']['requests'] == 3
+        assert apis['GET /projects']['errors'] == 2
+        assert apis['GET /projects']['throttled'] == 2
+        assert apis['GET /projects']['retries'] == 2
+        assert apis['GET /projects/{project}']['errors'] == 1
+        assert apis['GET /projects/{project}']['throttled'] == 0
+        assert apis['GET /projects/{project}']['retries'] == 0
+
+        dh = DataHub('access_id', 'access_key', 'http://127.0.0.1:1', metrics=metrics, retry_times=0)
+        try:
+            dh.list_project()
+        except LimitExceededException:
+            raise Exception('connection error is throttled!')
+        except Exception:
+            pass
+        else:
+            raise Exception('list project without server success!')
+        apis = metrics.snapshot()['apis']
+        assert apis['GET /projects']['requests'] == 4
+        assert apis['GET /projects']['errors'] == 3
+
+    def test_prometheus_exporter(self):
+        metrics = ClientMetrics()
+        metrics.on_request('GET /projects', 0.01, 200, sent=0, received=100, received_raw=100)
+        metrics.on_request('GET /projects', 0.02, 429, 'LimitExceeded')
+        metrics.on_records('project', 'topic', put=10, failed=1)
+
+        text = PrometheusExporter(metrics).render()
+        lines = text.splitlines()
+        assert '# TYPE datahub_requests_total counter' in lines
+        assert 'datahub_requests_total{api="GET /projects"} 2' in lines
+        assert 'datahub_requests_throttled_total{api="GET /projects"} 1' in lines
+        assert 'datahub_received_bytes_total{api="GET /projects"} 100' in lines
+        assert '# TYPE datahub_request_latency_seconds histogram' in lines
+        assert 'datahub_request_latency_seconds_bucket{api="GET /projects",le="+Inf"} 2' in lines
+        assert 'datahub_request_latency_seconds_count{api="GET /projects"} 2' in lines
+        assert 'datahub_records_put_total{project="project",topic="topic"} 10' in lines
+        assert 'datahub_records_failed_total{project="project",topic="topic"} 1' in lines
+
+    def test_statsd_exporter(self):
+        agent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        agent.bind(('127.0.0.1', 0))
+        agent.settimeout(5)
+        exporter = StatsdExporter('127.0.0.1', agent.getsockname()[1])
+        metrics = ClientMetrics(exporters=[exporter])
+        try:
+            metrics.on_request(SHARD_API % 'sub', 0.0125, 200, sent=10, sent_raw=20, received=30, received_raw=40)
+            lines = agent.recv(65536).decode('utf-8').splitlines()
+            assert 'datahub.post.projects.topics.shards.sub.requests:1|c' in lines
+            assert 'datahub.post.projects.topics.shards.sub.latency:12.500|ms' in lines
+            assert 'datahub.post.projects.topics.shards.sub.bytes_sent_raw:20|c' in lines
+
+            metrics.on_records('project', 'topic', read=5)
+            assert agent.recv(65536).decode('utf-8') == 'datahub.records.project.topic.read:5|c'
+        finally:
+            exporter.close()
+            agent.close()
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestMetrics()
+    test.test_api_name()
+    test.test_histogram()
+    test.test_request_metrics()
+    test.test_error_metrics()
+    test.test_prometheus_exporter()
+    test.test_statsd_exporter()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import time
+
+from datahub import DataHub
+from datahub.exceptions import ResourceExistException, ResourceNotFoundException, InvalidParameterException, \
+    InvalidOperationException, LimitExceededException, InternalServerException
+from datahub.models import RecordSchema, FieldType, BlobRecord, TupleRecord, CursorType, ShardState, \
+    CompressFormat
+from datahub.retry import RetryPolicy
+from datahub.testing import MockDataHubServer
+
+record_schema = RecordSchema.from_lists(
+    ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+    [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+
+def gen_records(count, shard_id='0'):
+    records = []
+    for i in range(count):
+        record = TupleRecord(schema=record_schema, values=[i, 'yc%d' % i, 1.5 * i, i % 2 == 0, 1455869335000000 + i])
+        record.shard_id = shard_id
+        record.put_attribute('index', str(i))
+        records.append(record)
+    return records
+
+
+def create_topics(client, project_name='test_project'):
+    client.create_project(project_name, 'comment')
+    client.create_tuple_topic(project_name, 'tuple_topic', 3, 7, record_schema, 'tuple')
+    client.create_blob_topic(project_name, 'blob_topic', 1, 7, 'blob')
+
+
+class TestMockServer:
+
+    def test_project_and_topic(self):
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint)
+            create_topics(dh)
+            assert dh.list_project().project_names == ['test_project']
+            assert dh.get_project('test_project').comment == 'comment'
+            assert dh.list_topic('test_project').topic_names == ['blob_topic', 'tuple_topic']
+
+            topic = dh.get_topic('test_project', 'tuple_topic')
+            assert topic.shard_count == 3
+            assert [field.name for field in topic.record_schema.field_list] == \
+                [field.name for field in record_schema.field_list]
+            dh.append_field('test_project', 'tuple_topic', 'new_field', FieldType.STRING)
+            assert topic.record_schema.field_list[-1].name != 'new_field'
+            assert dh.get_topic('test_project', 'tuple_topic').record_schema.field_list[-1].name == 'new_field'
+
+            try:
+                dh.create_project('test_project', 'comment')
+            except ResourceExistException:
+                pass
+            else:
+                raise Exception('create existed project success!')
+            try:
+                dh.get_topic('test_project', 'unexisted')
+            except ResourceNotFoundException:
+                pass
+            else:
+                raise Exception('get unexisted topic success!')
+            try:
+                dh.delete_project('test_project')
+            except InvalidOperationException:
+                pass
+            else:
+                raise Exception('delete project with topics success!')
+
+            dh.delete_topic('test_project', 'tuple_topic')
+            dh.delete_topic('test_project', 'blob_topic')
+            dh.delete_project('test_project')
+            assert dh.list_project().project_names == []
+
+    def test_put_get_records(self):
+        with MockDataHubServer() as server:
+            for enable_pb in (False, True):
+                for compress_format in (CompressFormat.NONE, CompressFormat.DEFLATE):
+                    project_name = 'project_%d_%s' % (enable_pb, compress_format.value or 'none')
+                    dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=enable_pb,
+                                 compress_format=compress_format)
+                    create_topics(dh, project_name)
+
+                    records = gen_records(20, '1')
+                    records[3].set_value(1, None)
+                    assert dh.put_records(project_name, 'tuple_topic', records).failed_record_count == 0
+                    cursor = dh.get_cursor(project_name, 'tuple_topic', '1', CursorType.OLDEST).cursor
+                    result = dh.get_tuple_records(project_name, 'tuple_topic', '1', record_schema, cursor, 15)
+                    assert result.record_count == 15
+                    assert result.start_seq == 0
+                    assert [record.values for record in result.records] == [record.values for record in records[:15]]
+                    assert result.records[3].get_value(1) is None
+                    assert result.records[5].attributes == {'index': '5'}
+                    assert result.records[5].sequence == 5
+
+                    result = dh.get_tuple_records(project_name, 'tuple_topic', '1', record_schema,
+                                                  result.next_cursor, 15)
+                    assert result.record_count == 5
+                    assert result.start_seq == 15
+                    result = dh.get_tuple_records(project_name, 'tuple_topic', '1', record_schema,
+                                                  result.next_cursor, 15)
+                    assert result.record_count == 0
+
+                    blob_record = BlobRecord(blob_data=b'\x00\x01blob\xff')
+                    blob_record.partition_key = 'key'
+                    dh.put_records(project_name, 'blob_topic', [blob_record])
+                    cursor = dh.get_cursor(project_name, 'blob_topic', '0', CursorType.LATEST).cursor
+                    result = dh.get_blob_records(project_name, 'blob_topic', '0', cursor, 10)
+                    assert result.records[0].blob_data == b'\x00\x01blob\xff'
+
+                    # records of shards not active are failed, records not well formed fail the request
+                    result = dh.put_records(project_name, 'tuple_topic', gen_records(2, '1') + gen_records(1, '10'))
+                    assert result.failed_record_count == 1
+                    assert result.failed_records[0].index == 2
+                    try:
+                        dh.put_records(project_name, 'blob_topic', gen_records(1))
+                    except InvalidParameterException:
+                        pass
+                    else:
+                        raise Exception('put tuple records to blob topic success!')
+                    dh.close()
+
+    def test_get_cursor(self):
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True)
+            create_topics(dh)
+            dh.put_records('test_project', 'tuple_topic', gen_records(5))
+            system_time = int(time.time() * 1000) + 1
+            time.sleep(0.01)
+            dh.put_records('test_project', 'tuple_topic', gen_records(5))
+
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.LATEST)
+            assert cursor.sequence == 9
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.SYSTEM_TIME, system_time)
+            assert cursor.sequence == 5
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.SEQUENCE, 7)
+            result = dh.get_tuple_records('test_project', 'tuple_topic', '0', record_schema, cursor.cursor, 10)
+            assert [record.sequence for record in result.records] == [7, 8, 9]
+
+            try:
+                dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.SEQUENCE, 11)
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('get cursor out of range success!')
+            try:
+                dh.get_tuple_records('test_project', 'tuple_topic', '0', record_schema, 'invalid', 10)
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('get records with invalid cursor success!')
+
+    def test_split_merge_shard(self):
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint)
+            create_topics(dh)
+            split_result = dh.split_shard('test_project', 'tuple_topic', '0')
+            assert [shard.shard_id for shard in split_result.new_shards] == ['3', '4']
+            merge_result = dh.merge_shard('test_project', 'tuple_topic', '1', '2')
+            assert merge_result.shard_id == '5'
+            assert merge_result.end_hash_key == 'F' * 32
+
+            shards = dh.list_shard('test_project', 'tuple_topic').shards
+            assert [(shard.shard_id, shard.state) for shard in shards] == \
+                [('0', ShardState.CLOSED), ('1', ShardState.CLOSED), ('2', ShardState.CLOSED),
+                 ('3', ShardState.ACTIVE), ('4', ShardState.ACTIVE), ('5', ShardState.ACTIVE)]
+            assert shards[3].parent_shard_ids == ['0']
+            assert dh.get_topic('test_project', 'tuple_topic').shard_count == 3
+
+            try:
+                dh.merge_shard('test_project', 'tuple_topic', '3', '5')
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('merge shards not adjacent success!')
+
+            # records routed by hash key go to active shards only
+            records = gen_records(3, '')
+            for record in records:
+                record.hash_key = 'F' * 32
+            assert dh.put_records('test_project', 'tuple_topic', records).failed_record_count == 0
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '5', CursorType.OLDEST).cursor
+            assert dh.get_tuple_records('test_project', 'tuple_topic', '5', record_schema, cursor, 10).record_count == 3
+
+    def test_subscription_offset(self):
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint)
+            create_topics(dh)
+            sub_id = dh.create_subscription('test_project', 'tuple_topic', 'sub comment').sub_id
+            assert dh.get_subscription('test_project', 'tuple_topic', sub_id).comment == 'sub comment'
+            dh.update_subscription('test_project', 'tuple_topic', sub_id, 'new comment')
+            result = dh.list_subscription('test_project', 'tuple_topic', '', 1, 10)
+            assert result.total_count == 1
+            assert result.subscriptions[0].comment == 'new comment'
+
+            offsets = dh.init_and_get_subscription_offset('test_project', 'tuple_topic', sub_id, ['0', '1']).offsets
+            assert offsets['0'].sequence == -1
+            offsets['0'].sequence, offsets['0'].timestamp = 10, 1000
+            dh.update_subscription_offset('test_project', 'tuple_topic', sub_id, {'0': offsets['0']})
+            offset = dh.get_subscription_offset('test_project', 'tuple_topic', sub_id, ['0']).offsets['0']
+            assert (offset.sequence, offset.timestamp) == (10, 1000)
+
+            # another consumer opens the offsets
+            dh.init_and_get_subscription_offset('test_project', 'tuple_topic', sub_id, ['0'])
+            try:
+                dh.update_subscription_offset('test_project', 'tuple_topic', sub_id, {'0': offsets['0']})
+            except InvalidOperationException:
+                pass
+            else:
+                raise Exception('commit offset of closed session success!')
+
+            dh.delete_subscription('test_project', 'tuple_topic', sub_id)
+            assert dh.list_subscription('test_project', 'tuple_topic', '', 1, 10).total_count == 0
+
+    def test_inject_error(self):
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True)
+            create_topics(dh)
+            server.service.inject_error(api='put_records', count=2)
+            for _ in range(2):
+                try:
+                    dh.put_records('test_project', 'tuple_topic', gen_records(1))
+                except InternalServerException:
+                    pass
+                else:
+                    raise Exception('put records success with error injected!')
+            dh.put_records('test_project', 'tuple_topic', gen_records(1))
+            assert server.service.request_count('put_records') == 3
+
+            # the retry policy rides out injected errors
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True,
+                         retry_policy=RetryPolicy(max_retries=3, base_delay=0.01, budget=None))
+            server.service.inject_error('LimitExceeded', 429, api='put_records', count=2)
+            dh.put_records('test_project', 'tuple_topic', gen_records(1))
+            assert server.service.request_count('put_records') == 6
+
+            server.service.record_error_rate = 1
+            result = dh.put_records('test_project', 'tuple_topic', gen_records(3))
+            assert result.failed_record_count == 3
+            assert result.failed_records[0].error_code == 'InternalServerError'
+
+    def test_throttle_and_latency(self):
+        with MockDataHubServer(throttle_qps=2) as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint)
+            create_topics(dh)
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.OLDEST).cursor
+            try:
+                for _ in range(5):
+                    dh.get_tuple_records('test_project', 'tuple_topic', '0', record_schema, cursor, 10)
+            except LimitExceededException:
+                pass
+            else:
+                raise Exception('get records beyond the throttle success!')
+            # shards are throttled separately
+            dh.get_tuple_records('test_project', 'tuple_topic', '1', record_schema, cursor, 10)
+
+            server.service.latency = 0.05
+            start = time.time()
+            dh.list_project()
+            assert time.time() - start >= 0.05
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestMockServer()
+    test.test_project_and_topic()
+    test.test_put_get_records()
+    test.test_get_cursor()
+    test.test_split_merge_shard()
+    test.test_subscription_offset()
+    test.test_inject_error()
+    test.test_throttle_and_latency()
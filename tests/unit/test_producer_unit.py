@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import threading
+
+from httmock import HTTMock, urlmatch, response
+
+from datahub import DataHub, DataHubProducer
+from datahub.exceptions import DatahubException, LimitExceededException, InvalidParameterException
+from datahub.models import RecordSchema, FieldType, TupleRecord, FailedRecord, PutRecordsResult
+
+_TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+_FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
+
+dh = DataHub('access_id', 'access_key', 'http://endpoint', enable_pb=False)
+
+record_schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING])
+
+
+@urlmatch(netloc=r'(.*\.)?endpoint')
+def datahub_api_mock(url, request):
+    path = url.path.replace('/', '.')[1:]
+    res_file = os.path.join(_FIXTURE_PATH, '%s.json' % path)
+    with open(res_file, 'rb') as f:
+        content = json.loads(f.read().decode('utf-8'))
+    headers = {
+        'Content-Type': 'application/json',
+        'x-datahub-request-id': 0
+    }
+    return response(500 if 'ErrorCode' in content else 200, content, headers, request=request)
+
+
+class FakeDataHub(object):
+    """
+    Records every put_records call and answers with the queued results
+    """
+
+    def __init__(self, results=None):
+        self.calls = []
+        self.results = list(results or [])
+        self.lock = threading.Lock()
+
+    def put_records(self, project_name, topic_name, record_list):
+        with self.lock:
+            self.calls.append(list(record_list))
+            result = self.results.pop(0) if self.results else PutRecordsResult(0, [])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def gen_record(value, shard_id='0'):
+    record = TupleRecord(schema=record_schema, values=[value, 'yc%d' % value])
+    record.shard_id = shard_id
+    return record
+
+
+class TestProducer:
+
+    def test_send_success(self):
+        with HTTMock(datahub_api_mock):
+            with DataHubProducer(dh, 'put', 'success', linger_ms=10) as producer:
+                futures = [producer.send(gen_record(i)) for i in range(10)]
+        for i, future in enumerate(futures):
+            assert future.result().get_value(0) == i
+
+    def test_batch_by_size_and_shard(self):
+        fake = FakeDataHub()
+        producer = DataHubProducer(fake, 'project', 'topic', batch_size=3, linger_ms=60000)
+        for i in range(6):
+            producer.send(gen_record(i, shard_id='0'))
+        producer.send(gen_record(6, shard_id='1'))
+        producer.close()
+
+        assert sorted(len(call) for call in fake.calls) == [1, 3, 3]
+        for call in fake.calls:
+            assert len(set(record.shard_id for record in call)) == 1
+        assert producer.buffered_records == 0
+
+    def test_resend_failed_records(self):
+        fake = FakeDataHub([
+            PutRecordsResult(2, [FailedRecord(1, 'LimitExceeded', 'limit exceeded'),
+                                 FailedRecord(2, 'MalformedRecord', 'malformed')])
+        ])
+        producer = DataHubProducer(fake, 'project', 'topic', linger_ms=10, retry_backoff_ms=1)
+        futures = [producer.send(gen_record(i)) for i in range(3)]
+        producer.close()
+
+        assert futures[0].result().get_value(0) == 0
+        assert futures[1].result().get_value(0) == 1
+        assert futures[2].exception().error_code == 'MalformedRecord'
+        assert len(fake.calls) == 2
+        assert [record.get_value(0) for record in fake.calls[1]] == [1]
+
+    def test_resend_limit_exceeded_request(self):
+        fake = FakeDataHub([LimitExceededException('limit exceeded', 429, error_code='LimitExceeded'),
+                            LimitExceededException('limit exceeded', 429, error_code='LimitExceeded')])
+        producer = DataHubProducer(fake, 'project', 'topic', linger_ms=10, retry_times=1, retry_backoff_ms=1)
+        future = producer.send(gen_record(0))
+        producer.close()
+
+        assert isinstance(future.exception(), LimitExceededException)
+        assert len(fake.calls) == 2
+
+    def test_callback(self):
+        fake = FakeDataHub()
+        done = []
+        with DataHubProducer(fake, 'project', 'topic', linger_ms=10) as producer:
+            producer.send(gen_record(0), callback=lambda f: done.append(f.result().get_value(0)))
+        assert done == [0]
+
+    def test_buffer_full(self):
+        fake = FakeDataHub()
+        producer = DataHubProducer(fake, 'project', 'topic', linger_ms=60000, max_buffered_records=1,
+                                   max_block_ms=10)
+        producer.send(gen_record(0))
+        try:
+            producer.send(gen_record(1))
+        except DatahubException as e:
+            assert 'buffer is full' in e.error_msg
+        else:
+            raise Exception('send success when producer buffer is full')
+        producer.close()
+        assert len(fake.calls) == 1
+
+    def test_send_after_close(self):
+        producer = DataHubProducer(FakeDataHub(), 'project', 'topic')
+        producer.close()
+        try:
+            producer.send(gen_record(0))
+        except DatahubException as e:
+            assert 'closed' in e.error_msg
+        else:
+            raise Exception('send success after producer closed')
+
+    def test_invalid_param(self):
+        try:
+            DataHubProducer(FakeDataHub(), '', 'topic')
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create producer success with empty project name')
+
+        try:
+            DataHubProducer(FakeDataHub(), 'project', 'topic', batch_size=0)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create producer success with zero batch size')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestProducer()
+    test.test_send_success()
+    test.test_batch_by_size_and_shard()
+    test.test_resend_failed_records()
+    test.test_resend_limit_exceeded_request()
+    test.test_callback()
+    test.test_buffer_full()
+    test.test_send_after_close()
+    test.test_invalid_param()
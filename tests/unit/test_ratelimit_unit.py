@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import time
+
+from httmock import HTTMock, urlmatch, response
+
+from datahub import DataHub
+from datahub.exceptions import InvalidParameterException, LimitExceededException
+from datahub.models import BlobRecord
+from datahub.ratelimit import AdaptiveTokenBucket, ShardRateLimiter
+from datahub.retry import RetryPolicy
+
+headers = {
+    'Content-Type': 'application/json',
+    'x-datahub-request-id': 0
+}
+
+
+class TestRateLimit:
+
+    def test_token_bucket(self):
+        bucket = AdaptiveTokenBucket(10, burst=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        delay = bucket.reserve()
+        assert 0.05 < delay <= 0.1
+        delay = bucket.reserve()
+        assert 0.15 < delay <= 0.2
+
+    def test_aimd(self):
+        bucket = AdaptiveTokenBucket(100, min_rate=10, increase=1000, cooldown=0.05)
+        bucket.on_throttled()
+        assert bucket.rate == 50
+        # throttling of requests in flight is counted once
+        bucket.on_throttled()
+        assert bucket.rate == 50
+        time.sleep(0.06)
+        bucket.on_throttled()
+        assert bucket.rate == 25
+        assert bucket.reserve() > 0
+
+        time.sleep(0.02)
+        bucket.on_success()
+        assert 25 < bucket.rate <= 100
+        time.sleep(0.1)
+        bucket.on_success()
+        assert bucket.rate == 100
+
+        for _ in range(10):
+            time.sleep(0.06)
+            bucket.on_throttled()
+        assert bucket.rate == 10
+
+    def test_invalid_param(self):
+        try:
+            AdaptiveTokenBucket(0)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create token bucket success with zero rate')
+
+        try:
+            ShardRateLimiter(10, decrease_factor=1)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create rate limiter success with invalid decrease factor')
+
+    def test_put_records_throttled(self):
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def partial_throttled_mock(url, request):
+            failed = [{'Index': 1, 'ErrorCode': 'LimitExceeded', 'ErrorMessage': 'limit exceeded'}]
+            return response(200, {'FailedRecordCount': 1, 'FailedRecords': failed}, headers, request=request)
+
+        limiter = ShardRateLimiter(100)
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', rate_limiter=limiter)
+        records = []
+        for shard_id in ('0', '1'):
+            record = BlobRecord(blob_data=b'data')
+            record.shard_id = shard_id
+            records.append(record)
+        with HTTMock(partial_throttled_mock):
+            put_result = dh.put_records('project', 'topic', records)
+
+        assert put_result.failed_record_count == 1
+        assert limiter.rate('project', 'topic', '0') == 100
+        assert limiter.rate('project', 'topic', '1') == 50
+
+    def test_get_records_throttled(self):
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def throttled_mock(url, request):
+            return response(500, {'ErrorCode': 'LimitExceeded', 'ErrorMessage': 'limit exceeded'}, headers,
+                            request=request)
+
+        limiter = ShardRateLimiter(10)
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', rate_limiter=limiter)
+        with HTTMock(throttled_mock):
+            try:
+                dh.get_blob_records('project', 'topic', '0', '20000000000000000000000000fa0000', 10)
+            except LimitExceededException:
+                pass
+            else:
+                raise Exception('get records success when throttled')
+        assert limiter.rate('project', 'topic', '0') == 5
+        assert limiter.rate('project', 'topic', '1') == 10
+
+    def test_retried_throttled(self):
+        error_codes = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def retried_mock(url, request):
+            if error_codes:
+                error_code = error_codes.pop(0)
+                return response(500, {'ErrorCode': error_code, 'ErrorMessage': 'error'}, headers, request=request)
+            return response(200, {'FailedRecordCount': 0, 'FailedRecords': []}, headers, request=request)
+
+        limiter = ShardRateLimiter(10, burst=2)
+        retry_policy = RetryPolicy(max_retries=2, base_delay=0.001, throttle_base_delay=0.001, budget=None)
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', retry_policy=retry_policy, rate_limiter=limiter)
+        record = BlobRecord(blob_data=b'data')
+        record.shard_id = '0'
+
+        # the throttled try is retried and the put succeeds, the limiter still slows the shard down
+        error_codes.append('LimitExceeded')
+        with HTTMock(retried_mock):
+            put_result = dh.put_records('project', 'topic', [record])
+        assert put_result.failed_record_count == 0
+        assert 5 <= limiter.rate('project', 'topic', '0') < 6
+
+        # every try takes a token
+        record.shard_id = '1'
+        error_codes.append('InternalServerError')
+        with HTTMock(retried_mock):
+            dh.put_records('project', 'topic', [record])
+        assert limiter.rate('project', 'topic', '1') == 10
+        assert limiter.reserve([('project', 'topic', '1')]) > 0
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestRateLimit()
+    test.test_token_bucket()
+    test.test_aimd()
+    test.test_invalid_param()
+    test.test_put_records_throttled()
+    test.test_get_records_throttled()
+    test.test_retried_throttled()
@@ -25,7 +25,7 @@ from httmock import HTTMock, urlmatch, response
 from datahub import DataHub
 from datahub.exceptions import ResourceNotFoundException, InvalidOperationException, \
     InvalidParameterException, LimitExceededException
-from datahub.models import RecordSchema, FieldType, BlobRecord, TupleRecord
+from datahub.models import RecordSchema, Field, FieldType, BlobRecord, TupleRecord, LazyRecords
 
 _TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
 _FIXTURE_PATH = os.path.join(_TESTS_PATH, '../fixtures')
@@ -97,6 +97,94 @@ class TestRecord:
         else:
             raise Exception('set record success with none value of field not allowd null')
 
+    def test_build_tuple_record_with_bool_string(self):
+        record_schema = RecordSchema.from_lists(['bool_field'], [FieldType.BOOLEAN])
+        assert TupleRecord(schema=record_schema, values=['true']).values == (True,)
+        assert TupleRecord(schema=record_schema, values=[b'False']).values == (False,)
+        try:
+            TupleRecord(schema=record_schema, values=['yes'])
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('build record success with invalid bool string')
+
+    def test_compiled_validators(self):
+        import decimal
+        from datahub.models import types
+        record_schema = RecordSchema.from_lists(
+            ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field', 'decimal_field'],
+            [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP,
+             FieldType.DECIMAL])
+        values_list = [
+            [1, 'yc1', 10.01, True, 1455869335000000, decimal.Decimal('1.5')],
+            ['2', b'yc2', 10, 'false', '1455869335000000', '2.5'],
+            [True, 3, '10.5', b'TRUE', 1, 3],
+            [None, None, None, None, None, None],
+        ]
+        for values in values_list:
+            expected = tuple(types.validate_value(value, field.type)
+                             for value, field in zip(values, record_schema.field_list))
+            assert TupleRecord(schema=record_schema, values=values).values == expected
+            assert TupleRecord(field_list=record_schema.field_list, values=values).values == expected
+        # validators are built once by the schema
+        assert record_schema.validators is record_schema.validators
+
+        record_schema.add_field(Field('new_field', FieldType.STRING, False))
+        try:
+            TupleRecord(schema=record_schema, values=values_list[0] + [None])
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('build record success with none value of field added not allowed null')
+
+    def test_build_tuple_record_from_trusted(self):
+        record_schema = RecordSchema.from_lists(
+            ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+            [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+        values = [1, 'yc1', 10.01, True, 1455869335000000]
+        record = TupleRecord.from_trusted(record_schema, values)
+        assert record.values == TupleRecord(schema=record_schema, values=values).values
+        assert record.get_value('string_field') == 'yc1'
+        assert record.attributes == {}
+        record.set_value('bigint_field', '2')
+        assert record.get_value(0) == 2
+
+        from datahub.models.types import decode_values
+        assert decode_values(record_schema.decoders, [b'99', b'yc2', b'10.02', b'false', b'1455869335000011']) == \
+            [99, 'yc2', 10.02, False, 1455869335000011]
+        assert decode_values(record_schema.decoders, ['1', None, '-1.5', 'True', '0']) == [1, None, -1.5, True, 0]
+
+        try:
+            TupleRecord.from_trusted(record_schema, values[:2])
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('build trusted record success with values against the schema')
+
+    def test_compiled_schema(self):
+        import decimal
+        record_schema = RecordSchema.from_lists(
+            ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field', 'decimal_field'],
+            [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP,
+             FieldType.DECIMAL])
+        record1 = TupleRecord(schema=record_schema, values=[1, 'yc1', 10.01, True, 1455869335000000,
+                                                            decimal.Decimal('1.5')])
+        record2 = TupleRecord(schema=record_schema, values=[None, None, None, False, None, None])
+        # the name map and the encoders are shared by records of the schema
+        assert record1.name_indices is record2.name_indices is record_schema.compiled.name_indices
+        assert record_schema.compiled is record_schema.compiled
+
+        assert record1.encode_values() == ['1', 'yc1', '10.01', 'true', '1455869335000000', '1.5']
+        assert record1.encode_pb_values() == [b'1', b'yc1', b'10.01', b'true', b'1455869335000000', b'1.5']
+        assert record2.encode_values() == [None, None, None, 'false', None, None]
+        assert record2.encode_pb_values() == [None, None, None, b'false', None, None]
+        assert record_schema.compiled.decode_values(record1.encode_pb_values()) == list(record1.values)
+
+        compiled = record_schema.compiled
+        record_schema.add_field(Field('new_field', FieldType.STRING))
+        assert record_schema.compiled is not compiled
+        assert TupleRecord(schema=record_schema).has_field('new_field')
+
     def test_put_blob_record_success(self):
         project_name = 'put'
         topic_name = 'success'
@@ -402,6 +490,52 @@ class TestRecord:
         assert get_result.records[0].values == (99, 'yc1', 10.01, True, 1455869335000000)
         assert get_result.records[0].attributes == {}
 
+    def test_get_tuple_record_lazily(self):
+        cursor = '20000000000000000000000000fb0021'
+        record_schema = RecordSchema.from_lists(
+            ['bigint_field', 'string_field', 'double_field', 'bool_field', 'time_field'],
+            [FieldType.BIGINT, FieldType.STRING, FieldType.DOUBLE, FieldType.BOOLEAN, FieldType.TIMESTAMP])
+
+        for client, mock in ((dh, datahub_api_mock), (dh2, datahub_pb_api_mock)):
+            with HTTMock(mock):
+                records = client.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10).records
+                get_result = client.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10, lazy=True)
+                projected_result = client.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10,
+                                                            fields=['string_field', 'bigint_field'])
+            lazy_records = get_result.records
+            assert isinstance(lazy_records, LazyRecords)
+            assert len(lazy_records) == len(records)
+            assert [lazy_records.system_time(i) for i in range(len(records))] == \
+                [record.system_time for record in records]
+            assert lazy_records.attributes(-1) == records[-1].attributes
+            assert lazy_records[-1].values == records[-1].values
+            assert lazy_records[-1] is lazy_records[len(records) - 1]
+            assert [(record.sequence, record.values) for record in lazy_records] == \
+                [(record.sequence, record.values) for record in records]
+
+            assert isinstance(projected_result.records, list)
+            assert [field.name for field in projected_result.records[0].field_list] == ['string_field', 'bigint_field']
+            assert [record.values for record in projected_result.records] == \
+                [(record.values[1], record.values[0]) for record in records]
+            assert projected_result.records[0].get_value('bigint_field') == records[0].get_value('bigint_field')
+
+            try:
+                with HTTMock(mock):
+                    client.get_tuple_records('get', 'tuple', '0', record_schema, cursor, 10, fields=['unknown'])
+            except InvalidParameterException:
+                pass
+            else:
+                raise Exception('get records success with unknown field')
+
+    def test_get_blob_record_lazily(self):
+        cursor = '20000000000000000000000000fb0021'
+        for client, mock in ((dh, datahub_api_mock), (dh2, datahub_pb_api_mock)):
+            with HTTMock(mock):
+                records = client.get_blob_records('get', 'blob', '0', cursor, 10).records
+                lazy_records = client.get_blob_records('get', 'blob', '0', cursor, 10, lazy=True).records
+            assert [record.blob_data for record in lazy_records] == [record.blob_data for record in records]
+            assert lazy_records[0].encode_values() == records[0].encode_values()
+
     def test_get_record_with_invalid_cursor(self):
         project_name = 'get'
         topic_name = 'invalid_cursor'
@@ -585,6 +719,10 @@ class TestRecord:
 if __name__ == '__main__':
     test = TestRecord()
     test.test_build_tuple_record_allow_null()
+    test.test_build_tuple_record_with_bool_string()
+    test.test_compiled_validators()
+    test.test_build_tuple_record_from_trusted()
+    test.test_compiled_schema()
     test.test_put_blob_record_success()
     test.test_put_tuple_record_success()
     test.test_put_malformed_tuple_record()
@@ -608,3 +746,5 @@ if __name__ == '__main__':
     test.test_get_blob_record_pb_success()
     test.test_put_tuple_record_pb_success()
     test.test_get_tuple_record_pb_success()
+    test.test_get_tuple_record_lazily()
+    test.test_get_blob_record_lazily()
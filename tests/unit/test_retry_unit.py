@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+
+from httmock import HTTMock, urlmatch, response
+
+from datahub import DataHub
+from datahub.exceptions import LimitExceededException, InvalidParameterException, NoPermissionException
+from datahub.models import BlobRecord
+from datahub.retry import ErrorType, RetryBudget, RetryPolicy, classify
+
+headers = {
+    'Content-Type': 'application/json',
+    'x-datahub-request-id': 0
+}
+
+
+def error_content(error_code):
+    return {'ErrorCode': error_code, 'ErrorMessage': error_code}
+
+
+def fast_policy(max_retries=3, budget=None):
+    return RetryPolicy(max_retries=max_retries, base_delay=0.001, throttle_base_delay=0.001, max_delay=0.01,
+                       budget=budget)
+
+
+class TestRetry:
+
+    def test_classify(self):
+        assert classify(500, 'LimitExceeded') == ErrorType.THROTTLED
+        assert classify(429) == ErrorType.THROTTLED
+        assert classify(500, 'InternalServerError') == ErrorType.SERVER_ERROR
+        assert classify(503) == ErrorType.SERVER_ERROR
+        assert classify(502, '') == ErrorType.SERVER_ERROR
+        assert classify(500, 'NoSuchTopic') == ErrorType.NON_RETRYABLE
+        assert classify(400) == ErrorType.NON_RETRYABLE
+        assert classify(error_code='MalformedRecord') == ErrorType.NON_RETRYABLE
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=0.1, throttle_base_delay=1, max_delay=2)
+        for attempt in range(5):
+            delay = policy.backoff(ErrorType.SERVER_ERROR, attempt)
+            assert 0 <= delay <= min(2, 0.1 * 2 ** attempt)
+            delay = policy.backoff(ErrorType.THROTTLED, attempt)
+            assert 0 <= delay <= min(2, 2 ** attempt)
+
+        assert policy.retry_delay(ErrorType.NON_RETRYABLE, 0) is None
+        assert policy.retry_delay(ErrorType.THROTTLED, 3) is None
+        assert policy.retry_delay(ErrorType.THROTTLED, 2) is not None
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2)
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        for _ in range(10):
+            budget.deposit()
+        assert budget.tokens == 2
+
+        policy = fast_policy(budget=RetryBudget(ratio=0, min_per_second=0))
+        assert policy.retry_delay(ErrorType.THROTTLED, 0) is None
+
+        try:
+            RetryBudget(ratio=-1)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create retry budget success with negative ratio')
+
+    def test_retry_request(self):
+        calls = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def throttled_mock(url, request):
+            calls.append(url.path)
+            if len(calls) < 3:
+                return response(500, error_content('LimitExceeded'), headers, request=request)
+            return response(200, {'ProjectNames': ['project_name_1']}, headers, request=request)
+
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', retry_policy=fast_policy())
+        with HTTMock(throttled_mock):
+            assert dh.list_project().project_names == ['project_name_1']
+        assert len(calls) == 3
+
+        del calls[:]
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', retry_policy=fast_policy(max_retries=1))
+        with HTTMock(throttled_mock):
+            try:
+                dh.list_project()
+            except LimitExceededException:
+                pass
+            else:
+                raise Exception('list project success when retries exhausted')
+        assert len(calls) == 2
+
+        # no retry by default
+        del calls[:]
+        dh = DataHub('access_id', 'access_key', 'http://endpoint')
+        with HTTMock(throttled_mock):
+            try:
+                dh.list_project()
+            except LimitExceededException:
+                pass
+            else:
+                raise Exception('list project success without retry')
+        assert len(calls) == 1
+
+    def test_not_retry_client_error(self):
+        calls = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def no_permission_mock(url, request):
+            calls.append(url.path)
+            return response(403, error_content('NoPermission'), headers, request=request)
+
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', retry_policy=fast_policy())
+        with HTTMock(no_permission_mock):
+            try:
+                dh.list_project()
+            except NoPermissionException:
+                pass
+            else:
+                raise Exception('list project success with no permission')
+        assert len(calls) == 1
+
+    def test_retry_failed_records(self):
+        bodies = []
+
+        @urlmatch(netloc=r'(.*\.)?endpoint')
+        def partial_failed_mock(url, request):
+            records = json.loads(request.body)['Records']
+            bodies.append([record['Data'] for record in records])
+            if len(bodies) == 1:
+                failed = [{'Index': 1, 'ErrorCode': 'LimitExceeded', 'ErrorMessage': 'limit exceeded'},
+                          {'Index': 2, 'ErrorCode': 'MalformedRecord', 'ErrorMessage': 'malformed'},
+                          {'Index': 3, 'ErrorCode': 'InternalServerError', 'ErrorMessage': 'internal error'}]
+            elif len(bodies) == 2:
+                failed = [{'Index': 1, 'ErrorCode': 'InternalServerError', 'ErrorMessage': 'internal error'}]
+            else:
+                failed = []
+            return response(200, {'FailedRecordCount': len(failed), 'FailedRecords': failed}, headers,
+                            request=request)
+
+        dh = DataHub('access_id', 'access_key', 'http://endpoint', retry_policy=fast_policy())
+        records = [BlobRecord(blob_data=('data%d' % i).encode()) for i in range(4)]
+        with HTTMock(partial_failed_mock):
+            put_result = dh.put_records('project', 'topic', records)
+
+        assert len(bodies) == 3
+        assert len(bodies[0]) == 4
+        assert len(bodies[1]) == 2
+        assert len(bodies[2]) == 1
+        assert bodies[2][0] == bodies[0][3]
+        assert put_result.failed_record_count == 1
+        assert put_result.failed_records[0].index == 2
+        assert put_result.failed_records[0].error_code == 'MalformedRecord'
+
+    def test_invalid_policy(self):
+        try:
+            RetryPolicy(max_retries=-1)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create retry policy success with negative max retries')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestRetry()
+    test.test_classify()
+    test.test_backoff()
+    test.test_budget()
+    test.test_retry_request()
+    test.test_not_retry_client_error()
+    test.test_retry_failed_records()
+    test.test_invalid_policy()
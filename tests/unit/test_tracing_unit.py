@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import pytest
+
+from datahub import DataHub
+from datahub.exceptions import ResourceNotFoundException
+from datahub.models import RecordSchema, FieldType, TupleRecord, CursorType, CompressFormat
+from datahub.retry import RetryPolicy
+from datahub.testing import MockDataHubServer
+from datahub.tracing import RequestHook, OpenTelemetryHook
+
+record_schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING])
+
+
+def gen_records(count, shard_id='0'):
+    records = []
+    for i in range(count):
+        record = TupleRecord(schema=record_schema, values=[i, 'value_%d' % i])
+        record.shard_id = shard_id
+        records.append(record)
+    return records
+
+
+class RecordingHook(RequestHook):
+
+    def __init__(self):
+        self.events = []
+        self.contexts = []
+
+    def before_request(self, context):
+        context.headers['x-test-trace'] = 'trace'
+        self.events.append(('before_request', context.api))
+
+    def after_send(self, context):
+        self.events.append(('after_send', context.status_code, context.request_id, context.attempt))
+
+    def after_parse(self, context):
+        self.events.append(('after_parse', context.error))
+        self.contexts.append(context)
+
+
+def phase_names(context):
+    return [name for name, _, _ in context.phases]
+
+
+class TestTracing:
+
+    def test_hooks(self):
+        hook = RecordingHook()
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True, hooks=[hook])
+            dh.create_project('test_project', 'comment')
+            dh.create_tuple_topic('test_project', 'tuple_topic', 1, 7, record_schema, 'tuple')
+            del hook.events[:], hook.contexts[:]
+
+            dh.put_records('test_project', 'tuple_topic', gen_records(10))
+            assert hook.events[0] == ('before_request', 'POST /projects/{project}/topics/{topic}/shards pub')
+            assert hook.events[1][0] == 'after_send'
+            assert hook.events[1][1] == 200
+            assert hook.events[1][2]
+            assert hook.events[2] == ('after_parse', None)
+
+            context = hook.contexts[0]
+            assert phase_names(context) == ['encode', 'compress', 'sign', 'http', 'decompress', 'parse']
+            assert context.headers['x-test-trace'] == 'trace'
+            assert context.start <= context.phases[0][1]
+            assert context.phases[-1][2] <= context.end
+            for (_, _, end), (_, start, _) in zip(context.phases, context.phases[1:]):
+                assert end <= start
+
+            cursor = dh.get_cursor('test_project', 'tuple_topic', '0', CursorType.OLDEST).cursor
+            # requests without encode and parse phases are traced by the rest client
+            assert phase_names(hook.contexts[-1]) == ['compress', 'sign', 'http', 'decompress']
+            result = dh.get_tuple_records('test_project', 'tuple_topic', '0', record_schema, cursor, 10)
+            assert result.record_count == 10
+            assert hook.contexts[-1].api == 'POST /projects/{project}/topics/{topic}/shards/{shard} sub'
+            assert phase_names(hook.contexts[-1]) == ['encode', 'compress', 'sign', 'http', 'decompress', 'parse']
+
+    def test_hooks_retry_and_error(self):
+        hook = RecordingHook()
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, compress_format=CompressFormat.LZ4, hooks=[hook],
+                         retry_policy=RetryPolicy(max_retries=3, base_delay=0.001, budget=None))
+            server.service.inject_error(count=1, api='list_project')
+            dh.list_project()
+            assert [event[0] for event in hook.events] == ['before_request', 'after_send', 'after_send',
+                                                           'after_parse']
+            assert hook.events[1][1] == 500
+            assert hook.events[2][1:] == (200, hook.contexts[0].request_id, 1)
+            assert phase_names(hook.contexts[0]) == ['compress', 'sign', 'http', 'decompress', 'sign', 'http',
+                                                     'decompress']
+            del hook.events[:], hook.contexts[:]
+
+            try:
+                dh.get_project('unexisted')
+            except ResourceNotFoundException:
+                pass
+            else:
+                raise Exception('get unexisted project success!')
+            assert hook.events[1][1] == 404
+            assert isinstance(hook.contexts[0].error, ResourceNotFoundException)
+
+    def test_opentelemetry_hook(self):
+        pytest.importorskip('opentelemetry.sdk')
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        from opentelemetry.trace import StatusCode
+
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        hook = OpenTelemetryHook(provider.get_tracer('test'))
+
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, enable_pb=True, hooks=[hook])
+            dh.create_project('test_project', 'comment')
+            dh.create_tuple_topic('test_project', 'tuple_topic', 1, 7, record_schema, 'tuple')
+            exporter.clear()
+
+            dh.put_records('test_project', 'tuple_topic', gen_records(10))
+            spans = exporter.get_finished_spans()
+            root = spans[-1]
+            assert root.name == 'DataHub POST /projects/{project}/topics/{topic}/shards pub'
+            assert root.attributes['http.status_code'] == 200
+            assert root.attributes['datahub.request_id']
+            children = spans[:-1]
+            assert [span.name for span in children] == ['encode', 'compress', 'sign', 'http', 'decompress', 'parse']
+            for span in children:
+                assert span.parent.span_id == root.context.span_id
+                assert root.start_time <= span.start_time <= span.end_time <= root.end_time
+            exporter.clear()
+
+            try:
+                dh.get_topic('test_project', 'unexisted')
+            except ResourceNotFoundException:
+                pass
+            else:
+                raise Exception('get unexisted topic success!')
+            root = exporter.get_finished_spans()[-1]
+            assert root.status.status_code == StatusCode.ERROR
+            assert root.attributes['http.status_code'] == 404
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestTracing()
+    test.test_hooks()
+    test.test_hooks_retry_and_error()
+    test.test_opentelemetry_hook()
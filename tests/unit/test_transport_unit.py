@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# 'License'); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# 'AS IS' BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import socket
+import threading
+import time
+
+import pytest
+import requests
+from six.moves import BaseHTTPServer, socketserver
+
+from datahub import DataHub
+from datahub.exceptions import DatahubException
+from datahub.transport import Transport, Http2Transport, transport_registry
+from datahub.utils import pb_message_wrap
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import httpx
+except ImportError:
+    h2 = httpx = None
+
+_DELAY = 0.2
+_CONTENT = b'{"ProjectNames": []}'
+
+
+class SlowHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers every request with an empty project list after a delay
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(_DELAY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(_CONTENT)))
+        self.send_header('x-datahub-request-id', '0')
+        self.end_headers()
+        self.wfile.write(_CONTENT)
+
+    def log_message(self, *args):
+        pass
+
+
+class BodyHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers a body of the size in the path, the body of path /short is cut before the content length,
+    bodies of posts are echoed
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections.append(self.client_address)
+
+    def do_GET(self):
+        short = self.path == '/short'
+        body = b'x' * 10 if short else bytes(bytearray(i % 256 for i in range(int(self.path.strip('/')))))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body) * 2 if short else len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if short:
+            self.close_connection = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SlowServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class SlowH2Handler(socketserver.BaseRequestHandler):
+    """
+    HTTP/2 cleartext server answering every stream with an empty project list after a delay,
+    streams of one connection are answered concurrently, request bodies are kept by the server
+    """
+
+    def setup(self):
+        self.server.connections.append(self.client_address)
+        self.bodies = {}
+        self.lock = threading.Lock()
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+
+    def flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            self.request.sendall(data)
+
+    def respond(self, stream_id):
+        time.sleep(_DELAY)
+        with self.lock:
+            self.conn.send_headers(stream_id, [(':status', '200'), ('content-type', 'application/json'),
+                                               ('content-length', str(len(_CONTENT))),
+                                               ('x-datahub-request-id', '0')])
+            self.conn.send_data(stream_id, _CONTENT, end_stream=True)
+            self.flush()
+
+    def handle(self):
+        with self.lock:
+            self.conn.initiate_connection()
+            self.flush()
+        while True:
+            try:
+                data = self.request.recv(65535)
+            except socket.error:
+                break
+            if not data:
+                break
+            with self.lock:
+                events = self.conn.receive_data(data)
+                self.flush()
+            for event in events:
+                if isinstance(event, h2.events.DataReceived):
+                    self.bodies[event.stream_id] = self.bodies.get(event.stream_id, b'') + event.data
+                    with self.lock:
+                        self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        self.flush()
+                if isinstance(event, h2.events.StreamEnded):
+                    self.server.bodies.append(self.bodies.pop(event.stream_id, b''))
+                    thread = threading.Thread(target=self.respond, args=(event.stream_id,))
+                    thread.daemon = True
+                    thread.start()
+
+
+def start_server(handler=SlowHandler):
+    server = SlowServer(('127.0.0.1', 0), handler)
+    server.connections = []
+    server.bodies = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%d' % server.server_address[1]
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+class TestTransport:
+
+    def test_share_transport(self):
+        server, endpoint = start_server()
+        try:
+            dh1 = DataHub('access_id_1', 'access_key_1', endpoint, shared_transport=True)
+            dh2 = DataHub('access_id_2', 'access_key_2', endpoint + '/', shared_transport=True)
+            dh3 = DataHub('access_id_3', 'access_key_3', endpoint)
+            rest_client = dh1._datahub_impl._rest_client
+            assert rest_client.transport is dh2._datahub_impl._rest_client.transport
+            assert rest_client.transport is not dh3._datahub_impl._rest_client.transport
+
+            dh1.list_project()
+            dh2.list_project()
+            stats = dh1.transport_stats()
+            assert stats.clients == 2
+            assert stats.requests == 2
+            assert stats.in_use == 0
+            # the second client reuses the connection kept alive by the first one
+            assert stats.idle == 1
+            assert endpoint in [s.endpoint for s in transport_registry.stats()]
+
+            dh1.close()
+            assert dh2.transport_stats().clients == 1
+            dh2.close()
+            assert endpoint not in [s.endpoint for s in transport_registry.stats()]
+            dh3.close()
+        finally:
+            stop_server(server)
+
+    def test_max_concurrency(self):
+        server, endpoint = start_server()
+        try:
+            dh = DataHub('access_id', 'access_key', endpoint, shared_transport=True, max_concurrency=2,
+                         pool_maxsize=4)
+            errors = []
+
+            def list_project():
+                try:
+                    dh.list_project()
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=list_project) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert not errors
+            stats = dh.transport_stats()
+            assert stats.requests == 4
+            assert stats.max_concurrency == 2
+            assert stats.wait_count == 2
+            assert stats.max_wait_time >= _DELAY / 2
+            assert stats.idle <= 2
+            dh.close()
+        finally:
+            stop_server(server)
+
+    @pytest.mark.skipif(httpx is None, reason='httpx and h2 are required by http2 transport')
+    def test_http2_multiplex(self):
+        server, endpoint = start_server(SlowH2Handler)
+        try:
+            dh = DataHub('access_id', 'access_key', endpoint, http2=True)
+            results = []
+
+            def list_project():
+                results.append(dh.list_project())
+
+            list_project()
+
+            # all requests share the connection and are answered at the same time
+            start = time.time()
+            threads = [threading.Thread(target=list_project) for _ in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - start
+
+            assert len(results) == 17
+            assert all(result.project_names == [] for result in results)
+            assert len(server.connections) == 1
+            assert elapsed < 4 * _DELAY
+            stats = dh.transport_stats()
+            assert stats.requests == 17
+            assert stats.in_use == 0
+            assert stats.idle == 1
+
+            # idle connections are unknown if httpx hides its pool
+            transport = dh._datahub_impl._rest_client.transport
+            pools, transport._pools = transport._pools, {None: object()}
+            assert dh.transport_stats().idle is None
+            transport._pools = pools
+            dh.close()
+        finally:
+            stop_server(server)
+
+    @pytest.mark.skipif(httpx is None, reason='httpx and h2 are required by http2 transport')
+    def test_http2_fallback(self):
+        server, endpoint = start_server()
+        try:
+            dh = DataHub('access_id', 'access_key', endpoint, http2=True)
+            assert dh.list_project().project_names == []
+            assert dh.list_project().project_names == []
+            assert dh.transport_stats().requests == 2
+            dh.close()
+        finally:
+            stop_server(server)
+
+    def test_read_body(self):
+        server, endpoint = start_server(BodyHandler)
+        try:
+            transport = Transport(endpoint)
+            for size in (0, 1, 1024 * 1024 + 1):
+                resp = transport.send(requests.Request('GET', '%s/%d' % (endpoint, size)).prepare())
+                assert resp.status_code == 200
+                assert isinstance(resp.content, bytearray)
+                assert resp.content == bytearray(i % 256 for i in range(size))
+            # the connection is released once the body is read and reused by the next request
+            assert len(server.connections) == 1
+            assert transport.stats().idle == 1
+
+            try:
+                transport.send(requests.Request('GET', endpoint + '/short').prepare())
+            except (requests.exceptions.ChunkedEncodingError, DatahubException):
+                pass
+            else:
+                raise Exception('read incomplete body success')
+            transport.close()
+        finally:
+            stop_server(server)
+
+    def test_send_buffer_body(self):
+        body = pb_message_wrap(b'message')
+        assert isinstance(body, bytearray)
+        server, endpoint = start_server(BodyHandler)
+        try:
+            transport = Transport(endpoint)
+            resp = transport.send(requests.Request('POST', endpoint + '/echo', data=body).prepare())
+            assert resp.content == body
+            transport.close()
+        finally:
+            stop_server(server)
+
+    @pytest.mark.skipif(httpx is None, reason='httpx and h2 are required by http2 transport')
+    def test_http2_send_buffer_body(self):
+        body = pb_message_wrap(b'message')
+        server, endpoint = start_server(SlowH2Handler)
+        try:
+            transport = Http2Transport(endpoint)
+            resp = transport.send(requests.Request('POST', endpoint + '/echo', data=body).prepare())
+            assert resp.status_code == 200
+            assert server.bodies == [bytes(body)]
+            transport.close()
+        finally:
+            stop_server(server)
+
+    def test_invalid_endpoint(self):
+        try:
+            DataHub('access_id', 'access_key', 'invalid_endpoint', shared_transport=True)
+        except DatahubException:
+            pass
+        else:
+            raise Exception('create shared transport success with invalid endpoint')
+
+    def test_stream_deprecated(self):
+        with pytest.warns(DeprecationWarning, match='stream is deprecated'):
+            dh = DataHub('access_id', 'access_key', 'http://127.0.0.1:1', stream=True)
+        dh.close()
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestTransport()
+    test.test_share_transport()
+    test.test_max_concurrency()
+    test.test_http2_multiplex()
+    test.test_http2_fallback()
+    test.test_read_body()
+    test.test_send_buffer_body()
+    test.test_http2_send_buffer_body()
+    test.test_invalid_endpoint()
+    test.test_stream_deprecated()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+
+from datahub import DataHub
+from datahub.auth import AliyunAccount
+from datahub.exceptions import DatahubException, InvalidParameterException
+from datahub.models import RecordSchema, FieldType, TupleRecord, CompressFormat
+from datahub.rest import RestClient
+from datahub.testing import MockDataHubServer
+from datahub.wirelog import WireLogger, REDACTED
+
+record_schema = RecordSchema.from_lists(['bigint_field', 'string_field'], [FieldType.BIGINT, FieldType.STRING])
+
+
+class CapturingHandler(logging.Handler):
+
+    def __init__(self):
+        super(CapturingHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def capture(logger_name, level):
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    handler = CapturingHandler()
+    logger.addHandler(handler)
+    return handler
+
+
+class TestWireLogger:
+
+    def test_preview_and_redact(self):
+        wire_logger = WireLogger(max_body_size=8)
+        assert wire_logger.preview(None) == ''
+        assert wire_logger.preview('{"a": 1}') == '{"a": 1}'
+        assert wire_logger.preview('{"Action": "pub"}') == '{"Action...<17 bytes>'
+        assert wire_logger.preview(b'\x00\x01abc') == '\\x00\\x01abc'
+        assert wire_logger.preview(b'x' * 100, {'Content-Encoding': 'lz4'}) == '<100 bytes lz4>'
+        assert WireLogger(max_body_size=0).preview(b'x' * 100) == '<100 bytes>'
+
+        headers = wire_logger.redact({'authorization': 'DATAHUB id:signature', 'Content-Type': 'application/json'})
+        assert headers == {'authorization': REDACTED, 'Content-Type': 'application/json'}
+
+        try:
+            WireLogger(sample_rate=0)
+        except InvalidParameterException:
+            pass
+        else:
+            raise Exception('create wire logger with zero sample rate success!')
+
+    def test_sample(self):
+        handler = capture('datahub.test.wire.sample', logging.INFO)
+        assert not WireLogger(logger_name='datahub.test.wire.sample').sample()
+
+        wire_logger = WireLogger(sample_rate=3, logger_name='datahub.test.wire.sample', level=logging.INFO)
+        assert [wire_logger.sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+        assert handler.records == []
+
+    def test_log_requests(self):
+        handler = capture('datahub.test.wire.requests', logging.INFO)
+        wire_logger = WireLogger(sample_rate=2, max_body_size=16, level=logging.INFO,
+                                 logger_name='datahub.test.wire.requests')
+        with MockDataHubServer() as server:
+            dh = DataHub('access_id', 'access_key', server.endpoint, compress_format=CompressFormat.LZ4,
+                         wire_logger=wire_logger)
+            dh.create_project('test_project', 'comment')
+            dh.create_tuple_topic('test_project', 'tuple_topic', 1, 7, record_schema, 'tuple')
+            records = [TupleRecord(schema=record_schema, values=[i, 'value_%d' % i * 100]) for i in range(100)]
+            for record in records:
+                record.shard_id = '0'
+            dh.put_records('test_project', 'tuple_topic', records)
+            dh.list_project()
+
+        # 4 tries, the 1st and the 3rd are sampled
+        fields = [record.datahub_wire for record in handler.records]
+        assert [(field['direction'], field['url'].split(server.endpoint)[1]) for field in fields] == [
+            ('request', '/projects/test_project'), ('response', '/projects/test_project'),
+            ('request', '/projects/test_project/topics/tuple_topic/shards'),
+            ('response', '/projects/test_project/topics/tuple_topic/shards')]
+        assert fields[0]['headers']['Authorization'] == REDACTED
+        assert fields[0]['body'] == '{"Comment": "com...<22 bytes>'
+        assert fields[2]['body'] == '<%d bytes lz4>' % fields[2]['body_size']
+        assert fields[3]['status_code'] == 200
+        assert fields[3]['request_id']
+        for record in handler.records:
+            assert 'DATAHUB ' not in record.getMessage()
+
+    def test_decode_error_preview(self):
+        handler = capture('datahub.rest', logging.ERROR)
+        rest_client = RestClient(AliyunAccount('access_id', 'access_key'), 'http://127.0.0.1:1')
+        body = b'<html>' + b'x' * 10000 + b'</html>'
+        try:
+            rest_client._handle_response(502, {'x-datahub-request-id': 'request_id'}, body)
+        except DatahubException as e:
+            preview = e.error_msg.split('content: ')[1]
+            assert preview.endswith('...<%d bytes>' % len(body))
+            assert len(preview) < 1100
+        else:
+            raise Exception('handle non json error response success!')
+        finally:
+            logging.getLogger('datahub.rest').removeHandler(handler)
+        assert handler.records[-1].args == (preview,)
+
+        # the preview is cut by the wire logger of the client
+        rest_client = RestClient(AliyunAccount('access_id', 'access_key'), 'http://127.0.0.1:1',
+                                 wire_logger=WireLogger(max_body_size=16))
+        try:
+            rest_client._handle_response(502, {'x-datahub-request-id': 'request_id'}, body)
+        except DatahubException as e:
+            assert e.error_msg.endswith('content: <html>xxxxxxxxxx...<%d bytes>' % len(body))
+        else:
+            raise Exception('handle non json error response success!')
+
+
+# run directly
+if __name__ == '__main__':
+    test = TestWireLogger()
+    test.test_preview_and_redact()
+    test.test_sample()
+    test.test_log_requests()
+    test.test_decode_error_preview()